@@ -18,46 +18,16 @@ from telegram.ext import (
 )
 
 from .config import config
-from .gpt_handler import gpt
-from .handlers import (
-    start_handler,
-    callback_handler,
-    message_handler,
-    document_handler,
-    voice_handler,
-    iniciar_comparador,
-    procesar_comparacion,
-    iniciar_carga_tracking,
-    iniciar_descarga_tracking,
-    iniciar_envio_camaras_mail,
-    iniciar_informe_sla,
-)
-from .handlers import (
-    agregar_destinatario,
-    eliminar_destinatario,
-    listar_destinatarios,
-    listar_carriers,
-    agregar_carrier,
-    eliminar_carrier,
-    registrar_tarea_programada,
-    listar_tareas,
-    detectar_tarea_mail,
-    iniciar_identificador_tarea,
-    procesar_identificador_tarea,
-    procesar_correos,
-    reenviar_aviso,
-    supermenu,
-    listar_servicios,
-    listar_reclamos,
-    listar_camaras,
-    depurar_duplicados,
-    listar_clientes,
-    listar_carriers_cdb,
-    listar_conversaciones,
-    listar_ingresos,
-    listar_tareas_programadas,
-    listar_tareas_servicio,
-)
+
+# ``start_handler`` se importa de inmediato porque es el primer comando que
+# recibe el bot. El resto se resuelve con ``diferido`` para que pandas,
+# python-docx, geopandas, notion_client u openai se carguen recién cuando se
+# usa el flujo que los necesita.
+from .handlers import diferido
+from .handlers.start import start_handler
+from .metricas import iniciar_servidor, instrumentar
+from .registrador import buffer_conversaciones
+from .trazas import trazar_update
 
 logger = logging.getLogger(__name__)
 
@@ -67,68 +37,119 @@ class SandyBot:
 
     def __init__(self):
         """Inicializa el bot y sus handlers"""
-        self.app = Application.builder().token(config.TELEGRAM_TOKEN).build()
+        self.app = (
+            Application.builder()
+            .token(config.TELEGRAM_TOKEN)
+            .post_init(self._al_iniciar)
+            .post_shutdown(self._al_detener)
+            .build()
+        )
+        self._tareas_fondo: list[asyncio.Task] = []
+        self._servidor_metricas = None
         self._setup_handlers()
 
+    async def _al_iniciar(self, app: Application) -> None:
+        """Arranca las tareas de fondo una vez que el loop está activo."""
+        await buffer_conversaciones.iniciar()
+        from .handlers.notion import bandeja_notion
+
+        await bandeja_notion.iniciar()
+        # Los perfiles de correo se compilan acá y no con el primer aviso
+        from .perfiles_correo import registro
+
+        registro()
+        # Con la retención desactivada el ciclo solo crea las particiones
+        from .retencion import ciclo_retencion
+
+        self._tareas_fondo.append(asyncio.create_task(ciclo_retencion()))
+        if config.METRICAS_PUERTO:
+            try:
+                self._servidor_metricas = iniciar_servidor(
+                    config.METRICAS_PUERTO, config.METRICAS_HOST
+                )
+            except OSError as e:
+                logger.error("No se pudo publicar /metrics: %s", e)
+
+    async def _al_detener(self, app: Application) -> None:
+        """Vacía los buffers pendientes antes de cerrar el bot."""
+        for tarea in self._tareas_fondo:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas_fondo, return_exceptions=True)
+        self._tareas_fondo.clear()
+        await buffer_conversaciones.detener()
+        from .handlers.notion import bandeja_notion
+
+        await bandeja_notion.detener()
+        if self._servidor_metricas is not None:
+            self._servidor_metricas.shutdown()
+            self._servidor_metricas.server_close()
+            self._servidor_metricas = None
+
     def _setup_handlers(self):
         """Configura los handlers del bot"""
         # Comandos básicos
         self.app.add_handler(CommandHandler("start", start_handler))
-        self.app.add_handler(CommandHandler("comparar_fo", iniciar_comparador))
-        self.app.add_handler(CommandHandler("procesar", procesar_comparacion))
-        self.app.add_handler(CommandHandler("cargar_tracking", iniciar_carga_tracking))
+        self.app.add_handler(CommandHandler("comparar_fo", diferido("iniciar_comparador")))
+        self.app.add_handler(CommandHandler("procesar", diferido("procesar_comparacion")))
+        self.app.add_handler(CommandHandler("cargar_tracking", diferido("iniciar_carga_tracking")))
         self.app.add_handler(
-            CommandHandler("descargar_tracking", iniciar_descarga_tracking)
+            CommandHandler("descargar_tracking", diferido("iniciar_descarga_tracking"))
         )
 
         self.app.add_handler(
-            CommandHandler("agregar_destinatario", agregar_destinatario)
+            CommandHandler("agregar_destinatario", diferido("agregar_destinatario"))
         )
         self.app.add_handler(
-            CommandHandler("eliminar_destinatario", eliminar_destinatario)
+            CommandHandler("eliminar_destinatario", diferido("eliminar_destinatario"))
         )
         self.app.add_handler(
-            CommandHandler("listar_destinatarios", listar_destinatarios)
+            CommandHandler("listar_destinatarios", diferido("listar_destinatarios"))
         )
         self.app.add_handler(
-            CommandHandler("registrar_tarea", registrar_tarea_programada)
+            CommandHandler("registrar_tarea", diferido("registrar_tarea_programada"))
         )
-        self.app.add_handler(CommandHandler("listar_carriers", listar_carriers))
-        self.app.add_handler(CommandHandler("agregar_carrier", agregar_carrier))
-        self.app.add_handler(CommandHandler("eliminar_carrier", eliminar_carrier))
-        self.app.add_handler(CommandHandler("listar_tareas", listar_tareas))
-        self.app.add_handler(CommandHandler("detectar_tarea", detectar_tarea_mail))
+        self.app.add_handler(CommandHandler("listar_carriers", diferido("listar_carriers")))
+        self.app.add_handler(CommandHandler("agregar_carrier", diferido("agregar_carrier")))
+        self.app.add_handler(CommandHandler("eliminar_carrier", diferido("eliminar_carrier")))
+        self.app.add_handler(CommandHandler("listar_tareas", diferido("listar_tareas")))
+        self.app.add_handler(CommandHandler("detectar_tarea", diferido("detectar_tarea_mail")))
         self.app.add_handler(
-            CommandHandler("identificar_tarea", iniciar_identificador_tarea)
+            CommandHandler("identificar_tarea", diferido("iniciar_identificador_tarea"))
         )
-        self.app.add_handler(CommandHandler("procesar_correos", procesar_correos))
-        self.app.add_handler(CommandHandler("reenviar_aviso", reenviar_aviso))
-        self.app.add_handler(CommandHandler("informe_sla", iniciar_informe_sla))
-        self.app.add_handler(CommandHandler("Supermenu", supermenu))
-        self.app.add_handler(CommandHandler("CDB_Servicios", listar_servicios))
-        self.app.add_handler(CommandHandler("CDB_Reclamos", listar_reclamos))
-        self.app.add_handler(CommandHandler("CDB_Camaras", listar_camaras))
-        self.app.add_handler(CommandHandler("Depurar_Duplicados", depurar_duplicados))
-        self.app.add_handler(CommandHandler("CDB_Clientes", listar_clientes))
-        self.app.add_handler(CommandHandler("CDB_Carriers", listar_carriers_cdb))
-        self.app.add_handler(CommandHandler("CDB_Conversaciones", listar_conversaciones))
-        self.app.add_handler(CommandHandler("CDB_Ingresos", listar_ingresos))
-        self.app.add_handler(CommandHandler("CDB_Tareas", listar_tareas_programadas))
-        self.app.add_handler(CommandHandler("CDB_TareasServicio", listar_tareas_servicio))
+        self.app.add_handler(CommandHandler("procesar_correos", diferido("procesar_correos")))
+        self.app.add_handler(CommandHandler("reenviar_aviso", diferido("reenviar_aviso")))
+        self.app.add_handler(CommandHandler("informe_sla", diferido("iniciar_informe_sla")))
+        self.app.add_handler(CommandHandler("Supermenu", diferido("supermenu")))
+        self.app.add_handler(CommandHandler("CDB_Servicios", diferido("listar_servicios")))
+        self.app.add_handler(CommandHandler("CDB_Reclamos", diferido("listar_reclamos")))
+        self.app.add_handler(CommandHandler("CDB_Camaras", diferido("listar_camaras")))
+        self.app.add_handler(CommandHandler("Depurar_Duplicados", diferido("depurar_duplicados")))
+        self.app.add_handler(CommandHandler("CDB_Clientes", diferido("listar_clientes")))
+        self.app.add_handler(CommandHandler("CDB_Carriers", diferido("listar_carriers_cdb")))
+        self.app.add_handler(CommandHandler("CDB_Conversaciones", diferido("listar_conversaciones")))
+        self.app.add_handler(CommandHandler("CDB_Ingresos", diferido("listar_ingresos")))
+        self.app.add_handler(CommandHandler("CDB_Tareas", diferido("listar_tareas_programadas")))
+        self.app.add_handler(CommandHandler("CDB_TareasServicio", diferido("listar_tareas_servicio")))
 
         # Callbacks de botones
-        self.app.add_handler(CallbackQueryHandler(callback_handler))
+        self.app.add_handler(CallbackQueryHandler(diferido("callback_handler")))
 
         # Mensajes de texto
         self.app.add_handler(
-            MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler)
+            MessageHandler(filters.TEXT & ~filters.COMMAND, diferido("message_handler"))
         )
 
         # Documentos
-        self.app.add_handler(MessageHandler(filters.Document.ALL, document_handler))
+        self.app.add_handler(MessageHandler(filters.Document.ALL, diferido("document_handler")))
 
         # Mensajes de voz
-        self.app.add_handler(MessageHandler(filters.VOICE, voice_handler))
+        self.app.add_handler(MessageHandler(filters.VOICE, diferido("voice_handler")))
+
+        # Cada update se atiende en su propia traza y cada handler registra
+        # su duración y sus errores en ``/metrics``
+        for grupo in self.app.handlers.values():
+            for handler in grupo:
+                handler.callback = instrumentar(trazar_update(handler.callback))
 
         # Error handler
         self.app.add_error_handler(self._error_handler)
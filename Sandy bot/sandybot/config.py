@@ -64,6 +64,9 @@ class Config:  # pylint: disable=too-many-instance-attributes
         self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
         self.NOTION_TOKEN = os.getenv("NOTION_TOKEN")
         self.NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
+        # Segundos máximos por pedido a Notion y entre reintentos de la bandeja
+        self.NOTION_TIMEOUT = float(os.getenv("NOTION_TIMEOUT", "15"))
+        self.NOTION_REINTENTO_SEG = float(os.getenv("NOTION_REINTENTO_SEG", "60"))
         self.SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
         self.SUPERVISOR_DB_ID = os.getenv("SUPERVISOR_DB_ID")
         # Clave para habilitar el menú de superusuario
@@ -76,6 +79,9 @@ class Config:  # pylint: disable=too-many-instance-attributes
         self.LOG_FILE = self.LOG_DIR / "sandy.log"
         self.ERRORES_FILE = self.LOG_DIR / "errores_ingresos.log"
         self.GPT_CACHE_FILE = self.DATA_DIR / "gpt_cache.json"
+        self.TRANSCRIPCIONES_FILE = self.DATA_DIR / "transcripciones.json"
+        # Bandeja de páginas de Notion aún no creadas
+        self.NOTION_PENDIENTES_FILE = self.DATA_DIR / "notion_pendientes.json"
 
         # 5) Plantillas
         self.PLANTILLA_PATH = os.getenv(
@@ -97,11 +103,24 @@ class Config:  # pylint: disable=too-many-instance-attributes
 
         # 7) GPT
         self.GPT_MODEL = os.getenv("GPT_MODEL", "gpt-4")
+        # Modelos por tipo de tarea (ver ``gpt_handler.perfiles_modelo``)
+        self.GPT_MODEL_CLASIFICACION = os.getenv("GPT_MODEL_CLASIFICACION", "gpt-4o-mini")
+        self.GPT_MODEL_EXTRACCION = os.getenv("GPT_MODEL_EXTRACCION", self.GPT_MODEL)
         self.GPT_TIMEOUT = 30
+        self.GPT_TIMEOUT_CLASIFICACION = 10
         self.GPT_MAX_RETRIES = 3
         self.GPT_CACHE_TIMEOUT = 3600  # 1 hora
         # Cada cuántas consultas se persiste la cache de GPT
         self.GPT_CACHE_SAVE_INTERVAL = int(os.getenv("GPT_CACHE_SAVE_INTERVAL", "5"))
+        # Segundos mínimos entre ediciones del mensaje al transmitir una respuesta
+        self.GPT_STREAM_INTERVALO = float(os.getenv("GPT_STREAM_INTERVALO", "1.0"))
+        # Límites compartidos por todas las consultas a OpenAI (0 = sin límite)
+        self.GPT_LIMITE_RPM = int(os.getenv("GPT_LIMITE_RPM", "500"))
+        self.GPT_LIMITE_TPM = int(os.getenv("GPT_LIMITE_TPM", "30000"))
+        self.GPT_MAX_SIMULTANEAS = int(os.getenv("GPT_MAX_SIMULTANEAS", "8"))
+        # Tamaño de los fragmentos y consultas simultáneas al analizar incidencias
+        self.INCIDENCIAS_TOKENS_FRAGMENTO = int(os.getenv("INCIDENCIAS_TOKENS_FRAGMENTO", "3000"))
+        self.INCIDENCIAS_CONCURRENCIA = int(os.getenv("INCIDENCIAS_CONCURRENCIA", "4"))
 
         # 8) Conexión BD
         self.DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -110,6 +129,21 @@ class Config:  # pylint: disable=too-many-instance-attributes
         self.DB_USER = os.getenv("DB_USER")
         self.DB_PASSWORD = os.getenv("DB_PASSWORD")
 
+        # Registro de conversaciones en lote: se vuelca a la base cada
+        # ``REGISTRO_LOTE_FILAS`` filas o cada ``REGISTRO_LOTE_MS`` milisegundos
+        self.REGISTRO_LOTE_FILAS = int(os.getenv("REGISTRO_LOTE_FILAS", "50"))
+        self.REGISTRO_LOTE_MS = int(os.getenv("REGISTRO_LOTE_MS", "500"))
+
+        # Retención de conversaciones: los meses anteriores a este plazo se
+        # archivan comprimidos en ``CONVERSACIONES_ARCHIVO_DIR``. Desactivada
+        # por defecto (0): borrar historial requiere que el operador la active
+        self.CONVERSACIONES_RETENCION_DIAS = int(
+            os.getenv("CONVERSACIONES_RETENCION_DIAS", "0")
+        )
+        self.CONVERSACIONES_ARCHIVO_DIR = Path(
+            os.getenv("CONVERSACIONES_ARCHIVO_DIR", self.DATA_DIR / "archivo")
+        )
+
         # 9) SMTP / Email
         self.SMTP_HOST = os.getenv("SMTP_HOST", os.getenv("EMAIL_HOST", "smtp.gmail.com"))
         self.SMTP_PORT = int(os.getenv("SMTP_PORT", os.getenv("EMAIL_PORT", "465")))
@@ -124,6 +158,40 @@ class Config:  # pylint: disable=too-many-instance-attributes
         self.EMAIL_USER = self.SMTP_USER
         self.EMAIL_PASSWORD = self.SMTP_PASSWORD
 
+        # Lectura de correos .msg en procesos aparte: cantidad de procesos y
+        # segundos máximos por archivo
+        self.CORREOS_PROCESOS = int(
+            os.getenv("CORREOS_PROCESOS", str(min(4, os.cpu_count() or 1)))
+        )
+        self.CORREOS_TIMEOUT = float(os.getenv("CORREOS_TIMEOUT", "30"))
+        # Perfiles de extracción por carrier que amplían los incluidos
+        self.PERFILES_CORREO_PATH = Path(
+            os.getenv("PERFILES_CORREO_PATH", str(self.DATA_DIR / "perfiles_correo.yaml"))
+        )
+
+        # Transcripción de audios: motor ("openai" o "local" con faster-whisper),
+        # modelo local, idioma y cantidad de audios a la vez
+        self.TRANSCRIPCION_BACKEND = os.getenv("TRANSCRIPCION_BACKEND", "openai").lower()
+        self.WHISPER_LOCAL_MODELO = os.getenv("WHISPER_LOCAL_MODELO", "small")
+        self.TRANSCRIPCION_IDIOMA = os.getenv("TRANSCRIPCION_IDIOMA", "es") or None
+        self.TRANSCRIPCION_CONCURRENCIA = int(os.getenv("TRANSCRIPCION_CONCURRENCIA", "2"))
+
+        # Métricas en formato Prometheus: ``http://METRICAS_HOST:METRICAS_PUERTO/metrics``
+        # (puerto 0 = desactivado)
+        self.METRICAS_HOST = os.getenv("METRICAS_HOST", "127.0.0.1")
+        self.METRICAS_PUERTO = int(os.getenv("METRICAS_PUERTO", "9108"))
+
+        # Trazas por update: exportador ("nulo" u "otel") y segundos a partir de
+        # los cuales el árbol de tramos se vuelca en ``TRAZAS_LENTAS_FILE`` (0 = nunca)
+        self.TRAZAS_EXPORTADOR = os.getenv("TRAZAS_EXPORTADOR", "nulo").lower()
+        self.TRAZAS_UMBRAL_SEG = float(os.getenv("TRAZAS_UMBRAL_SEG", "10"))
+        self.TRAZAS_LENTAS_FILE = self.LOG_DIR / "trazas_lentas.log"
+
+        # Logs en JSON (una línea por registro) y muestreo de ``DEBUG`` repetidos:
+        # se conserva uno de cada ``LOG_MUESTREO_DEBUG`` (1 = todos)
+        self.LOG_JSON = os.getenv("LOG_JSON", "false").lower() in {"1", "true", "yes"}
+        self.LOG_MUESTREO_DEBUG = int(os.getenv("LOG_MUESTREO_DEBUG", "1"))
+
         # Validación final
         self._validate_env()
 
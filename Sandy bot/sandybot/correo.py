@@ -6,10 +6,12 @@ import smtplib
 from email.message import EmailMessage
 import logging
 from .config import config
+from .metricas import medir_smtp
 
 logger = logging.getLogger(__name__)
 
 
+@medir_smtp
 def enviar_email(destinatarios, asunto, cuerpo, archivo_adjunto, nombre_adjunto=None):
     """Envía un correo con un adjunto.
 
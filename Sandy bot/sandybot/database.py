@@ -1,13 +1,16 @@
 # Nombre de archivo: database.py
 # Ubicación de archivo: Sandy bot/sandybot/database.py
 # User-provided custom instructions
+import csv
 import json
 import logging
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 
-import pandas as pd
 from sqlalchemy import (  # (+) Necesario para definir y recrear índices de forma explícita; (+) Mantiene la restricción única de tareas_servicio
     JSON,
+    BigInteger,
     Column,
     DateTime,
     ForeignKey,
@@ -15,16 +18,23 @@ from sqlalchemy import (  # (+) Necesario para definir y recrear índices de for
     Integer,
     String,
     UniqueConstraint,
+    bindparam,
     create_engine,
+    event,
     func,
     inspect,
+    select,
     text,
+    tuple_,
 )
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from .config import config
+from .metricas import registro
+from .trazas import empezar_span
 from .utils import normalizar_camara
 
 logger = logging.getLogger(__name__)
@@ -47,6 +57,42 @@ if engine.dialect.name == "postgresql":
 else:  # pragma: no cover - para SQLite en tests
     JSONType = JSON
 
+# Duración de cada sentencia según su tipo (SELECT, INSERT...), para todos
+# los engines (también los de SQLite que usan las pruebas)
+DB_SEGUNDOS = registro.histograma(
+    "sandy_db_consulta_segundos", "Duración de las sentencias SQL", ("operacion",)
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _inicio_sentencia(conn, cursor, sentencia, parametros, contexto, executemany) -> None:
+    operacion = sentencia.lstrip().split(None, 1)[0].upper() if sentencia.strip() else "?"
+    conn.info.setdefault("sentencias", []).append(
+        (operacion, time.perf_counter(), empezar_span("db", operacion=operacion))
+    )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _fin_sentencia(conn, cursor, sentencia, parametros, contexto, executemany) -> None:
+    pendientes = conn.info.get("sentencias")
+    if not pendientes:
+        return
+    operacion, inicio, tramo = pendientes.pop()
+    DB_SEGUNDOS.observar(time.perf_counter() - inicio, operacion=operacion)
+    if tramo is not None:
+        tramo.terminar()
+
+
+@event.listens_for(Engine, "handle_error")
+def _error_sentencia(contexto) -> None:
+    conn = contexto.connection
+    pendientes = conn.info.get("sentencias") if conn is not None else None
+    if pendientes:
+        _, _, tramo = pendientes.pop()
+        if tramo is not None:
+            tramo.terminar(contexto.original_exception)
+
+
 # Crear sessionmaker
 # ``expire_on_commit=False`` evita que los objetos devueltos pierdan sus datos
 # al cerrarse la sesión, algo útil cuando las funciones retornan instancias.
@@ -230,182 +276,230 @@ class ServicioPendiente(Base):
     id_carrier = Column(String, index=True)
 
 
-def eliminar_duplicados_tareas(conn) -> None:
+class HuellaCorreo(Base):
+    """Huellas de avisos ya procesados y la tarea a la que corresponden.
+
+    ``tipo`` es ``"archivo"`` (SHA-256 del adjunto tal como llegó) o
+    ``"texto"`` (SHA-256 del cuerpo normalizado). Las de texto guardan además
+    el SimHash y la firma de los números del aviso para detectar reenvíos con
+    cambios menores. Ver :mod:`sandybot.huellas`.
+    """
+
+    __tablename__ = "huellas_correos"
+
+    id = Column(Integer, primary_key=True)
+    clave = Column(String(64), unique=True, nullable=False)
+    tipo = Column(String(10), nullable=False)
+    simhash = Column(BigInteger, nullable=True)
+    firma = Column(String(16), nullable=True)
+    tarea_id = Column(Integer, ForeignKey("tareas_programadas.id"), index=True)
+    fecha = Column(DateTime, default=datetime.utcnow)
+
+
+class ExtraccionCorreo(Base):
+    """Datos de tarea que GPT extrajo de un correo, por texto limpio.
+
+    ``version`` identifica el prompt, el esquema y el modelo que produjeron
+    el resultado; si alguno cambia las filas viejas dejan de usarse.
+    """
+
+    __tablename__ = "extracciones_correo"
+
+    id = Column(Integer, primary_key=True)
+    clave = Column(String(64), unique=True, nullable=False)
+    version = Column(String(16), nullable=False)
+    datos = Column(JSONType)
+    fecha = Column(DateTime, default=datetime.utcnow)
+
+
+class VersionEsquema(Base):
+    """Migraciones aplicadas sobre la base (una fila por versión)."""
+
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    descripcion = Column(String)
+    aplicada = Column(DateTime, default=datetime.utcnow)
+
+
+# Subconsulta que asocia cada tarea duplicada con la de menor ``id`` de su
+# par ``carrier_id``/``id_interno``. Se agrupa una vez y se une por clave, así
+# el costo es lineal aunque un par tenga muchas copias. Las filas con valores
+# nulos no se consideran repetidas porque la restricción única tampoco las
+# compara.
+_MAPA_TAREAS_DUPLICADAS = """
+    SELECT t.id AS dup_id, g.keep_id
+    FROM tareas_programadas t
+    JOIN (
+        SELECT carrier_id, id_interno, MIN(id) AS keep_id
+        FROM tareas_programadas
+        WHERE carrier_id IS NOT NULL AND id_interno IS NOT NULL
+        GROUP BY carrier_id, id_interno
+        HAVING COUNT(*) > 1
+    ) g
+      ON t.carrier_id = g.carrier_id
+     AND t.id_interno = g.id_interno
+     AND t.id <> g.keep_id
+"""
+
+
+def eliminar_duplicados_tareas(conn) -> int:
     """Borra tareas con ``carrier_id`` e ``id_interno`` repetidos.
 
     Solo se conserva la fila con menor ``id`` de cada par duplicado para
-    permitir la creación de la restricción única.
+    permitir la creación de la restricción única. Los servicios y pendientes
+    de las tareas borradas pasan a la conservada. Todo se resuelve con unas
+    pocas sentencias sobre conjuntos, sin recorrer los duplicados en Python.
+    Devuelve la cantidad de tareas eliminadas.
     """
 
-    filas = conn.execute(
-        text(
-            """
-            SELECT carrier_id, id_interno, MIN(id) AS keep_id
-            FROM tareas_programadas
-            WHERE carrier_id IS NOT NULL AND id_interno IS NOT NULL
-            GROUP BY carrier_id, id_interno
-            HAVING COUNT(*) > 1
-            """
-        )
-    ).fetchall()
+    tablas = set(inspect(conn).get_table_names())
 
-    inspector = inspect(conn)
-    tablas = set(inspector.get_table_names())
-
-    for carrier_id, id_interno, keep_id in filas:
-        dup_ids = conn.execute(
+    if "tareas_servicio" in tablas:
+        # Se copian los vínculos que la tarea conservada todavía no tiene y
+        # luego se borran los originales, así no se viola ``uix_tarea_servicio``.
+        conn.execute(
             text(
-                "SELECT id FROM tareas_programadas "
-                "WHERE carrier_id = :c AND id_interno = :i AND id <> :k"
-            ),
-            {"c": carrier_id, "i": id_interno, "k": keep_id},
-        ).fetchall()
-
-        for (dup_id,) in dup_ids:
-            if "tareas_servicio" in tablas:
-                conn.execute(
-                    text(
-                        "UPDATE tareas_servicio SET tarea_id = :k WHERE tarea_id = :d"
-                    ),
-                    {"k": keep_id, "d": dup_id},
-                )
-            if "servicios_pendientes" in tablas:
-                conn.execute(
-                    text(
-                        "UPDATE servicios_pendientes SET tarea_id = :k WHERE tarea_id = :d"
-                    ),
-                    {"k": keep_id, "d": dup_id},
-                )
-            conn.execute(
-                text("DELETE FROM tareas_programadas WHERE id = :d"),
-                {"d": dup_id},
+                "INSERT INTO tareas_servicio (tarea_id, servicio_id) "
+                "SELECT DISTINCT m.keep_id, ts.servicio_id "
+                f"FROM tareas_servicio ts JOIN ({_MAPA_TAREAS_DUPLICADAS}) m "
+                "ON ts.tarea_id = m.dup_id "
+                "WHERE NOT EXISTS (SELECT 1 FROM tareas_servicio x "
+                "WHERE x.tarea_id = m.keep_id AND x.servicio_id = ts.servicio_id)"
             )
+        )
+        conn.execute(
+            text(
+                "DELETE FROM tareas_servicio WHERE tarea_id IN "
+                f"(SELECT dup_id FROM ({_MAPA_TAREAS_DUPLICADAS}) m)"
+            )
+        )
+    if "servicios_pendientes" in tablas:
+        conn.execute(
+            text(
+                "UPDATE servicios_pendientes SET tarea_id = m.keep_id "
+                f"FROM ({_MAPA_TAREAS_DUPLICADAS}) m "
+                "WHERE servicios_pendientes.tarea_id = m.dup_id"
+            )
+        )
+    resultado = conn.execute(
+        text(
+            "DELETE FROM tareas_programadas WHERE id IN "
+            f"(SELECT dup_id FROM ({_MAPA_TAREAS_DUPLICADAS}) m)"
+        )
+    )
+    return resultado.rowcount or 0
 
 
-def ensure_servicio_columns() -> None:
+def ensure_servicio_columns(conn=None) -> None:
     """Comprueba que la tabla ``servicios`` posea todas las columnas del modelo.
 
     Si falta alguna, la agrega mediante ``ALTER TABLE`` para mantener la base
-    sincronizada con la definición de :class:`Servicio`.
+    sincronizada con la definición de :class:`Servicio`. Es la migración 1:
+    pone al día las bases creadas antes de existir ``schema_version``. Si no
+    se indica ``conn`` todo se ejecuta en una única transacción.
     """
-    inspector = inspect(engine)
+    if conn is None:
+        with engine.begin() as conn:
+            ensure_servicio_columns(conn)
+        return
+
+    inspector = inspect(conn)
+    dialecto = conn.dialect
 
     # Crear la tabla de clientes y carriers si no existen
     if "clientes" not in inspector.get_table_names():
-        Cliente.__table__.create(bind=engine)
+        Cliente.__table__.create(bind=conn)
     else:
         cols_cli = {c["name"] for c in inspector.get_columns("clientes")}
         if "destinatarios_carrier" not in cols_cli:
             tipo = Cliente.__table__.columns["destinatarios_carrier"].type.compile(
-                engine.dialect
+                dialecto
+            )
+            conn.execute(
+                text(f"ALTER TABLE clientes ADD COLUMN destinatarios_carrier {tipo}")
             )
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        f"ALTER TABLE clientes ADD COLUMN destinatarios_carrier {tipo}"
-                    )
-                )
     if "carriers" not in inspector.get_table_names():
-        Carrier.__table__.create(bind=engine)
+        Carrier.__table__.create(bind=conn)
 
     actuales = {col["name"] for col in inspector.get_columns("servicios")}
     definidas = {c.name for c in Servicio.__table__.columns}
 
     faltantes = definidas - actuales
     for columna in faltantes:
-        tipo = Servicio.__table__.columns[columna].type.compile(engine.dialect)
+        tipo = Servicio.__table__.columns[columna].type.compile(dialecto)
         extra = ""
         if columna == "cliente_id":
             extra = " REFERENCES clientes(id)"
         elif columna == "carrier_id":
             extra = " REFERENCES carriers(id)"
-        with engine.begin() as conn:
-            conn.execute(
-                text(f"ALTER TABLE servicios ADD COLUMN {columna} {tipo}{extra}")
-            )
+        conn.execute(text(f"ALTER TABLE servicios ADD COLUMN {columna} {tipo}{extra}"))
 
     indices = {idx["name"] for idx in inspector.get_indexes("servicios")}
     if "ix_servicios_id_carrier" not in indices:
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "CREATE INDEX ix_servicios_id_carrier" " ON servicios (id_carrier)"
-                )
-            )
+        conn.execute(
+            text("CREATE INDEX ix_servicios_id_carrier" " ON servicios (id_carrier)")
+        )
     if "ix_servicios_carrier_id" not in indices:
-        with engine.begin() as conn:
-            conn.execute(
-                text("CREATE INDEX ix_servicios_carrier_id ON servicios (carrier_id)")
-            )
+        conn.execute(
+            text("CREATE INDEX ix_servicios_carrier_id ON servicios (carrier_id)")
+        )
     if "ix_servicios_cliente_id" not in indices:
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "CREATE INDEX ix_servicios_cliente_id" " ON servicios (cliente_id)"
-                )
-            )
+        conn.execute(
+            text("CREATE INDEX ix_servicios_cliente_id" " ON servicios (cliente_id)")
+        )
 
     indices_tareas = {
         idx["name"] for idx in inspector.get_indexes("tareas_programadas")
     }
     if "ix_tareas_programadas_fecha_inicio_fecha_fin" not in indices_tareas:
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "CREATE INDEX ix_tareas_programadas_fecha_inicio_fecha_fin "
-                    "ON tareas_programadas (fecha_inicio, fecha_fin)"
-                )
+        conn.execute(
+            text(
+                "CREATE INDEX ix_tareas_programadas_fecha_inicio_fecha_fin "
+                "ON tareas_programadas (fecha_inicio, fecha_fin)"
             )
+        )
 
     actuales_tarea = {c["name"] for c in inspector.get_columns("tareas_programadas")}
     if "carrier_id" not in actuales_tarea:
-        tipo = TareaProgramada.__table__.columns["carrier_id"].type.compile(
-            engine.dialect
-        )
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    f"ALTER TABLE tareas_programadas ADD COLUMN carrier_id {tipo} REFERENCES carriers(id)"
-                )
+        tipo = TareaProgramada.__table__.columns["carrier_id"].type.compile(dialecto)
+        conn.execute(
+            text(
+                f"ALTER TABLE tareas_programadas ADD COLUMN carrier_id {tipo} REFERENCES carriers(id)"
             )
+        )
     if "ix_tareas_programadas_carrier_id" not in indices_tareas:
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "CREATE INDEX ix_tareas_programadas_carrier_id ON tareas_programadas (carrier_id)"
-                )
+        conn.execute(
+            text(
+                "CREATE INDEX ix_tareas_programadas_carrier_id ON tareas_programadas (carrier_id)"
             )
+        )
 
     if "id_interno" not in actuales_tarea:
-        tipo = TareaProgramada.__table__.columns["id_interno"].type.compile(
-            engine.dialect
+        tipo = TareaProgramada.__table__.columns["id_interno"].type.compile(dialecto)
+        conn.execute(
+            text(f"ALTER TABLE tareas_programadas ADD COLUMN id_interno {tipo}")
         )
-        with engine.begin() as conn:
-            conn.execute(
-                text(f"ALTER TABLE tareas_programadas ADD COLUMN id_interno {tipo}")
-            )
     if "ix_tareas_programadas_id_interno" not in indices_tareas:
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "CREATE INDEX ix_tareas_programadas_id_interno ON tareas_programadas (id_interno)"
-                )
+        conn.execute(
+            text(
+                "CREATE INDEX ix_tareas_programadas_id_interno ON tareas_programadas (id_interno)"
             )
+        )
 
     uniques_tarea = {
         u["name"] for u in inspector.get_unique_constraints("tareas_programadas")
     }
     if "uix_carrier_interno" not in uniques_tarea:
-        with engine.begin() as conn:
-            eliminar_duplicados_tareas(conn)
-            conn.execute(
-                text(
-                    "ALTER TABLE tareas_programadas ADD CONSTRAINT uix_carrier_interno UNIQUE (carrier_id, id_interno)"
-                )
+        eliminar_duplicados_tareas(conn)
+        conn.execute(
+            text(
+                "ALTER TABLE tareas_programadas ADD CONSTRAINT uix_carrier_interno UNIQUE (carrier_id, id_interno)"
             )
+        )
 
     if "servicios_pendientes" not in inspector.get_table_names():
-        ServicioPendiente.__table__.create(bind=engine)
+        ServicioPendiente.__table__.create(bind=conn)
 
     # 2️⃣ Restricción única (tarea_id, servicio_id) en tareas_servicio
     if "tareas_servicio" in inspector.get_table_names():
@@ -413,82 +507,275 @@ def ensure_servicio_columns() -> None:
             u["name"] for u in inspector.get_unique_constraints("tareas_servicio")
         }
         if "uix_tarea_servicio" not in uniques:
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        "ALTER TABLE tareas_servicio "
-                        "ADD CONSTRAINT uix_tarea_servicio "
-                        "UNIQUE (tarea_id, servicio_id)"
-                    )
+            conn.execute(
+                text(
+                    "ALTER TABLE tareas_servicio "
+                    "ADD CONSTRAINT uix_tarea_servicio "
+                    "UNIQUE (tarea_id, servicio_id)"
                 )
+            )
 
     # 3️⃣ Restricciones únicas de cámaras y reclamos
     if "camaras" in inspector.get_table_names():
         uniques = {u["name"] for u in inspector.get_unique_constraints("camaras")}
         if "uix_camara_unica" not in uniques:
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        "ALTER TABLE camaras "
-                        "ADD CONSTRAINT uix_camara_unica "
-                        "UNIQUE (id_servicio, nombre)"
-                    )
+            conn.execute(
+                text(
+                    "ALTER TABLE camaras "
+                    "ADD CONSTRAINT uix_camara_unica "
+                    "UNIQUE (id_servicio, nombre)"
                 )
+            )
     if "reclamos" in inspector.get_table_names():
         uniques = {u["name"] for u in inspector.get_unique_constraints("reclamos")}
         if "uix_reclamo_unico" not in uniques:
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        "ALTER TABLE reclamos "
-                        "ADD CONSTRAINT uix_reclamo_unico "
-                        "UNIQUE (servicio_id, numero)"
-                    )
+            conn.execute(
+                text(
+                    "ALTER TABLE reclamos "
+                    "ADD CONSTRAINT uix_reclamo_unico "
+                    "UNIQUE (servicio_id, numero)"
                 )
+            )
 
 
-def init_db():
-    """Inicializa la base de datos y crea las tablas si no existen."""
-    # ``bind=engine`` deja explícito que las tablas se crearán usando
-    # la conexión configurada en ``engine``. Esto permite que el bot
-    # genere la estructura necesaria de forma automática la primera vez.
-    # Se incluyen las tablas recientes como ``reclamos``.
-    Base.metadata.create_all(bind=engine)
-    ensure_servicio_columns()
-    if engine.dialect.name == "postgresql":
-        with engine.begin() as conn:
-            try:
-                conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
-                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
-            except SQLAlchemyError as e:
-                logger.warning(
-                    "No se pudieron crear las extensiones unaccent/pg_trgm: %s",
-                    e,
-                )
+def _crear_busqueda_camaras(conn) -> None:
+    """Extensiones e índice trigram para buscar cámaras sin acentos.
 
-            try:
-                conn.execute(
-                    text(
-                        "CREATE OR REPLACE FUNCTION immutable_unaccent(text)\n"
-                        # Se invoca "public.unaccent" porque el esquema
-                        # "public" puede no estar en el ``search_path`` al
-                        # crear la función.
-                        "RETURNS text AS $$ SELECT public.unaccent($1) $$\n"
-                        "LANGUAGE SQL IMMUTABLE"
-                    )
+    Solo aplica a PostgreSQL. Cada paso usa un ``SAVEPOINT`` para que la
+    falta de permisos no aborte el resto de la migración.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except SQLAlchemyError as e:
+        logger.warning(
+            "No se pudieron crear las extensiones unaccent/pg_trgm: %s",
+            e,
+        )
+
+    try:
+        with conn.begin_nested():
+            conn.execute(
+                text(
+                    "CREATE OR REPLACE FUNCTION immutable_unaccent(text)\n"
+                    # Se invoca "public.unaccent" porque el esquema
+                    # "public" puede no estar en el ``search_path`` al
+                    # crear la función.
+                    "RETURNS text AS $$ SELECT public.unaccent($1) $$\n"
+                    "LANGUAGE SQL IMMUTABLE"
+                )
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_servicios_camaras_unaccent "
+                    "ON servicios USING gin ("
+                    "immutable_unaccent(lower(camaras::text)) gin_trgm_ops)"
                 )
+            )
+    except SQLAlchemyError as e:
+        logger.warning(
+            "No se pudo crear el índice para las cámaras: %s",
+            e,
+        )
+
+
+def _inicio_mes(fecha: datetime) -> datetime:
+    return datetime(fecha.year, fecha.month, 1)
+
+
+def _mes_siguiente(fecha: datetime) -> datetime:
+    return datetime(fecha.year + fecha.month // 12, fecha.month % 12 + 1, 1)
+
+
+def conversaciones_particionada(conn) -> bool:
+    """Indica si ``conversaciones`` es una tabla particionada de PostgreSQL."""
+    if conn.dialect.name != "postgresql":
+        return False
+    return (
+        conn.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = 'conversaciones'")
+        ).scalar()
+        == "p"
+    )
+
+
+def asegurar_particiones_conversaciones(conn, desde: datetime, hasta: datetime) -> list[str]:
+    """Crea las particiones mensuales de ``conversaciones`` entre dos fechas.
+
+    Cada mes queda en ``conversaciones_pAAAA_MM``. Si la partición por defecto
+    ya tiene filas de ese mes PostgreSQL rechaza la creación; se registra un
+    aviso y se continúa con el resto. Devuelve las particiones creadas.
+    """
+    creadas = []
+    mes = _inicio_mes(desde)
+    while mes <= hasta:
+        fin = _mes_siguiente(mes)
+        nombre = f"conversaciones_p{mes:%Y_%m}"
+        try:
+            with conn.begin_nested():
                 conn.execute(
                     text(
-                        "CREATE INDEX IF NOT EXISTS ix_servicios_camaras_unaccent "
-                        "ON servicios USING gin ("
-                        "immutable_unaccent(lower(camaras::text)) gin_trgm_ops)"
+                        f"CREATE TABLE IF NOT EXISTS {nombre} PARTITION OF conversaciones "
+                        f"FOR VALUES FROM ('{mes:%Y-%m-%d}') TO ('{fin:%Y-%m-%d}')"
                     )
                 )
-            except SQLAlchemyError as e:
-                logger.warning(
-                    "No se pudo crear el índice para las cámaras: %s",
-                    e,
+            creadas.append(nombre)
+        except SQLAlchemyError as e:
+            logger.warning("No se pudo crear la partición %s: %s", nombre, e)
+        mes = fin
+    return creadas
+
+
+def _particionar_conversaciones(conn) -> None:
+    """Convierte ``conversaciones`` en una tabla particionada por mes (PostgreSQL).
+
+    Se renombra la tabla actual, se crea la particionada con la misma
+    secuencia de IDs, se copian las filas y se elimina la original. La clave
+    primaria pasa a ser ``(id, fecha)`` porque PostgreSQL exige incluir la
+    columna de partición. En otros motores no hace nada: la retención se
+    resuelve archivando y borrando filas (ver :mod:`sandybot.retencion`).
+    """
+    if conn.dialect.name != "postgresql" or conversaciones_particionada(conn):
+        return
+
+    secuencia = conn.execute(
+        text("SELECT pg_get_serial_sequence('conversaciones', 'id')")
+    ).scalar()
+    desde = conn.execute(text("SELECT MIN(fecha) FROM conversaciones")).scalar()
+    conn.execute(text("ALTER TABLE conversaciones RENAME TO conversaciones_sin_particionar"))
+    conn.execute(text(f"ALTER SEQUENCE {secuencia} OWNED BY NONE"))
+    conn.execute(
+        text(
+            "CREATE TABLE conversaciones ("
+            f"id INTEGER NOT NULL DEFAULT nextval('{secuencia}'), "
+            "user_id VARCHAR, mensaje VARCHAR, respuesta VARCHAR, modo VARCHAR, "
+            "fecha TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'), "
+            "PRIMARY KEY (id, fecha)"
+            ") PARTITION BY RANGE (fecha)"
+        )
+    )
+    conn.execute(
+        text("CREATE TABLE conversaciones_default PARTITION OF conversaciones DEFAULT")
+    )
+    ahora = datetime.utcnow()
+    asegurar_particiones_conversaciones(conn, desde or ahora, _mes_siguiente(_mes_siguiente(ahora)))
+    conn.execute(
+        text(
+            "INSERT INTO conversaciones (id, user_id, mensaje, respuesta, modo, fecha) "
+            "SELECT id, user_id, mensaje, respuesta, modo, "
+            "COALESCE(fecha, now() AT TIME ZONE 'utc') FROM conversaciones_sin_particionar"
+        )
+    )
+    conn.execute(text("DROP TABLE conversaciones_sin_particionar"))
+    conn.execute(text(f"ALTER SEQUENCE {secuencia} OWNED BY conversaciones.id"))
+    conn.execute(text("CREATE INDEX ix_conversaciones_user_id ON conversaciones (user_id)"))
+    conn.execute(text("CREATE INDEX ix_conversaciones_fecha ON conversaciones (fecha)"))
+
+
+def _crear_periodo_tareas(conn) -> None:
+    """Agrega ``periodo`` (``tsrange``) con índice GiST a ``tareas_programadas``.
+
+    La columna es generada a partir de ``fecha_inicio`` y ``fecha_fin`` así
+    que no hace falta mantenerla desde Python. Sin fecha de fin el periodo es
+    el instante de inicio. Solo aplica en PostgreSQL; en el resto de los
+    motores :func:`tareas_en_rango` usa un árbol de intervalos en memoria.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(
+        text(
+            "ALTER TABLE tareas_programadas ADD COLUMN IF NOT EXISTS periodo tsrange "
+            "GENERATED ALWAYS AS (CASE WHEN fecha_inicio IS NULL THEN NULL "
+            "ELSE tsrange(fecha_inicio, GREATEST(fecha_inicio, "
+            "COALESCE(fecha_fin, fecha_inicio)), '[]') END) STORED"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_tareas_programadas_periodo "
+            "ON tareas_programadas USING gist (periodo)"
+        )
+    )
+
+
+
+def _crear_huellas_correos(conn) -> None:
+    """Crea ``huellas_correos`` con sus índices en las bases ya versionadas."""
+    HuellaCorreo.__table__.create(bind=conn, checkfirst=True)
+
+
+def _crear_extracciones_correo(conn) -> None:
+    """Crea ``extracciones_correo`` en las bases ya versionadas."""
+    ExtraccionCorreo.__table__.create(bind=conn, checkfirst=True)
+
+# Migraciones en orden: (versión, descripción, función que recibe ``conn``).
+# Para cambiar el esquema se agrega una entrada nueva al final; nunca se
+# modifica una migración ya publicada.
+MIGRACIONES = [
+    (1, "Columnas, índices y restricciones previas al versionado", ensure_servicio_columns),
+    (2, "Búsqueda de cámaras sin acentos (PostgreSQL)", _crear_busqueda_camaras),
+    (3, "Conversaciones particionadas por mes (PostgreSQL)", _particionar_conversaciones),
+    (4, "Periodo tsrange con índice GiST en tareas (PostgreSQL)", _crear_periodo_tareas),
+    (5, "Huellas de avisos", _crear_huellas_correos),
+    (6, "Extracciones de avisos validadas", _crear_extracciones_correo),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+def obtener_version_esquema() -> int | None:
+    """Devuelve la versión aplicada o ``None`` si no existe ``schema_version``."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                text("SELECT MAX(version) FROM schema_version")
+            ).scalar() or 0
+    except SQLAlchemyError:
+        return None
+
+
+def aplicar_migraciones(desde: int = 0) -> list[int]:
+    """Ejecuta las migraciones posteriores a ``desde`` y devuelve las aplicadas.
+
+    Cada migración corre en su propia transacción junto con el registro en
+    ``schema_version``; si falla, la versión no se marca y se reintenta en el
+    próximo arranque.
+    """
+    # ``create_all`` crea las tablas nuevas, incluida ``schema_version``
+    Base.metadata.create_all(bind=engine)
+    aplicadas = []
+    for version, descripcion, migracion in MIGRACIONES:
+        if version <= desde:
+            continue
+        with engine.begin() as conn:
+            migracion(conn)
+            conn.execute(
+                VersionEsquema.__table__.insert().values(
+                    version=version,
+                    descripcion=descripcion,
+                    aplicada=datetime.utcnow(),
                 )
+            )
+        logger.info("Migración %s aplicada: %s", version, descripcion)
+        aplicadas.append(version)
+    return aplicadas
+
+
+def init_db():
+    """Inicializa la base de datos y aplica las migraciones pendientes.
+
+    Con la base al día el arranque solo consulta ``schema_version``. Si la
+    tabla no existe (base nueva o anterior al versionado) se crean las tablas
+    y se ejecutan todas las migraciones, que son idempotentes.
+    """
+    version = obtener_version_esquema()
+    if version is not None and version >= VERSION_ESQUEMA:
+        logger.debug("Esquema de base al día (versión %s)", version)
+        return
+    aplicar_migraciones(version or 0)
 
 
 # La inicialización se realiza desde ``main.py`` para evitar errores al
@@ -690,6 +977,9 @@ def exportar_camaras_servicio(id_servicio: int, ruta_excel: str) -> bool:
         except json.JSONDecodeError:
             return False
 
+    # pandas se importa acá para no demorar el arranque del bot
+    import pandas as pd
+
     # Se crea el DataFrame con una única columna
     df = pd.DataFrame(camaras, columns=["camara"])
 
@@ -813,7 +1103,21 @@ def obtener_reclamos_servicio(servicio_id: int) -> list[Reclamo]:
         return session.query(Reclamo).filter(Reclamo.servicio_id == servicio_id).all()
 
 
-def crear_tarea_programada(
+@dataclass
+class CambiosTarea:
+    """Resumen de lo que modificó :func:`guardar_tarea_programada`."""
+
+    creada: bool = False
+    campos: list[str] = field(default_factory=list)
+    agregados: list[int] = field(default_factory=list)
+    quitados: list[int] = field(default_factory=list)
+
+    @property
+    def sin_cambios(self) -> bool:
+        return not (self.creada or self.campos or self.agregados or self.quitados)
+
+
+def guardar_tarea_programada(
     fecha_inicio: datetime,
     fecha_fin: datetime,
     tipo_tarea: str,
@@ -822,16 +1126,26 @@ def crear_tarea_programada(
     tiempo_afectacion: str | None = None,
     descripcion: str | None = None,
     id_interno: str | None = None,
-) -> tuple[TareaProgramada, bool]:
-    """Registra una tarea programada y la vincula a los servicios indicados.
+) -> tuple[TareaProgramada, CambiosTarea]:
+    """Crea o actualiza una tarea y sus servicios aplicando solo las diferencias.
 
-    Retorna la instancia creada o actualizada y ``True`` si se creó una nueva
-    fila en la base.
+    Si la tarea ya existe (mismo ``carrier_id`` e ``id_interno``) se comparan
+    sus campos y el conjunto de servicios vinculados: se insertan los vínculos
+    nuevos, se borran los que ya no figuran y no se escribe nada si el correo
+    repite la misma información. Todo ocurre en una única transacción.
     """
+    valores = {
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "tipo_tarea": tipo_tarea,
+        "tiempo_afectacion": tiempo_afectacion,
+        "descripcion": descripcion,
+    }
+    servicios = list(dict.fromkeys(servicios))
+    cambios = CambiosTarea()
 
     with SessionLocal() as session:
         tarea = None
-        creada = False
         if carrier_id and id_interno:
             tarea = (
                 session.query(TareaProgramada)
@@ -842,35 +1156,119 @@ def crear_tarea_programada(
                 .first()
             )
         if tarea:
-            tarea.fecha_inicio = fecha_inicio
-            tarea.fecha_fin = fecha_fin
-            tarea.tipo_tarea = tipo_tarea
-            tarea.tiempo_afectacion = tiempo_afectacion
-            tarea.descripcion = descripcion
+            for campo, valor in valores.items():
+                if getattr(tarea, campo) != valor:
+                    setattr(tarea, campo, valor)
+                    cambios.campos.append(campo)
+            actuales = set(
+                session.scalars(
+                    select(TareaServicio.servicio_id).where(
+                        TareaServicio.tarea_id == tarea.id
+                    )
+                )
+            )
         else:
             tarea = TareaProgramada(
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                tipo_tarea=tipo_tarea,
-                carrier_id=carrier_id,
-                tiempo_afectacion=tiempo_afectacion,
-                descripcion=descripcion,
-                id_interno=id_interno,
+                carrier_id=carrier_id, id_interno=id_interno, **valores
             )
             session.add(tarea)
-            creada = True
+            session.flush()
+            cambios.creada = True
+            actuales = set()
+
+        cambios.agregados = [sid for sid in servicios if sid not in actuales]
+        cambios.quitados = sorted(actuales.difference(servicios))
+        if cambios.quitados:
+            session.execute(
+                TareaServicio.__table__.delete().where(
+                    TareaServicio.tarea_id == tarea.id,
+                    TareaServicio.servicio_id.in_(cambios.quitados),
+                )
+            )
+        if cambios.agregados:
+            session.execute(
+                TareaServicio.__table__.insert(),
+                [{"tarea_id": tarea.id, "servicio_id": sid} for sid in cambios.agregados],
+            )
 
+        if cambios.sin_cambios:
+            return tarea, cambios
         session.commit()
-        session.refresh(tarea)
+    # Los vínculos se escriben con sentencias directas, que no pasan por los
+    # eventos del ORM
+    invalidar_cache_tareas()
+    return tarea, cambios
 
-        servicios = list(dict.fromkeys(servicios))
-        session.query(TareaServicio).filter(TareaServicio.tarea_id == tarea.id).delete()
-        relaciones = [
-            TareaServicio(tarea_id=tarea.id, servicio_id=sid) for sid in servicios
-        ]
-        session.bulk_save_objects(relaciones)
+
+def crear_tarea_programada(
+    fecha_inicio: datetime,
+    fecha_fin: datetime,
+    tipo_tarea: str,
+    servicios: list[int],
+    carrier_id: int | None = None,
+    tiempo_afectacion: str | None = None,
+    descripcion: str | None = None,
+    id_interno: str | None = None,
+) -> tuple[TareaProgramada, bool]:
+    """Registra una tarea programada y la vincula a los servicios indicados.
+
+    Retorna la instancia creada o actualizada y ``True`` si se creó una nueva
+    fila en la base. Para conocer el detalle de los cambios usar
+    :func:`guardar_tarea_programada`.
+    """
+    tarea, cambios = guardar_tarea_programada(
+        fecha_inicio,
+        fecha_fin,
+        tipo_tarea,
+        servicios,
+        carrier_id=carrier_id,
+        tiempo_afectacion=tiempo_afectacion,
+        descripcion=descripcion,
+        id_interno=id_interno,
+    )
+    return tarea, cambios.creada
+
+
+def obtener_extraccion(clave: str, version: str) -> dict | None:
+    """Devuelve la extracción guardada para ``clave`` si es de ``version``."""
+    with SessionLocal() as session:
+        fila = session.scalar(
+            select(ExtraccionCorreo).where(ExtraccionCorreo.clave == clave)
+        )
+        if fila is None or fila.version != version:
+            return None
+        return fila.datos
+
+
+def guardar_extraccion(clave: str, version: str, datos: dict) -> None:
+    """Guarda o reemplaza la extracción de un correo."""
+    with SessionLocal() as session:
+        fila = session.scalar(
+            select(ExtraccionCorreo).where(ExtraccionCorreo.clave == clave)
+        )
+        if fila is None:
+            session.add(ExtraccionCorreo(clave=clave, version=version, datos=datos))
+        else:
+            fila.version = version
+            fila.datos = datos
+            fila.fecha = datetime.utcnow()
+        try:
+            session.commit()
+        except IntegrityError:
+            # Otro proceso guardó el mismo correo al mismo tiempo
+            session.rollback()
+
+
+def depurar_extracciones(version: str) -> int:
+    """Borra las extracciones de otras versiones del prompt."""
+    with SessionLocal() as session:
+        borradas = (
+            session.query(ExtraccionCorreo)
+            .filter(ExtraccionCorreo.version != version)
+            .delete(synchronize_session=False)
+        )
         session.commit()
-        return tarea, creada
+        return borradas
 
 
 def crear_servicio_pendiente(id_carrier: str, tarea_id: int) -> ServicioPendiente:
@@ -988,6 +1386,86 @@ def obtener_tareas_programadas(desc: bool = True) -> list[TareaProgramada]:
         return query.all()
 
 
+@dataclass
+class Pagina:
+    """Resultado de :func:`obtener_pagina`.
+
+    ``anterior`` y ``siguiente`` son las claves para pedir la página vecina o
+    ``None`` si no existe.
+    """
+
+    filas: list
+    anterior: tuple | None = None
+    siguiente: tuple | None = None
+
+
+def obtener_pagina(
+    columnas,
+    orden,
+    cursor: tuple | None = None,
+    anterior: bool = False,
+    limite: int = 20,
+) -> Pagina:
+    """Devuelve una página de ``columnas`` en orden descendente por ``orden``.
+
+    Se pagina por clave (*keyset*): en lugar de ``OFFSET`` se filtran las filas
+    anteriores o posteriores a ``cursor``, por lo que el costo no crece con el
+    número de página. ``orden`` es una tupla de columnas o expresiones sin
+    valores nulos (para columnas que los admiten usar ``coalesce``) cuya
+    última columna es única (normalmente ``id``). Solo se consultan las
+    columnas indicadas, sin instanciar objetos ORM.
+    """
+    claves = [c.label(f"_orden{i}") for i, c in enumerate(orden)]
+    consulta = select(*columnas, *claves)
+    if cursor is not None:
+        clave = tuple_(*orden) if len(orden) > 1 else orden[0]
+        valor = tuple_(*cursor) if len(orden) > 1 else cursor[0]
+        consulta = consulta.where(clave > valor if anterior else clave < valor)
+    consulta = consulta.order_by(*(c.asc() if anterior else c.desc() for c in orden))
+
+    with SessionLocal() as session:
+        filas = session.execute(consulta.limit(limite + 1)).all()
+
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    if anterior:
+        filas.reverse()
+    if not filas:
+        return Pagina([])
+
+    def _clave(fila):
+        return tuple(getattr(fila, f"_orden{i}") for i in range(len(orden)))
+
+    if anterior:
+        return Pagina(filas, _clave(filas[0]) if hay_mas else None, _clave(filas[-1]))
+    return Pagina(
+        filas,
+        _clave(filas[0]) if cursor is not None else None,
+        _clave(filas[-1]) if hay_mas else None,
+    )
+
+
+def exportar_csv(columnas, orden, destino, lote: int = 1000) -> int:
+    """Escribe en ``destino`` todas las filas de ``columnas`` en formato CSV.
+
+    Las filas se leen por lotes con ``yield_per`` para no cargar la tabla
+    completa en memoria. Devuelve la cantidad de filas exportadas.
+    """
+    consulta = (
+        select(*columnas)
+        .order_by(*(c.desc() for c in orden))
+        .execution_options(yield_per=lote)
+    )
+    total = 0
+    with SessionLocal() as session, open(destino, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow([c.key for c in columnas])
+        for fila in session.execute(consulta):
+            escritor.writerow(fila)
+            total += 1
+    return total
+
+
 def obtener_proxima_tarea() -> TareaProgramada | None:
     """Devuelve la tarea futura más cercana a la fecha actual."""
     with SessionLocal() as session:
@@ -1000,49 +1478,242 @@ def obtener_proxima_tarea() -> TareaProgramada | None:
         )
 
 
-def depurar_servicios_duplicados() -> int:
-    """Elimina servicios con el mismo nombre y cliente dejando el más reciente."""
+# ─────────────────── CONSULTAS DE TAREAS POR SOLAPAMIENTO ───────────────────
+
+# Versión de los datos de tareas. Se incrementa al confirmar una sesión que
+# modificó tareas; las caches en memoria la comparan para saber si siguen
+# vigentes.
+_version_tareas = 0
+_cache_arbol: dict = {}
+_cache_mantenimientos: dict = {}
+
+
+def invalidar_cache_tareas() -> None:
+    """Descarta las caches de tareas en memoria.
+
+    Los cambios hechos con el ORM la invalidan solos; se llama a mano
+    después de sentencias masivas (``DELETE``/``UPDATE`` directos).
+    """
+    global _version_tareas
+    _version_tareas += 1
+
+
+@event.listens_for(Session, "after_flush")
+def _marcar_cambios_tareas(session, contexto) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (TareaProgramada, TareaServicio)):
+            session.info["tareas_modificadas"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_al_confirmar(session) -> None:
+    # Se invalida recién al confirmar para que otro hilo no reconstruya la
+    # cache con datos que todavía no son visibles
+    if session.info.pop("tareas_modificadas", False):
+        invalidar_cache_tareas()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marca_tareas(session) -> None:
+    session.info.pop("tareas_modificadas", None)
+
+
+def _arbol_tareas(session):
+    """Árbol de intervalos ``id`` por periodo, reconstruido si hubo cambios."""
+    from .intervalos import ArbolIntervalos
+
+    clave = (id(session.get_bind()), _version_tareas)
+    if _cache_arbol.get("clave") != clave:
+        filas = session.execute(
+            select(
+                TareaProgramada.id,
+                TareaProgramada.fecha_inicio,
+                TareaProgramada.fecha_fin,
+            ).where(TareaProgramada.fecha_inicio.isnot(None))
+        )
+        _cache_arbol["arbol"] = ArbolIntervalos(
+            (ini, max(ini, fin or ini), tid) for tid, ini, fin in filas
+        )
+        _cache_arbol["clave"] = clave
+    return _cache_arbol["arbol"]
+
+
+def _ids_tareas_en_rango(session, desde: datetime, hasta: datetime):
+    """Filtro de SQLAlchemy con las tareas que se cruzan con la ventana."""
+    if session.get_bind().dialect.name == "postgresql":
+        return text("tareas_programadas.periodo && tsrange(:desde, :hasta, '[]')").bindparams(
+            desde=desde, hasta=hasta
+        )
+    ids = _arbol_tareas(session).solapados(desde, hasta)
+    # Los IDs van literales en la sentencia: SQLite limita la cantidad de
+    # parámetros y una ventana amplia puede devolver miles de tareas
+    return TareaProgramada.id.in_(bindparam("ids_tareas", ids, literal_execute=True))
+
+
+def tareas_en_rango(desde: datetime, hasta: datetime) -> list[TareaProgramada]:
+    """Tareas cuyo periodo se cruza con ``[desde, hasta]``, ordenadas por inicio.
+
+    En PostgreSQL usa el índice GiST de ``periodo``; en otros motores un árbol
+    de intervalos en memoria que se reconstruye solo cuando cambian las tareas.
+    """
     with SessionLocal() as session:
-        repetidos = (
-            session.query(Servicio.nombre, Servicio.cliente)
-            .group_by(Servicio.nombre, Servicio.cliente)
-            .having(func.count(Servicio.id) > 1)
+        return (
+            session.query(TareaProgramada)
+            .filter(_ids_tareas_en_rango(session, desde, hasta))
+            .order_by(TareaProgramada.fecha_inicio, TareaProgramada.id)
             .all()
         )
-        eliminados = 0
-        for nombre, cliente in repetidos:
-            filas = (
-                session.query(Servicio)
-                .filter(Servicio.nombre == nombre, Servicio.cliente == cliente)
-                .order_by(Servicio.id.desc())
-                .all()
-            )
-            for srv in filas[1:]:
-                session.delete(srv)
-                eliminados += 1
-        session.commit()
-        return eliminados
 
 
-def depurar_reclamos_duplicados() -> int:
-    """Elimina reclamos con número repetido conservando el de mayor ID."""
+def tareas_en_curso(momento: datetime | None = None) -> list[TareaProgramada]:
+    """Tareas que están ocurriendo en ``momento`` (por defecto, ahora)."""
+    momento = momento or datetime.utcnow()
+    return tareas_en_rango(momento, momento)
+
+
+def servicios_afectados(desde: datetime, hasta: datetime) -> set[int]:
+    """IDs de los servicios con alguna tarea que se cruza con ``[desde, hasta]``."""
     with SessionLocal() as session:
-        repetidos = (
-            session.query(Reclamo.numero)
-            .group_by(Reclamo.numero)
-            .having(func.count(Reclamo.id) > 1)
-            .all()
+        filas = session.execute(
+            select(TareaServicio.servicio_id)
+            .join(TareaProgramada, TareaProgramada.id == TareaServicio.tarea_id)
+            .where(_ids_tareas_en_rango(session, desde, hasta))
+            .distinct()
         )
-        eliminados = 0
-        for (numero,) in repetidos:
-            filas = (
-                session.query(Reclamo)
-                .filter(Reclamo.numero == numero)
-                .order_by(Reclamo.id.desc())
-                .all()
+        return {sid for (sid,) in filas}
+
+
+@dataclass(frozen=True)
+class Mantenimiento:
+    """Tarea vigente o próxima vista desde uno de sus servicios."""
+
+    tarea_id: int
+    inicio: datetime
+    fin: datetime
+    tipo_tarea: str | None
+
+
+def _mantenimientos(session) -> dict:
+    """Mapas ``servicio → mantenimientos`` y ``tarea → servicios`` en memoria.
+
+    Incluye solo las tareas que no terminaron al momento de construirlos; se
+    rehacen con la misma versión de datos que :func:`_arbol_tareas`.
+    """
+    clave = (id(session.get_bind()), _version_tareas)
+    if _cache_mantenimientos.get("clave") != clave:
+        fin = func.coalesce(TareaProgramada.fecha_fin, TareaProgramada.fecha_inicio)
+        filas = session.execute(
+            select(
+                TareaServicio.servicio_id,
+                TareaProgramada.id,
+                TareaProgramada.fecha_inicio,
+                fin,
+                TareaProgramada.tipo_tarea,
             )
-            for rec in filas[1:]:
-                session.delete(rec)
-                eliminados += 1
+            .join(TareaProgramada, TareaProgramada.id == TareaServicio.tarea_id)
+            .where(fin >= datetime.utcnow())
+            .order_by(TareaProgramada.fecha_inicio, TareaProgramada.id, TareaServicio.id)
+        )
+        por_servicio: dict[int, list[Mantenimiento]] = {}
+        por_tarea: dict[int, list[int]] = {}
+        for sid, tid, ini, hasta, tipo in filas:
+            por_servicio.setdefault(sid, []).append(Mantenimiento(tid, ini, hasta, tipo))
+            por_tarea.setdefault(tid, []).append(sid)
+        _cache_mantenimientos.update(
+            clave=clave, por_servicio=por_servicio, por_tarea=por_tarea
+        )
+    return _cache_mantenimientos
+
+
+def mantenimientos_servicio(
+    servicio_id: int, momento: datetime | None = None
+) -> list[Mantenimiento]:
+    """Mantenimientos en curso o por venir del servicio, ordenados por inicio."""
+    momento = momento or datetime.utcnow()
+    with SessionLocal() as session:
+        lista = _mantenimientos(session)["por_servicio"].get(servicio_id, ())
+    return [m for m in lista if m.fin >= momento]
+
+
+def servicio_afectado(servicio_id: int, desde: datetime, hasta: datetime) -> bool:
+    """Indica si alguna tarea vigente o próxima afecta al servicio en la ventana.
+
+    Solo contempla tareas que no habían terminado al construirse la cache, por
+    lo que ``hasta`` no debería ser anterior al momento actual.
+    """
+    return any(
+        m.inicio <= hasta and m.fin >= desde
+        for m in mantenimientos_servicio(servicio_id, desde)
+    )
+
+
+def servicios_de_tarea(tarea_id: int) -> list[int]:
+    """IDs de los servicios vinculados a la tarea.
+
+    Las tareas vigentes o próximas salen de la cache; las ya terminadas se
+    consultan en la base.
+    """
+    with SessionLocal() as session:
+        ids = _mantenimientos(session)["por_tarea"].get(tarea_id)
+        if ids is not None:
+            return list(ids)
+        return [
+            sid
+            for (sid,) in session.execute(
+                select(TareaServicio.servicio_id)
+                .where(TareaServicio.tarea_id == tarea_id)
+                .order_by(TareaServicio.id)
+            )
+        ]
+
+
+def _filas_duplicadas(columna_id, *grupo):
+    """Subconsulta con los IDs sobrantes de cada grupo repetido.
+
+    Numera las filas de cada grupo con ``row_number()`` de mayor a menor ID
+    y devuelve todas salvo la primera, es decir, la más reciente.
+    """
+    orden = (
+        func.row_number()
+        .over(partition_by=grupo, order_by=columna_id.desc())
+        .label("orden")
+    )
+    numeradas = select(columna_id.label("id"), orden).subquery()
+    return select(numeradas.c.id).where(numeradas.c.orden > 1)
+
+
+def _depurar(modelo, sobrantes, simular: bool) -> int:
+    """Cuenta o elimina en una sola sentencia las filas de ``sobrantes``."""
+    with SessionLocal() as session:
+        if simular:
+            return session.execute(
+                select(func.count()).select_from(sobrantes.subquery())
+            ).scalar_one()
+        resultado = session.execute(
+            modelo.__table__.delete().where(modelo.__table__.c.id.in_(sobrantes))
+        )
         session.commit()
-        return eliminados
+        return resultado.rowcount
+
+
+def depurar_servicios_duplicados(simular: bool = False) -> int:
+    """Elimina servicios con el mismo nombre y cliente dejando el más reciente.
+
+    Con ``simular=True`` no borra nada y devuelve cuántos se eliminarían.
+    """
+    return _depurar(
+        Servicio,
+        _filas_duplicadas(Servicio.id, Servicio.nombre, Servicio.cliente),
+        simular,
+    )
+
+
+def depurar_reclamos_duplicados(simular: bool = False) -> int:
+    """Elimina reclamos con número repetido conservando el de mayor ID.
+
+    Con ``simular=True`` no borra nada y devuelve cuántos se eliminarían.
+    """
+    return _depurar(
+        Reclamo, _filas_duplicadas(Reclamo.id, Reclamo.numero), simular
+    )
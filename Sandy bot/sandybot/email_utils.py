@@ -3,6 +3,8 @@
 # User-provided custom instructions
 """Funciones utilitarias para el manejo de correos."""
 
+import hashlib
+import json
 import logging
 import os
 import re
@@ -20,8 +22,10 @@ except Exception:  # pragma: no cover - entornos sin win32
     win32 = None
     pythoncom = None
 
+from . import perfiles_correo
 from .config import config
-from .gpt_handler import gpt
+from .gpt_handler import gpt, perfil_gpt
+from .metricas import medir_smtp
 
 SIGNATURE_PATH = Path(config.SIGNATURE_PATH) if config.SIGNATURE_PATH else None
 TEMPLATE_MSG_PATH = Path(config.MSG_TEMPLATE_PATH)
@@ -33,24 +37,18 @@ from .database import Cliente  # Tabla de clientes
 from .database import Servicio  # Tabla de servicios
 from .database import SessionLocal  # Sesiones SQLAlchemy
 from .database import TareaProgramada  # Tabla de tareas programadas
-from .database import crear_tarea_programada  # Registra la tarea programada
+from .database import guardar_tarea_programada  # Registra la tarea programada
 from .database import crear_servicio_pendiente, obtener_cliente_por_nombre
+from .database import depurar_extracciones, guardar_extraccion, obtener_extraccion
 from .utils import cargar_json, guardar_json, incrementar_contador
 
 logger = logging.getLogger(__name__)
 
-# Mapeo rapido de remitente a carrier
-carrier_map: dict[str, str] = {r".*telxius.*": "TELXIUS"}
-
-
 def detectar_carrier_por_remitente(remitente: str) -> str | None:
-    """Devuelve el carrier segun el remitente utilizando ``carrier_map``."""
+    """Devuelve el carrier según los remitentes de los perfiles de correo."""
 
-    rem = remitente.lower()
-    for patron, nombre in carrier_map.items():
-        if re.search(patron, rem):
-            return nombre
-    return None
+    perfil = perfiles_correo.registro().por_remitente(remitente)
+    return perfil.nombre if perfil else None
 
 
 def _limpiar_correo(texto: str) -> str:
@@ -137,6 +135,7 @@ def eliminar_destinatario(
     return guardar_destinatarios(lista, cliente_id, carrier)
 
 
+@medir_smtp
 def enviar_correo(
     asunto: str,
     cuerpo: str,
@@ -178,6 +177,7 @@ def enviar_correo(
         return False
 
 
+@medir_smtp
 def enviar_excel_por_correo(
     destinatario: str,
     ruta_excel: str,
@@ -431,6 +431,71 @@ def generar_archivo_msg(
     return ruta, cuerpo_final
 
 
+# ─── Extracción de tareas con GPT ──────────────────────────────────────
+_EJEMPLO_EXTRACCION = (
+    "Ejemplo correo:\n"
+    "Inicio: 02/01/2024 08:00\n"
+    "Fin: 02/01/2024 10:00\n"
+    "Trabajo: Actualización de equipos\n"
+    "Servicios: 76208, 78333\n"
+    "\nRespuesta esperada:\n"
+    '{"inicio": "2024-01-02 08:00", "fin": "2024-01-02 10:00", '
+    '"tipo": "Actualización de equipos", "afectacion": null, '
+    '"descripcion": null, "ids": ["76208", "78333"]}'
+)
+
+# Los prompts terminan en «Correo:» y se les agrega el texto limpio
+PROMPT_EXTRACCION = (
+    "Sos un analista que extrae datos de mantenimientos programados. "
+    "Devolvé únicamente un JSON con las claves inicio, fin, tipo, "
+    "afectacion, descripcion e ids (lista de servicios).\n\n"
+    f"{_EJEMPLO_EXTRACCION}\n\nCorreo:\n"
+)
+PROMPT_SOLO_JSON = (
+    "Devuelveme ÚNICAMENTE el JSON (sin ``` ni explicaciones) con las "
+    "claves inicio, fin, tipo, afectacion, descripcion, ids.\n\n"
+    "Correo:\n"
+)
+
+ESQUEMA_TAREA = {
+    "type": "object",
+    "properties": {
+        "inicio": {"type": "string"},
+        "fin": {"type": "string"},
+        "tipo": {"type": "string"},
+        "afectacion": {"type": "string"},
+        "descripcion": {"type": "string"},
+        "ids": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["inicio", "fin", "tipo", "ids"],
+}
+
+# Identifica prompts, esquema y modelo: al cambiar cualquiera de ellos las
+# extracciones guardadas dejan de usarse
+VERSION_EXTRACCION = hashlib.sha256(
+    json.dumps(
+        [PROMPT_EXTRACCION, PROMPT_SOLO_JSON, ESQUEMA_TAREA, config.GPT_MODEL_EXTRACCION],
+        sort_keys=True,
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+_extracciones_depuradas = False
+
+
+def _extraccion_guardada(clave: str) -> dict | None:
+    """Busca la extracción del correo y, la primera vez, borra las viejas."""
+    global _extracciones_depuradas
+    if not _extracciones_depuradas:
+        _extracciones_depuradas = True
+        borradas = depurar_extracciones(VERSION_EXTRACCION)
+        if borradas:
+            logger.info("Extracciones de prompts anteriores borradas: %s", borradas)
+    datos = obtener_extraccion(clave, VERSION_EXTRACCION)
+    if datos:
+        logger.info("Extracción reutilizada, sin consultar a GPT")
+    return datos
+
+
 async def procesar_correo_a_tarea(
     texto: str,
     cliente_nombre: str,
@@ -448,16 +513,29 @@ async def procesar_correo_a_tarea(
     """
 
     texto_limpio = _limpiar_correo(texto)
+
+    # 👉 (0) Aviso ya procesado: se reutiliza la tarea sin consultar a GPT
+    from .huellas import registrar_texto, tarea_por_texto
+
+    tarea_previa = tarea_por_texto(texto_limpio)
+    if tarea_previa is not None:
+        logger.info("Aviso ya registrado como tarea %s; se omite GPT", tarea_previa)
+        return _resultado_tarea_existente(
+            tarea_previa, cliente_nombre, carrier_nombre, generar_msg
+        )
+
     datos_detectados = _detectar_datos_correo(texto_limpio)
 
     if not carrier_nombre:
         carrier_nombre = datos_detectados.get("carrier")
 
-    # 👉 (1) INTENTO RÁPIDO: extraer datos con regex
-    datos = _extraer_por_regex(texto_limpio)
+    # 👉 (1) INTENTO RÁPIDO: patrones del perfil del carrier
+    perfil = perfiles_correo.registro().perfil(carrier_nombre)
+    datos = perfil.extraer(texto_limpio)
+    perfiles_correo.registrar_extraccion(perfil.nombre, bool(datos))
     if datos:
         if os.getenv("SANDY_ENV") == "dev":
-            logger.debug("Regex OK, sin GPT: %s", datos)
+            logger.debug("Regex OK (%s), sin GPT: %s", perfil.nombre, datos)
     else:
         datos = {}
 
@@ -466,60 +544,36 @@ async def procesar_correo_a_tarea(
         if m:
             carrier_nombre = m.group(1).strip()
 
-    ejemplo = (
-        "Ejemplo correo:\n"
-        "Inicio: 02/01/2024 08:00\n"
-        "Fin: 02/01/2024 10:00\n"
-        "Trabajo: Actualización de equipos\n"
-        "Servicios: 76208, 78333\n"
-        "\nRespuesta esperada:\n"
-        '{"inicio": "2024-01-02 08:00", "fin": "2024-01-02 10:00", '
-        '"tipo": "Actualización de equipos", "afectacion": null, '
-        '"descripcion": null, "ids": ["76208", "78333"]}'
-    )
-
-    prompt = (
-        "Sos un analista que extrae datos de mantenimientos programados. "
-        "Devolvé únicamente un JSON con las claves inicio, fin, tipo, "
-        "afectacion, descripcion e ids (lista de servicios).\n\n"
-        f"{ejemplo}\n\nCorreo:\n{texto_limpio}"
-    )
-
-    esquema = {
-        "type": "object",
-        "properties": {
-            "inicio": {"type": "string"},
-            "fin": {"type": "string"},
-            "tipo": {"type": "string"},
-            "afectacion": {"type": "string"},
-            "descripcion": {"type": "string"},
-            "ids": {"type": "array", "items": {"type": "string"}},
-        },
-        "required": ["inicio", "fin", "tipo", "ids"],
-    }
-
+    clave_extraccion = hashlib.sha256(texto_limpio.encode("utf-8")).hexdigest()
+    desde_gpt = False
     try:
         if not datos:
-            # 👉 2A) Desactivamos la cache para recibir respuesta actual
-            respuesta = await gpt.consultar_gpt(prompt, cache=False)
+            # 👉 2A) Resultado ya validado de una consulta anterior con el
+            # mismo prompt. La cache de chat queda desactivada porque guarda
+            # texto crudo y vence en una hora.
+            datos = _extraccion_guardada(clave_extraccion)
+        if not datos:
+            desde_gpt = True
+            with perfil_gpt("extraccion"):
+                respuesta = await gpt.consultar_gpt(
+                    PROMPT_EXTRACCION + texto_limpio, cache=False
+                )
             logger.debug("GPT raw:\n%s", respuesta[:500])
             import re as _re
 
             match = _re.search(r"\{.*\}", respuesta, _re.S)
             if not match:
                 # 👉 2C) Segundo intento restringiendo a solo JSON
-                prompt_2 = (
-                    "Devuelveme ÚNICAMENTE el JSON (sin ``` ni explicaciones) con las "
-                    "claves inicio, fin, tipo, afectacion, descripcion, ids.\n\n"
-                    f"Correo:\n{texto_limpio}"
-                )
-                respuesta_2 = await gpt.consultar_gpt(prompt_2, cache=False)
+                with perfil_gpt("extraccion"):
+                    respuesta_2 = await gpt.consultar_gpt(
+                        PROMPT_SOLO_JSON + texto_limpio, cache=False
+                    )
                 logger.debug("GPT raw #2:\n%s", respuesta_2[:500])
                 match = _re.search(r"\{.*\}", respuesta_2, _re.S)
                 if not match:
                     raise ValueError("JSON no encontrado en ningún intento GPT")
 
-            datos = await gpt.procesar_json_response(match.group(0), esquema)
+            datos = await gpt.procesar_json_response(match.group(0), ESQUEMA_TAREA)
         if not datos:
             raise ValueError("JSON inválido")
         if os.getenv("SANDY_ENV") == "dev":
@@ -528,24 +582,10 @@ async def procesar_correo_a_tarea(
         raise ValueError("No se pudo extraer la tarea del correo") from exc
 
     def _parse_fecha(valor: str) -> datetime:
-        valor = valor.replace("T", " ").strip()
-        formatos = (
-            "%Y-%m-%d %H:%M",
-            "%Y-%m-%d %H:%M:%S",
-            "%d/%m/%Y %H:%M",
-            "%d/%m/%Y %H:%M:%S",
-            "%d/%m %H:%M",
-            "%d/%m %H:%M:%S",
-        )
-        for fmt in formatos:
-            try:
-                dt = datetime.strptime(valor, fmt)
-                if "%Y" not in fmt:
-                    dt = dt.replace(year=datetime.now().year)
-                return dt
-            except ValueError:
-                continue
-        return datetime.fromisoformat(valor)
+        fecha = perfil.leer_fecha(valor)
+        if fecha is None:
+            raise ValueError(f"Fecha no reconocida: {valor}")
+        return fecha
 
     try:
         inicio = _parse_fecha(str(datos["inicio"]))
@@ -554,40 +594,18 @@ async def procesar_correo_a_tarea(
         raise ValueError("Fechas con formato inválido") from exc
     if inicio >= fin:
         raise ValueError("La fecha de inicio debe ser anterior al fin")
+    if desde_gpt:
+        # Solo se guardan respuestas que pasaron el esquema y tienen fechas válidas
+        guardar_extraccion(clave_extraccion, VERSION_EXTRACCION, datos)
 
     tipo = datos.get("tipo") or datos_detectados.get("tipo") or "Programada"
     ids_brutos = [str(i) for i in datos.get("ids", [])]
     ids_brutos.extend(
         [s for s in datos_detectados.get("ids", []) if s not in ids_brutos]
     )
-    descartados: list[str] = []
-    carrier_norm = carrier_nombre.upper() if carrier_nombre else ""
-    if carrier_norm == "TELXIUS":
-        ids_filtrados = []
-        for i in ids_brutos:
-            if re.fullmatch(r"CRT-\d{6}", i):
-                ids_filtrados.append(i)
-            else:
-                descartados.append(i)
-    elif carrier_norm == "IGNETWORK":
-        ids_filtrados = []
-        patron = re.compile(r"MTR\.\d{4,6}\.[A0]\d+")
-        for i in ids_brutos:
-            if patron.fullmatch(i):
-                ids_filtrados.append(i)
-            else:
-                descartados.append(i)
-    else:
-        ids_filtrados = []
-        for i in ids_brutos:
-            if re.fullmatch(r"\d{4}", i):
-                descartados.append(i)
-                continue
-            if i.isdigit() and len(i) < 6:
-                descartados.append(i)
-                continue
-            ids_filtrados.append(i)
-    ids_brutos = ids_filtrados
+    # El carrier puede haberse detectado después de elegir el perfil
+    perfil = perfiles_correo.registro().perfil(carrier_nombre)
+    ids_brutos, descartados = perfil.filtrar_ids(ids_brutos)
 
     id_interno = datos_detectados.get("id_interno")
     afectacion = datos.get("afectacion")
@@ -600,23 +618,7 @@ async def procesar_correo_a_tarea(
         logger.info(">> Servicios descartados: %s", descartados)
 
     with SessionLocal() as session:
-        cliente = obtener_cliente_por_nombre(cliente_nombre)
-        if not cliente:
-            cliente = Cliente(nombre=cliente_nombre)
-            session.add(cliente)
-            session.commit()
-            session.refresh(cliente)
-
-        carrier = None
-        if carrier_nombre:
-            carrier = (
-                session.query(Carrier).filter(Carrier.nombre == carrier_nombre).first()
-            )
-            if not carrier:
-                carrier = Carrier(nombre=carrier_nombre)
-                session.add(carrier)
-                session.commit()
-                session.refresh(carrier)
+        cliente, carrier = _cliente_y_carrier(session, cliente_nombre, carrier_nombre)
 
         servicios: list[Servicio] = []
         ids_pendientes: list[str] = []
@@ -648,7 +650,7 @@ async def procesar_correo_a_tarea(
         if ids_pendientes:
             logger.info(">> Servicios faltantes: %s", ids_pendientes)
 
-        tarea, creada_nueva = crear_tarea_programada(
+        tarea, cambios = guardar_tarea_programada(
             inicio,
             fin,
             tipo,
@@ -658,6 +660,17 @@ async def procesar_correo_a_tarea(
             descripcion=descripcion,
             id_interno=id_interno,
         )
+        creada_nueva = cambios.creada
+        if cambios.sin_cambios:
+            logger.info("Tarea %s sin cambios", tarea.id)
+        elif not creada_nueva:
+            logger.info(
+                "Tarea %s actualizada: campos=%s servicios +%s -%s",
+                tarea.id,
+                cambios.campos,
+                cambios.agregados,
+                cambios.quitados,
+            )
         if carrier:
             for srv in servicios:
                 if srv:
@@ -669,54 +682,101 @@ async def procesar_correo_a_tarea(
             crear_servicio_pendiente(token, tarea.id)
             logger.info("ServicioPendiente creado: %s", token)
 
-        if generar_msg:
-            nombre_arch = f"tarea_{tarea.id}.msg"
-            ruta = Path(tempfile.gettempdir()) / nombre_arch
+        registrar_texto(texto_limpio, tarea.id)
+
+        return _resultado_tarea(
+            tarea,
+            creada_nueva,
+            cliente,
+            servicios,
+            carrier,
+            ids_pendientes,
+            carrier_nombre,
+            generar_msg,
+        )
 
-            ruta_str, cuerpo = generar_archivo_msg(
-                tarea,
-                cliente,
-                [s for s in servicios if s],
-                str(ruta),
-                carrier,
-            )
-            ruta_msg = Path(ruta_str)
-
-            return (
-                tarea,
-                creada_nueva,
-                cliente,
-                ruta_msg,
-                cuerpo,
-                ids_pendientes,
-                carrier_nombre,
-            )
 
-        return tarea, creada_nueva, ids_pendientes, carrier_nombre
+def _cliente_y_carrier(session, cliente_nombre: str, carrier_nombre: str | None):
+    """Obtiene el cliente y el carrier por nombre, creándolos si no existen."""
+    cliente = obtener_cliente_por_nombre(cliente_nombre)
+    if not cliente:
+        cliente = Cliente(nombre=cliente_nombre)
+        session.add(cliente)
+        session.commit()
+        session.refresh(cliente)
 
+    carrier = None
+    if carrier_nombre:
+        carrier = session.query(Carrier).filter(Carrier.nombre == carrier_nombre).first()
+        if not carrier:
+            carrier = Carrier(nombre=carrier_nombre)
+            session.add(carrier)
+            session.commit()
+            session.refresh(carrier)
+    return cliente, carrier
+
+
+def _resultado_tarea(
+    tarea,
+    creada_nueva,
+    cliente,
+    servicios,
+    carrier,
+    ids_pendientes,
+    carrier_nombre,
+    generar_msg,
+):
+    """Arma el retorno de :func:`procesar_correo_a_tarea`."""
+    if generar_msg:
+        nombre_arch = f"tarea_{tarea.id}.msg"
+        ruta = Path(tempfile.gettempdir()) / nombre_arch
+
+        ruta_str, cuerpo = generar_archivo_msg(
+            tarea,
+            cliente,
+            [s for s in servicios if s],
+            str(ruta),
+            carrier,
+        )
+        ruta_msg = Path(ruta_str)
+
+        return (
+            tarea,
+            creada_nueva,
+            cliente,
+            ruta_msg,
+            cuerpo,
+            ids_pendientes,
+            carrier_nombre,
+        )
 
-def _extraer_por_regex(texto: str) -> dict | None:
-    """Devuelve datos de una tarea con expresiones regulares.
+    return tarea, creada_nueva, ids_pendientes, carrier_nombre
 
-    Retorna ``None`` si no consigue inicio, fin e IDs.
+
+def _resultado_tarea_existente(
+    tarea_id: int, cliente_nombre: str, carrier_nombre: str | None, generar_msg: bool
+):
+    """Retorno de :func:`procesar_correo_a_tarea` para un aviso repetido.
+
+    Se usa el carrier guardado en la tarea y los servicios ya vinculados; no
+    hay IDs pendientes porque se crearon al registrar el aviso original.
     """
-    import re as _re
+    from .database import servicios_de_tarea
 
-    inicio_m = _re.search(r"inicio[:\s-]+([^\n\r]+)", texto, _re.I)
-    fin_m = _re.search(r"fin[:\s-]+([^\n\r]+)", texto, _re.I)
-    ids_m = _re.search(
-        r"servicios?(?:\s+afectados)?[:\s-]+([A-Z0-9,\- ]+)", texto, _re.I
-    )
-    if not (inicio_m and fin_m and ids_m):
-        return None
-    return {
-        "inicio": inicio_m.group(1).strip(),
-        "fin": fin_m.group(1).strip(),
-        "tipo": "Mantenimiento",
-        "afectacion": None,
-        "descripcion": None,
-        "ids": [i.strip() for i in ids_m.group(1).split(",") if i.strip()],
-    }
+    with SessionLocal() as session:
+        tarea = session.get(TareaProgramada, tarea_id)
+        carrier = session.get(Carrier, tarea.carrier_id) if tarea.carrier_id else None
+        if carrier:
+            carrier_nombre = carrier.nombre
+        cliente, carrier = _cliente_y_carrier(session, cliente_nombre, carrier_nombre)
+        orden = {sid: i for i, sid in enumerate(servicios_de_tarea(tarea_id))}
+        servicios = sorted(
+            session.query(Servicio).filter(Servicio.id.in_(list(orden))).all(),
+            key=lambda srv: orden[srv.id],
+        )
+        return _resultado_tarea(
+            tarea, False, cliente, servicios, carrier, [], carrier_nombre, generar_msg
+        )
 
 
 def _detectar_datos_correo(texto: str) -> dict:
@@ -748,22 +808,12 @@ def _detectar_datos_correo(texto: str) -> dict:
         if m:
             resultado["carrier"] = m.group(1).strip().split()[0]
 
-    carrier_norm = resultado.get("carrier", "").upper()
-    if carrier_norm == "TELXIUS":
-        id_pat = r"SWX\d{7}"
-        srv_pat = r"CRT-\d{6}"
-    elif carrier_norm == "IGNETWORK":
-        id_pat = r"MTR\.\d{4,6}\.[A0]\d+"
-        srv_pat = r"MTR\.\d{4,6}\.[A0]\d+"
-    else:
-        id_pat = r"ID\w+"
-        srv_pat = r"\b\d+\b"
-
-    m = re.search(id_pat, texto)
-    if m:
-        resultado["id_interno"] = m.group(0)
+    perfil = perfiles_correo.registro().perfil(resultado.get("carrier"))
+    id_interno = perfil.buscar_id_interno(texto)
+    if id_interno:
+        resultado["id_interno"] = id_interno
 
-    resultado["ids"] = re.findall(srv_pat, texto)
+    resultado["ids"] = perfil.buscar_servicios(texto)
 
     resultado["tipo"] = "Emergencia" if "EMERGENCY" in asunto.upper() else "Programada"
     return resultado
@@ -7,11 +7,10 @@ from __future__ import annotations
 
 import re
 from typing import Iterable
-import geopandas as gpd
-import contextily as ctx
-from shapely.geometry import Point
-import matplotlib.pyplot as plt
 
+# geopandas, contextily, shapely y matplotlib se importan dentro de
+# ``generar_mapa_puntos``: tardan varios segundos en cargarse y solo se usan
+# cuando el informe de repetitividad incluye un mapa.
 
 
 def extraer_coordenada(texto: str) -> tuple[float, float] | None:
@@ -45,6 +44,10 @@ def generar_mapa_puntos(
     ruta: str,
 ) -> None:
     """Genera un mapa PNG con las coordenadas y sus números de fila."""
+    import contextily as ctx
+    import geopandas as gpd
+    import matplotlib.pyplot as plt
+    from shapely.geometry import Point
 
     gdf = gpd.GeoDataFrame(
         index=range(len(list(puntos))),
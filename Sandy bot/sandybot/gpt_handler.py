@@ -8,16 +8,170 @@ import json
 import logging
 import asyncio
 import random
-from typing import List, Dict, Any, Optional, Union
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Dict, Any, Optional, Union
 from datetime import datetime
 import openai
 from jsonschema import validate, ValidationError
 from .config import config
+from .limitador import PRIORIDAD_INTERACTIVA, limitador_gpt, prioridad_gpt
+from .metricas import registro
+from .tokens import contar_tokens
+from .trazas import empezar_span, span
 from .utils import cargar_json, guardar_json
 import atexit
 
 logger = logging.getLogger(__name__)
 
+# Tokens de respuesta que se reservan en el limitador antes de conocer el uso real
+TOKENS_RESPUESTA_ESTIMADOS = 500
+
+
+def _espera_rate_limit(error: Exception, intento: int) -> float:
+    """Segundos a esperar tras un ``RateLimitError``.
+
+    Se respeta ``Retry-After`` si la API lo informa; si no, backoff
+    exponencial con un pequeño valor aleatorio.
+    """
+    respuesta = getattr(error, "response", None)
+    encabezados = getattr(respuesta, "headers", None) or {}
+    try:
+        return float(encabezados.get("retry-after")) + random.random()
+    except (TypeError, ValueError):
+        return (2 ** intento) + random.random()
+
+
+def _tokens_usados(respuesta) -> Optional[int]:
+    return getattr(getattr(respuesta, "usage", None), "total_tokens", None)
+
+
+# ─────────────────────────── PERFILES POR TAREA ───────────────────────────
+@dataclass(frozen=True)
+class PerfilModelo:
+    """Modelo y parámetros de consulta para un tipo de tarea."""
+
+    modelo: str
+    temperatura: float = 0.3
+    max_tokens: Optional[int] = None
+    timeout: float = 30
+    # Pide a la API un objeto JSON válido si el modelo lo admite
+    json: bool = False
+
+
+# Familias de modelos que aceptan ``response_format={"type": "json_object"}``
+MODELOS_CON_JSON = (
+    "gpt-4o", "gpt-4.1", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125",
+    "gpt-3.5-turbo", "gpt-5", "o1", "o3", "o4",
+)
+
+# Modelos de razonamiento: rechazan ``temperature`` y ``max_tokens``; el tope
+# se pide con ``max_completion_tokens`` e incluye los tokens de razonamiento
+MODELOS_RAZONAMIENTO = ("gpt-5", "o1", "o3", "o4")
+
+PERFIL_POR_DEFECTO = "chat"
+
+
+def perfiles_modelo() -> Dict[str, PerfilModelo]:
+    """Perfiles de consulta según la configuración actual.
+
+    * ``chat``: respuestas al usuario con el modelo principal.
+    * ``clasificacion``: respuestas de una palabra con un modelo chico.
+    * ``extraccion``: datos de avisos en JSON estructurado.
+    * ``cronologia``: eventos de incidencias (array JSON, sin modo JSON).
+    """
+    return {
+        "chat": PerfilModelo(config.GPT_MODEL, 0.3, None, config.GPT_TIMEOUT),
+        "clasificacion": PerfilModelo(
+            config.GPT_MODEL_CLASIFICACION, 0, 20, config.GPT_TIMEOUT_CLASIFICACION
+        ),
+        "extraccion": PerfilModelo(
+            config.GPT_MODEL_EXTRACCION, 0, 4000, config.GPT_TIMEOUT, json=True
+        ),
+        "cronologia": PerfilModelo(config.GPT_MODEL_EXTRACCION, 0, 4000, config.GPT_TIMEOUT),
+    }
+
+
+def admite_json(modelo: str) -> bool:
+    return modelo.startswith(MODELOS_CON_JSON)
+
+
+def es_razonamiento(modelo: str) -> bool:
+    return modelo.startswith(MODELOS_RAZONAMIENTO)
+
+
+_perfil: ContextVar[str] = ContextVar("perfil_gpt", default=PERFIL_POR_DEFECTO)
+
+
+@contextmanager
+def perfil_gpt(nombre: str):
+    """Fija el perfil de las consultas a GPT hechas dentro del bloque."""
+    marca = _perfil.set(nombre)
+    try:
+        yield
+    finally:
+        _perfil.reset(marca)
+
+
+GPT_SEGUNDOS = registro.histograma(
+    "sandy_gpt_segundos", "Duración de las consultas a la API de OpenAI", ("perfil",)
+)
+GPT_CONSULTAS = registro.contador(
+    "sandy_gpt_consultas_total",
+    "Consultas a GPT por perfil y resultado (api, cache o error)",
+    ("perfil", "resultado"),
+)
+
+
+class MetricasPerfil:
+    """Latencias de las últimas consultas a la API de un perfil.
+
+    Cada evento se suma también a las métricas de ``/metrics``.
+    """
+
+    def __init__(self, muestras: int = 500, perfil: str = PERFIL_POR_DEFECTO):
+        self.perfil = perfil
+        self.latencias: deque = deque(maxlen=muestras)
+        self.consultas = 0
+        self.errores = 0
+        self.desde_cache = 0
+
+    def registrar(self, segundos: float) -> None:
+        self.consultas += 1
+        self.latencias.append(segundos)
+        GPT_SEGUNDOS.observar(segundos, perfil=self.perfil)
+        GPT_CONSULTAS.incrementar(perfil=self.perfil, resultado="api")
+
+    def registrar_error(self) -> None:
+        self.errores += 1
+        GPT_CONSULTAS.incrementar(perfil=self.perfil, resultado="error")
+
+    def registrar_cache(self) -> None:
+        self.desde_cache += 1
+        GPT_CONSULTAS.incrementar(perfil=self.perfil, resultado="cache")
+
+    def tasa_cache(self) -> Optional[float]:
+        """Proporción de consultas resueltas con la cache."""
+        total = self.consultas + self.desde_cache
+        return self.desde_cache / total if total else None
+
+    def resumen(self) -> Dict[str, float]:
+        ordenadas = sorted(self.latencias)
+        datos = {
+            "consultas": self.consultas,
+            "errores": self.errores,
+            "desde_cache": self.desde_cache,
+        }
+        if ordenadas:
+            datos["media_ms"] = sum(ordenadas) / len(ordenadas) * 1000
+            datos["p50_ms"] = ordenadas[len(ordenadas) // 2] * 1000
+            datos["p95_ms"] = ordenadas[max(int(len(ordenadas) * 0.95) - 1, 0)] * 1000
+        return datos
+
+
 class GPTHandler:
     """
     Clase para manejar interacciones con la API de OpenAI GPT.
@@ -34,6 +188,11 @@ class GPTHandler:
         # De esta forma se aprovecha la nueva interfaz de la
         # biblioteca ``openai`` a partir de la versión 1.x.
         self.client = openai.AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        # Modelo y parámetros por tipo de tarea, con sus métricas de latencia
+        self.perfiles = perfiles_modelo()
+        self.metricas: Dict[str, MetricasPerfil] = {
+            nombre: MetricasPerfil(perfil=nombre) for nombre in self.perfiles
+        }
         # Guardar la cache automáticamente al finalizar la aplicación
         atexit.register(self._flush_cache)
 
@@ -54,10 +213,80 @@ class GPTHandler:
             self._dirty = False
             self._contador = 0
         
+    def _respuesta_cacheada(self, cache_key: str) -> Optional[str]:
+        """Devuelve la respuesta guardada para ``cache_key`` si sigue vigente."""
+        entrada = self.cache.get(cache_key)
+        if entrada is None:
+            return None
+        ts = datetime.fromisoformat(entrada["timestamp"])
+        if (datetime.now() - ts).total_seconds() < config.GPT_CACHE_TIMEOUT:
+            return entrada["response"]
+        return None
+
+    def _purgar_cache(self) -> None:
+        """Elimina de la cache las respuestas vencidas."""
+        ahora = datetime.now()
+        vencidos = [k for k, v in self.cache.items()
+                   if (ahora - datetime.fromisoformat(v["timestamp"])).total_seconds() >= config.GPT_CACHE_TIMEOUT]
+        for k in vencidos:
+            del self.cache[k]
+        if vencidos:
+            # Se marca la cache como sucia; se guardará según el intervalo
+            self._marcar_sucia()
+
+    def _guardar_respuesta(self, cache_key: str, resultado: str) -> None:
+        self.cache[cache_key] = {
+            "timestamp": datetime.now().isoformat(),
+            "response": resultado,
+        }
+        # Se marca la cache como sucia; se escribirá en disco más adelante
+        self._marcar_sucia()
+
+    # ──────────────────────── Perfiles de consulta ────────────────────────
+    def _perfil_actual(self) -> tuple:
+        nombre = _perfil.get()
+        if nombre not in self.perfiles:
+            logger.warning("Perfil de GPT desconocido: %s", nombre)
+            nombre = PERFIL_POR_DEFECTO
+        return nombre, self.perfiles[nombre]
+
+    def _parametros(self, perfil: PerfilModelo, mensaje: str) -> Dict[str, Any]:
+        """Argumentos de ``chat.completions.create`` para ``perfil``."""
+        parametros: Dict[str, Any] = {
+            "model": perfil.modelo,
+            "messages": [{"role": "user", "content": mensaje}],
+            "timeout": perfil.timeout,
+        }
+        if es_razonamiento(perfil.modelo):
+            # Solo admiten la temperatura por defecto y el tope en otro campo
+            if perfil.max_tokens:
+                parametros["max_completion_tokens"] = perfil.max_tokens
+        else:
+            parametros["temperature"] = perfil.temperatura
+            if perfil.max_tokens:
+                parametros["max_tokens"] = perfil.max_tokens
+        if perfil.json and admite_json(perfil.modelo):
+            parametros["response_format"] = {"type": "json_object"}
+        return parametros
+
+    def _tokens_reserva(self, perfil: PerfilModelo, mensaje: str) -> int:
+        return contar_tokens(mensaje, perfil.modelo) + (
+            perfil.max_tokens or TOKENS_RESPUESTA_ESTIMADOS
+        )
+
+    def metricas_perfiles(self) -> Dict[str, Dict[str, float]]:
+        """Consultas, errores y latencias (ms) de la API por perfil."""
+        return {nombre: m.resumen() for nombre, m in self.metricas.items()}
+
     async def consultar_gpt(self, mensaje: str, cache: bool = True) -> str:
         """
         Consulta GPT con manejo de cache y errores
 
+        Las consultas esperan turno en :data:`limitador_gpt` con la prioridad
+        fijada por :func:`prioridad_gpt` (normal si no se indica). El modelo y
+        sus parámetros salen del perfil fijado con :func:`perfil_gpt`
+        (``chat`` por defecto).
+
         Args:
             mensaje: El texto a enviar a GPT
             cache: Si True, intenta usar respuesta cacheada
@@ -68,50 +297,46 @@ class GPTHandler:
         Raises:
             Exception: Si no se puede obtener respuesta después de los reintentos
         """
+        nombre, perfil = self._perfil_actual()
+        metricas = self.metricas[nombre]
         cache_key = mensaje.strip().lower()
-        if cache and cache_key in self.cache:
-            entrada = self.cache[cache_key]
-            ts = datetime.fromisoformat(entrada["timestamp"])
-            if (datetime.now() - ts).seconds < config.GPT_CACHE_TIMEOUT:
+        if cache:
+            guardada = self._respuesta_cacheada(cache_key)
+            if guardada is not None:
                 logger.info("Usando respuesta cacheada para: %s", mensaje[:50])
-                return entrada["response"]
+                metricas.registrar_cache()
+                return guardada
 
         # Limpiar respuestas vencidas de la cache
-        ahora = datetime.now()
-        vencidos = [k for k, v in self.cache.items()
-                   if (ahora - datetime.fromisoformat(v["timestamp"])).seconds >= config.GPT_CACHE_TIMEOUT]
-        for k in vencidos:
-            del self.cache[k]
-        if vencidos:
-            # Se marca la cache como sucia; se guardará según el intervalo
-            self._marcar_sucia()
+        self._purgar_cache()
 
+        parametros = self._parametros(perfil, mensaje)
+        tokens = self._tokens_reserva(perfil, mensaje)
         for intento in range(config.GPT_MAX_RETRIES):
             try:
-                # Utiliza el cliente asíncrono creado en ``__init__`` para
-                # solicitar una nueva completitud de chat.
-                respuesta = await self.client.chat.completions.create(
-                    model=config.GPT_MODEL,
-                    messages=[{"role": "user", "content": mensaje}],
-                    temperature=0.3,
-                    timeout=config.GPT_TIMEOUT
-                )
+                # El tramo incluye la espera de turno en el limitador
+                with span("gpt", perfil=nombre, modelo=perfil.modelo, intento=intento + 1):
+                    async with limitador_gpt.reservar(tokens) as reserva:
+                        # Utiliza el cliente asíncrono creado en ``__init__`` para
+                        # solicitar una nueva completitud de chat.
+                        inicio = time.perf_counter()
+                        try:
+                            respuesta = await self.client.chat.completions.create(**parametros)
+                        except Exception:
+                            metricas.registrar_error()
+                            raise
+                        metricas.registrar(time.perf_counter() - inicio)
+                        reserva.ajustar(_tokens_usados(respuesta))
                 resultado = respuesta.choices[0].message.content.strip()
                 
                 if cache:
-                    self.cache[cache_key] = {
-                        "timestamp": datetime.now().isoformat(),
-                        "response": resultado,
-                    }
-                    # Se marca la cache como sucia; se escribirá en disco más adelante
-                    self._marcar_sucia()
+                    self._guardar_respuesta(cache_key, resultado)
                 return resultado
                 
-            except openai.RateLimitError:
+            except openai.RateLimitError as e:
                 logger.warning("Rate limit alcanzado, reintentando...")
-                # Exponential backoff con un pequeño valor aleatorio
-                backoff_seconds = (2 ** intento) + random.random()
-                await asyncio.sleep(backoff_seconds)
+                # La pausa frena a todo el bot, no solo a esta consulta
+                limitador_gpt.penalizar(_espera_rate_limit(e, intento))
             except openai.APIError as e:
                 logger.error("Error de API en consulta GPT: %s", str(e))
                 if intento == config.GPT_MAX_RETRIES - 1:
@@ -124,6 +349,97 @@ class GPTHandler:
 
         raise Exception("No se pudo obtener respuesta de GPT después de varios intentos")
 
+    async def consultar_gpt_stream(
+        self, mensaje: str, cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Consulta GPT en modo streaming y devuelve los fragmentos a medida que llegan
+
+        Usa la misma cache que :meth:`consultar_gpt`: si la respuesta está
+        guardada se entrega en un único fragmento y, si no, se guarda el texto
+        completo al terminar. Los reintentos solo se hacen mientras no se haya
+        entregado ningún fragmento; un corte posterior se propaga. Se usa
+        para responder al usuario, así que siempre usa el perfil ``chat`` con
+        prioridad interactiva.
+
+        Args:
+            mensaje: El texto a enviar a GPT
+            cache: Si True, intenta usar respuesta cacheada
+
+        Yields:
+            str: Cada fragmento de texto recibido
+        """
+        metricas = self.metricas["chat"]
+        cache_key = mensaje.strip().lower()
+        if cache:
+            guardada = self._respuesta_cacheada(cache_key)
+            if guardada is not None:
+                logger.info("Usando respuesta cacheada para: %s", mensaje[:50])
+                metricas.registrar_cache()
+                yield guardada
+                return
+
+        self._purgar_cache()
+
+        perfil = self.perfiles["chat"]
+        parametros = self._parametros(perfil, mensaje)
+        tokens = self._tokens_reserva(perfil, mensaje)
+        for intento in range(config.GPT_MAX_RETRIES):
+            partes: List[str] = []
+            # Entre fragmentos el código que consume el generador sigue
+            # corriendo, así que el tramo no se vuelve el tramo en curso
+            tramo = empezar_span(
+                "gpt.stream", perfil="chat", modelo=perfil.modelo, intento=intento + 1
+            )
+            try:
+                async with limitador_gpt.reservar(tokens, PRIORIDAD_INTERACTIVA):
+                    inicio = time.perf_counter()
+                    try:
+                        stream = await self.client.chat.completions.create(
+                            **parametros, stream=True
+                        )
+                        async for chunk in stream:
+                            if not chunk.choices:
+                                continue
+                            fragmento = chunk.choices[0].delta.content
+                            if fragmento:
+                                partes.append(fragmento)
+                                yield fragmento
+                    except Exception as e:
+                        metricas.registrar_error()
+                        if tramo is not None:
+                            tramo.terminar(e)
+                        raise
+                    metricas.registrar(time.perf_counter() - inicio)
+                if tramo is not None:
+                    tramo.terminar()
+
+                if cache:
+                    self._guardar_respuesta(cache_key, "".join(partes).strip())
+                return
+
+            except openai.RateLimitError as e:
+                if partes:
+                    raise
+                logger.warning("Rate limit alcanzado, reintentando...")
+                limitador_gpt.penalizar(_espera_rate_limit(e, intento))
+            except openai.APIError as e:
+                logger.error("Error de API en consulta GPT: %s", str(e))
+                if partes or intento == config.GPT_MAX_RETRIES - 1:
+                    raise
+                await asyncio.sleep(1)
+            except Exception as e:
+                logger.error("Error en consulta GPT: %s", str(e))
+                if partes or intento == config.GPT_MAX_RETRIES - 1:
+                    raise
+
+        raise Exception("No se pudo obtener respuesta de GPT después de varios intentos")
+
+    async def _consultar_interactiva(self, prompt: str, perfil: str = PERFIL_POR_DEFECTO) -> str:
+        """Consulta que el usuario está esperando: pasa antes que los lotes."""
+        with prioridad_gpt(PRIORIDAD_INTERACTIVA), perfil_gpt(perfil):
+            return await self.consultar_gpt(prompt)
+
     async def detectar_intencion(self, mensaje: str) -> str:
         """
         Detecta la intención del usuario en el mensaje
@@ -144,7 +460,7 @@ class GPTHandler:
         )
         
         try:
-            respuesta = await self.consultar_gpt(prompt)
+            respuesta = await self._consultar_interactiva(prompt, "clasificacion")
             salida = respuesta.lower().strip()
             return salida if salida in ["acción", "consulta", "neutro"] else "neutro"
         except Exception as e:
@@ -179,7 +495,7 @@ class GPTHandler:
         )
 
         try:
-            respuesta = await self.consultar_gpt(prompt)
+            respuesta = await self._consultar_interactiva(prompt, "clasificacion")
             resultado = respuesta.lower().strip()
             return resultado if resultado in flujos else "desconocido"
         except Exception as e:
@@ -195,7 +511,7 @@ class GPTHandler:
         )
 
         try:
-            return await self.consultar_gpt(prompt)
+            return await self._consultar_interactiva(prompt)
         except Exception as e:
             logger.error("Error al generar pregunta de intención: %s", str(e))
             return "¿Podrías aclarar tu solicitud?"
@@ -237,35 +553,151 @@ class GPTHandler:
             logger.error("Error al procesar respuesta JSON de GPT: %s", str(e))
             return None
 
-    async def analizar_incidencias(self, texto: str) -> Optional[List[Dict[str, str]]]:
-
-        """Analiza un texto y extrae una cronología de incidencias."""
+    async def _cronologia_fragmento(
+        self, texto: str, contexto: Optional[str] = None
+    ) -> Optional[List[Dict[str, str]]]:
+        """Consulta a GPT la cronología de un único fragmento."""
         prompt = (
             "Extraé la cronología de incidencias del texto y "
             "devolvé solo un array JSON de objetos con 'fecha' y 'evento'.\n\n"
-            f"Texto:\n{texto}"
         )
+        if contexto:
+            prompt += (
+                "Contexto (usalo solo para interpretar el texto):\n"
+                f"{contexto}\n\n"
+            )
+        prompt += f"Texto:\n{texto}"
+        with perfil_gpt("cronologia"):
+            respuesta = await self.consultar_gpt(prompt)
+        return await self.procesar_json_response(respuesta, ESQUEMA_CRONOLOGIA)
+
+    async def analizar_incidencias(
+        self,
+        texto: str,
+        contexto: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        concurrencia: Optional[int] = None,
+    ) -> Optional[List[Dict[str, str]]]:
+        """Analiza un texto y extrae una cronología de incidencias.
+
+        Si el texto supera ``max_tokens`` (``config.INCIDENCIAS_TOKENS_FRAGMENTO``)
+        se divide por párrafos y cada fragmento se analiza por separado, con
+        hasta ``concurrencia`` consultas a la vez. Las cronologías parciales se
+        unen con :func:`combinar_cronologias`. ``contexto`` acompaña a cada
+        fragmento y se recorta a un cuarto del límite.
 
-        esquema = {
+        Returns:
+            La cronología combinada o ``None`` si algún fragmento falla.
+        """
+        from .tokens import dividir_por_tokens
 
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "fecha": {"type": "string"},
+        max_tokens = max_tokens or config.INCIDENCIAS_TOKENS_FRAGMENTO
+        modelo = self.perfiles["cronologia"].modelo
+        concurrencia = concurrencia or config.INCIDENCIAS_CONCURRENCIA
+        # Un contexto solo con espacios no deja fragmentos: se trata como vacío
+        contexto = (contexto or "").strip() or None
+        if contexto:
+            contexto = dividir_por_tokens(contexto, max(max_tokens // 4, 1), modelo)[0]
+            presupuesto = max(max_tokens - contar_tokens(contexto, modelo), 1)
+        else:
+            presupuesto = max_tokens
+        fragmentos = dividir_por_tokens(texto, presupuesto, modelo) or [texto]
+        if len(fragmentos) > 1:
+            logger.info("Incidencias divididas en %s fragmentos", len(fragmentos))
 
-                    "evento": {"type": "string"},
-                },
-                "required": ["fecha", "evento"],
+        limite = asyncio.Semaphore(concurrencia)
 
-            },
-        }
+        async def _analizar(fragmento: str):
+            async with limite:
+                return await self._cronologia_fragmento(fragmento, contexto)
 
+        resultados = await asyncio.gather(
+            *(_analizar(f) for f in fragmentos), return_exceptions=True
+        )
+        for i, parcial in enumerate(resultados, 1):
+            if isinstance(parcial, BaseException) or parcial is None:
+                logger.error(
+                    "Fragmento %s/%s de incidencias sin cronología: %s",
+                    i,
+                    len(fragmentos),
+                    parcial,
+                )
+                return None
+        return combinar_cronologias(resultados)
+
+
+ESQUEMA_CRONOLOGIA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "fecha": {"type": "string"},
+            "evento": {"type": "string"},
+        },
+        "required": ["fecha", "evento"],
+    },
+}
+
+_FORMATOS_FECHA = (
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+    "%d-%m-%Y %H:%M",
+    "%d-%m-%Y",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+)
+
+
+def _leer_fecha(valor: str) -> Optional[datetime]:
+    valor = " ".join(str(valor).replace("T", " ").split())
+    for formato in _FORMATOS_FECHA:
         try:
-            respuesta = await self.consultar_gpt(prompt)
-            return await self.procesar_json_response(respuesta, esquema)
-        except Exception:
-            return None
+            return datetime.strptime(valor, formato)
+        except ValueError:
+            continue
+    return None
+
+
+def combinar_cronologias(
+    parciales: List[List[Dict[str, str]]]
+) -> List[Dict[str, str]]:
+    """Une las cronologías de varios fragmentos en una sola.
+
+    Quita los eventos repetidos (misma fecha y descripción, sin distinguir
+    mayúsculas ni espacios), que aparecen cuando un hecho se menciona en más
+    de un fragmento. Si todas las fechas se pueden interpretar el resultado se
+    ordena por fecha; si no, se respeta el orden del documento.
+    """
+    eventos: List[Dict[str, str]] = []
+    vistos = set()
+    for parcial in parciales:
+        for evento in parcial:
+            clave = tuple(
+                " ".join(str(evento.get(c, "")).lower().split()) for c in ("fecha", "evento")
+            )
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            eventos.append(evento)
+
+    fechas = [_leer_fecha(e.get("fecha", "")) for e in eventos]
+    if eventos and all(fechas):
+        orden = sorted(range(len(eventos)), key=lambda i: fechas[i])
+        eventos = [eventos[i] for i in orden]
+    return eventos
+
 
 # Instancia global
 gpt = GPTHandler()
+
+registro.medidor(
+    "sandy_gpt_cache_ratio",
+    "Proporción de consultas a GPT resueltas con la cache",
+    lambda: {
+        nombre: tasa
+        for nombre, m in gpt.metricas.items()
+        if (tasa := m.tasa_cache()) is not None
+    },
+    etiqueta="perfil",
+)
@@ -3,117 +3,157 @@
 # User-provided custom instructions
 """
 Handlers del bot Sandy
+
+Los submódulos se importan recién cuando se accede a alguno de sus
+handlers. Así el bot puede responder ``/start`` sin cargar pandas,
+python-docx, geopandas, notion_client ni openai, que solo se necesitan
+en flujos puntuales.
 """
 
-from .callback import callback_handler
-from .cargar_tracking import guardar_tracking_servicio, iniciar_carga_tracking
-from .carriers import (
-    actualizar_carrier,
-    agregar_carrier,
-    eliminar_carrier,
-    listar_carriers,
-)
-from .comparador import iniciar_comparador, procesar_comparacion, recibir_tracking
-from .descargar_camaras import enviar_camaras_servicio, iniciar_descarga_camaras
-from .descargar_tracking import enviar_tracking_servicio, iniciar_descarga_tracking
-from .destinatarios import (
-    agregar_destinatario,
-    eliminar_destinatario,
-    listar_destinatarios,
-    listar_destinatarios_por_carrier,
-)
-from .detectar_tarea_mail import detectar_tarea_mail
-from .document import document_handler
-from .enviar_camaras_mail import iniciar_envio_camaras_mail, procesar_envio_camaras_mail
-from .id_carrier import iniciar_identificador_carrier, procesar_identificador_carrier
-from .identificador_tarea import (
-    iniciar_identificador_tarea,
-    procesar_identificador_tarea,
-)
-from .incidencias import iniciar_incidencias, procesar_incidencias
-from .informe_sla import (
-    actualizar_plantilla_sla,
-    iniciar_informe_sla,
-    procesar_informe_sla,
-)
-from .ingresar_tarea import ingresar_tarea
-from .ingresos import iniciar_verificacion_ingresos, procesar_ingresos
-from .listar_tareas import listar_tareas
-from .message import message_handler
-from .procesar_correos import procesar_correos
-from .reenviar_aviso import reenviar_aviso
-from .registro_ingresos import guardar_registro, iniciar_registro_ingresos
-from .repetitividad import procesar_repetitividad
-from .start import start_handler
-from .supermenu import depurar_duplicados, listar_camaras
-from .supermenu import listar_carriers as listar_carriers_cdb
-from .supermenu import (
-    listar_clientes,
-    listar_conversaciones,
-    listar_ingresos,
-    listar_reclamos,
-    listar_servicios,
-    listar_tareas_programadas,
-    listar_tareas_servicio,
-    supermenu,
-)
-from .tarea_programada import registrar_tarea_programada
-from .voice import voice_handler
-
-__all__ = [
-    "start_handler",
-    "callback_handler",
-    "message_handler",
-    "document_handler",
-    "voice_handler",
-    "iniciar_verificacion_ingresos",
-    "procesar_ingresos",
-    "iniciar_registro_ingresos",
-    "guardar_registro",
-    "procesar_repetitividad",
-    "iniciar_comparador",
-    "recibir_tracking",
-    "procesar_comparacion",
-    "iniciar_carga_tracking",
-    "guardar_tracking_servicio",
-    "iniciar_descarga_tracking",
-    "enviar_tracking_servicio",
-    "iniciar_descarga_camaras",
-    "enviar_camaras_servicio",
-    "iniciar_envio_camaras_mail",
-    "procesar_envio_camaras_mail",
-    "iniciar_identificador_carrier",
-    "procesar_identificador_carrier",
-    "iniciar_identificador_tarea",
-    "procesar_identificador_tarea",
-    "iniciar_incidencias",
-    "procesar_incidencias",
-    "iniciar_informe_sla",
-    "procesar_informe_sla",
-    "actualizar_plantilla_sla",
-    "agregar_destinatario",
-    "eliminar_destinatario",
-    "listar_destinatarios",
-    "listar_destinatarios_por_carrier",
-    "agregar_carrier",
-    "eliminar_carrier",
-    "listar_carriers",
-    "actualizar_carrier",
-    "registrar_tarea_programada",
-    "ingresar_tarea",
-    "listar_tareas",
-    "detectar_tarea_mail",
-    "procesar_correos",
-    "reenviar_aviso",
-    "supermenu",
-    "listar_servicios",
-    "listar_reclamos",
-    "listar_camaras",
-    "depurar_duplicados",
-    "listar_clientes",
-    "listar_carriers_cdb",
-    "listar_conversaciones",
-    "listar_ingresos",
-    "listar_tareas_programadas",
-    "listar_tareas_servicio",
-]
+from __future__ import annotations
+
+import importlib
+from typing import Any, Callable
+
+# Nombre público → (submódulo, atributo dentro del submódulo)
+_REGISTRO: dict[str, tuple[str, str]] = {
+    "start_handler": ("start", "start_handler"),
+    "callback_handler": ("callback", "callback_handler"),
+    "message_handler": ("message", "message_handler"),
+    "document_handler": ("document", "document_handler"),
+    "voice_handler": ("voice", "voice_handler"),
+    "iniciar_verificacion_ingresos": ("ingresos", "iniciar_verificacion_ingresos"),
+    "procesar_ingresos": ("ingresos", "procesar_ingresos"),
+    "iniciar_registro_ingresos": ("registro_ingresos", "iniciar_registro_ingresos"),
+    "guardar_registro": ("registro_ingresos", "guardar_registro"),
+    "procesar_repetitividad": ("repetitividad", "procesar_repetitividad"),
+    "iniciar_comparador": ("comparador", "iniciar_comparador"),
+    "recibir_tracking": ("comparador", "recibir_tracking"),
+    "procesar_comparacion": ("comparador", "procesar_comparacion"),
+    "iniciar_carga_tracking": ("cargar_tracking", "iniciar_carga_tracking"),
+    "guardar_tracking_servicio": ("cargar_tracking", "guardar_tracking_servicio"),
+    "iniciar_descarga_tracking": ("descargar_tracking", "iniciar_descarga_tracking"),
+    "enviar_tracking_servicio": ("descargar_tracking", "enviar_tracking_servicio"),
+    "iniciar_descarga_camaras": ("descargar_camaras", "iniciar_descarga_camaras"),
+    "enviar_camaras_servicio": ("descargar_camaras", "enviar_camaras_servicio"),
+    "iniciar_envio_camaras_mail": ("enviar_camaras_mail", "iniciar_envio_camaras_mail"),
+    "procesar_envio_camaras_mail": (
+        "enviar_camaras_mail",
+        "procesar_envio_camaras_mail",
+    ),
+    "iniciar_identificador_carrier": ("id_carrier", "iniciar_identificador_carrier"),
+    "procesar_identificador_carrier": ("id_carrier", "procesar_identificador_carrier"),
+    "iniciar_identificador_tarea": (
+        "identificador_tarea",
+        "iniciar_identificador_tarea",
+    ),
+    "procesar_identificador_tarea": (
+        "identificador_tarea",
+        "procesar_identificador_tarea",
+    ),
+    "iniciar_incidencias": ("incidencias", "iniciar_incidencias"),
+    "procesar_incidencias": ("incidencias", "procesar_incidencias"),
+    "iniciar_informe_sla": ("informe_sla", "iniciar_informe_sla"),
+    "procesar_informe_sla": ("informe_sla", "procesar_informe_sla"),
+    "actualizar_plantilla_sla": ("informe_sla", "actualizar_plantilla_sla"),
+    "agregar_destinatario": ("destinatarios", "agregar_destinatario"),
+    "eliminar_destinatario": ("destinatarios", "eliminar_destinatario"),
+    "listar_destinatarios": ("destinatarios", "listar_destinatarios"),
+    "listar_destinatarios_por_carrier": (
+        "destinatarios",
+        "listar_destinatarios_por_carrier",
+    ),
+    "agregar_carrier": ("carriers", "agregar_carrier"),
+    "eliminar_carrier": ("carriers", "eliminar_carrier"),
+    "listar_carriers": ("carriers", "listar_carriers"),
+    "actualizar_carrier": ("carriers", "actualizar_carrier"),
+    "registrar_tarea_programada": ("tarea_programada", "registrar_tarea_programada"),
+    "ingresar_tarea": ("ingresar_tarea", "ingresar_tarea"),
+    "listar_tareas": ("listar_tareas", "listar_tareas"),
+    "detectar_tarea_mail": ("detectar_tarea_mail", "detectar_tarea_mail"),
+    "procesar_correos": ("procesar_correos", "procesar_correos"),
+    "reenviar_aviso": ("reenviar_aviso", "reenviar_aviso"),
+    "supermenu": ("supermenu", "supermenu"),
+    "listar_servicios": ("supermenu", "listar_servicios"),
+    "listar_reclamos": ("supermenu", "listar_reclamos"),
+    "listar_camaras": ("supermenu", "listar_camaras"),
+    "depurar_duplicados": ("supermenu", "depurar_duplicados"),
+    "listar_clientes": ("supermenu", "listar_clientes"),
+    "listar_carriers_cdb": ("supermenu", "listar_carriers"),
+    "listar_conversaciones": ("supermenu", "listar_conversaciones"),
+    "listar_ingresos": ("supermenu", "listar_ingresos"),
+    "listar_tareas_programadas": ("supermenu", "listar_tareas_programadas"),
+    "listar_tareas_servicio": ("supermenu", "listar_tareas_servicio"),
+    "navegar_listado": ("supermenu", "navegar_listado"),
+}
+
+__all__ = list(_REGISTRO)
+
+# Handlers que atienden updates de cualquier flujo; en las métricas se
+# etiquetan con el modo del usuario en lugar de su submódulo
+_GENERICOS = {"callback_handler", "message_handler", "document_handler", "voice_handler"}
+
+# Handlers ya importados. No se usa ``globals()`` como cache porque varios
+# nombres coinciden con su submódulo (``supermenu``, ``listar_tareas``...) y
+# al importarlo Python reemplaza el atributo del paquete por el módulo.
+_RESUELTOS: dict[str, Any] = {}
+
+
+def _resolver(nombre: str) -> Any:
+    """Importa el submódulo que define ``nombre`` y devuelve el handler."""
+    try:
+        return _RESUELTOS[nombre]
+    except KeyError:
+        pass
+    try:
+        modulo, atributo = _REGISTRO[nombre]
+    except KeyError:
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {nombre!r}"
+        ) from None
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), atributo)
+    _RESUELTOS[nombre] = valor
+    return valor
+
+
+def __getattr__(nombre: str) -> Any:
+    """Carga perezosa de los handlers (PEP 562)."""
+    return _resolver(nombre)
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+def diferido(nombre: str) -> Callable:
+    """Devuelve un callback que importa el handler ``nombre`` en su primer uso.
+
+    Se utiliza al registrar los handlers en :class:`~sandybot.bot.SandyBot`
+    para que el arranque no dependa de las bibliotecas de cada flujo.
+    """
+    if nombre not in _REGISTRO:
+        raise AttributeError(f"Handler desconocido: {nombre}")
+
+    async def _callback(update, context):
+        return await _resolver(nombre)(update, context)
+
+    _callback.__name__ = nombre
+    _callback.__qualname__ = nombre
+    # Submódulo del handler, usado como etiqueta de flujo en las métricas
+    _callback.flujo = _REGISTRO[nombre][0]
+    if nombre in _GENERICOS:
+        _callback.flujo_dinamico = flujo_del_usuario
+    return _callback
+
+
+def flujo_del_usuario(update) -> str | None:
+    """Modo de :class:`~sandybot.handlers.estado.UserState` del autor de ``update``.
+
+    Devuelve ``None`` si el update no tiene usuario o si no hay un flujo en curso.
+    """
+    usuario = getattr(update, "effective_user", None)
+    if usuario is None:
+        return None
+    from .estado import UserState
+
+    return UserState.get_mode(usuario.id) or None
@@ -13,14 +13,12 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 from .estado import UserState
-from .ingresos import iniciar_verificacion_ingresos
-from .repetitividad import iniciar_repetitividad
-from .comparador import iniciar_comparador, procesar_comparacion
-from .cargar_tracking import iniciar_carga_tracking, guardar_tracking_servicio
 from ..database import obtener_servicio
 from ..registrador import registrar_conversacion
 from ..utils import obtener_mensaje  # Si se necesitara en el futuro
-from .message import _ejecutar_accion_natural, _nombre_flujo
+
+# Los handlers de cada flujo se importan dentro de su rama para que un
+# botón no cargue las dependencias de los demás (pandas, docx, geopandas).
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +35,7 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         flujo = context.user_data.pop("confirmar_flujo", None)
         registrar_conversacion(user_id, "confirmar_flujo_si", "Confirmar", "callback")
         if flujo:
+            from .message import _ejecutar_accion_natural, _nombre_flujo
             await query.edit_message_text(
                 f"Iniciando { _nombre_flujo(flujo) }..."
             )
@@ -60,8 +59,15 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text("Listo.")
         return
 
+    # ─────────────────────── LISTADOS CDB DEL SUPERMENU ─────────────────────
+    if data.startswith("cdb:"):
+        from .supermenu import navegar_listado
+        await navegar_listado(update, context)
+        return
+
     # ───────────────────────────── COMPARADOR FO ────────────────────────────
     if data == "comparar_fo":
+        from .comparador import iniciar_comparador
         UserState.set_mode(user_id, "comparador")
         context.user_data.clear()
         registrar_conversacion(user_id, "boton_comparar_fo", "Inicio comparador", "callback")
@@ -69,6 +75,7 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # ─────────────────────────── VERIFICACIÓN INGRESOS ──────────────────────
     elif data == "verificar_ingresos":
+        from .ingresos import iniciar_verificacion_ingresos
         registrar_conversacion(user_id, "boton_verificar_ingresos", "Inicio ingresos", "callback")
         await iniciar_verificacion_ingresos(update, context)
 
@@ -89,12 +96,14 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # ─────────────────────── INFORME DE REPETITIVIDAD ──────────────────────
     elif data == "informe_repetitividad":
+        from .repetitividad import iniciar_repetitividad
         UserState.set_mode(user_id, "repetitividad")
         registrar_conversacion(user_id, "boton_informe_repetitividad", "Inicio repetitividad", "callback")
         await iniciar_repetitividad(update, context)
 
     # ─────────────────────────── TRACKINGS SERVICIO ─────────────────────────
     elif data == "cargar_tracking":
+        from .cargar_tracking import iniciar_carga_tracking
         registrar_conversacion(user_id, "boton_cargar_tracking", "Inicio carga tracking", "callback")
         await iniciar_carga_tracking(update, context)
 
@@ -170,6 +179,7 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data["tipo_tracking"] = (
             "principal" if data == "tracking_principal" else "complementario"
         )
+        from .cargar_tracking import guardar_tracking_servicio
         registrar_conversacion(user_id, data, "Elegir tipo", "callback")
         await guardar_tracking_servicio(update, context)
 
@@ -233,6 +243,7 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await query.edit_message_text("Ese servicio no posee tracking. Debés enviar el archivo .txt.")
 
     elif data == "comparador_procesar":
+        from .comparador import procesar_comparacion
         registrar_conversacion(user_id, "comparador_procesar", "Procesar", "callback")
         await procesar_comparacion(update, context)
 
@@ -14,6 +14,7 @@ from ..config import config
 from ..database import actualizar_tracking, obtener_servicio, crear_servicio
 from .estado import UserState
 from ..registrador import responder_registrando
+from ..trazas import span
 
 logger = logging.getLogger(__name__)
 
@@ -62,7 +63,8 @@ async def guardar_tracking_servicio(update: Update, context: ContextTypes.DEFAUL
 
         archivo = await documento.get_file()
         ruta_temp = config.DATA_DIR / f"tmp_{documento.file_unique_id}.txt"
-        await archivo.download_to_drive(str(ruta_temp))
+        with span("telegram.descarga"):
+            await archivo.download_to_drive(str(ruta_temp))
 
         archivos = context.user_data.setdefault("tracking_files", [])
         match = re.search(r"_(\d+)", documento.file_name)
@@ -21,6 +21,7 @@ from sandybot.config import config
 import shutil
 from .estado import UserState
 from ..registrador import responder_registrando, registrar_conversacion
+from ..trazas import span
 
 logger = logging.getLogger(__name__)
 
@@ -100,7 +101,8 @@ async def recibir_tracking(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
         archivo = await documento.get_file()
         with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp:
-            await archivo.download_to_drive(tmp.name)
+            with span("telegram.descarga"):
+                await archivo.download_to_drive(tmp.name)
 
         ruta_destino = config.DATA_DIR / f"tracking_{servicio}.txt"
         rutas_extra = []
@@ -13,8 +13,9 @@ from telegram.ext import ContextTypes
 
 from ..email_utils import procesar_correo_a_tarea
 from ..registrador import responder_registrando
+from ..trazas import span
 from ..utils import obtener_mensaje
-from .procesar_correos import _leer_msg
+from .procesar_correos import leer_correos
 
 logger = logging.getLogger(__name__)
 
@@ -47,12 +48,13 @@ async def detectar_tarea_mail(
     if mensaje.document:
         archivo = await mensaje.document.get_file()
         with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            await archivo.download_to_drive(tmp.name)
+            with span("telegram.descarga"):
+                await archivo.download_to_drive(tmp.name)
             ruta = tmp.name
         try:
             nombre = (mensaje.document.file_name or "").lower()
             if nombre.endswith(".msg"):
-                contenido = _leer_msg(ruta)
+                contenido = (await leer_correos([ruta]))[0].texto
             else:
                 contenido = Path(ruta).read_text(encoding="utf-8", errors="ignore")
         except Exception as e:
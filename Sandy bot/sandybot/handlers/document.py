@@ -7,12 +7,6 @@ Handler para el procesamiento de documentos.
 from telegram import Update
 from telegram.ext import ContextTypes
 from .estado import UserState
-from .repetitividad import procesar_repetitividad
-from .comparador import recibir_tracking
-from .cargar_tracking import guardar_tracking_servicio
-from .ingresos import procesar_ingresos
-from .id_carrier import procesar_identificador_carrier
-from .incidencias import procesar_incidencias
 
 async def manejar_documento(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -28,12 +22,15 @@ async def manejar_documento(update: Update, context: ContextTypes.DEFAULT_TYPE)
         user_id = update.message.from_user.id
         mode = UserState.get_mode(user_id)
         if mode == "repetitividad":
+            from .repetitividad import procesar_repetitividad
             await procesar_repetitividad(update, context)
             return
         if mode == "comparador":
+            from .comparador import recibir_tracking
             await recibir_tracking(update, context)
             return
         if mode == "cargar_tracking":
+            from .cargar_tracking import guardar_tracking_servicio
             await guardar_tracking_servicio(update, context)
             return
         if mode == "ingresos":
@@ -41,9 +38,11 @@ async def manejar_documento(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 from .ingresos import procesar_ingresos_excel
                 await procesar_ingresos_excel(update, context)
             else:
+                from .ingresos import procesar_ingresos
                 await procesar_ingresos(update, context)
             return
         if mode == "id_carrier":
+            from .id_carrier import procesar_identificador_carrier
             await procesar_identificador_carrier(update, context)
             return
         if mode == "identificador_tarea":
@@ -51,6 +50,7 @@ async def manejar_documento(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await procesar_identificador_tarea(update, context)
             return
         if mode == "incidencias":
+            from .incidencias import procesar_incidencias
             await procesar_incidencias(update, context)
             return
         if mode == "informe_sla":
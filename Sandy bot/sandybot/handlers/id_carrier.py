@@ -14,6 +14,7 @@ from ..utils import obtener_mensaje
 from ..database import SessionLocal, Servicio, Carrier, registrar_servicio
 from .estado import UserState
 from ..registrador import responder_registrando, registrar_conversacion
+from ..trazas import span
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +62,8 @@ async def procesar_identificador_carrier(
 
     file = await documento.get_file()
     with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
-        await file.download_to_drive(tmp.name)
+        with span("telegram.descarga"):
+            await file.download_to_drive(tmp.name)
 
     try:
         df = pd.read_excel(tmp.name)
@@ -144,7 +146,8 @@ async def procesar_identificador_carrier(
             tempfile.gettempdir(),
             f"identificador_carrier_{mensaje.from_user.id}.xlsx",
         )
-        df.to_excel(salida, index=False)
+        with span("excel.id_carrier"):
+            df.to_excel(salida, index=False)
 
         with open(salida, "rb") as f:
             await mensaje.reply_document(f, filename=os.path.basename(salida))
@@ -16,9 +16,10 @@ from telegram.helpers import escape_markdown
 
 from ..email_utils import procesar_correo_a_tarea
 from ..registrador import responder_registrando
+from ..trazas import span
 from ..utils import obtener_mensaje
 from .estado import UserState
-from .procesar_correos import _leer_msg
+from .procesar_correos import leer_correos
 
 logger = logging.getLogger(__name__)
 
@@ -62,12 +63,13 @@ async def procesar_identificador_tarea(
     nombre = mensaje.document.file_name or ""
     archivo = await mensaje.document.get_file()
     with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        await archivo.download_to_drive(tmp.name)
+        with span("telegram.descarga"):
+            await archivo.download_to_drive(tmp.name)
         ruta = tmp.name
 
     try:
         if nombre.lower().endswith(".msg"):
-            contenido = _leer_msg(ruta)
+            contenido = (await leer_correos([ruta]))[0].texto
             if not contenido:
                 await responder_registrando(
                     mensaje,
@@ -141,20 +143,14 @@ async def procesar_identificador_tarea(
     carrier_nombre = "Sin carrier"
     servicios_txt = ""
     if tarea.carrier_id:
-        from ..database import Carrier, Servicio, SessionLocal, TareaServicio
+        from ..database import Carrier, Servicio, SessionLocal, servicios_de_tarea
 
         with SessionLocal() as s:
             car = s.get(Carrier, tarea.carrier_id)
             if car:
                 carrier_nombre = car.nombre
-            servicios_ids = [
-                ts.servicio_id
-                for ts in s.query(TareaServicio).filter(
-                    TareaServicio.tarea_id == tarea.id
-                )
-            ]
             servicios_pares = []
-            for sid in servicios_ids:
+            for sid in servicios_de_tarea(tarea.id):
                 srv = s.get(Servicio, sid)
                 if srv:
                     propio = str(srv.id) if srv.id else ""
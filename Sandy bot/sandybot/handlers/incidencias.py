@@ -16,6 +16,7 @@ from ..gpt_handler import gpt
 from ..utils import obtener_mensaje
 from .estado import UserState
 from ..registrador import responder_registrando
+from ..trazas import span
 
 logger = logging.getLogger(__name__)
 
@@ -78,7 +79,8 @@ async def procesar_incidencias(update: Update, context: ContextTypes.DEFAULT_TYP
     sufijo = ".docx" if nombre.endswith(".docx") else ".doc"
     with tempfile.NamedTemporaryFile(delete=False, suffix=sufijo) as tmp:
 
-        await archivo.download_to_drive(tmp.name)
+        with span("telegram.descarga"):
+            await archivo.download_to_drive(tmp.name)
         ruta_doc = tmp.name
 
     try:
@@ -105,13 +107,10 @@ async def procesar_incidencias(update: Update, context: ContextTypes.DEFAULT_TYP
         context.user_data.setdefault("principal", []).append(texto)
 
     texto_principal = "\n".join(context.user_data.get("principal", []))
-    if context.user_data.get("contexto"):
-        texto_total = texto_principal + "\n" + "\n".join(context.user_data["contexto"])
-    else:
-        texto_total = texto_principal
+    texto_contexto = "\n".join(context.user_data.get("contexto", [])) or None
 
     try:
-        datos = await gpt.analizar_incidencias(texto_total)
+        datos = await gpt.analizar_incidencias(texto_principal, contexto=texto_contexto)
         if not datos:
             raise ValueError("JSON inválido")
     except Exception as e:
@@ -140,7 +139,9 @@ async def procesar_incidencias(update: Update, context: ContextTypes.DEFAULT_TYP
     for linea in lineas:
         doc_salida.add_paragraph(linea)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_out:
+    with span("docx.incidencias"), tempfile.NamedTemporaryFile(
+        delete=False, suffix=".docx"
+    ) as tmp_out:
         doc_salida.save(tmp_out.name)
         ruta_salida = tmp_out.name
 
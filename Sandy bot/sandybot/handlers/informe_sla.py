@@ -39,6 +39,7 @@ from ..utils import (
 from .estado import UserState
 from ..registrador import responder_registrando, registrar_conversacion
 from .. import database as bd
+from ..trazas import span, trazar
 
 # Plantilla
 RUTA_PLANTILLA = config.SLA_PLANTILLA_PATH
@@ -234,7 +235,8 @@ async def procesar_informe_sla(
         for doc in docs:
             tmp_fd, tmp_path = tempfile.mkstemp(suffix=".xlsx")
             os.close(tmp_fd)
-            await (await doc.get_file()).download_to_drive(tmp_path)
+            with span("telegram.descarga"):
+                await (await doc.get_file()).download_to_drive(tmp_path)
 
             try:
                 tipo = identificar_excel(tmp_path)
@@ -301,7 +303,8 @@ async def actualizar_plantilla_sla(mensaje, context):
             config.SLA_HISTORIAL_DIR.mkdir(parents=True, exist_ok=True)
             shutil.move(RUTA_PLANTILLA, config.SLA_HISTORIAL_DIR / nombre_backup)
 
-        await f.download_to_drive(RUTA_PLANTILLA)
+        with span("telegram.descarga"):
+            await f.download_to_drive(RUTA_PLANTILLA)
         texto = "Plantilla de SLA actualizada."
         context.user_data.pop("cambiar_plantilla", None)
     except Exception as exc:  # pragma: no cover
@@ -312,6 +315,7 @@ async def actualizar_plantilla_sla(mensaje, context):
 
 
 # ───────────────────────── GENERADOR DE INFORME ─────────────────────────
+@trazar("docx.informe_sla")
 def _generar_documento_sla(
     reclamos_xlsx: str,
     servicios_xlsx: str,
@@ -19,6 +19,7 @@ from ..config import config
 import shutil
 from .estado import UserState
 from ..registrador import responder_registrando
+from ..trazas import span
 
 logger = logging.getLogger(__name__)
 
@@ -223,7 +224,8 @@ async def procesar_ingresos(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
         archivo = await documento.get_file()
         with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp:
-            await archivo.download_to_drive(tmp.name)
+            with span("telegram.descarga"):
+                await archivo.download_to_drive(tmp.name)
 
         destino = config.DATA_DIR / f"ingresos_{id_servicio}_{documento.file_name}"
         shutil.move(tmp.name, destino)
@@ -339,7 +341,8 @@ async def procesar_ingresos_excel(
 
         archivo = await documento.get_file()
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
-            await archivo.download_to_drive(tmp.name)
+            with span("telegram.descarga"):
+                await archivo.download_to_drive(tmp.name)
 
         try:
             df = pd.read_excel(tmp.name, header=None)
@@ -14,12 +14,42 @@ from ..database import (
     Carrier,
     SessionLocal,
     obtener_proxima_tarea,
+    tareas_en_curso,
 )
-from sqlalchemy import func, cast, String
+from sqlalchemy import JSON, func, select
+from sqlalchemy.dialects.postgresql import array_agg
+
+# Cantidad de tareas por mensaje; el resto se pide con ``pagina=N``
+TAREAS_POR_PAGINA = 50
+
+
+def _servicios_agregados(dialecto: str):
+    """Lista de IDs de servicio por tarea devuelta como arreglo por la base.
+
+    PostgreSQL entrega un ``ARRAY`` y SQLite un arreglo JSON que SQLAlchemy
+    decodifica; en ambos casos se recibe una lista de enteros.
+    """
+    if dialecto == "postgresql":
+        return array_agg(TareaServicio.servicio_id)
+    return func.json_group_array(TareaServicio.servicio_id, type_=JSON)
+
+
+def _formatear(filas) -> list[str]:
+    return [
+        f"{ini:%Y-%m-%d %H:%M} - {fin:%Y-%m-%d %H:%M} {tipo} "
+        f"(servicios: {', '.join(map(str, ids))})"
+        for _, ini, fin, tipo, ids in filas
+    ]
 
 
 async def listar_tareas(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Muestra las tareas programadas aplicando filtros opcionales."""
+    """Muestra las tareas programadas aplicando filtros opcionales.
+
+    Los resultados se paginan de a :data:`TAREAS_POR_PAGINA`; la página se
+    elige con el argumento ``pagina=N``. Una página con muchos servicios por
+    tarea puede superar el largo de un mensaje de Telegram:
+    :func:`~sandybot.registrador.responder_registrando` la envía en partes.
+    """
     mensaje = obtener_mensaje(update)
     if not mensaje:
         return
@@ -31,10 +61,13 @@ async def listar_tareas(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     fecha_inicio = None
     fecha_fin = None
     carrier_nombre = None
+    pagina = 1
+    filtros = []
 
     for arg in context.args:
         if arg.isdigit():
             servicio_id = int(arg)
+            filtros.append(arg)
             continue
         try:
             fecha = datetime.fromisoformat(arg)
@@ -42,71 +75,99 @@ async def listar_tareas(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
                 fecha_inicio = fecha
             else:
                 fecha_fin = fecha
+            filtros.append(arg)
             continue
         except ValueError:
+            if arg.startswith("pagina="):
+                valor = arg.split("=", 1)[1]
+                pagina = max(int(valor), 1) if valor.isdigit() else 1
+                continue
+            filtros.append(arg)
             if arg.startswith("carrier="):
                 carrier_nombre = arg.split("=", 1)[1]
             elif not cliente:
                 cliente = arg
 
+    # Vínculos tarea-servicio que cuentan para el filtro; los mismos se usan
+    # para elegir las tareas y para listar sus servicios
+    vinculo = []
+    if servicio_id is not None:
+        vinculo.append(TareaServicio.servicio_id == servicio_id)
+    if cliente:
+        # ``EXISTS`` correlacionado: se resuelve por la clave primaria del
+        # servicio de cada vínculo, sin recorrer todos los del cliente
+        vinculo.append(
+            select(Servicio.id)
+            .where(Servicio.id == TareaServicio.servicio_id, Servicio.cliente == cliente)
+            .exists()
+        )
+
+    # Un servicio puntual tiene pocas tareas: se parte de sus vínculos. En
+    # los demás casos se recorre el índice por fecha y se corta al completar
+    # la página, comprobando cada tarea con ``EXISTS``. La cache de
+    # ``database.mantenimientos_servicio`` no sirve aquí: solo guarda las
+    # tareas que no terminaron y el listado incluye el historial completo.
+    if servicio_id is not None:
+        con_servicios = TareaProgramada.id.in_(
+            select(TareaServicio.tarea_id).where(*vinculo)
+        )
+    else:
+        con_servicios = (
+            select(TareaServicio.id)
+            .where(TareaServicio.tarea_id == TareaProgramada.id, *vinculo)
+            .exists()
+        )
+    # Se pide una fila extra para saber si existe otra página
+    consulta = select(
+        TareaProgramada.id,
+        TareaProgramada.fecha_inicio,
+        TareaProgramada.fecha_fin,
+        TareaProgramada.tipo_tarea,
+    ).where(con_servicios)
+    if fecha_inicio:
+        consulta = consulta.where(TareaProgramada.fecha_inicio >= fecha_inicio)
+    if fecha_fin:
+        consulta = consulta.where(TareaProgramada.fecha_fin <= fecha_fin)
+    if carrier_nombre:
+        consulta = consulta.join(
+            Carrier, TareaProgramada.carrier_id == Carrier.id
+        ).where(Carrier.nombre == carrier_nombre)
+    consulta = (
+        consulta.order_by(TareaProgramada.fecha_inicio, TareaProgramada.id)
+        .offset((pagina - 1) * TAREAS_POR_PAGINA)
+        .limit(TAREAS_POR_PAGINA + 1)
+    )
+
     with SessionLocal() as session:
-        dialect = session.bind.dialect.name
-        if dialect == "sqlite":
-            agg = func.group_concat(TareaServicio.servicio_id, ",")
-        else:
-            agg = func.string_agg(cast(TareaServicio.servicio_id, String), ",")
-
-        consulta = session.query(
-            TareaProgramada.id,
-            TareaProgramada.fecha_inicio,
-            TareaProgramada.fecha_fin,
-            TareaProgramada.tipo_tarea,
-            agg.label("servicios"),
-        ).join(TareaServicio)
-
-        if servicio_id is not None:
-            consulta = consulta.filter(TareaServicio.servicio_id == servicio_id)
-        if cliente:
-            consulta = consulta.join(Servicio).filter(Servicio.cliente == cliente)
-        if fecha_inicio:
-            consulta = consulta.filter(TareaProgramada.fecha_inicio >= fecha_inicio)
-        if fecha_fin:
-            consulta = consulta.filter(TareaProgramada.fecha_fin <= fecha_fin)
-        if carrier_nombre:
-            consulta = consulta.join(
-                Carrier, TareaProgramada.carrier_id == Carrier.id
-            ).filter(Carrier.nombre == carrier_nombre)
-
-        # Agrupamos + ordenamos en un solo paso
-        filas = (
-            consulta.group_by(
-                TareaProgramada.id,
-                TareaProgramada.fecha_inicio,
-                TareaProgramada.fecha_fin,
-                TareaProgramada.tipo_tarea,
+        tareas = session.execute(consulta).all()
+        hay_mas = len(tareas) > TAREAS_POR_PAGINA
+        tareas = tareas[:TAREAS_POR_PAGINA]
+        # Los servicios se agregan solo para las tareas de la página, por
+        # búsqueda directa en el índice de ``tarea_id``. Con un servicio
+        # puntual el vínculo ya deja uno solo por tarea: no hace falta consultar
+        servicios = {}
+        if tareas and servicio_id is not None:
+            servicios = {t.id: [servicio_id] for t in tareas}
+        elif tareas:
+            servicios = dict(
+                session.execute(
+                    select(
+                        TareaServicio.tarea_id,
+                        _servicios_agregados(session.bind.dialect.name),
+                    )
+                    .where(TareaServicio.tarea_id.in_([t.id for t in tareas]), *vinculo)
+                    .group_by(TareaServicio.tarea_id)
+                ).all()
             )
-            .order_by(TareaProgramada.fecha_inicio)
-            .all()
-        )
 
-        if not filas:
-            texto = "No se encontraron tareas."
-        else:
-            tareas_map: dict[int, list[int]] = {}
-            info_map: dict[int, tuple] = {}
-            for tid, ini, fin, tipo, ids in filas:
-                lista = [int(x) for x in ids.split(",") if x]
-                tareas_map[tid] = lista
-                info_map[tid] = (ini, fin, tipo)
-
-            lineas = []
-            for tid in sorted(info_map, key=lambda i: info_map[i][0]):
-                ini, fin, tipo = info_map[tid]
-                ids_txt = ", ".join(str(i) for i in tareas_map[tid])
-                lineas.append(
-                    f"{ini:%Y-%m-%d %H:%M} - {fin:%Y-%m-%d %H:%M} {tipo} (servicios: {ids_txt})"
-                )
-            texto = "\n".join(lineas)
+    lineas = _formatear((*t, servicios.get(t.id, [])) for t in tareas)
+    if not lineas:
+        texto = "No se encontraron tareas."
+    else:
+        if hay_mas:
+            siguiente = " ".join(filtros + [f"pagina={pagina + 1}"])
+            lineas.append(f"\nHay más tareas: /listar_tareas {siguiente}")
+        texto = "\n".join(lineas)
 
     await responder_registrando(
         mensaje,
@@ -126,16 +187,7 @@ async def mostrar_tareas(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id
     ahora = datetime.utcnow()
 
-    with SessionLocal() as session:
-        en_curso = (
-            session.query(TareaProgramada)
-            .filter(
-                TareaProgramada.fecha_inicio <= ahora,
-                TareaProgramada.fecha_fin >= ahora,
-            )
-            .order_by(TareaProgramada.fecha_inicio)
-            .all()
-        )
+    en_curso = tareas_en_curso(ahora)
 
     if en_curso:
         lineas = [
@@ -9,18 +9,9 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from ..gpt_handler import gpt
 from ..database import obtener_servicio, crear_servicio
-from ..registrador import responder_registrando
+from ..registrador import responder_en_vivo, responder_registrando
 import os
 from .estado import UserState
-from .notion import registrar_accion_pendiente
-from .ingresos import verificar_camara, iniciar_verificacion_ingresos
-from .comparador import iniciar_comparador
-from .cargar_tracking import (
-    guardar_tracking_servicio,
-    iniciar_carga_tracking,
-)
-from .repetitividad import iniciar_repetitividad
-from .id_carrier import iniciar_identificador_carrier
 from ..utils import normalizar_texto
 from difflib import SequenceMatcher
 
@@ -218,6 +209,7 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     )
                     return
                 context.user_data.pop("confirmar_id", None)
+                from .cargar_tracking import guardar_tracking_servicio
                 await guardar_tracking_servicio(update, context)
             else:
                 await responder_registrando(
@@ -306,6 +298,7 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await _manejar_opcion_ingresos(update, context, mensaje_usuario)
                 return
             if context.user_data.get("opcion_ingresos") == "nombre":
+                from .ingresos import verificar_camara
                 await verificar_camara(update, context)
                 return
             if context.user_data.get("opcion_ingresos") == "excel":
@@ -344,15 +337,14 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Actualizar contador de interacciones
         puntaje = UserState.increment_interaction(user_id)
 
-        # Procesar respuesta con GPT ajustando el tono según el puntaje
+        # Procesar respuesta con GPT ajustando el tono según el puntaje.
+        # La respuesta se transmite editando el mensaje a medida que llega.
         prompt_con_tono = _generar_prompt_por_animo(mensaje_usuario, puntaje)
-        respuesta = await gpt.consultar_gpt(prompt_con_tono)
-
-        await responder_registrando(
+        await responder_en_vivo(
             update.message,
             user_id,
             mensaje_usuario,
-            respuesta,
+            gpt.consultar_gpt_stream(prompt_con_tono),
             intencion,
         )
 
@@ -375,6 +367,7 @@ async def _manejar_detalle_pendiente(update: Update, context: ContextTypes.DEFAU
         # Limpiar bandera de flujo manual si existe
         context.user_data.pop("nueva_solicitud", None)
 
+        from .notion import registrar_accion_pendiente
         await registrar_accion_pendiente(mensajes, user_id)
         UserState.set_waiting_detail(user_id, False)
         await responder_registrando(
@@ -671,12 +664,15 @@ async def _ejecutar_accion_natural(
     continuar con el flujo de conversación por defecto.
     """
     if accion == "comparar_fo":
+        from .comparador import iniciar_comparador
         await iniciar_comparador(update, context)
         return True
     elif accion == "verificar_ingresos":
+        from .ingresos import iniciar_verificacion_ingresos
         await iniciar_verificacion_ingresos(update, context)
         return True
     elif accion == "cargar_tracking":
+        from .cargar_tracking import iniciar_carga_tracking
         await iniciar_carga_tracking(update, context)
         return True
     elif accion == "descargar_tracking":
@@ -692,6 +688,7 @@ async def _ejecutar_accion_natural(
         await iniciar_envio_camaras_mail(update, context)
         return True
     elif accion == "id_carrier":
+        from .id_carrier import iniciar_identificador_carrier
         await iniciar_identificador_carrier(update, context)
         return True
     elif accion == "identificador_tarea":
@@ -699,6 +696,7 @@ async def _ejecutar_accion_natural(
         await iniciar_identificador_tarea(update, context)
         return True
     elif accion == "informe_repetitividad":
+        from .repetitividad import iniciar_repetitividad
         await iniciar_repetitividad(update, context)
         return True
     elif accion == "analizar_incidencias":
@@ -3,43 +3,219 @@
 # User-provided custom instructions
 """
 Integración con Notion para registro de acciones pendientes
+
+Las solicitudes no se envían a Notion dentro del handler: se guardan en una
+bandeja de salida persistente (``config.NOTION_PENDIENTES_FILE``) y una tarea
+de fondo las crea con el cliente asíncrono. Si Notion falla o tarda, la
+solicitud queda en la bandeja y se reintenta con esperas crecientes, también
+después de reiniciar el bot.
 """
+import asyncio
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import List
-from notion_client import Client as NotionClient
+from pathlib import Path
+from typing import List, Optional
 from ..config import config
-from ..utils import cargar_json, guardar_json
+from ..metricas import registro
+from ..utils import cargar_json, guardar_json_atomico, reservar_numero
 
 logger = logging.getLogger(__name__)
-notion = NotionClient(auth=config.NOTION_TOKEN)
 
-async def registrar_accion_pendiente(mensajes_usuario: List[str], telegram_id: int) -> None:
+_notion = None
+
+
+def _cliente():
+    """Cliente asíncrono de Notion, creado en el primer envío."""
+    global _notion
+    if _notion is None:
+        from notion_client import AsyncClient
+
+        _notion = AsyncClient(auth=config.NOTION_TOKEN)
+    return _notion
+
+
+def _es_permanente(error: Exception) -> bool:
+    """Errores que no se resuelven reintentando (la página es inválida)."""
+    return getattr(error, "status", None) == 400
+
+
+class BandejaNotion:
+    """Bandeja de salida de páginas pendientes de crear en Notion.
+
+    Cada entrada se guarda en disco antes de intentar enviarla y se borra
+    recién cuando Notion confirma la creación. ``iniciar`` arranca la tarea
+    que la vacía al recibir ``avisar`` o cada ``intervalo`` segundos;
+    ``detener`` hace un último intento antes de terminar.
+    """
+
+    def __init__(self, ruta: Path, intervalo: float = 60, espera_maxima: float = 3600) -> None:
+        self.ruta = Path(ruta)
+        self.intervalo = intervalo
+        self.espera_maxima = espera_maxima
+        # ``agregar`` y los cambios de estado corren en hilos (``to_thread``)
+        self._lock = threading.Lock()
+        # Claves que se están enviando, para no crear dos veces la misma página
+        self._enviando: set[str] = set()
+        self._hay_trabajo: Optional[asyncio.Event] = None
+        self._tarea: Optional[asyncio.Task] = None
+        self._cerrando = False
+
+    @property
+    def activo(self) -> bool:
+        return self._tarea is not None and not self._tarea.done()
+
+    # ───────────────────────── Persistencia ─────────────────────────
+    def pendientes(self) -> dict:
+        with self._lock:
+            return cargar_json(self.ruta)
+
+    def agregar(self, clave: str, entrada: dict) -> None:
+        with self._lock:
+            datos = cargar_json(self.ruta)
+            datos[clave] = {"entrada": entrada, "intentos": 0, "proximo": 0, "error": None}
+            guardar_json_atomico(datos, self.ruta)
+
+    def _quitar(self, clave: str) -> None:
+        with self._lock:
+            datos = cargar_json(self.ruta)
+            if datos.pop(clave, None) is not None:
+                guardar_json_atomico(datos, self.ruta)
+
+    def _marcar_fallo(self, clave: str, error: str) -> None:
+        with self._lock:
+            datos = cargar_json(self.ruta)
+            item = datos.get(clave)
+            if item is None:
+                return
+            item["intentos"] += 1
+            item["error"] = error
+            espera = min(self.intervalo * 2 ** (item["intentos"] - 1), self.espera_maxima)
+            item["proximo"] = time.time() + espera
+            guardar_json_atomico(datos, self.ruta)
+
+    # ─────────────────────────── Envío ───────────────────────────
+    async def enviar_pendientes(self) -> int:
+        """Crea en Notion las entradas cuyo reintento ya venció.
+
+        Devuelve cuántas se crearon.
+        """
+        pendientes = await asyncio.to_thread(self.pendientes)
+        enviadas = 0
+        ahora = time.time()
+        for clave, item in pendientes.items():
+            if clave in self._enviando or item.get("proximo", 0) > ahora:
+                continue
+            self._enviando.add(clave)
+            try:
+                # Otro envío simultáneo pudo haberla atendido después de la lectura
+                item = (await asyncio.to_thread(self.pendientes)).get(clave)
+                if item is None or item.get("proximo", 0) > ahora:
+                    continue
+                if await self._crear(clave, item):
+                    enviadas += 1
+            finally:
+                self._enviando.discard(clave)
+        return enviadas
+
+    async def _crear(self, clave: str, item: dict) -> bool:
+        try:
+            await asyncio.wait_for(
+                _cliente().pages.create(**item["entrada"]), config.NOTION_TIMEOUT
+            )
+        except Exception as e:
+            if _es_permanente(e):
+                logger.error("❌ Notion rechazó %s, se descarta: %s", clave, e)
+                await asyncio.to_thread(self._quitar, clave)
+            else:
+                logger.warning(
+                    "Notion no disponible para %s (intento %s): %s",
+                    clave,
+                    item.get("intentos", 0) + 1,
+                    e,
+                )
+                await asyncio.to_thread(self._marcar_fallo, clave, str(e))
+            return False
+        await asyncio.to_thread(self._quitar, clave)
+        logger.info("✅ Acción pendiente registrada como %s", clave)
+        return True
+
+    def avisar(self) -> None:
+        if self._hay_trabajo is not None:
+            self._hay_trabajo.set()
+
+    async def iniciar(self) -> None:
+        if self.activo:
+            return
+        self._cerrando = False
+        self._hay_trabajo = asyncio.Event()
+        # Lo que quedó de una ejecución anterior se intenta enseguida
+        self._hay_trabajo.set()
+        self._tarea = asyncio.create_task(self._ciclo())
+
+    async def _ciclo(self) -> None:
+        while not self._cerrando:
+            try:
+                await asyncio.wait_for(self._hay_trabajo.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._hay_trabajo.clear()
+            try:
+                await self.enviar_pendientes()
+            except Exception as e:  # pragma: no cover - no debe cortar el ciclo
+                logger.error("Error vaciando la bandeja de Notion: %s", e)
+
+    async def detener(self) -> None:
+        """Termina la tarea de fondo con un último intento de envío.
+
+        No se cancela la tarea: se le pide que salga y se espera el envío en
+        curso, que está acotado por ``config.NOTION_TIMEOUT``.
+        """
+        if self._tarea is not None:
+            self._cerrando = True
+            self._hay_trabajo.set()
+            await self._tarea
+            self._tarea = None
+            await self.enviar_pendientes()
+        self._hay_trabajo = None
+
+
+bandeja_notion = BandejaNotion(config.NOTION_PENDIENTES_FILE, config.NOTION_REINTENTO_SEG)
+
+registro.medidor(
+    "sandy_notion_pendientes",
+    "Solicitudes en la bandeja esperando crearse en Notion",
+    lambda: len(bandeja_notion.pendientes()),
+)
+
+
+async def registrar_accion_pendiente(mensajes_usuario: List[str], telegram_id: int) -> str:
     """
     Registra una acción pendiente en Notion
-    
+
+    La solicitud queda guardada en :data:`bandeja_notion` y se crea en Notion
+    desde la tarea de fondo. Fuera del bot (scripts, pruebas) se envía en el
+    momento; si falla, igual queda en la bandeja para reintentarla.
+
     Args:
         mensajes_usuario: Lista de mensajes enviados por el usuario
         telegram_id: ID de Telegram del usuario
-        
+
+    Returns:
+        str: Nombre asignado a la solicitud
+
     Raises:
-        Exception: Si hay error al registrar en Notion
+        Exception: Si no se pudo guardar la solicitud
     """
     try:
-        # Cargar y actualizar contador
-        fecha_actual = datetime.now().strftime("%d-%m-%Y")
-        contador = cargar_json(config.ARCHIVO_CONTADOR)
-        
-        if fecha_actual not in contador:
-            contador[fecha_actual] = 1
-        else:
-            contador[fecha_actual] += 1
-            
-        guardar_json(contador, config.ARCHIVO_CONTADOR)
+        # Número diario único aunque lleguen varias solicitudes a la vez
+        ahora = datetime.now()
+        numero = await asyncio.to_thread(reservar_numero, ahora.strftime("%d-%m-%Y"))
 
         # Generar ID de solicitud
-        id_solicitud = f"{contador[fecha_actual]:03d}"
-        nombre_solicitud = f"Solicitud{id_solicitud}{datetime.now().strftime('%d%m%y')}"
+        id_solicitud = f"{numero:03d}"
+        nombre_solicitud = f"Solicitud{id_solicitud}{ahora.strftime('%d%m%y')}"
 
         # Crear bloques de párrafo por cada mensaje recibido
         bloques = [
@@ -61,7 +237,7 @@ async def registrar_accion_pendiente(mensajes_usuario: List[str], telegram_id: i
                     "title": [{"text": {"content": nombre_solicitud}}]
                 },
                 "Estado": {"select": {"name": "Nuevo"}},
-                "Fecha": {"date": {"start": datetime.now().isoformat()}},
+                "Fecha": {"date": {"start": ahora.isoformat()}},
                 "ID Telegram": {
                     "rich_text": [{"text": {"content": str(telegram_id)}}]
                 },
@@ -69,9 +245,14 @@ async def registrar_accion_pendiente(mensajes_usuario: List[str], telegram_id: i
             "children": bloques,
         }
 
-        notion.pages.create(**nueva_entrada)
-        logger.info("✅ Acción pendiente registrada como %s", nombre_solicitud)
+        await asyncio.to_thread(bandeja_notion.agregar, nombre_solicitud, nueva_entrada)
 
     except Exception as e:
         logger.error("❌ Error al registrar en Notion: %s", str(e))
         raise
+
+    if bandeja_notion.activo:
+        bandeja_notion.avisar()
+    else:
+        await bandeja_notion.enviar_pendientes()
+    return nombre_solicitud
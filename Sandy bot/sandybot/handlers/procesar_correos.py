@@ -5,17 +5,27 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import shutil
+import tarfile
 import tempfile
 import zipfile
+from contextlib import aclosing
 from pathlib import Path
+from typing import IO, AsyncIterator, Iterator
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from ..email_utils import enviar_correo, procesar_correo_a_tarea
+from ..email_utils import _limpiar_correo, enviar_correo, procesar_correo_a_tarea
+from ..huellas import huella_archivo, registrar_archivo, tarea_por_archivo, tarea_por_texto
+# ``CorreoParseado`` y ``leer_correos`` se reexportan para los demás handlers
+from ..lector_msg import CorreoParseado, PoolCorreos, leer_correos, parsear_msg
+from ..limitador import PRIORIDAD_LOTE, prioridad_gpt
 from ..registrador import responder_registrando
+from ..trazas import span
 from ..utils import obtener_mensaje
 
 logger = logging.getLogger(__name__)
@@ -23,77 +33,207 @@ logger = logging.getLogger(__name__)
 
 # ────────────────────────── UTILIDAD LOCAL ──────────────────────────
 def _leer_msg(ruta: str) -> str:
-    """Devuelve «asunto + cuerpo» del archivo MSG, o '' si falla.
+    """Devuelve «asunto + cuerpo» del archivo MSG, o '' si falla."""
+    return parsear_msg(ruta).texto
 
-    Se intenta importar ``extract_msg`` en cada llamada para permitir que el
-    handler funcione aunque la dependencia sea opcional. Si la librería no está
-    instalada, se registra el error y se retorna una cadena vacía.
+
+# ────────────────────────── ARCHIVOS COMPRIMIDOS ────────────────────
+# Extensiones de comprimidos aceptados y de los avisos que se toman de ellos
+_EXT_COMPRIMIDOS = (".zip", ".tar", ".tar.gz", ".tgz")
+_EXT_AVISOS = (".msg", ".txt")
+# Tamaño máximo de un miembro descomprimido; evita llenar el disco con bombas
+_MAX_MIEMBRO = 50 * 1024 * 1024
+# Avisos que se leen juntos en el pool antes de registrar sus tareas
+_TAM_LOTE = 20
+
+
+def _es_comprimido(nombre: str) -> bool:
+    return nombre.lower().endswith(_EXT_COMPRIMIDOS)
+
+
+def _volcar_miembro(origen: IO[bytes], nombre: str) -> str:
+    """Copia un miembro del comprimido a un temporal con su misma extensión.
+
+    La extensión decide cómo se lee el aviso: ``.msg`` con ``extract_msg`` y
+    ``.txt`` como texto plano.
     """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(nombre).suffix.lower()) as tmp:
+        shutil.copyfileobj(origen, tmp)
+        return tmp.name
 
-    msg = None
-    try:
+
+def _miembro_valido(nombre: str, tamanio: int) -> bool:
+    if not nombre.lower().endswith(_EXT_AVISOS):
+        return False
+    if tamanio > _MAX_MIEMBRO:
+        logger.warning("Se omite %s: ocupa %d bytes descomprimido", nombre, tamanio)
+        return False
+    return True
+
+
+def _miembros_comprimido(ruta: str, nombre: str) -> Iterator[tuple[str, str]]:
+    """Recorre los avisos de un ZIP o TAR de a uno.
+
+    Cada miembro se copia a un temporal recién cuando se pide el siguiente
+    elemento, así en disco hay a lo sumo un lote y no el comprimido entero.
+    Quien consume el iterador borra los temporales. Los TAR se abren en modo
+    flujo (``r|*``), que no necesita índice ni volver hacia atrás.
+    """
+    if nombre.lower().endswith(".zip"):
+        with zipfile.ZipFile(ruta) as zipf:
+            for info in zipf.infolist():
+                if info.is_dir() or not _miembro_valido(info.filename, info.file_size):
+                    continue
+                with zipf.open(info) as origen:
+                    ruta_tmp = _volcar_miembro(origen, info.filename)
+                yield Path(info.filename).name, ruta_tmp
+    else:
+        with tarfile.open(ruta, "r|*") as tar:
+            for miembro in tar:
+                if not miembro.isfile() or not _miembro_valido(miembro.name, miembro.size):
+                    continue
+                origen = tar.extractfile(miembro)
+                if origen is None:  # pragma: no cover - enlaces u otros tipos
+                    continue
+                ruta_tmp = _volcar_miembro(origen, miembro.name)
+                yield Path(miembro.name).name, ruta_tmp
+
+
+async def _avisos_recibidos(docs: list) -> AsyncIterator[tuple[str, str]]:
+    """Descarga los adjuntos y entrega ``(nombre, ruta temporal)`` por aviso.
+
+    Los comprimidos se descargan una vez y sus miembros se extraen en otro
+    hilo a medida que se consumen.
+    """
+    for doc in docs:
+        nombre = getattr(doc, "file_name", "") or ""
+        archivo = await doc.get_file()
+        # Se conserva la extensión para leer los ``.txt`` como texto plano
+        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(nombre).suffix.lower()) as tmp:
+            with span("telegram.descarga"):
+                await archivo.download_to_drive(tmp.name)
+            ruta = tmp.name
+        if not _es_comprimido(nombre):
+            yield nombre, ruta
+            continue
+
+        miembros = _miembros_comprimido(ruta, nombre)
         try:
-            import extract_msg
-        except ModuleNotFoundError as exc:
-            logger.error("No se encontró la librería 'extract-msg': %s", exc)
-            return ""
-
-        msg = extract_msg.Message(ruta)
-        asunto = msg.subject or ""
-        remitente = getattr(msg, "sender", None) or getattr(msg, "sender_email", None)
-        remitente_nom = getattr(msg, "sender_name", None)
-
-        # 👉 1A) Usamos .body y, si está vacío, htmlBody o rtfBody
-        cuerpo = msg.body or getattr(msg, "htmlBody", "") or getattr(msg, "rtfBody", "")
-
-        # Si viene como bytes convertimos a texto para evitar errores
-        if isinstance(cuerpo, bytes):
-            try:
-                cuerpo = cuerpo.decode()
-            except Exception:
-                cuerpo = cuerpo.decode("latin-1", "ignore")
-        if isinstance(asunto, bytes):
-            try:
-                asunto = asunto.decode()
-            except Exception:
-                asunto = asunto.decode("latin-1", "ignore")
-
-        # 👉 1B) Convertimos HTML a texto si es necesario
-        if "<html" in cuerpo.lower():
-            try:
-                from bs4 import BeautifulSoup
-
-                cuerpo = BeautifulSoup(cuerpo, "html.parser").get_text("\n")
-            except ModuleNotFoundError:
-                logger.warning("beautifulsoup4 no instalado; continúo con HTML crudo")
-        cuerpo = cuerpo.strip()
-
-        encabezado = []
-        if remitente:
-            encabezado.append(f"From: {remitente}")
-        if remitente_nom:
-            encabezado.append(f"Name: {remitente_nom}")
-        texto = "\n".join(encabezado + [asunto, cuerpo]).strip()
-
-        if not texto:
-            try:
-                texto = Path(ruta).read_text(encoding="utf-8", errors="ignore")
-            except Exception as err:  # pragma: no cover - error inusual
-                logger.error("Error leyendo texto plano de %s: %s", ruta, err)
-                texto = ""
-
-        return texto
-    except Exception as exc:  # pragma: no cover
-        logger.error("Error leyendo MSG %s: %s", ruta, exc)
-        return ""
-    finally:
-        if msg and hasattr(msg, "close"):
-            msg.close()
+            while (siguiente := await asyncio.to_thread(next, miembros, None)) is not None:
+                yield siguiente
+        except (zipfile.BadZipFile, tarfile.TarError) as err:
+            logger.error("No se pudo abrir el comprimido %s: %s", nombre, err)
+        finally:
+            miembros.close()
+            os.remove(ruta)
+
+
+async def _lotes_avisos(docs: list, tamanio: int) -> AsyncIterator[list[tuple[str, str]]]:
+    """Agrupa los avisos de :func:`_avisos_recibidos` en lotes de ``tamanio``."""
+    lote: list[tuple[str, str]] = []
+    async with aclosing(_avisos_recibidos(docs)) as avisos:
+        async for aviso in avisos:
+            lote.append(aviso)
+            if len(lote) >= tamanio:
+                yield lote
+                lote = []
+    if lote:
+        yield lote
+
+
+class _EnvioMsg:
+    """Junta los ``.msg`` generados y arma el ZIP a medida que llegan.
+
+    Con menos de :attr:`UMBRAL` archivos se envían sueltos; al llegar al
+    umbral se abre ``tareas.zip`` y cada ``.msg`` se agrega y se borra en el
+    momento, sin esperar al final del procesamiento.
+    """
+
+    UMBRAL = 5
+
+    def __init__(self) -> None:
+        self.pendientes: list[Path] = []
+        self.ruta_zip: Path | None = None
+        self._zip: zipfile.ZipFile | None = None
+        self._nombres: set[str] = set()
+
+    def agregar(self, ruta: Path) -> None:
+        if self._zip is None:
+            if ruta not in self.pendientes:
+                self.pendientes.append(ruta)
+            if len(self.pendientes) < self.UMBRAL:
+                return
+            fd, nombre = tempfile.mkstemp(suffix=".zip")
+            os.close(fd)
+            self.ruta_zip = Path(nombre)
+            self._zip = zipfile.ZipFile(self.ruta_zip, "w")
+            nuevos, self.pendientes = self.pendientes, []
+        else:
+            nuevos = [ruta]
+        for p in nuevos:
+            # Un aviso repetido regenera el mismo ``tarea_<id>.msg``
+            if p.name not in self._nombres:
+                self._zip.write(p, arcname=p.name)
+                self._nombres.add(p.name)
+            os.remove(p)
+
+    async def enviar(self, mensaje) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            with open(self.ruta_zip, "rb") as f:
+                await mensaje.reply_document(f, filename="tareas.zip")
+            os.remove(self.ruta_zip)
+        for p in self.pendientes:
+            with open(p, "rb") as f:
+                await mensaje.reply_document(f, filename=p.name)
+            os.remove(p)
+
+
+def _separar_conocidos(
+    lote: list[tuple[str, str]],
+) -> tuple[list[tuple[str, str, str]], list[int]]:
+    """Separa los avisos cuyo archivo idéntico ya generó una tarea.
+
+    Devuelve ``(nombre, ruta, sha)`` de los nuevos y los IDs de tarea de los
+    repetidos, que no hace falta parsear.
+    """
+    nuevos: list[tuple[str, str, str]] = []
+    repetidas: list[int] = []
+    for nombre, ruta in lote:
+        sha = huella_archivo(ruta)
+        tarea_id = tarea_por_archivo(sha)
+        if tarea_id is None:
+            nuevos.append((nombre, ruta, sha))
+        else:
+            logger.info("Archivo %s ya procesado (tarea %s)", nombre, tarea_id)
+            repetidas.append(tarea_id)
+    return nuevos, repetidas
+
+
+async def _informar_progreso(mensaje, progreso, procesados: int, tareas: int):
+    """Crea o edita el mensaje que muestra el avance de un comprimido."""
+    texto = f"Procesando correos: {procesados} leídos, {tareas} tareas registradas…"
+    try:
+        if progreso is not None and hasattr(progreso, "edit_text"):
+            await progreso.edit_text(texto)
+            return progreso
+        return await mensaje.reply_text(texto)
+    except Exception as err:  # pragma: no cover - fallas de red en el aviso
+        logger.warning("No se pudo actualizar el progreso: %s", err)
+        return progreso
 
 
 # ────────────────────────── HANDLER PRINCIPAL ───────────────────────
 async def procesar_correos(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Procesa archivos `.msg` adjuntos y registra las tareas encontradas."""
+    """Procesa archivos `.msg` adjuntos y registra las tareas encontradas.
+
+    También acepta comprimidos ``.zip``/``.tar.gz`` con avisos: sus miembros
+    se leen por lotes y se informa el avance en un mensaje que se edita. Los
+    avisos ya procesados (ver :mod:`sandybot.huellas`) y los que no se
+    pudieron leer o registrar se informan aparte.
+    """
+    from ..config import config
+
     mensaje = obtener_mensaje(update)
     if not mensaje:
         return
@@ -113,73 +253,106 @@ async def procesar_correos(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         return
 
     first_name = getattr(docs[0], "file_name", "")
+    con_comprimidos = any(_es_comprimido(getattr(d, "file_name", "") or "") for d in docs)
     tareas: list[str] = []
-    rutas_msg: list[Path] = []
-
-    for doc in docs:
-        # Descarga temporal del .msg recibido
-        archivo = await doc.get_file()
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            await archivo.download_to_drive(tmp.name)
-            ruta_tmp = tmp.name
-
-        try:
-            contenido = _leer_msg(ruta_tmp)
-            if not contenido:
-                await responder_registrando(
-                    mensaje,
-                    user_id,
-                    doc.file_name,
-                    "Instalá la librería 'extract-msg' para procesar correos .MSG.",
-                    "tareas",
-                )
-                os.remove(ruta_tmp)
-                return
-
-            # Procesar correo → registrar tarea → generar .msg final
-            (
-                tarea,
-                _creada_nueva,
-                cliente,
-                ruta_msg,
-                cuerpo,
-                _,
-                carrier_nombre,
-            ) = await procesar_correo_a_tarea(
-                contenido, cliente_nombre, carrier_nombre, generar_msg=True
-            )
-
-        except ValueError as err:  # pragma: no cover
-            logger.error("Fallo procesando correo %s: %s", doc.file_name, err)
-            await responder_registrando(
-                mensaje,
-                user_id,
-                doc.file_name,
-                str(err),
-                "tareas",
-            )
-            os.remove(ruta_tmp)
-            continue
-        except Exception as e:  # pragma: no cover
-            logger.error("Fallo procesando correo %s: %s", doc.file_name, e)
-            os.remove(ruta_tmp)
-            continue
-        finally:
-            if os.path.exists(ruta_tmp):
-                os.remove(ruta_tmp)
-
-        # Aviso por correo a destinatarios del cliente
-        enviar_correo(
-            f"Aviso de tarea programada - {cliente.nombre}",
-            cuerpo,
-            cliente.id,
-            carrier_nombre,
-        )
-
-        if ruta_msg.exists():
-            rutas_msg.append(ruta_msg)
-
-        tareas.append(str(tarea.id))
+    repetidas: list[str] = []
+    fallidos: list[str] = []
+    envio = _EnvioMsg()
+    progreso = None
+    procesados = 0
+
+    # Los avisos se leen por lotes en otros procesos y se registran a medida
+    # que llegan, sin esperar a descargar o descomprimir todo. Todos los
+    # lotes del comando comparten el mismo pool.
+    with PoolCorreos(config.CORREOS_PROCESOS) as pool:
+        async with aclosing(_lotes_avisos(docs, _TAM_LOTE)) as lotes:
+            async for lote in lotes:
+                try:
+                    nuevos, conocidas = _separar_conocidos(lote)
+                    repetidas.extend(str(t) for t in conocidas)
+                    correos = await leer_correos([ruta for _, ruta, _ in nuevos], pool=pool)
+                finally:
+                    for _, ruta_tmp in lote:
+                        if os.path.exists(ruta_tmp):
+                            os.remove(ruta_tmp)
+
+                for (nombre, _, sha), correo in zip(nuevos, correos):
+                    try:
+                        if correo.error and correo.error != "sin_libreria":
+                            logger.error("Fallo leyendo correo %s: %s", nombre, correo.error)
+                            fallidos.append(nombre)
+                            continue
+                        contenido = correo.texto
+                        # Reenvíos y recordatorios de un aviso ya registrado: no
+                        # se consulta a GPT ni se vuelve a avisar a los clientes
+                        tarea_previa = (
+                            tarea_por_texto(_limpiar_correo(contenido)) if contenido else None
+                        )
+                        if tarea_previa is not None:
+                            registrar_archivo(sha, tarea_previa)
+                            repetidas.append(str(tarea_previa))
+                            continue
+                        if not contenido:
+                            await responder_registrando(
+                                mensaje,
+                                user_id,
+                                nombre,
+                                "Instalá la librería 'extract-msg' para procesar correos .MSG.",
+                                "tareas",
+                            )
+                            await envio.enviar(mensaje)
+                            return
+
+                        # Procesar correo → registrar tarea → generar .msg final.
+                        # Las consultas a GPT del lote ceden el turno a la charla.
+                        with prioridad_gpt(PRIORIDAD_LOTE):
+                            (
+                                tarea,
+                                _creada_nueva,
+                                cliente,
+                                ruta_msg,
+                                cuerpo,
+                                _,
+                                carrier_nombre,
+                            ) = await procesar_correo_a_tarea(
+                                contenido, cliente_nombre, carrier_nombre, generar_msg=True
+                            )
+
+                    except ValueError as err:  # pragma: no cover
+                        logger.error("Fallo procesando correo %s: %s", nombre, err)
+                        await responder_registrando(
+                            mensaje,
+                            user_id,
+                            nombre,
+                            str(err),
+                            "tareas",
+                        )
+                        fallidos.append(nombre)
+                        continue
+                    except Exception as e:  # pragma: no cover
+                        logger.error("Fallo procesando correo %s: %s", nombre, e)
+                        fallidos.append(nombre)
+                        continue
+
+                    # Aviso por correo a destinatarios del cliente
+                    enviar_correo(
+                        f"Aviso de tarea programada - {cliente.nombre}",
+                        cuerpo,
+                        cliente.id,
+                        carrier_nombre,
+                    )
+
+                    if ruta_msg.exists():
+                        envio.agregar(ruta_msg)
+
+                    registrar_archivo(sha, tarea.id)
+                    tareas.append(str(tarea.id))
+
+                procesados += len(lote)
+                if con_comprimidos:
+                    progreso = await _informar_progreso(
+                        mensaje, progreso, procesados, len(tareas)
+                    )
 
     # Resumen final
     if tareas:
@@ -190,20 +363,21 @@ async def procesar_correos(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             f"Tareas registradas: {', '.join(tareas)}",
             "tareas",
         )
+    if repetidas:
+        await responder_registrando(
+            mensaje,
+            user_id,
+            first_name,
+            f"Avisos ya registrados, sin procesar de nuevo: {', '.join(repetidas)}",
+            "tareas",
+        )
+    if fallidos:
+        await responder_registrando(
+            mensaje,
+            user_id,
+            first_name,
+            f"No se pudieron procesar {len(fallidos)} avisos: {', '.join(fallidos)}",
+            "tareas",
+        )
 
-    if rutas_msg:
-        if len(rutas_msg) >= 5:
-            zip_path = Path(tempfile.gettempdir()) / "tareas.zip"
-            with zipfile.ZipFile(zip_path, "w") as zipf:
-                for p in rutas_msg:
-                    zipf.write(p, arcname=p.name)
-            with open(zip_path, "rb") as f:
-                await mensaje.reply_document(f, filename=zip_path.name)
-            for p in rutas_msg:
-                os.remove(p)
-            os.remove(zip_path)
-        else:
-            for p in rutas_msg:
-                with open(p, "rb") as f:
-                    await mensaje.reply_document(f, filename=p.name)
-                os.remove(p)
+    await envio.enviar(mensaje)
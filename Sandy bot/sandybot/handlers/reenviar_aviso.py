@@ -11,12 +11,12 @@ from ..utils import obtener_mensaje
 from ..registrador import responder_registrando
 from ..database import (
     TareaProgramada,
-    TareaServicio,
     Servicio,
     Cliente,
     Carrier,
     SessionLocal,
     obtener_cliente_por_nombre,
+    servicios_de_tarea,
 )
 from ..email_utils import generar_archivo_msg, enviar_correo
 
@@ -53,12 +53,7 @@ async def reenviar_aviso(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
             return
 
-        rels = (
-            session.query(TareaServicio)
-            .filter(TareaServicio.tarea_id == tarea.id)
-            .all()
-        )
-        servicios = [session.get(Servicio, r.servicio_id) for r in rels]
+        servicios = [session.get(Servicio, sid) for sid in servicios_de_tarea(tarea.id)]
 
         cliente = None
         for s in servicios:
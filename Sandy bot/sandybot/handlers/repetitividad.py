@@ -34,6 +34,7 @@ from ..utils import obtener_mensaje
 from .estado import UserState
 from ..registrador import responder_registrando, registrar_conversacion
 from ..geo_utils import extraer_coordenada, generar_mapa_puntos
+from ..trazas import span, trazar
 
 # Ruta a la plantilla Word definida en la configuración global
 # Permite modificar la ubicación mediante la variable de entorno "PLANTILLA_PATH"
@@ -155,7 +156,8 @@ async def procesar_repetitividad(update: Update, context: ContextTypes.DEFAULT_T
 
         file = await archivo.get_file()
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_excel:
-            await file.download_to_drive(tmp_excel.name)
+            with span("telegram.descarga"):
+                await file.download_to_drive(tmp_excel.name)
 
         try:
             ruta_salida = generar_informe_y_modificar(tmp_excel.name)
@@ -193,6 +195,7 @@ async def procesar_repetitividad(update: Update, context: ContextTypes.DEFAULT_T
             )
 
 
+@trazar("docx.repetitividad")
 def generar_informe_y_modificar(ruta_excel):
     for loc in ("es_ES.UTF-8", "es_ES", "es_AR.UTF-8", "es_AR"):
         try:
@@ -3,25 +3,257 @@
 # User-provided custom instructions
 """Comandos de acceso rápido para consultas de base."""
 
-from telegram import Update, ReplyKeyboardMarkup
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import func
+from telegram import (
+    Update,
+    ReplyKeyboardMarkup,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+)
 from telegram.ext import ContextTypes
 
 from ..config import config
 from ..database import (
-    obtener_servicios,
-    obtener_reclamos,
-    obtener_camaras,
-    obtener_clientes,
-    obtener_carriers,
-    obtener_conversaciones,
-    obtener_ingresos,
-    obtener_tareas_programadas,
-    obtener_tareas_servicio,
+    Servicio,
+    Reclamo,
+    Camara,
+    Cliente,
+    Carrier,
+    Conversacion,
+    Ingreso,
+    TareaProgramada,
+    TareaServicio,
+    obtener_pagina,
+    exportar_csv,
     depurar_servicios_duplicados,
     depurar_reclamos_duplicados,
 )
 from ..utils import obtener_mensaje
-from ..registrador import responder_registrando
+from ..registrador import responder_registrando, registrar_conversacion
+
+FILAS_POR_PAGINA = 20
+
+# Valor que reemplaza a las fechas nulas al paginar: la clave del cursor no
+# puede ser ``NULL`` porque la comparación la descartaría.
+_SIN_FECHA = datetime(1900, 1, 1)
+
+
+def _recortar(texto: str | None, largo: int = 80) -> str:
+    texto = (texto or "").replace("\n", " ")
+    return texto if len(texto) <= largo else texto[: largo - 1] + "…"
+
+
+# Clave corta → (título, texto sin datos, comando, columnas, orden, formato).
+# La clave viaja en el ``callback_data`` de los botones, que Telegram limita
+# a 64 bytes, por eso se usan abreviaturas.
+_LISTADOS = {
+    "srv": (
+        "Servicios",
+        "No hay servicios registrados.",
+        "CDB_Servicios",
+        (Servicio.id, Servicio.nombre, Servicio.cliente, Servicio.carrier, Servicio.id_carrier),
+        (Servicio.id,),
+        lambda f: f"{f.id} {f.nombre or ''}",
+    ),
+    "rec": (
+        "Reclamos",
+        "No hay reclamos registrados.",
+        "CDB_Reclamos",
+        (Reclamo.id, Reclamo.servicio_id, Reclamo.numero, Reclamo.fecha_inicio),
+        (Reclamo.id,),
+        lambda f: f.numero or "sin número",
+    ),
+    "cam": (
+        "Cámaras",
+        "No hay cámaras registradas.",
+        "CDB_Camaras",
+        (Camara.id, Camara.id_servicio, Camara.nombre),
+        (Camara.id,),
+        lambda f: f.nombre,
+    ),
+    "cli": (
+        "Clientes",
+        "No hay clientes registrados.",
+        "CDB_Clientes",
+        (Cliente.id, Cliente.nombre),
+        (Cliente.id,),
+        lambda f: f.nombre,
+    ),
+    "car": (
+        "Carriers",
+        "No hay carriers registrados.",
+        "CDB_Carriers",
+        (Carrier.id, Carrier.nombre),
+        (Carrier.id,),
+        lambda f: f.nombre,
+    ),
+    "conv": (
+        "Conversaciones",
+        "No hay conversaciones registradas.",
+        "CDB_Conversaciones",
+        (
+            Conversacion.id,
+            Conversacion.user_id,
+            Conversacion.fecha,
+            Conversacion.modo,
+            Conversacion.mensaje,
+            Conversacion.respuesta,
+        ),
+        (Conversacion.id,),
+        lambda f: _recortar(f.mensaje),
+    ),
+    "ing": (
+        "Ingresos",
+        "No hay ingresos registrados.",
+        "CDB_Ingresos",
+        (Ingreso.id, Ingreso.id_servicio, Ingreso.camara, Ingreso.fecha, Ingreso.usuario),
+        (func.coalesce(Ingreso.fecha, _SIN_FECHA), Ingreso.id),
+        lambda f: f.camara,
+    ),
+    "tar": (
+        "Tareas",
+        "No hay tareas programadas.",
+        "CDB_Tareas",
+        (
+            TareaProgramada.id,
+            TareaProgramada.fecha_inicio,
+            TareaProgramada.fecha_fin,
+            TareaProgramada.tipo_tarea,
+            TareaProgramada.carrier_id,
+            TareaProgramada.id_interno,
+        ),
+        (func.coalesce(TareaProgramada.fecha_inicio, _SIN_FECHA), TareaProgramada.id),
+        lambda f: f.tipo_tarea,
+    ),
+    "ts": (
+        "Tareas-Servicio",
+        "No hay relaciones registradas.",
+        "CDB_TareasServicio",
+        (TareaServicio.id, TareaServicio.tarea_id, TareaServicio.servicio_id),
+        (TareaServicio.id,),
+        lambda f: f"{f.tarea_id}-{f.servicio_id}",
+    ),
+}
+
+
+def _codificar_cursor(cursor: tuple) -> str:
+    return "|".join(v.isoformat() if isinstance(v, datetime) else str(v) for v in cursor)
+
+
+def _decodificar_cursor(texto: str, orden) -> tuple:
+    valores = []
+    for crudo, columna in zip(texto.split("|"), orden):
+        tipo = columna.type.python_type
+        valores.append(tipo.fromisoformat(crudo) if tipo is datetime else tipo(crudo))
+    return tuple(valores)
+
+
+def _armar_pagina(
+    clave: str, pagina: int = 0, cursor: tuple | None = None, anterior: bool = False
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    """Devuelve el texto de la página y los botones de navegación."""
+    titulo, vacio, _, columnas, orden, formato = _LISTADOS[clave]
+    resultado = obtener_pagina(
+        columnas, orden, cursor=cursor, anterior=anterior, limite=FILAS_POR_PAGINA
+    )
+    if not resultado.filas:
+        return vacio, None
+
+    inicio = pagina * FILAS_POR_PAGINA
+    texto = f"{titulo}:\n" + "\n".join(
+        f"{inicio + i + 1}. {formato(f)}" for i, f in enumerate(resultado.filas)
+    )
+    navegacion = []
+    if resultado.anterior is not None:
+        navegacion.append(
+            InlineKeyboardButton(
+                "⬅️ Anterior",
+                callback_data=f"cdb:{clave}:a:{pagina - 1}:{_codificar_cursor(resultado.anterior)}",
+            )
+        )
+    if resultado.siguiente is not None:
+        navegacion.append(
+            InlineKeyboardButton(
+                "Siguiente ➡️",
+                callback_data=f"cdb:{clave}:s:{pagina + 1}:{_codificar_cursor(resultado.siguiente)}",
+            )
+        )
+    botones = [navegacion] if navegacion else []
+    botones.append([InlineKeyboardButton("📄 Exportar CSV", callback_data=f"cdb:{clave}:csv")])
+    return texto, InlineKeyboardMarkup(botones)
+
+
+async def _exportar_listado(mensaje, user_id: int, clave: str, texto_usuario: str) -> None:
+    """Envía el listado completo como adjunto CSV."""
+    titulo, vacio, comando, columnas, orden, _ = _LISTADOS[clave]
+    # Nombre único: dos exportaciones simultáneas no comparten archivo
+    descriptor, ruta = tempfile.mkstemp(prefix=f"{comando}_", suffix=".csv")
+    os.close(descriptor)
+    try:
+        # La lectura de toda la tabla se hace en un hilo para no frenar al bot
+        total = await asyncio.to_thread(exportar_csv, columnas, orden, ruta)
+        if not total:
+            await responder_registrando(mensaje, user_id, texto_usuario, vacio, "supermenu")
+            return
+        with open(ruta, "rb") as f:
+            await mensaje.reply_document(f, filename=f"{comando}.csv")
+        registrar_conversacion(
+            user_id, texto_usuario, f"{titulo}: {total} filas exportadas", "supermenu"
+        )
+    finally:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+async def _listar(update: Update, context: ContextTypes.DEFAULT_TYPE, clave: str) -> None:
+    """Responde la primera página del listado ``clave`` o el CSV completo."""
+    mensaje = obtener_mensaje(update)
+    if not mensaje:
+        return
+    user_id = update.effective_user.id
+    comando = _LISTADOS[clave][2]
+    args = getattr(context, "args", None) or []
+    if args and args[0].lower() == "csv":
+        await _exportar_listado(mensaje, user_id, clave, mensaje.text or comando)
+        return
+    texto, markup = _armar_pagina(clave)
+    await responder_registrando(
+        mensaje,
+        user_id,
+        mensaje.text or comando,
+        texto,
+        "supermenu",
+        reply_markup=markup,
+    )
+
+
+async def navegar_listado(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Atiende los botones ``cdb:*`` de paginación y exportación."""
+    query = update.callback_query
+    user_id = query.from_user.id
+    partes = query.data.split(":", 4)
+    clave = partes[1] if len(partes) > 1 else ""
+    if clave not in _LISTADOS:
+        await query.edit_message_text("Listado no disponible.")
+        return
+    if partes[2] == "csv":
+        await _exportar_listado(query.message, user_id, clave, query.data)
+        return
+    _, _, accion, pagina, crudo = partes
+    orden = _LISTADOS[clave][4]
+    texto, markup = _armar_pagina(
+        clave,
+        pagina=int(pagina),
+        cursor=_decodificar_cursor(crudo, orden),
+        anterior=accion == "a",
+    )
+    registrar_conversacion(user_id, query.data, texto, "supermenu")
+    await query.edit_message_text(texto, reply_markup=markup)
 
 
 async def supermenu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -74,83 +306,44 @@ async def supermenu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
 async def listar_servicios(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Enumera los servicios en orden descendente."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    servicios = obtener_servicios(desc=True)
-    if not servicios:
-        texto = "No hay servicios registrados."
-    else:
-        texto = "Servicios:\n" + "\n".join(
-            f"{i + 1}. {s.id} {s.nombre or ''}" for i, s in enumerate(servicios)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_Servicios",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "srv")
 
 
 async def listar_reclamos(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Muestra los reclamos de forma descendente."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    reclamos = obtener_reclamos(desc=True)
-    if not reclamos:
-        texto = "No hay reclamos registrados."
-    else:
-        texto = "Reclamos:\n" + "\n".join(
-            f"{i + 1}. {r.numero or 'sin número'}" for i, r in enumerate(reclamos)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_Reclamos",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "rec")
 
 
 async def listar_camaras(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Lista todas las cámaras registradas."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    camaras = obtener_camaras(desc=True)
-    if not camaras:
-        texto = "No hay cámaras registradas."
-    else:
-        texto = "Cámaras:\n" + "\n".join(
-            f"{i + 1}. {c.nombre}" for i, c in enumerate(camaras)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_Camaras",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "cam")
 
 
 async def depurar_duplicados(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Elimina registros duplicados de servicios y reclamos."""
+    """Elimina registros duplicados de servicios y reclamos.
+
+    Con ``/Depurar_Duplicados simular`` solo informa cuántos se borrarían.
+    """
     mensaje = obtener_mensaje(update)
     if not mensaje:
         return
     user_id = update.effective_user.id
-    elim_serv = depurar_servicios_duplicados()
-    elim_rec = depurar_reclamos_duplicados()
-    texto = (
-        "Depuración completada:\n"
-        f"Servicios eliminados: {elim_serv}\n"
-        f"Reclamos eliminados: {elim_rec}"
-    )
+    args = [a.lower() for a in (getattr(context, "args", None) or [])]
+    simular = "simular" in args
+    elim_serv = depurar_servicios_duplicados(simular=simular)
+    elim_rec = depurar_reclamos_duplicados(simular=simular)
+    if simular:
+        texto = (
+            "Simulación de depuración:\n"
+            f"Servicios a eliminar: {elim_serv}\n"
+            f"Reclamos a eliminar: {elim_rec}"
+        )
+    else:
+        texto = (
+            "Depuración completada:\n"
+            f"Servicios eliminados: {elim_serv}\n"
+            f"Reclamos eliminados: {elim_rec}"
+        )
     await responder_registrando(
         mensaje,
         user_id,
@@ -162,133 +355,29 @@ async def depurar_duplicados(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def listar_clientes(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Muestra los clientes registrados."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    clientes = obtener_clientes(desc=True)
-    if not clientes:
-        texto = "No hay clientes registrados."
-    else:
-        texto = "Clientes:\n" + "\n".join(
-            f"{i + 1}. {c.nombre}" for i, c in enumerate(clientes)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_Clientes",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "cli")
 
 
 async def listar_carriers(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Enumera los carriers de la base."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    carriers = obtener_carriers(desc=True)
-    if not carriers:
-        texto = "No hay carriers registrados."
-    else:
-        texto = "Carriers:\n" + "\n".join(
-            f"{i + 1}. {c.nombre}" for i, c in enumerate(carriers)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_Carriers",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "car")
 
 
 async def listar_conversaciones(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Lista las conversaciones guardadas."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    convs = obtener_conversaciones(desc=True)
-    if not convs:
-        texto = "No hay conversaciones registradas."
-    else:
-        texto = "Conversaciones:\n" + "\n".join(
-            f"{i + 1}. {c.mensaje}" for i, c in enumerate(convs)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_Conversaciones",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "conv")
 
 
 async def listar_ingresos(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Muestra los ingresos ordenados por fecha."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    ingresos = obtener_ingresos(desc=True)
-    if not ingresos:
-        texto = "No hay ingresos registrados."
-    else:
-        texto = "Ingresos:\n" + "\n".join(
-            f"{i + 1}. {ing.camara}" for i, ing in enumerate(ingresos)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_Ingresos",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "ing")
 
 
-async def listar_tareas_programadas(
-    update: Update, context: ContextTypes.DEFAULT_TYPE
-) -> None:
+async def listar_tareas_programadas(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Lista las tareas programadas."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    tareas = obtener_tareas_programadas(desc=True)
-    if not tareas:
-        texto = "No hay tareas programadas."
-    else:
-        texto = "Tareas:\n" + "\n".join(
-            f"{i + 1}. {t.tipo_tarea}" for i, t in enumerate(tareas)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_Tareas",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "tar")
 
 
 async def listar_tareas_servicio(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Muestra la tabla de relaciones tarea-servicio."""
-    mensaje = obtener_mensaje(update)
-    if not mensaje:
-        return
-    user_id = update.effective_user.id
-    rels = obtener_tareas_servicio(servicio_id=None, desc=True)
-    if not rels:
-        texto = "No hay relaciones registradas."
-    else:
-        texto = "Tareas-Servicio:\n" + "\n".join(
-            f"{i + 1}. {r.tarea_id}-{r.servicio_id}" for i, r in enumerate(rels)
-        )
-    await responder_registrando(
-        mensaje,
-        user_id,
-        mensaje.text or "CDB_TareasServicio",
-        texto,
-        "supermenu",
-    )
+    await _listar(update, context, "ts")
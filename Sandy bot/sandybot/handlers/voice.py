@@ -3,12 +3,11 @@
 # User-provided custom instructions
 """Handler para mensajes de voz."""
 import logging
-import tempfile
-import os
 from ..gpt_handler import gpt
 from telegram import Update
 from telegram.ext import ContextTypes
 from ..registrador import responder_registrando
+from ..transcripcion import Transcriptor, crear_backend
 from .message import message_handler
 
 logger = logging.getLogger(__name__)
@@ -16,23 +15,22 @@ logger = logging.getLogger(__name__)
 # Cliente global de OpenAI para transcribir audios
 voice_client = gpt.client
 
-async def voice_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Descarga el audio, lo transcribe y pasa el texto a ``message_handler``."""
-    mensaje = update.message
-    if not mensaje or not mensaje.voice:
-        return
+# Se crea con el primer audio, así usa el cliente vigente en ese momento
+_transcriptor: Transcriptor | None = None
+
 
-    voice = await mensaje.voice.get_file()
-    fd, path = tempfile.mkstemp(suffix=".ogg")
-    os.close(fd)
+def _obtener_transcriptor() -> Transcriptor:
+    global _transcriptor
+    if _transcriptor is None:
+        _transcriptor = Transcriptor(crear_backend(voice_client))
+    return _transcriptor
+
+
+async def _transcribir_y_responder(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Transcribe el audio y pasa el texto a ``message_handler``."""
+    mensaje = update.message
     try:
-        await voice.download_to_drive(path)
-        with open(path, "rb") as audio:
-            transcripcion = await voice_client.audio.transcriptions.create(
-                file=audio,
-                model="whisper-1",
-            )
-        texto = transcripcion.text.strip()
+        texto = await _obtener_transcriptor().transcribir(mensaje.voice)
     except Exception as e:
         logger.error("Error al transcribir audio: %s", e)
         await responder_registrando(
@@ -43,14 +41,28 @@ async def voice_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
             "voz",
         )
         return
-    finally:
-        try:
-            os.remove(path)
-        except OSError:
-            pass
 
     # Pasar la transcripción a ``message_handler`` sin alterar el objeto
     # ``Update`` original.
     context.user_data["voice_text"] = texto
     await message_handler(update, context)
     context.user_data.pop("voice_text", None)
+
+
+async def voice_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Responde a un audio a partir de su transcripción.
+
+    Los audios ya transcriptos (por ejemplo, reenvíos) se responden en el
+    momento. Los nuevos se transcriben en una tarea de la aplicación, así el
+    bot sigue atendiendo otros mensajes y responde cuando el texto está listo.
+    """
+    mensaje = update.message
+    if not mensaje or not mensaje.voice:
+        return
+
+    aplicacion = getattr(context, "application", None)
+    clave = getattr(mensaje.voice, "file_unique_id", None)
+    if aplicacion is None or (clave and _obtener_transcriptor().en_cache(clave) is not None):
+        await _transcribir_y_responder(update, context)
+        return
+    aplicacion.create_task(_transcribir_y_responder(update, context), update=update)
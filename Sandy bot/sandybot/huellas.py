@@ -0,0 +1,245 @@
+# Nombre de archivo: huellas.py
+# Ubicación de archivo: Sandy bot/sandybot/huellas.py
+# User-provided custom instructions
+"""Huellas de avisos de mantenimiento para reconocer los ya procesados.
+
+Un mismo aviso suele llegar varias veces (reenvíos, recordatorios). Antes de
+leer el ``.msg`` y consultar a GPT se busca:
+
+1. el SHA-256 del archivo recibido, que evita incluso parsearlo;
+2. el SHA-256 del cuerpo normalizado (sin encabezados de reenvío ni
+   prefijos ``RE:``/``FW:``);
+3. un SimHash de 64 bits del cuerpo, para textos casi iguales. Solo se
+   acepta si además coinciden todos los números del aviso (fechas, horas,
+   IDs), de modo que una reprogramación nunca se confunde con el original.
+
+Las huellas se guardan en la tabla ``huellas_correos``; el índice de SimHash
+se mantiene en memoria y se arma en la primera búsqueda.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from .database import HuellaCorreo, SessionLocal, TareaProgramada
+
+logger = logging.getLogger(__name__)
+
+# Distancia de Hamming máxima entre SimHash para considerar dos avisos iguales
+DISTANCIA_MAXIMA = 3
+# Textos más cortos no tienen rasgos suficientes para comparar por SimHash
+MIN_PALABRAS = 20
+
+# Encabezados que agrega cada reenvío. Las direcciones solo se descartan si
+# la línea tiene un correo o no tiene números ("De: 08:00" puede ser del aviso)
+_RE_DIRECCION = re.compile(r"^(?:from|name|to|cc|de|para)\s*:", re.I)
+_RE_ENVIO = re.compile(r"^(?:sent|enviado(?:\s+el)?)\s*:", re.I)
+_RE_ASUNTO = re.compile(r"^(?:subject|asunto)\s*:\s*", re.I)
+_RE_PREFIJOS = re.compile(r"^(?:(?:re|fw|fwd|rv|tr|reenviar)\s*:\s*)+", re.I)
+_RE_SEPARADOR = re.compile(r"^-{2,}.*-{2,}$")
+_RE_PALABRA = re.compile(r"\w+")
+_RE_NUMERO = re.compile(r"\d+")
+
+
+def normalizar(texto: str) -> str:
+    """Quita lo que cambia entre copias del mismo aviso.
+
+    Se espera el texto ya pasado por ``_limpiar_correo``; acá se descartan
+    los encabezados de reenvío, los separadores de mensaje original, las
+    citas ``>`` y los prefijos del asunto, y se pasa todo a minúsculas.
+    """
+    lineas: list[str] = []
+    for linea in texto.splitlines():
+        l = linea.strip().lstrip(">").strip()
+        if not l or _RE_SEPARADOR.match(l) or _RE_ENVIO.match(l):
+            continue
+        if _RE_DIRECCION.match(l) and ("@" in l or not _RE_NUMERO.search(l)):
+            continue
+        l = _RE_PREFIJOS.sub("", _RE_ASUNTO.sub("", l))
+        if l:
+            lineas.append(" ".join(l.lower().split()))
+    return "\n".join(lineas)
+
+
+def _sha256(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def huella_archivo(ruta: str | Path) -> str:
+    """SHA-256 del archivo leído por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def firma_numerica(texto: str) -> str:
+    """Resumen corto de la secuencia de números del texto."""
+    numeros = " ".join(_RE_NUMERO.findall(texto))
+    return hashlib.sha1(numeros.encode()).hexdigest()[:16]
+
+
+def simhash(texto: str) -> int:
+    """SimHash de 64 bits sobre pares de palabras consecutivas."""
+    palabras = _RE_PALABRA.findall(texto)
+    rasgos = [f"{a} {b}" for a, b in zip(palabras, palabras[1:])] or palabras
+    pesos = [0] * 64
+    for rasgo in rasgos:
+        h = int.from_bytes(hashlib.blake2b(rasgo.encode(), digest_size=8).digest(), "big")
+        for bit in range(64):
+            pesos[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, peso in enumerate(pesos) if peso > 0)
+
+
+def distancia(a: int, b: int) -> int:
+    """Cantidad de bits distintos entre dos SimHash."""
+    return bin(a ^ b).count("1")
+
+
+def _a_bigint(valor: int) -> int:
+    """Convierte el SimHash sin signo al rango de ``BIGINT``."""
+    return valor - (1 << 64) if valor >= 1 << 63 else valor
+
+
+def _desde_bigint(valor: int) -> int:
+    return valor + (1 << 64) if valor < 0 else valor
+
+
+class IndiceSimHash:
+    """Índice por bandas para buscar SimHash a poca distancia.
+
+    Con ``DISTANCIA_MAXIMA + 1`` bandas, dos valores a esa distancia o menos
+    coinciden por fuerza en alguna banda completa, así que solo se comparan
+    los candidatos que comparten una.
+    """
+
+    def __init__(self, distancia_maxima: int = DISTANCIA_MAXIMA):
+        self.distancia_maxima = distancia_maxima
+        self._bandas = distancia_maxima + 1
+        self._ancho = 64 // self._bandas
+        self._cubetas: list[dict[int, list[tuple[int, str, int]]]] = [
+            {} for _ in range(self._bandas)
+        ]
+
+    def _claves(self, valor: int):
+        mascara = (1 << self._ancho) - 1
+        for i in range(self._bandas):
+            yield i, valor >> (i * self._ancho) & mascara
+
+    def agregar(self, valor: int, firma: str, tarea_id: int) -> None:
+        for i, clave in self._claves(valor):
+            self._cubetas[i].setdefault(clave, []).append((valor, firma, tarea_id))
+
+    def buscar(self, valor: int, firma: str) -> list[int]:
+        """IDs de tarea con SimHash cercano y la misma firma numérica."""
+        encontrados: dict[int, int] = {}
+        for i, clave in self._claves(valor):
+            for otro, otra_firma, tarea_id in self._cubetas[i].get(clave, ()):
+                if otra_firma != firma:
+                    continue
+                d = distancia(valor, otro)
+                if d <= self.distancia_maxima and d < encontrados.get(tarea_id, 65):
+                    encontrados[tarea_id] = d
+        return sorted(encontrados, key=encontrados.get)
+
+
+# Índice de SimHash de la base activa, se arma en la primera búsqueda
+_cache_indice: dict = {}
+
+
+def _indice(session) -> IndiceSimHash:
+    clave = id(session.get_bind())
+    if _cache_indice.get("clave") != clave:
+        indice = IndiceSimHash()
+        filas = session.execute(
+            select(HuellaCorreo.simhash, HuellaCorreo.firma, HuellaCorreo.tarea_id).where(
+                HuellaCorreo.tipo == "texto", HuellaCorreo.simhash.isnot(None)
+            )
+        )
+        for valor, firma, tarea_id in filas:
+            indice.agregar(_desde_bigint(valor), firma, tarea_id)
+        _cache_indice.update(clave=clave, indice=indice)
+    return _cache_indice["indice"]
+
+
+def _tarea_vigente(session, tarea_id: int | None) -> int | None:
+    """Descarta huellas de tareas que ya no existen (depuradas o borradas)."""
+    if tarea_id is not None and session.get(TareaProgramada, tarea_id):
+        return tarea_id
+    return None
+
+
+def tarea_por_archivo(sha: str) -> int | None:
+    """ID de la tarea registrada a partir de un archivo idéntico."""
+    with SessionLocal() as session:
+        tarea_id = session.scalar(
+            select(HuellaCorreo.tarea_id).where(HuellaCorreo.clave == sha)
+        )
+        return _tarea_vigente(session, tarea_id)
+
+
+def tarea_por_texto(texto: str) -> int | None:
+    """ID de la tarea de un aviso igual o casi igual a ``texto``.
+
+    ``texto`` es el cuerpo ya pasado por ``_limpiar_correo``.
+    """
+    normal = normalizar(texto)
+    if not normal:
+        return None
+    with SessionLocal() as session:
+        tarea_id = _tarea_vigente(
+            session,
+            session.scalar(
+                select(HuellaCorreo.tarea_id).where(HuellaCorreo.clave == _sha256(normal))
+            ),
+        )
+        if tarea_id is not None or len(_RE_PALABRA.findall(normal)) < MIN_PALABRAS:
+            return tarea_id
+        for candidato in _indice(session).buscar(simhash(normal), firma_numerica(normal)):
+            if _tarea_vigente(session, candidato) is not None:
+                logger.info("Aviso casi idéntico al de la tarea %s", candidato)
+                return candidato
+    return None
+
+
+def _guardar(session, huella: HuellaCorreo) -> bool:
+    session.add(huella)
+    try:
+        session.commit()
+        return True
+    except IntegrityError:
+        # Otra copia del aviso se registró antes: se conserva la primera
+        session.rollback()
+        return False
+
+
+def registrar_archivo(sha: str, tarea_id: int) -> None:
+    """Asocia el SHA-256 de un archivo recibido con su tarea."""
+    with SessionLocal() as session:
+        _guardar(session, HuellaCorreo(clave=sha, tipo="archivo", tarea_id=tarea_id))
+
+
+def registrar_texto(texto: str, tarea_id: int) -> None:
+    """Guarda la huella del cuerpo limpio de un aviso ya registrado."""
+    normal = normalizar(texto)
+    if not normal:
+        return
+    valor = simhash(normal)
+    firma = firma_numerica(normal)
+    with SessionLocal() as session:
+        huella = HuellaCorreo(
+            clave=_sha256(normal),
+            tipo="texto",
+            simhash=_a_bigint(valor),
+            firma=firma,
+            tarea_id=tarea_id,
+        )
+        if _guardar(session, huella) and _cache_indice.get("clave") == id(session.get_bind()):
+            _cache_indice["indice"].agregar(valor, firma, tarea_id)
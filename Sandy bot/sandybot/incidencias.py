@@ -27,29 +27,24 @@ async def procesar_incidencias_docx(ruta: str) -> str:
     return await gpt.consultar_gpt(texto)
 
 
-async def procesar_incidencias_archivos(rutas: list[str], contexto: str | None = None) -> str:
-    """Combina texto de varios archivos y lo envía a GPT.
+def _leer_archivo(ruta: str | Path) -> str:
+    path = Path(ruta)
+    if path.suffix.lower() == ".docx":
+        doc = Document(path)
+        return "\n".join(p.text for p in doc.paragraphs if p.text)
+    return path.read_text(encoding="utf-8")
+
+
+async def procesar_incidencias_archivos(
+    rutas: list[str], contexto: str | None = None
+) -> list[dict] | None:
+    """Arma la cronología de incidencias de varios archivos.
 
     Se aceptan paths a documentos ``.docx`` o ``.doc`` de texto plano. Si se
-    indica ``contexto`` se adjunta al final del mensaje.
+    indica ``contexto`` (otro archivo) su texto acompaña al análisis. Los
+    documentos largos se analizan por fragmentos en paralelo
+    (ver :meth:`GPTHandler.analizar_incidencias`).
     """
-    textos: list[str] = []
-
-    for ruta in rutas:
-        path = Path(ruta)
-        if path.suffix.lower() == ".docx":
-            doc = Document(path)
-            textos.append("\n".join(p.text for p in doc.paragraphs if p.text))
-        else:
-            textos.append(path.read_text(encoding="utf-8"))
-
-    if contexto:
-        cpath = Path(contexto)
-        if cpath.suffix.lower() == ".docx":
-            doc = Document(cpath)
-            textos.append("\n".join(p.text for p in doc.paragraphs if p.text))
-        else:
-            textos.append(cpath.read_text(encoding="utf-8"))
-
-    mensaje = "\n".join(textos)
-    return await gpt.consultar_gpt(mensaje)
+    texto = "\n".join(_leer_archivo(ruta) for ruta in rutas)
+    texto_contexto = _leer_archivo(contexto) if contexto else None
+    return await gpt.analizar_incidencias(texto, contexto=texto_contexto)
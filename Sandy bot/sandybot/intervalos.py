@@ -0,0 +1,74 @@
+# Nombre de archivo: intervalos.py
+# Ubicación de archivo: Sandy bot/sandybot/intervalos.py
+# User-provided custom instructions
+"""Árbol de intervalos estático para consultas de solapamiento en memoria.
+
+Se usa cuando la base no ofrece tipos de rango con índice GiST (SQLite):
+los intervalos se ordenan por inicio y se arma un árbol implícito sobre ese
+arreglo en el que cada nodo guarda el mayor fin de su subárbol. Una consulta
+descarta los subárboles que terminan antes de la ventana y los que empiezan
+después, por lo que cuesta ``O(log n + k)`` con ``k`` resultados.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Generic, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+class ArbolIntervalos(Generic[T]):
+    """Intervalos cerrados ``[inicio, fin]`` con un valor asociado.
+
+    El árbol es inmutable: ante cualquier cambio se construye uno nuevo, algo
+    barato frente a la cantidad de consultas que recibe entre cambios.
+    """
+
+    def __init__(self, intervalos: Iterable[tuple[Any, Any, T]]):
+        datos = sorted(intervalos, key=lambda i: i[0])
+        self._inicios = [d[0] for d in datos]
+        self._fines = [d[1] for d in datos]
+        self._valores = [d[2] for d in datos]
+        # ``_max_fin[m]`` es el mayor fin del rango cuyo nodo central es ``m``
+        self._max_fin = list(self._fines)
+        self._armar(0, len(datos))
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+    def _armar(self, lo: int, hi: int):
+        if lo >= hi:
+            return None
+        medio = (lo + hi) // 2
+        mayor = self._fines[medio]
+        for hijo in (self._armar(lo, medio), self._armar(medio + 1, hi)):
+            if hijo is not None and hijo > mayor:
+                mayor = hijo
+        self._max_fin[medio] = mayor
+        return mayor
+
+    def solapados(self, desde: Any, hasta: Any) -> list[T]:
+        """Valores cuyos intervalos se cruzan con ``[desde, hasta]``.
+
+        Se devuelven en orden de inicio.
+        """
+        # Solo los intervalos que empiezan antes de ``hasta`` pueden solaparse
+        tope = bisect_right(self._inicios, hasta)
+        return self._recorrer(0, len(self._inicios), desde, tope, [])
+
+    def _recorrer(self, lo: int, hi: int, desde, tope: int, resultado: list[T]) -> list[T]:
+        if lo >= hi or lo >= tope:
+            return resultado
+        medio = (lo + hi) // 2
+        if self._max_fin[medio] < desde:
+            return resultado
+        self._recorrer(lo, medio, desde, tope, resultado)
+        if medio < tope and self._fines[medio] >= desde:
+            resultado.append(self._valores[medio])
+        self._recorrer(medio + 1, hi, desde, tope, resultado)
+        return resultado
+
+    def en(self, momento: Any) -> list[T]:
+        """Valores cuyos intervalos contienen ``momento``."""
+        return self.solapados(momento, momento)
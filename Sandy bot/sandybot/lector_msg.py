@@ -0,0 +1,217 @@
+# Nombre de archivo: lector_msg.py
+# Ubicación de archivo: Sandy bot/sandybot/lector_msg.py
+# User-provided custom instructions
+"""Lectura de avisos ``.msg`` en procesos aparte, con tiempo máximo por archivo.
+
+Los procesos se crean con el método ``spawn``: el bot corre varios hilos
+(logging, métricas, pool de la base) y un ``fork`` podría heredar un lock
+tomado y colgar al hijo. Por eso este módulo solo depende de la biblioteca
+estándar: es lo único que importa cada proceso nuevo, sin telegram ni la base.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_CONTEXTO = multiprocessing.get_context("spawn")
+
+# Imágenes embebidas (``data:`` en base64) que solo agrandan el HTML a parsear
+_RE_IMAGENES = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+
+
+@dataclass
+class CorreoParseado:
+    """Contenido de un archivo ``.msg`` leído por :func:`parsear_msg`.
+
+    ``error`` queda en ``None`` si la lectura fue correcta; en caso contrario
+    describe el motivo (``"sin_libreria"``, ``"timeout"`` o la excepción).
+    """
+
+    ruta: str
+    asunto: str = ""
+    cuerpo: str = ""
+    remitente: str | None = None
+    remitente_nombre: str | None = None
+    error: str | None = None
+
+    @property
+    def texto(self) -> str:
+        """«From + Name + asunto + cuerpo» como lo espera el extractor."""
+        encabezado = []
+        if self.remitente:
+            encabezado.append(f"From: {self.remitente}")
+        if self.remitente_nombre:
+            encabezado.append(f"Name: {self.remitente_nombre}")
+        return "\n".join(encabezado + [self.asunto, self.cuerpo]).strip()
+
+
+def _a_texto(valor) -> str:
+    """Convierte bytes a ``str`` probando UTF-8 y luego latin-1."""
+    if isinstance(valor, bytes):
+        try:
+            return valor.decode()
+        except Exception:
+            return valor.decode("latin-1", "ignore")
+    return valor or ""
+
+
+def _abrir_msg(extract_msg, ruta: str):
+    """Abre el MSG sin cargar los adjuntos, que no se usan."""
+    try:
+        return extract_msg.Message(ruta, delayAttachments=True)
+    except TypeError:
+        # Versiones de extract-msg sin la opción ``delayAttachments``
+        return extract_msg.Message(ruta)
+
+
+def parsear_msg(ruta: str) -> CorreoParseado:
+    """Lee el archivo MSG y devuelve sus partes.
+
+    Se intenta importar ``extract_msg`` en cada llamada para permitir que el
+    handler funcione aunque la dependencia sea opcional. Los ``.txt`` se leen
+    como texto plano. Se ejecuta en los procesos de :class:`PoolCorreos`, por
+    eso no lanza excepciones: cualquier falla queda registrada en ``error``.
+    """
+
+    msg = None
+    try:
+        if ruta.lower().endswith(".txt"):
+            return CorreoParseado(
+                ruta, cuerpo=Path(ruta).read_text(encoding="utf-8", errors="ignore").strip()
+            )
+        try:
+            import extract_msg
+        except ModuleNotFoundError as exc:
+            logger.error("No se encontró la librería 'extract-msg': %s", exc)
+            return CorreoParseado(ruta, error="sin_libreria")
+
+        msg = _abrir_msg(extract_msg, ruta)
+        correo = CorreoParseado(
+            ruta,
+            asunto=_a_texto(msg.subject),
+            remitente=getattr(msg, "sender", None) or getattr(msg, "sender_email", None),
+            remitente_nombre=getattr(msg, "sender_name", None),
+        )
+
+        # 👉 1A) Usamos .body y, si está vacío, htmlBody. El RTF se decodifica
+        # solo como último recurso porque es la conversión más costosa.
+        cuerpo = _a_texto(msg.body) or _a_texto(getattr(msg, "htmlBody", ""))
+        if not cuerpo:
+            cuerpo = _a_texto(getattr(msg, "rtfBody", ""))
+
+        # 👉 1B) Convertimos HTML a texto si es necesario
+        if "<html" in cuerpo.lower():
+            cuerpo = _RE_IMAGENES.sub("", cuerpo)
+            try:
+                from bs4 import BeautifulSoup
+
+                cuerpo = BeautifulSoup(cuerpo, "html.parser").get_text("\n")
+            except ModuleNotFoundError:
+                logger.warning("beautifulsoup4 no instalado; continúo con HTML crudo")
+        correo.cuerpo = cuerpo.strip()
+
+        if not correo.texto:
+            try:
+                correo.cuerpo = Path(ruta).read_text(encoding="utf-8", errors="ignore")
+            except Exception as err:  # pragma: no cover - error inusual
+                logger.error("Error leyendo texto plano de %s: %s", ruta, err)
+
+        return correo
+    except Exception as exc:  # pragma: no cover
+        logger.error("Error leyendo MSG %s: %s", ruta, exc)
+        return CorreoParseado(ruta, error=str(exc))
+    finally:
+        if msg and hasattr(msg, "close"):
+            msg.close()
+
+
+class PoolCorreos:
+    """Pool de procesos reutilizado por todos los lotes de un comando.
+
+    Se abre con el primer lote y se cierra con :meth:`cerrar` (o al salir del
+    bloque ``with``). Si un archivo agota su tiempo el pool se termina, así
+    el proceso colgado no ocupa un lugar en los lotes siguientes, y el
+    próximo lote abre uno nuevo.
+    """
+
+    def __init__(self, procesos: int):
+        self.procesos = procesos
+        self._pool = None
+
+    def __enter__(self) -> "PoolCorreos":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def parsear(self, rutas: list[str], timeout: float) -> list[CorreoParseado]:
+        """Parsea ``rutas`` respetando ``timeout`` segundos por archivo.
+
+        Cada archivo dispone de ``timeout`` segundos a partir del turno que le
+        toca en la cola del pool.
+        """
+        if self.procesos <= 0:
+            return [parsear_msg(r) for r in rutas]
+        if not rutas:
+            return []
+        if self._pool is None:
+            self._pool = _CONTEXTO.Pool(self.procesos)
+        pendientes = [self._pool.apply_async(parsear_msg, (r,)) for r in rutas]
+        inicio = time.monotonic()
+        resultados = []
+        colgado = False
+        for i, (ruta, pendiente) in enumerate(zip(rutas, pendientes)):
+            limite = inicio + timeout * (i // self.procesos + 1)
+            try:
+                resultados.append(pendiente.get(max(limite - time.monotonic(), 0)))
+            except multiprocessing.TimeoutError:
+                logger.error("Tiempo agotado leyendo %s", ruta)
+                resultados.append(CorreoParseado(ruta, error="timeout"))
+                colgado = True
+        if colgado:
+            self.cerrar()
+        return resultados
+
+
+async def leer_correos(
+    rutas: list[str],
+    timeout: float | None = None,
+    procesos: int | None = None,
+    pool: PoolCorreos | None = None,
+) -> list[CorreoParseado]:
+    """Lee varios ``.msg`` en paralelo sin bloquear el loop del bot.
+
+    Por defecto usa ``config.CORREOS_PROCESOS`` procesos (``0`` los lee en
+    este mismo proceso) y ``config.CORREOS_TIMEOUT`` segundos por archivo.
+    Con ``pool`` se reutilizan los procesos de una llamada anterior; sin él
+    se abre un pool solo para esta lectura.
+    """
+    if not rutas:
+        return []
+    from .config import config
+
+    if timeout is None:
+        timeout = config.CORREOS_TIMEOUT
+    if pool is not None:
+        return await asyncio.to_thread(pool.parsear, list(rutas), timeout)
+
+    def _leer() -> list[CorreoParseado]:
+        cantidad = config.CORREOS_PROCESOS if procesos is None else procesos
+        with PoolCorreos(min(cantidad, len(rutas))) as propio:
+            return propio.parsear(list(rutas), timeout)
+
+    return await asyncio.to_thread(_leer)
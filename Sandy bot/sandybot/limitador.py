@@ -0,0 +1,222 @@
+# Nombre de archivo: limitador.py
+# Ubicación de archivo: Sandy bot/sandybot/limitador.py
+# User-provided custom instructions
+"""Limitador global de consultas a la API de OpenAI.
+
+Todas las consultas del bot pasan por :data:`limitador_gpt`, que respeta a la
+vez tres límites compartidos:
+
+* pedidos por minuto y tokens por minuto, como dos baldes de fichas que se
+  rellenan de forma continua;
+* cantidad máxima de consultas en curso.
+
+Cuando no hay capacidad, los pedidos esperan en una cola ordenada por
+prioridad y luego por llegada: la charla con el usuario
+(:data:`PRIORIDAD_INTERACTIVA`) pasa antes que la extracción masiva de
+correos (:data:`PRIORIDAD_LOTE`). La prioridad se fija para todo un flujo
+con :func:`prioridad_gpt`, sin pasarla en cada consulta. Ante un
+``RateLimitError`` :meth:`LimitadorGPT.penalizar` frena a todo el bot durante
+la espera, así los reintentos no se repiten en simultáneo.
+
+Uso::
+
+    with prioridad_gpt(PRIORIDAD_LOTE):
+        async with limitador_gpt.reservar(tokens) as reserva:
+            respuesta = await cliente.chat.completions.create(...)
+            reserva.ajustar(respuesta.usage.total_tokens)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from .metricas import registro
+
+logger = logging.getLogger(__name__)
+
+PRIORIDAD_INTERACTIVA = 0
+PRIORIDAD_NORMAL = 1
+PRIORIDAD_LOTE = 2
+
+_prioridad: ContextVar[int] = ContextVar("prioridad_gpt", default=PRIORIDAD_NORMAL)
+
+
+@contextmanager
+def prioridad_gpt(nivel: int):
+    """Fija la prioridad de las consultas a GPT hechas dentro del bloque."""
+    marca = _prioridad.set(nivel)
+    try:
+        yield
+    finally:
+        _prioridad.reset(marca)
+
+
+class BaldeFichas:
+    """Balde de ``capacidad`` fichas que se rellena en un minuto.
+
+    Una capacidad de ``0`` desactiva el límite.
+    """
+
+    def __init__(self, capacidad: int, reloj=time.monotonic):
+        self.capacidad = capacidad
+        self._reloj = reloj
+        self._fichas = float(capacidad)
+        self._ultimo = reloj()
+
+    def _rellenar(self) -> None:
+        ahora = self._reloj()
+        self._fichas = min(
+            self.capacidad, self._fichas + (ahora - self._ultimo) * self.capacidad / 60
+        )
+        self._ultimo = ahora
+
+    def espera(self, cantidad: float) -> float:
+        """Segundos hasta que haya ``cantidad`` fichas (0 si ya las hay)."""
+        if not self.capacidad:
+            return 0.0
+        self._rellenar()
+        faltan = min(cantidad, self.capacidad) - self._fichas
+        return max(faltan, 0) * 60 / self.capacidad
+
+    def consumir(self, cantidad: float) -> None:
+        """Descuenta fichas; puede quedar en negativo al ajustar el consumo real."""
+        if self.capacidad:
+            self._rellenar()
+            self._fichas -= min(cantidad, self.capacidad)
+
+
+class Reserva:
+    """Capacidad tomada por una consulta en curso."""
+
+    def __init__(self, limitador: "LimitadorGPT", tokens: int):
+        self._limitador = limitador
+        self.tokens = tokens
+
+    def ajustar(self, tokens_reales: int | None) -> None:
+        """Corrige el balde de tokens con el consumo informado por la API."""
+        if tokens_reales is None:
+            return
+        self._limitador.tokens.consumir(tokens_reales - self.tokens)
+        self.tokens = tokens_reales
+
+
+class LimitadorGPT:
+    """Cola con prioridades que reparte la capacidad de la API entre consultas."""
+
+    def __init__(
+        self,
+        pedidos_por_minuto: int,
+        tokens_por_minuto: int,
+        max_simultaneas: int = 0,
+        reloj=time.monotonic,
+    ):
+        self._reloj = reloj
+        self.pedidos = BaldeFichas(pedidos_por_minuto, reloj)
+        self.tokens = BaldeFichas(tokens_por_minuto, reloj)
+        self.max_simultaneas = max_simultaneas
+        self.en_curso = 0
+        self._cola: list[tuple[int, int, int, asyncio.Future]] = []
+        self._orden = itertools.count()
+        self._pausa_hasta = 0.0
+        self._temporizador: asyncio.TimerHandle | None = None
+        self._loop_temporizador: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def en_espera(self) -> int:
+        return sum(not f.done() for *_, f in self._cola)
+
+    def penalizar(self, segundos: float) -> None:
+        """Detiene todas las consultas nuevas durante ``segundos``."""
+        self._pausa_hasta = max(self._pausa_hasta, self._reloj() + segundos)
+        logger.warning("Límite de OpenAI alcanzado; se pausan las consultas %.1f s", segundos)
+
+    def _espera(self, tokens: int) -> float:
+        if self.max_simultaneas and self.en_curso >= self.max_simultaneas:
+            # Se libera al terminar una consulta, no por tiempo
+            return float("inf")
+        return max(
+            self._pausa_hasta - self._reloj(),
+            self.pedidos.espera(1),
+            self.tokens.espera(tokens),
+        )
+
+    def _despachar(self) -> None:
+        """Atiende la cola en orden mientras haya capacidad para el primero."""
+        while self._cola:
+            _, _, tokens, futuro = self._cola[0]
+            if futuro.done():
+                # Cancelado mientras esperaba
+                heapq.heappop(self._cola)
+                continue
+            espera = self._espera(tokens)
+            if espera > 0:
+                if espera != float("inf"):
+                    self._programar(espera)
+                return
+            heapq.heappop(self._cola)
+            self.pedidos.consumir(1)
+            self.tokens.consumir(tokens)
+            self.en_curso += 1
+            futuro.set_result(None)
+
+    def _programar(self, espera: float) -> None:
+        loop = asyncio.get_running_loop()
+        if self._temporizador is not None and self._loop_temporizador is loop:
+            self._temporizador.cancel()
+        self._loop_temporizador = loop
+        self._temporizador = loop.call_later(espera, self._despachar)
+
+    def _liberar(self) -> None:
+        self.en_curso -= 1
+        self._despachar()
+
+    @asynccontextmanager
+    async def reservar(self, tokens: int, prioridad: int | None = None):
+        """Espera turno y capacidad para una consulta de ``tokens`` estimados.
+
+        Sin ``prioridad`` se usa la fijada con :func:`prioridad_gpt`.
+        """
+        if prioridad is None:
+            prioridad = _prioridad.get()
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._cola, (prioridad, next(self._orden), tokens, futuro))
+        self._despachar()
+        try:
+            await futuro
+        except asyncio.CancelledError:
+            if futuro.done() and not futuro.cancelled():
+                # Ya tenía el turno asignado: se devuelve
+                self._liberar()
+            else:
+                self._despachar()
+            raise
+        try:
+            yield Reserva(self, tokens)
+        finally:
+            self._liberar()
+
+
+def _crear_limitador() -> LimitadorGPT:
+    from .config import config
+
+    return LimitadorGPT(
+        config.GPT_LIMITE_RPM, config.GPT_LIMITE_TPM, config.GPT_MAX_SIMULTANEAS
+    )
+
+
+# Instancia compartida por todas las consultas del bot
+limitador_gpt = _crear_limitador()
+
+registro.medidor(
+    "sandy_gpt_en_espera", "Consultas a GPT esperando turno en el limitador",
+    lambda: limitador_gpt.en_espera,
+)
+registro.medidor(
+    "sandy_gpt_en_curso", "Consultas a GPT en curso", lambda: limitador_gpt.en_curso
+)
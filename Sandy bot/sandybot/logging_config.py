@@ -1,16 +1,133 @@
 # Nombre de archivo: logging_config.py
 # Ubicación de archivo: Sandy bot/sandybot/logging_config.py
 # User-provided custom instructions
+"""Configuración del logging del bot.
+
+Los registros no se escriben en el hilo que los genera: el logger raíz solo
+tiene un :class:`~logging.handlers.QueueHandler` que los encola, y un
+:class:`~logging.handlers.QueueListener` en un hilo aparte los pasa a la
+consola y a los archivos con rotación. Así un ``logger.info`` en el loop del
+bot no espera al disco.
+
+Antes de encolar se agrega el identificador de la traza en curso (que solo
+se conoce en el hilo de origen) y se descarta parte de los mensajes
+``DEBUG`` repetidos según ``config.LOG_MUESTREO_DEBUG``. Con
+``config.LOG_JSON`` cada línea es un objeto JSON.
+"""
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
 from .config import config
+from .trazas import FiltroTraza
 
+FORMATO_TEXTO = '%(asctime)s - %(levelname)s - %(name)s - [%(trace_id)s] %(message)s'
 
-def setup_logging(level: int = logging.INFO) -> None:
-    """Configura logging para consola y archivos con rotación."""
-    formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
-    )
+_listener: Optional[QueueListener] = None
+
+
+class FormatoJSON(logging.Formatter):
+    """Un objeto JSON por registro, con la traza y la excepción si la hay."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "mensaje": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos["excepcion"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False)
+
+
+class EncoladorLogs(QueueHandler):
+    """``QueueHandler`` que deja la excepción aparte del mensaje.
+
+    El ``prepare`` original formatea el registro completo y pega el traceback
+    en ``msg``; así el formato JSON lo mostraría dentro de ``mensaje``. Aquí
+    solo se resuelven los argumentos del mensaje y el traceback se guarda en
+    ``exc_text``, que los formateadores del hilo de escritura agregan por
+    separado.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        # El traceback ya quedó en texto; los frames no se retienen en la cola
+        record.exc_info = None
+        return record
+
+
+class MuestreoDebug(logging.Filter):
+    """Deja pasar uno de cada ``cada`` registros ``DEBUG`` de la misma línea.
+
+    Los registros se agrupan por logger y plantilla del mensaje, así una
+    línea ruidosa dentro de un bucle no tapa al resto. Los niveles
+    superiores no se muestrean.
+    """
+
+    def __init__(self, cada: int = 1):
+        super().__init__()
+        self.cada = max(int(cada), 1)
+        self._vistos: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.cada == 1 or record.levelno > logging.DEBUG:
+            return True
+        clave = (record.name, str(record.msg))
+        with self._lock:
+            n = self._vistos.get(clave, 0)
+            self._vistos[clave] = n + 1
+        return n % self.cada == 0
+
+
+def detener_logging() -> None:
+    """Escribe lo que quede en la cola y detiene el hilo de logging."""
+    global _listener
+    if _listener is not None:
+        if _listener._thread is not None:
+            _listener.stop()
+        _listener = None
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    json_logs: Optional[bool] = None,
+    muestreo_debug: Optional[int] = None,
+) -> QueueListener:
+    """Configura logging para consola y archivos con rotación.
+
+    Args:
+        level: Nivel mínimo del logger raíz.
+        json_logs: Si ``True`` cada línea es JSON. Por defecto ``config.LOG_JSON``.
+        muestreo_debug: Uno de cada cuántos ``DEBUG`` repetidos se conserva.
+            Por defecto ``config.LOG_MUESTREO_DEBUG``.
+
+    Returns:
+        QueueListener: el hilo que escribe los registros, ya iniciado.
+    """
+    global _listener
+    detener_logging()
+
+    if json_logs is None:
+        json_logs = config.LOG_JSON
+    if muestreo_debug is None:
+        muestreo_debug = config.LOG_MUESTREO_DEBUG
+    formatter = FormatoJSON() if json_logs else logging.Formatter(FORMATO_TEXTO)
 
     root = logging.getLogger()
     root.setLevel(level)
@@ -21,7 +138,6 @@ def setup_logging(level: int = logging.INFO) -> None:
 
     consola = logging.StreamHandler()
     consola.setFormatter(formatter)
-    root.addHandler(consola)
 
     archivo = RotatingFileHandler(
         config.LOG_FILE,
@@ -30,7 +146,6 @@ def setup_logging(level: int = logging.INFO) -> None:
         encoding='utf-8'
     )
     archivo.setFormatter(formatter)
-    root.addHandler(archivo)
 
     errores = RotatingFileHandler(
         config.ERRORES_FILE,
@@ -40,4 +155,21 @@ def setup_logging(level: int = logging.INFO) -> None:
     )
     errores.setLevel(logging.ERROR)
     errores.setFormatter(formatter)
-    root.addHandler(errores)
+
+    cola: queue.SimpleQueue = queue.SimpleQueue()
+    encolador = EncoladorLogs(cola)
+    # Los filtros corren en el hilo de origen, antes de encolar: la traza
+    # en curso solo se conoce ahí y lo descartado no llega a la cola
+    encolador.addFilter(MuestreoDebug(muestreo_debug))
+    encolador.addFilter(FiltroTraza())
+    root.addHandler(encolador)
+
+    _listener = QueueListener(
+        cola, consola, archivo, errores, respect_handler_level=True
+    )
+    _listener.start()
+    return _listener
+
+
+# Lo encolado al cerrar el proceso se escribe antes de salir
+atexit.register(detener_logging)
@@ -0,0 +1,360 @@
+# Nombre de archivo: metricas.py
+# Ubicación de archivo: Sandy bot/sandybot/metricas.py
+# User-provided custom instructions
+"""Métricas del bot en formato de texto de Prometheus.
+
+Cada módulo declara sus métricas en :data:`registro` al importarse:
+
+* :class:`Contador`: valores que solo crecen (``*_total``);
+* :class:`Histograma`: duraciones agrupadas en cubetas acumuladas;
+* :meth:`Registro.medidor`: valores que se leen recién al exponer (largo de
+  colas, proporción de aciertos de cache), a partir de una función.
+
+:func:`iniciar_servidor` publica ``GET /metrics`` en un hilo aparte, así el
+scrape no pasa por el loop del bot. Solo usa la biblioteca estándar.
+
+Uso::
+
+    DEMORA = registro.histograma("sandy_x_segundos", "Duración de x", ("flujo",))
+    with cronometrar(DEMORA, flujo="comparador"):
+        ...
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable
+
+from .trazas import span
+
+logger = logging.getLogger(__name__)
+
+# Cubetas en segundos: de consultas a la base (ms) a informes y GPT (minutos)
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _valor(numero: float) -> str:
+    if math.isinf(numero):
+        return "+Inf" if numero > 0 else "-Inf"
+    if float(numero).is_integer():
+        return str(int(numero))
+    return repr(float(numero))
+
+
+def _escapar(texto: str) -> str:
+    return str(texto).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: Iterable[str], valores: Iterable[str], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Iterable[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def _clave(self, valores: dict) -> tuple:
+        if set(valores) != set(self.etiquetas):
+            raise ValueError(
+                f"{self.nombre} espera las etiquetas {self.etiquetas}, recibió {tuple(valores)}"
+            )
+        return tuple(str(valores[e]) for e in self.etiquetas)
+
+    def _encabezado(self) -> list[str]:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    """Cantidad acumulada por combinación de etiquetas."""
+
+    tipo = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._valores: dict[tuple, float] = {}
+
+    def incrementar(self, cantidad: float = 1, **etiquetas) -> None:
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+    def valor(self, **etiquetas) -> float:
+        return self._valores.get(self._clave(etiquetas), 0)
+
+    def exponer(self) -> list[str]:
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return self._encabezado() + [
+            f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_valor(v)}"
+            for clave, v in valores
+        ]
+
+
+class Histograma(_Metrica):
+    """Distribución de observaciones en cubetas acumuladas, con suma y cuenta."""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites)) + (float("inf"),)
+        # clave → [cuenta por cubeta (no acumulada), suma, cuenta]
+        self._series: dict[tuple, list] = {}
+
+    def observar(self, valor: float, **etiquetas) -> None:
+        clave = self._clave(etiquetas)
+        indice = next(i for i, limite in enumerate(self.limites) if valor <= limite)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * len(self.limites), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def cuenta(self, **etiquetas) -> int:
+        serie = self._series.get(self._clave(etiquetas))
+        return serie[2] if serie else 0
+
+    def exponer(self) -> list[str]:
+        with self._lock:
+            series = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        lineas = self._encabezado()
+        for clave, (cubetas, suma, cuenta) in series:
+            acumulado = 0
+            for limite, n in zip(self.limites, cubetas):
+                acumulado += n
+                le = f'le="{_valor(limite)}"'
+                lineas.append(
+                    f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {acumulado}"
+                )
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_valor(suma)}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {cuenta}")
+        return lineas
+
+
+class _Medidor(_Metrica):
+    """Valor calculado al exponer con ``funcion``.
+
+    ``funcion`` devuelve un número o, si hay ``etiqueta``, un ``dict`` del
+    valor de esa etiqueta al número.
+    """
+
+    def __init__(self, nombre, ayuda, funcion: Callable, etiqueta: str | None, tipo: str):
+        super().__init__(nombre, ayuda, (etiqueta,) if etiqueta else ())
+        self.funcion = funcion
+        self.tipo = tipo
+
+    def exponer(self) -> list[str]:
+        try:
+            datos = self.funcion()
+        except Exception as e:
+            logger.warning("No se pudo leer la métrica %s: %s", self.nombre, e)
+            return []
+        if datos is None:
+            return []
+        if not self.etiquetas:
+            datos = {(): datos}
+        else:
+            datos = {(k,): v for k, v in datos.items()}
+        return self._encabezado() + [
+            f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_valor(v)}"
+            for clave, v in sorted(datos.items())
+        ]
+
+
+class Registro:
+    """Conjunto de métricas expuestas juntas.
+
+    Declarar dos veces el mismo nombre devuelve la métrica existente (los
+    medidores toman la función nueva), así recargar un módulo no duplica
+    series.
+    """
+
+    def __init__(self) -> None:
+        self._metricas: dict[str, _Metrica] = {}
+        self._lock = threading.Lock()
+
+    def _declarar(self, clase, nombre: str, *args, **kwargs):
+        with self._lock:
+            existente = self._metricas.get(nombre)
+            if existente is not None:
+                if not isinstance(existente, clase):
+                    raise ValueError(f"{nombre} ya está declarada como {existente.tipo}")
+                return existente
+            metrica = self._metricas[nombre] = clase(nombre, *args, **kwargs)
+            return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Iterable[str] = ()) -> Contador:
+        return self._declarar(Contador, nombre, ayuda, etiquetas)
+
+    def histograma(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Iterable[str] = (),
+        limites: Iterable[float] = LIMITES_SEGUNDOS,
+    ) -> Histograma:
+        return self._declarar(Histograma, nombre, ayuda, etiquetas, limites)
+
+    def medidor(
+        self,
+        nombre: str,
+        ayuda: str,
+        funcion: Callable,
+        etiqueta: str | None = None,
+        tipo: str = "gauge",
+    ) -> None:
+        medidor = self._declarar(_Medidor, nombre, ayuda, funcion, etiqueta, tipo)
+        medidor.funcion = funcion
+
+    def exponer(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus 0.0.4."""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas: list[str] = []
+        for metrica in metricas:
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+# Registro compartido por todo el bot
+registro = Registro()
+
+
+@contextmanager
+def cronometrar(histograma: Histograma, **etiquetas):
+    """Observa en ``histograma`` la duración del bloque, aunque falle."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        histograma.observar(time.perf_counter() - inicio, **etiquetas)
+
+
+# ───────────────────────────── Handlers ─────────────────────────────
+HANDLER_SEGUNDOS = registro.histograma(
+    "sandy_handler_segundos",
+    "Duración de cada update atendido, por handler y flujo",
+    ("handler", "flujo"),
+)
+HANDLER_ERRORES = registro.contador(
+    "sandy_handler_errores_total",
+    "Updates cuyo handler terminó con una excepción",
+    ("handler", "flujo"),
+)
+
+
+def instrumentar(callback: Callable) -> Callable:
+    """Envuelve un callback asíncrono de telegram para medirlo.
+
+    El flujo es el atributo ``flujo`` del callback (lo fija
+    :func:`~sandybot.handlers.diferido`) o, si no lo tiene, el último tramo
+    de su módulo. Los handlers genéricos (mensajes, documentos, botones)
+    traen además ``flujo_dinamico``, que se consulta con cada update: primero
+    antes de atenderlo y, si el usuario no estaba en ningún flujo, después,
+    para contar el botón que lo inicia.
+    """
+    if getattr(callback, "_instrumentado", False):
+        return callback
+    handler = getattr(callback, "__name__", "desconocido")
+    fijo = getattr(callback, "flujo", None) or callback.__module__.rsplit(".", 1)[-1]
+    dinamico = getattr(callback, "flujo_dinamico", None)
+
+    @functools.wraps(callback)
+    async def _medido(update, context):
+        inicio = time.perf_counter()
+        previo = dinamico(update) if dinamico else None
+        fallo = False
+        try:
+            return await callback(update, context)
+        except Exception:
+            fallo = True
+            raise
+        finally:
+            flujo = previo or (dinamico(update) if dinamico else None) or fijo
+            if fallo:
+                HANDLER_ERRORES.incrementar(handler=handler, flujo=flujo)
+            HANDLER_SEGUNDOS.observar(
+                time.perf_counter() - inicio, handler=handler, flujo=flujo
+            )
+
+    _medido._instrumentado = True
+    return _medido
+
+
+# ─────────────────────────────── SMTP ───────────────────────────────
+SMTP_SEGUNDOS = registro.histograma(
+    "sandy_smtp_segundos", "Duración de los envíos de correo", ("funcion",)
+)
+SMTP_ENVIOS = registro.contador(
+    "sandy_smtp_envios_total", "Envíos de correo por resultado", ("funcion", "resultado")
+)
+
+
+def medir_smtp(funcion: Callable) -> Callable:
+    """Mide una función de envío que devuelve ``True`` si el correo salió.
+
+    Cada envío queda también como tramo ``smtp`` de la traza en curso.
+    """
+    nombre = funcion.__name__
+
+    @functools.wraps(funcion)
+    def _medida(*args, **kwargs):
+        resultado = False
+        with span("smtp", funcion=nombre), cronometrar(SMTP_SEGUNDOS, funcion=nombre):
+            try:
+                resultado = funcion(*args, **kwargs)
+                return resultado
+            finally:
+                SMTP_ENVIOS.incrementar(
+                    funcion=nombre, resultado="ok" if resultado else "error"
+                )
+
+    return _medida
+
+
+# ───────────────────────────── Servidor ─────────────────────────────
+class _Manejador(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:  # el scrape periódico no va al log
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        datos = self.server.registro.exponer().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+
+def iniciar_servidor(
+    puerto: int, host: str = "127.0.0.1", registro_metricas: Registro | None = None
+) -> ThreadingHTTPServer:
+    """Sirve ``/metrics`` en ``host:puerto`` desde un hilo daemon.
+
+    Se detiene con ``servidor.shutdown()``.
+    """
+    servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.registro = registro_metricas or registro
+    threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True).start()
+    logger.info("Métricas disponibles en http://%s:%s/metrics", host, servidor.server_address[1])
+    return servidor
@@ -0,0 +1,316 @@
+# Nombre de archivo: perfiles_correo.py
+# Ubicación de archivo: Sandy bot/sandybot/perfiles_correo.py
+# User-provided custom instructions
+"""Perfiles de extracción de avisos por carrier.
+
+Cada perfil describe cómo reconocer los correos de un carrier y leerlos sin
+GPT: patrones del remitente, del ID interno y de los servicios, etiquetas de
+los campos y formatos de fecha. Los perfiles base están en este módulo y se
+pueden ampliar o modificar con un YAML (``config.PERFILES_CORREO_PATH``)::
+
+    TELXIUS:
+      remitentes: ["telxius"]
+      servicio: 'CRT-\\d{6}'
+      etiquetas:
+        inicio: ["start date", "inicio"]
+      formatos_fecha: ["%d/%m/%Y %H:%M"]
+
+Las expresiones se compilan una sola vez al armar el registro. Cada intento
+de extracción local se cuenta por perfil para conocer la tasa de aciertos
+(:func:`tasa_regex`).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+GENERICO = "GENERICO"
+
+# Etiquetas en inglés y castellano de los avisos que envían los carriers
+_ETIQUETAS_CARRIER = {
+    "inicio": [r"start(?:\s+date)?(?:\s+and\s+time)?", "inicio"],
+    "fin": [r"end(?:\s+date)?(?:\s+and\s+time)?", "fin"],
+    "tipo": [r"type\s+of\s+work", r"tipo\s+de\s+trabajo", "trabajo"],
+    "servicios": [r"affected\s+services?", r"servicios?(?:\s+afectados)?"],
+}
+
+# Perfiles incluidos. Usan el mismo formato que el YAML.
+PERFILES_BASE: dict[str, dict] = {
+    GENERICO: {
+        "id_interno": r"ID\w+",
+        "servicio": r"\b\d+\b",
+        # Se descartan los números cortos (años, horas, códigos de 4 dígitos)
+        "servicio_valido": r"(?!\d{1,5}$).+",
+        "etiquetas": {
+            "inicio": ["inicio"],
+            "fin": ["fin"],
+            "servicios": [r"servicios?(?:\s+afectados)?"],
+        },
+    },
+    "TELXIUS": {
+        "remitentes": ["telxius"],
+        "id_interno": r"SWX\d{7}",
+        "servicio": r"CRT-\d{6}",
+        "servicios_en_texto": True,
+        "etiquetas": _ETIQUETAS_CARRIER,
+    },
+    "IGNETWORK": {
+        "remitentes": ["ignetwork"],
+        "id_interno": r"MTR\.\d{4,6}\.[A0]\d+",
+        "servicio": r"MTR\.\d{4,6}\.[A0]\d+",
+        "servicios_en_texto": True,
+        "etiquetas": _ETIQUETAS_CARRIER,
+    },
+}
+
+# Lo que sigue a la etiqueta de cada campo
+_VALOR_LINEA = r"([^\n\r]+)"
+_VALOR_SERVICIOS = r"([A-Z0-9.,\- ]+)"
+
+# Formatos que se prueban después de los propios de cada perfil
+FORMATOS_FECHA_BASE = (
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m %H:%M",
+    "%d/%m %H:%M:%S",
+)
+
+
+def _etiqueta(opciones: list[str], valor: str) -> re.Pattern[str]:
+    # La etiqueta abre la línea y termina en ``:``; así "we will start the
+    # works..." o "Start time ..." no se toman como campos
+    return re.compile(
+        rf"^[ \t]*(?:{'|'.join(opciones)})[ \t]*:[ \t]*{valor}", re.I | re.M
+    )
+
+
+@dataclass(frozen=True)
+class PerfilCorreo:
+    """Patrones compilados para leer los avisos de un carrier."""
+
+    nombre: str
+    servicio: re.Pattern[str]
+    servicio_valido: re.Pattern[str]
+    remitentes: tuple[re.Pattern[str], ...] = ()
+    id_interno: re.Pattern[str] | None = None
+    etiquetas: dict[str, re.Pattern[str]] = field(default_factory=dict)
+    formatos_fecha: tuple[str, ...] = ()
+    servicios_en_texto: bool = False
+
+    @classmethod
+    def desde_dict(cls, nombre: str, datos: dict) -> "PerfilCorreo":
+        """Compila un perfil con el formato de :data:`PERFILES_BASE`."""
+        servicio = datos.get("servicio", r"\b\d+\b")
+        etiquetas = {
+            campo: _etiqueta(
+                [opciones] if isinstance(opciones, str) else list(opciones),
+                _VALOR_SERVICIOS if campo == "servicios" else _VALOR_LINEA,
+            )
+            for campo, opciones in (datos.get("etiquetas") or {}).items()
+            if opciones
+        }
+        return cls(
+            nombre=nombre.upper(),
+            servicio=re.compile(servicio),
+            servicio_valido=re.compile(datos.get("servicio_valido") or servicio),
+            remitentes=tuple(re.compile(p, re.I) for p in datos.get("remitentes", ())),
+            id_interno=re.compile(datos["id_interno"]) if datos.get("id_interno") else None,
+            etiquetas=etiquetas,
+            formatos_fecha=tuple(datos.get("formatos_fecha", ())),
+            servicios_en_texto=bool(datos.get("servicios_en_texto", False)),
+        )
+
+    def coincide_remitente(self, remitente: str) -> bool:
+        return any(p.search(remitente) for p in self.remitentes)
+
+    def buscar_id_interno(self, texto: str) -> str | None:
+        if self.id_interno is None:
+            return None
+        m = self.id_interno.search(texto)
+        return m.group(0) if m else None
+
+    def buscar_servicios(self, texto: str) -> list[str]:
+        """Todas las apariciones del patrón de servicio, en orden."""
+        return self.servicio.findall(texto)
+
+    def filtrar_ids(self, ids: list[str]) -> tuple[list[str], list[str]]:
+        """Separa los IDs en ``(válidos, descartados)`` según el perfil."""
+        validos: list[str] = []
+        descartados: list[str] = []
+        for ident in ids:
+            (validos if self.servicio_valido.fullmatch(ident) else descartados).append(ident)
+        return validos, descartados
+
+    def leer_fecha(self, valor: str) -> datetime | None:
+        """Fecha de ``valor`` con los formatos del perfil y los base, o ``None``.
+
+        Los formatos sin año toman el año en curso.
+        """
+        valor = valor.replace("T", " ").strip()
+        for fmt in self.formatos_fecha + FORMATOS_FECHA_BASE:
+            try:
+                fecha = datetime.strptime(valor, fmt)
+            except ValueError:
+                continue
+            if "%Y" not in fmt:
+                fecha = fecha.replace(year=datetime.now().year)
+            return fecha
+        try:
+            return datetime.fromisoformat(valor)
+        except ValueError:
+            return None
+
+    def _campo(self, campo: str, texto: str) -> str | None:
+        patron = self.etiquetas.get(campo)
+        m = patron.search(texto) if patron else None
+        return m.group(1).strip() if m else None
+
+    def extraer(self, texto: str) -> dict | None:
+        """Datos de la tarea leídos con los patrones del perfil.
+
+        Devuelve ``None`` si no encuentra inicio, fin y al menos un servicio,
+        o si las fechas no tienen un formato conocido: en ese caso el aviso
+        se deriva a GPT.
+        """
+        inicio = self._campo("inicio", texto)
+        fin = self._campo("fin", texto)
+        if not (inicio and fin):
+            return None
+        if self.leer_fecha(inicio) is None or self.leer_fecha(fin) is None:
+            return None
+        if self.servicios_en_texto:
+            ids = list(dict.fromkeys(self.buscar_servicios(texto)))
+        else:
+            valor = self._campo("servicios", texto)
+            ids = [i.strip(" .") for i in valor.split(",") if i.strip(" .")] if valor else []
+        if not ids:
+            return None
+        return {
+            "inicio": inicio,
+            "fin": fin,
+            "tipo": self._campo("tipo", texto) or "Mantenimiento",
+            "afectacion": None,
+            "descripcion": None,
+            "ids": ids,
+        }
+
+
+class RegistroPerfiles:
+    """Perfiles compilados indexados por nombre de carrier."""
+
+    def __init__(self, perfiles: dict[str, PerfilCorreo]):
+        self._perfiles = perfiles
+        self.generico = perfiles[GENERICO]
+
+    def __len__(self) -> int:
+        return len(self._perfiles)
+
+    def perfil(self, carrier: str | None) -> PerfilCorreo:
+        """Perfil del carrier o el genérico si no hay uno propio."""
+        if not carrier:
+            return self.generico
+        return self._perfiles.get(carrier.strip().upper(), self.generico)
+
+    def por_remitente(self, remitente: str) -> PerfilCorreo | None:
+        for perfil in self._perfiles.values():
+            if perfil.coincide_remitente(remitente):
+                return perfil
+        return None
+
+
+def _leer_yaml(ruta: Path) -> dict:
+    try:
+        import yaml
+    except ImportError:  # pragma: no cover - depende del entorno
+        logger.warning("PyYAML no instalado; se ignoran los perfiles de %s", ruta)
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        datos = yaml.safe_load(f) or {}
+    if not isinstance(datos, dict):
+        raise ValueError(f"{ruta}: se esperaba un mapa carrier → perfil")
+    return datos
+
+
+def cargar_perfiles(ruta: str | Path | None = None) -> RegistroPerfiles:
+    """Compila los perfiles base más los del YAML indicado, si existe.
+
+    Un perfil del YAML con el nombre de uno base reemplaza sus claves; las
+    etiquetas se combinan campo por campo.
+    """
+    definiciones = {nombre: dict(datos) for nombre, datos in PERFILES_BASE.items()}
+    if ruta and Path(ruta).exists():
+        for nombre, datos in _leer_yaml(Path(ruta)).items():
+            nombre = str(nombre).upper()
+            base = definiciones.setdefault(nombre, {})
+            etiquetas = {**base.get("etiquetas", {}), **(datos.get("etiquetas") or {})}
+            base.update(datos, etiquetas=etiquetas)
+    perfiles = {}
+    for nombre, datos in definiciones.items():
+        try:
+            perfiles[nombre] = PerfilCorreo.desde_dict(nombre, datos)
+        except (re.error, TypeError, ValueError) as err:
+            if nombre == GENERICO:
+                raise
+            logger.error("Perfil de correo %s inválido: %s", nombre, err)
+    logger.info("Perfiles de correo cargados: %s", ", ".join(sorted(perfiles)))
+    return RegistroPerfiles(perfiles)
+
+
+_registro: RegistroPerfiles | None = None
+
+
+def registro() -> RegistroPerfiles:
+    """Registro compartido; se compila en el primer uso o al iniciar el bot."""
+    global _registro
+    if _registro is None:
+        from .config import config
+
+        _registro = cargar_perfiles(getattr(config, "PERFILES_CORREO_PATH", None))
+    return _registro
+
+
+def recargar_perfiles() -> RegistroPerfiles:
+    """Vuelve a leer el YAML, por ejemplo después de editarlo."""
+    global _registro
+    _registro = None
+    return registro()
+
+
+# ─────────────────────────── MÉTRICA DE ACIERTOS ───────────────────────────
+_intentos: Counter[str] = Counter()
+_aciertos: Counter[str] = Counter()
+
+
+def registrar_extraccion(perfil: str, local: bool) -> None:
+    """Cuenta un intento de extracción local y si evitó consultar a GPT."""
+    _intentos[perfil] += 1
+    if local:
+        _aciertos[perfil] += 1
+
+
+def tasa_regex() -> dict[str, float]:
+    """Proporción de correos resueltos sin GPT por perfil y en ``"total"``."""
+    tasas = {p: _aciertos[p] / n for p, n in _intentos.items() if n}
+    total = sum(_intentos.values())
+    if total:
+        tasas["total"] = sum(_aciertos.values()) / total
+    return tasas
+
+
+metricas.registro.medidor(
+    "sandy_correos_regex_ratio",
+    "Proporción de avisos resueltos con expresiones regulares sin consultar a GPT",
+    tasa_regex,
+    etiqueta="perfil",
+)
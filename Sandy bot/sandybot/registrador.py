@@ -2,37 +2,164 @@
 # Ubicación de archivo: Sandy bot/sandybot/registrador.py
 # User-provided custom instructions
 # sandybot/registrador.py
-from datetime import datetime
-from .database import SessionLocal, Conversacion
+import asyncio
 import logging
+import threading
+import time
+from datetime import datetime
+from typing import AsyncIterator
+
 from telegram import Message
 
+from .config import config
+from .database import SessionLocal, Conversacion
+from .metricas import registro
+
 logger = logging.getLogger(__name__)
 
+
+def _insertar_lote(filas: list[dict]) -> bool:
+    """Inserta varias conversaciones con un único ``INSERT`` y ``commit``.
+
+    Devuelve ``False`` si la base rechazó el lote.
+    """
+    with SessionLocal() as session:
+        try:
+            session.execute(Conversacion.__table__.insert(), filas)
+            session.commit()
+            logger.debug("✅ %s conversaciones guardadas", len(filas))
+            return True
+        except Exception as e:
+            logger.error("❌ Error al guardar %s conversaciones: %s", len(filas), e)
+            session.rollback()
+            return False
+
+
+class BufferConversaciones:
+    """Acumula conversaciones y las guarda en lote desde una tarea de fondo.
+
+    ``agregar`` solo encola la fila, así responder al usuario no espera a la
+    base. La tarea vuelca el buffer cuando junta ``max_filas`` filas o pasan
+    ``intervalo_ms`` milisegundos, lo que ocurra primero. ``detener`` guarda
+    lo pendiente antes de terminar.
+
+    Si la base rechaza un lote, sus filas vuelven al buffer y se reintentan
+    en el próximo volcado. Para no crecer sin límite mientras la base está
+    caída se conservan a lo sumo ``max_pendientes`` filas (por defecto 200
+    lotes); las más viejas se descartan.
+    """
+
+    def __init__(
+        self, max_filas: int = 50, intervalo_ms: int = 500, max_pendientes: int | None = None
+    ) -> None:
+        self.max_filas = max_filas
+        self.intervalo = intervalo_ms / 1000
+        self.max_pendientes = max_pendientes or max_filas * 200
+        self._filas: list[dict] = []
+        # Los handlers pueden registrar desde hilos (``to_thread``)
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lleno: asyncio.Event | None = None
+        self._tarea: asyncio.Task | None = None
+
+    @property
+    def activo(self) -> bool:
+        return self._tarea is not None and not self._tarea.done()
+
+    @property
+    def pendientes(self) -> int:
+        """Filas encoladas que aún no se guardaron."""
+        with self._lock:
+            return len(self._filas)
+
+    def agregar(self, fila: dict) -> None:
+        with self._lock:
+            self._filas.append(fila)
+            lleno = len(self._filas) >= self.max_filas
+        if lleno and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._lleno.set)
+
+    async def iniciar(self) -> None:
+        if self.activo:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._lleno = asyncio.Event()
+        self._tarea = asyncio.create_task(self._ciclo())
+
+    async def _ciclo(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._lleno.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._lleno.clear()
+            await self.volcar()
+
+    async def volcar(self) -> int:
+        """Guarda en la base todo lo acumulado y devuelve cuántas filas eran."""
+        with self._lock:
+            filas, self._filas = self._filas, []
+        if filas and not await asyncio.to_thread(_insertar_lote, filas):
+            self._reencolar(filas)
+        return len(filas)
+
+    def _reencolar(self, filas: list[dict]) -> None:
+        """Devuelve al buffer un lote rechazado, delante de las filas nuevas."""
+        with self._lock:
+            self._filas[:0] = filas
+            sobrantes = len(self._filas) - self.max_pendientes
+            if sobrantes > 0:
+                del self._filas[:sobrantes]
+        if sobrantes > 0:
+            logger.warning("Se descartan %s conversaciones sin guardar", sobrantes)
+
+    async def detener(self) -> None:
+        """Cancela la tarea de fondo y vuelca las filas pendientes."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self.volcar()
+        self._loop = None
+
+
+buffer_conversaciones = BufferConversaciones(
+    config.REGISTRO_LOTE_FILAS, config.REGISTRO_LOTE_MS
+)
+
+registro.medidor(
+    "sandy_conversaciones_en_buffer",
+    "Conversaciones encoladas que aún no se guardaron en la base",
+    lambda: buffer_conversaciones.pendientes,
+)
+
+
 def registrar_conversacion(user_id: int, mensaje: str, respuesta: str, modo: str = "GPT") -> None:
     """
     Registra una conversación en la base de datos.
 
+    Si el bot está en marcha la fila se encola en ``buffer_conversaciones``;
+    fuera del bot (scripts, pruebas) se guarda en el momento.
+
     :param user_id: ID del usuario.
     :param mensaje: Mensaje enviado por el usuario.
     :param respuesta: Respuesta enviada por el bot.
     :param modo: Modo de la conversación (ej. GPT, comando).
     """
-    with SessionLocal() as session:
-        try:
-            nueva_conversacion = Conversacion(
-                user_id=str(user_id),  # Asegurar que user_id sea string para el modelo
-                mensaje=mensaje,
-                respuesta=respuesta,
-                modo=modo,
-                fecha=datetime.utcnow()
-            )
-            session.add(nueva_conversacion)
-            session.commit()
-            logger.info(f"✅ Conversación guardada para user_id: {user_id}")
-        except Exception as e:
-            logger.error(f"❌ Error al guardar conversación para user_id {user_id}: {e}")
-            session.rollback()  # Hacer rollback en caso de error
+    fila = {
+        "user_id": str(user_id),  # Asegurar que user_id sea string para el modelo
+        "mensaje": mensaje,
+        "respuesta": respuesta,
+        "modo": modo,
+        "fecha": datetime.utcnow(),
+    }
+    if buffer_conversaciones.activo:
+        buffer_conversaciones.agregar(fila)
+        return
+    _insertar_lote([fila])
 
 
 async def responder_registrando(
@@ -43,11 +170,101 @@ async def responder_registrando(
     modo: str,
     **kwargs,
 ) -> None:
-    """Envía una respuesta y registra la interacción."""
-    await mensaje_obj.reply_text(texto_respuesta, **kwargs)
+    """Envía una respuesta y registra la interacción.
+
+    Si supera :data:`LIMITE_MENSAJE` se envía en varios mensajes; el teclado
+    (``reply_markup``) va en el último. La conversación se registra una vez
+    con el texto completo.
+    """
+    partes = _partir_texto(texto_respuesta) or [texto_respuesta]
+    previos = {k: v for k, v in kwargs.items() if k != "reply_markup"}
+    for parte in partes[:-1]:
+        await mensaje_obj.reply_text(parte, **previos)
+    await mensaje_obj.reply_text(partes[-1], **kwargs)
     registrar_conversacion(user_id, texto_usuario, texto_respuesta, modo)
 
 
+# Largo máximo de un mensaje de texto en Telegram
+LIMITE_MENSAJE = 4096
+
+
+def _partir_texto(texto: str, limite: int = LIMITE_MENSAJE) -> list[str]:
+    """Divide ``texto`` en partes de hasta ``limite`` caracteres.
+
+    Se corta en el último salto de línea (o espacio) de cada parte cuando lo hay.
+    """
+    partes: list[str] = []
+    while len(texto) > limite:
+        corte = texto.rfind("\n", 0, limite)
+        if corte <= 0:
+            corte = texto.rfind(" ", 0, limite)
+        if corte <= 0:
+            corte = limite
+        partes.append(texto[:corte])
+        texto = texto[corte:].lstrip()
+    if texto:
+        partes.append(texto)
+    return partes
+
+
+async def responder_en_vivo(
+    mensaje_obj: Message,
+    user_id: int,
+    texto_usuario: str,
+    fragmentos: AsyncIterator[str],
+    modo: str,
+    intervalo: float | None = None,
+) -> str:
+    """Responde con una respuesta que llega por partes y registra la interacción.
+
+    El primer fragmento con texto se envía de inmediato y el mensaje se edita
+    a medida que llegan los siguientes, como máximo una vez cada ``intervalo``
+    segundos (``config.GPT_STREAM_INTERVALO`` por defecto) para respetar los
+    límites de Telegram. Al terminar se deja el texto completo; si supera
+    :data:`LIMITE_MENSAJE` el resto se envía en mensajes nuevos.
+
+    :return: El texto completo de la respuesta.
+    """
+    if intervalo is None:
+        intervalo = config.GPT_STREAM_INTERVALO
+    texto = ""
+    enviado = None
+    mostrado = ""
+    ultima_edicion = 0.0
+
+    async def _mostrar(contenido: str) -> None:
+        nonlocal enviado, mostrado, ultima_edicion
+        contenido = contenido[:LIMITE_MENSAJE]
+        if contenido == mostrado:
+            # Telegram rechaza las ediciones que no cambian el texto
+            return
+        if enviado is None:
+            enviado = await mensaje_obj.reply_text(contenido)
+        else:
+            await enviado.edit_text(contenido)
+        mostrado = contenido
+        ultima_edicion = time.monotonic()
+
+    async for fragmento in fragmentos:
+        texto += fragmento
+        if not texto.strip():
+            continue
+        if enviado is None or time.monotonic() - ultima_edicion >= intervalo:
+            await _mostrar(texto.strip())
+
+    final = texto.strip()
+    partes = _partir_texto(final) or [final]
+    if enviado is None:
+        await mensaje_obj.reply_text(partes[0])
+    else:
+        await _mostrar(partes[0])
+    for parte in partes[1:]:
+        await mensaje_obj.reply_text(parte)
+
+    registrar_conversacion(user_id, texto_usuario, final, modo)
+    return final
+
+
 def registrar_envio_email(user_id: int, destinatarios: list[str], archivo: str) -> None:
     """Registra en la base que se envió un correo con un adjunto."""
     mensaje = f"Email a {', '.join(destinatarios)}"
@@ -0,0 +1,167 @@
+# Nombre de archivo: retencion.py
+# Ubicación de archivo: Sandy bot/sandybot/retencion.py
+# User-provided custom instructions
+"""Archivo y retención de la tabla ``conversaciones``.
+
+Los meses completos anteriores al plazo de retención se exportan a archivos
+comprimidos (Parquet si ``pyarrow`` está instalado, si no CSV con gzip) y se
+quitan de la tabla. En PostgreSQL con la tabla particionada se elimina la
+partición entera; en el resto se borran las filas del mes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import gzip
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select, text
+
+from .config import config
+from .database import (
+    Conversacion,
+    SessionLocal,
+    _inicio_mes,
+    _mes_siguiente,
+    asegurar_particiones_conversaciones,
+    conversaciones_particionada,
+)
+
+logger = logging.getLogger(__name__)
+
+_COLUMNAS = (
+    Conversacion.id,
+    Conversacion.user_id,
+    Conversacion.mensaje,
+    Conversacion.respuesta,
+    Conversacion.modo,
+    Conversacion.fecha,
+)
+
+
+def _escribir_archivo(filas, destino: Path, mes: datetime) -> tuple[Path, int]:
+    """Guarda ``filas`` en un archivo comprimido y devuelve ``(ruta, total)``.
+
+    El nombre lleva la hora de creación para no pisar un archivo anterior del
+    mismo mes (filas con fecha vieja que llegaron después del primer archivo).
+    """
+    destino.mkdir(parents=True, exist_ok=True)
+    base = f"conversaciones_{mes:%Y_%m}_{datetime.utcnow():%Y%m%d%H%M%S%f}"
+    nombres = [c.key for c in _COLUMNAS]
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # pragma: no cover - depende del entorno
+        pa = None
+
+    if pa is not None:
+        datos = [tuple(f) for f in filas]
+        tabla = pa.Table.from_pylist([dict(zip(nombres, f)) for f in datos])
+        ruta = destino / f"{base}.parquet"
+        pq.write_table(tabla, ruta, compression="zstd")
+        return ruta, len(datos)
+
+    ruta = destino / f"{base}.csv.gz"
+    total = 0
+    with gzip.open(ruta, "wt", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(nombres)
+        for fila in filas:
+            escritor.writerow(fila)
+            total += 1
+    return ruta, total
+
+
+def preparar_particiones(ahora: datetime | None = None) -> list[str]:
+    """Crea por adelantado las particiones de los próximos meses.
+
+    Solo aplica con ``conversaciones`` particionada (PostgreSQL) y corre
+    aunque la retención esté desactivada: sin la partición del mes las filas
+    nuevas caen en la partición por defecto.
+    """
+    ahora = ahora or datetime.utcnow()
+    with SessionLocal() as session:
+        conn = session.connection()
+        if not conversaciones_particionada(conn):
+            return []
+        creadas = asegurar_particiones_conversaciones(
+            conn, ahora, _mes_siguiente(_mes_siguiente(ahora))
+        )
+        session.commit()
+    return creadas
+
+
+def archivar_conversaciones(
+    dias: int | None = None,
+    destino: Path | None = None,
+    ahora: datetime | None = None,
+) -> dict[str, int]:
+    """Archiva los meses completos con más de ``dias`` de antigüedad.
+
+    Devuelve ``{nombre_archivo: filas}``. Cada mes se exporta y luego se borra
+    en su propia transacción, así una falla a mitad de camino no pierde datos:
+    en el peor caso el mes queda exportado dos veces. Con ``dias`` en ``0``
+    (el valor por defecto de la configuración) no se archiva nada y solo se
+    preparan las particiones.
+    """
+    dias = config.CONVERSACIONES_RETENCION_DIAS if dias is None else dias
+    destino = Path(destino or config.CONVERSACIONES_ARCHIVO_DIR)
+    ahora = ahora or datetime.utcnow()
+    preparar_particiones(ahora)
+    if dias <= 0:
+        return {}
+    corte = _inicio_mes(ahora - timedelta(days=dias))
+    archivos: dict[str, int] = {}
+
+    with SessionLocal() as session:
+        particionada = conversaciones_particionada(session.connection())
+        primera = session.execute(
+            select(func.min(Conversacion.fecha)).where(Conversacion.fecha < corte)
+        ).scalar()
+
+    mes = _inicio_mes(primera) if primera else corte
+    while mes < corte:
+        fin = _mes_siguiente(mes)
+        rango = (Conversacion.fecha >= mes, Conversacion.fecha < fin)
+        with SessionLocal() as session:
+            filas = session.execute(
+                select(*_COLUMNAS)
+                .where(*rango)
+                .order_by(Conversacion.id)
+                .execution_options(yield_per=1000)
+            )
+            ruta, total = _escribir_archivo(filas, destino, mes)
+            if not total:
+                ruta.unlink()
+                mes = fin
+                continue
+            particion = f"conversaciones_p{mes:%Y_%m}"
+            existe = particionada and session.execute(
+                text("SELECT to_regclass(:n) IS NOT NULL"), {"n": particion}
+            ).scalar()
+            if existe:
+                session.execute(text(f"DROP TABLE {particion}"))
+            # También se borran las filas del mes que quedaron en la partición
+            # por defecto o, sin particiones, todas las del mes
+            session.execute(Conversacion.__table__.delete().where(*rango))
+            session.commit()
+        archivos[ruta.name] = total
+        logger.info("Conversaciones de %s archivadas en %s (%s filas)", f"{mes:%Y-%m}", ruta, total)
+        mes = fin
+    return archivos
+
+
+async def ciclo_retencion(intervalo_horas: float = 24) -> None:
+    """Ejecuta :func:`archivar_conversaciones` periódicamente en un hilo.
+
+    Corre también con la retención desactivada, para crear las particiones.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(archivar_conversaciones)
+        except Exception as e:  # pragma: no cover - no debe frenar al bot
+            logger.error("Error en la retención de conversaciones: %s", e)
+        await asyncio.sleep(intervalo_horas * 3600)
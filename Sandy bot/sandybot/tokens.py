@@ -0,0 +1,97 @@
+# Nombre de archivo: tokens.py
+# Ubicación de archivo: Sandy bot/sandybot/tokens.py
+# User-provided custom instructions
+"""Conteo de tokens y división de textos largos para consultar a GPT.
+
+Si ``tiktoken`` está instalado se cuenta con el tokenizador del modelo; si
+no, se estima un token cada :data:`CARACTERES_POR_TOKEN` caracteres, un valor
+conservador para textos en castellano.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from functools import lru_cache
+from typing import Callable
+
+CARACTERES_POR_TOKEN = 3
+
+_RE_ORACION = re.compile(r"(?<=[.!?;])\s+")
+
+
+@lru_cache(maxsize=8)
+def _codificador(modelo: str | None):
+    try:
+        import tiktoken  # type: ignore
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(modelo or "")
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def contar_tokens(texto: str, modelo: str | None = None) -> int:
+    """Cantidad de tokens de ``texto`` para ``modelo`` (exacta o estimada)."""
+    codificador = _codificador(modelo)
+    if codificador is None:
+        return math.ceil(len(texto) / CARACTERES_POR_TOKEN)
+    return len(codificador.encode(texto))
+
+
+def _agrupar(
+    piezas: list[str], max_tokens: int, contar: Callable[[str], int], union: str
+) -> list[str]:
+    """Junta piezas consecutivas mientras no superen ``max_tokens``."""
+    grupos: list[str] = []
+    actual: list[str] = []
+    tokens = 0
+    for pieza in piezas:
+        n = contar(pieza)
+        if actual and tokens + n + 1 > max_tokens:
+            grupos.append(union.join(actual))
+            actual, tokens = [], 0
+        actual.append(pieza)
+        tokens += n + 1
+    if actual:
+        grupos.append(union.join(actual))
+    return grupos
+
+
+def _partir_parrafo(parrafo: str, max_tokens: int, contar: Callable[[str], int]) -> list[str]:
+    """Divide un párrafo demasiado largo por oraciones y, si hace falta, por palabras."""
+    partes: list[str] = []
+    for oracion in _RE_ORACION.split(parrafo):
+        if contar(oracion) <= max_tokens:
+            partes.append(oracion)
+        else:
+            partes.extend(_agrupar(oracion.split(), max_tokens, contar, " "))
+    return _agrupar(partes, max_tokens, contar, " ")
+
+
+def dividir_por_tokens(
+    texto: str, max_tokens: int, modelo: str | None = None
+) -> list[str]:
+    """Divide ``texto`` en fragmentos de hasta ``max_tokens`` tokens.
+
+    Los cortes se hacen entre párrafos (líneas) para no separar un evento de
+    su fecha; solo un párrafo que por sí mismo supera el límite se corta por
+    oraciones o palabras. Devuelve los fragmentos en el orden del texto.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens debe ser positivo")
+
+    def contar(pieza: str) -> int:
+        return contar_tokens(pieza, modelo)
+
+    piezas: list[str] = []
+    for parrafo in texto.splitlines():
+        parrafo = parrafo.strip()
+        if not parrafo:
+            continue
+        if contar(parrafo) > max_tokens:
+            piezas.extend(_partir_parrafo(parrafo, max_tokens, contar))
+        else:
+            piezas.append(parrafo)
+    return _agrupar(piezas, max_tokens, contar, "\n")
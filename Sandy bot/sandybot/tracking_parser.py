@@ -11,6 +11,8 @@ from typing import List, Tuple
 
 import pandas as pd
 
+from .trazas import trazar
+
 
 class TrackingParser:
     """Procesa archivos de tracking para detectar cámaras comunes."""
@@ -64,6 +66,7 @@ class TrackingParser:
         comunes = set.intersection(*sets)
         return sorted(comunes)
 
+    @trazar("excel.tracking")
     def generate_excel(self, output: str) -> None:
         """Genera un Excel con cada tracking y las coincidencias."""
         coincidencias = pd.DataFrame(
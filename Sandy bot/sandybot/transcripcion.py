@@ -0,0 +1,153 @@
+# Nombre de archivo: transcripcion.py
+# Ubicación de archivo: Sandy bot/sandybot/transcripcion.py
+# User-provided custom instructions
+"""Transcripción de mensajes de voz.
+
+Cada transcripción se guarda por el ``file_unique_id`` del audio en Telegram,
+que es el mismo para todas las copias reenviadas, así un audio repetido no se
+vuelve a transcribir. Si llegan varias copias mientras la primera se está
+transcribiendo, todas esperan ese mismo resultado.
+
+Hay dos motores, elegidos con ``config.TRANSCRIPCION_BACKEND``:
+
+* ``openai``: ``whisper-1`` por la API (predeterminado);
+* ``local``: ``faster-whisper`` en CPU, sin enviar el audio afuera. Si el
+  paquete no está instalado se usa la API.
+
+Como máximo ``config.TRANSCRIPCION_CONCURRENCIA`` audios se transcriben a la
+vez.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+
+from .config import config
+from .trazas import span
+from .utils import cargar_json, guardar_json
+
+logger = logging.getLogger(__name__)
+
+# Transcripciones que se conservan en disco; se descartan las más antiguas
+MAX_TRANSCRIPCIONES = 1000
+
+
+class BackendOpenAI:
+    """Transcribe con la API de OpenAI."""
+
+    nombre = "openai"
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    async def transcribir(self, ruta: str) -> str:
+        with open(ruta, "rb") as audio:
+            transcripcion = await self.cliente.audio.transcriptions.create(
+                file=audio,
+                model="whisper-1",
+            )
+        return transcripcion.text.strip()
+
+
+class BackendLocal:
+    """Transcribe en la CPU con ``faster-whisper``.
+
+    El modelo se carga en el primer audio y se reutiliza; la transcripción
+    corre en un hilo para no frenar al bot.
+    """
+
+    nombre = "local"
+
+    def __init__(self, modelo: str, idioma: str | None = None):
+        self.modelo = modelo
+        self.idioma = idioma
+        self._whisper = None
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        with self._lock:
+            if self._whisper is None:
+                from faster_whisper import WhisperModel
+
+                logger.info("Cargando modelo local de transcripción %s", self.modelo)
+                self._whisper = WhisperModel(self.modelo, device="cpu", compute_type="int8")
+        return self._whisper
+
+    def _transcribir(self, ruta: str) -> str:
+        segmentos, _ = self._cargar().transcribe(
+            ruta, language=self.idioma, vad_filter=True
+        )
+        return " ".join(s.text.strip() for s in segmentos).strip()
+
+    async def transcribir(self, ruta: str) -> str:
+        return await asyncio.to_thread(self._transcribir, ruta)
+
+
+def crear_backend(cliente):
+    """Motor indicado en la configuración, o la API si no está disponible."""
+    if config.TRANSCRIPCION_BACKEND == "local":
+        if importlib.util.find_spec("faster_whisper") is not None:
+            return BackendLocal(config.WHISPER_LOCAL_MODELO, config.TRANSCRIPCION_IDIOMA)
+        logger.warning("faster-whisper no está instalado; se transcribe con la API")
+    return BackendOpenAI(cliente)
+
+
+class Transcriptor:
+    """Transcribe audios de Telegram con cache y concurrencia limitada."""
+
+    def __init__(self, backend, concurrencia: int | None = None, ruta_cache=None):
+        self.backend = backend
+        self._limite = asyncio.Semaphore(concurrencia or config.TRANSCRIPCION_CONCURRENCIA)
+        self._ruta_cache = ruta_cache or config.TRANSCRIPCIONES_FILE
+        self._cache: dict[str, str] = cargar_json(self._ruta_cache)
+        self._pendientes: dict[str, asyncio.Future] = {}
+
+    def en_cache(self, file_unique_id: str) -> str | None:
+        return self._cache.get(file_unique_id)
+
+    def _guardar(self, file_unique_id: str, texto: str) -> None:
+        self._cache[file_unique_id] = texto
+        while len(self._cache) > MAX_TRANSCRIPCIONES:
+            del self._cache[next(iter(self._cache))]
+        guardar_json(self._cache, self._ruta_cache)
+
+    async def _descargar_y_transcribir(self, voz) -> str:
+        archivo = await voz.get_file()
+        fd, ruta = tempfile.mkstemp(suffix=".ogg")
+        os.close(fd)
+        try:
+            with span("telegram.descarga"):
+                await archivo.download_to_drive(ruta)
+            async with self._limite:
+                with span("transcripcion", motor=self.backend.nombre):
+                    return await self.backend.transcribir(ruta)
+        finally:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+    async def transcribir(self, voz) -> str:
+        """Texto del audio ``voz`` (``telegram.Voice``)."""
+        clave = getattr(voz, "file_unique_id", None)
+        if not clave:
+            return await self._descargar_y_transcribir(voz)
+        texto = self.en_cache(clave)
+        if texto is not None:
+            logger.info("Transcripción reutilizada para %s", clave)
+            return texto
+        pendiente = self._pendientes.get(clave)
+        if pendiente is None:
+            pendiente = asyncio.ensure_future(self._descargar_y_transcribir(voz))
+            self._pendientes[clave] = pendiente
+            pendiente.add_done_callback(lambda _: self._pendientes.pop(clave, None))
+        # ``shield``: si se cancela una copia, las demás siguen esperando
+        texto = await asyncio.shield(pendiente)
+        if texto and self.en_cache(clave) is None:
+            self._guardar(clave, texto)
+        return texto
@@ -0,0 +1,330 @@
+# Nombre de archivo: trazas.py
+# Ubicación de archivo: Sandy bot/sandybot/trazas.py
+# User-provided custom instructions
+"""Trazas livianas por update de Telegram.
+
+Cada update atendido abre una traza (:func:`trazar_update`) con un
+identificador en el formato de W3C Trace Context / OpenTelemetry (32 dígitos
+hexadecimales). Dentro de ella, :func:`span` y :func:`trazar` registran
+tramos anidados: consultas a la base, a GPT, descargas de archivos,
+generación de Excel/DOCX y envíos de correo. Fuera de una traza no hacen
+nada, así los scripts y las pruebas no pagan el costo.
+
+Al terminar, la traza se entrega al exportador elegido con
+``config.TRAZAS_EXPORTADOR``: ``nulo`` (por defecto) la descarta y ``otel``
+la reenvía a la API de OpenTelemetry si el paquete está instalado. Si el
+update tardó más de ``config.TRAZAS_UMBRAL_SEG`` segundos, el árbol completo
+se agrega a ``config.TRAZAS_LENTAS_FILE``.
+
+El identificador de la traza en curso se agrega a cada línea de log con
+:class:`FiltroTraza`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib.util
+import logging
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Tramos que se guardan por traza; el resto solo se cuenta
+MAX_SPANS = 2000
+
+
+class Span:
+    """Tramo de una traza con su duración, atributos e hijos."""
+
+    __slots__ = (
+        "nombre", "trace_id", "span_id", "padre_id", "atributos",
+        "inicio", "fin", "inicio_epoch", "error", "hijos", "_traza",
+    )
+
+    def __init__(self, traza: "Traza", nombre: str, padre: "Span | None", atributos: dict):
+        self._traza = traza
+        self.nombre = nombre
+        self.trace_id = traza.trace_id
+        self.span_id = secrets.token_hex(8)
+        self.padre_id = padre.span_id if padre else None
+        self.atributos = atributos
+        self.inicio_epoch = time.time()
+        self.inicio = time.perf_counter()
+        self.fin: float | None = None
+        self.error: str | None = None
+        self.hijos: list[Span] = []
+
+    @property
+    def duracion(self) -> float:
+        return (self.fin if self.fin is not None else time.perf_counter()) - self.inicio
+
+    def terminar(self, error: BaseException | None = None) -> None:
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self.fin is None:
+            self.fin = time.perf_counter()
+
+
+class Traza:
+    """Árbol de tramos de un update."""
+
+    def __init__(self, nombre: str, atributos: dict):
+        self.trace_id = secrets.token_hex(16)
+        self._lock = threading.Lock()
+        self.cantidad = 1
+        self.descartados = 0
+        self.raiz = Span(self, nombre, None, atributos)
+
+    def _agregar(self, padre: Span, nombre: str, atributos: dict) -> Span | None:
+        # Los tramos se abren también desde hilos (``asyncio.to_thread``)
+        with self._lock:
+            if self.cantidad >= MAX_SPANS:
+                self.descartados += 1
+                return None
+            self.cantidad += 1
+            hijo = Span(self, nombre, padre, atributos)
+            padre.hijos.append(hijo)
+            return hijo
+
+    def arbol(self) -> str:
+        """Texto con un tramo por línea, indentado según su profundidad."""
+        lineas = [
+            f"{datetime.fromtimestamp(self.raiz.inicio_epoch).isoformat(timespec='seconds')} "
+            f"traza {self.trace_id} ({self.raiz.duracion:.2f} s)"
+        ]
+
+        def _linea(span: Span, nivel: int) -> None:
+            atributos = " ".join(f"{k}={v}" for k, v in span.atributos.items())
+            desfase = span.inicio - self.raiz.inicio
+            texto = (
+                f"{'  ' * nivel}- {span.nombre} {span.duracion * 1000:.1f} ms "
+                f"(+{desfase * 1000:.0f} ms)"
+            )
+            if atributos:
+                texto += f" {atributos}"
+            if span.error:
+                texto += f" ERROR {span.error}"
+            lineas.append(texto)
+            for hijo in span.hijos:
+                _linea(hijo, nivel + 1)
+
+        _linea(self.raiz, 1)
+        if self.descartados:
+            lineas.append(f"  ({self.descartados} tramos más sin registrar)")
+        return "\n".join(lineas)
+
+
+_traza: ContextVar[Traza | None] = ContextVar("traza", default=None)
+_span_actual: ContextVar[Span | None] = ContextVar("span_actual", default=None)
+
+
+def id_traza_actual() -> str | None:
+    traza = _traza.get()
+    return traza.trace_id if traza else None
+
+
+def traceparent() -> str | None:
+    """Encabezado ``traceparent`` del tramo en curso, para propagar la traza."""
+    span_actual = _span_actual.get()
+    if span_actual is None:
+        return None
+    return f"00-{span_actual.trace_id}-{span_actual.span_id}-01"
+
+
+def empezar_span(nombre: str, **atributos) -> Span | None:
+    """Abre un tramo hijo del actual sin volverlo el tramo en curso.
+
+    Sirve cuando el inicio y el fin ocurren en callbacks separados; se
+    cierra con :meth:`Span.terminar`. Devuelve ``None`` fuera de una traza.
+    """
+    padre = _span_actual.get()
+    if padre is None:
+        return None
+    return padre._traza._agregar(padre, nombre, atributos)
+
+
+@contextmanager
+def span(nombre: str, **atributos):
+    """Registra el bloque como tramo de la traza en curso."""
+    actual = empezar_span(nombre, **atributos)
+    if actual is None:
+        yield None
+        return
+    marca = _span_actual.set(actual)
+    try:
+        yield actual
+    except BaseException as e:
+        actual.terminar(e)
+        raise
+    finally:
+        _span_actual.reset(marca)
+        actual.terminar()
+
+
+def trazar(nombre: str | None = None) -> Callable:
+    """Decorador que registra cada llamada (síncrona o asíncrona) como tramo."""
+
+    def _decorador(funcion: Callable) -> Callable:
+        etiqueta = nombre or funcion.__qualname__
+
+        if asyncio.iscoroutinefunction(funcion):
+
+            @functools.wraps(funcion)
+            async def _asincrona(*args, **kwargs):
+                with span(etiqueta):
+                    return await funcion(*args, **kwargs)
+
+            return _asincrona
+
+        @functools.wraps(funcion)
+        def _sincrona(*args, **kwargs):
+            with span(etiqueta):
+                return funcion(*args, **kwargs)
+
+        return _sincrona
+
+    return _decorador
+
+
+# ─────────────────────────── Exportadores ───────────────────────────
+class ExportadorNulo:
+    """Descarta las trazas; solo se vuelcan las lentas."""
+
+    def exportar(self, traza: Traza) -> None:
+        pass
+
+
+class ExportadorOTel:
+    """Reenvía cada traza a la API de OpenTelemetry con sus tiempos reales.
+
+    Los tramos se recrean al terminar el update, con el proveedor de trazas
+    que configure la aplicación (``opentelemetry-sdk`` y su exportador).
+    """
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("sandybot")
+
+    def _reenviar(self, span_local: Span, contexto) -> None:
+        inicio = int(span_local.inicio_epoch * 1e9)
+        otel = self._tracer.start_span(
+            span_local.nombre,
+            context=contexto,
+            start_time=inicio,
+            attributes={k: str(v) for k, v in span_local.atributos.items()},
+        )
+        if span_local.error:
+            from opentelemetry.trace import Status, StatusCode
+
+            otel.set_status(Status(StatusCode.ERROR, span_local.error))
+        hijo_contexto = self._trace.set_span_in_context(otel)
+        for hijo in span_local.hijos:
+            self._reenviar(hijo, hijo_contexto)
+        otel.end(end_time=inicio + int(span_local.duracion * 1e9))
+
+    def exportar(self, traza: Traza) -> None:
+        self._reenviar(traza.raiz, None)
+
+
+def crear_exportador():
+    """Exportador indicado en la configuración, o el nulo si no está disponible."""
+    from .config import config
+
+    if config.TRAZAS_EXPORTADOR == "otel":
+        if importlib.util.find_spec("opentelemetry") is not None:
+            return ExportadorOTel()
+        logger.warning("opentelemetry no está instalado; las trazas no se exportan")
+    return ExportadorNulo()
+
+
+_exportador = None
+
+
+def _obtener_exportador():
+    global _exportador
+    if _exportador is None:
+        _exportador = crear_exportador()
+    return _exportador
+
+
+def volcar_traza(traza: Traza, ruta) -> None:
+    """Agrega el árbol de ``traza`` al archivo ``ruta``."""
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(traza.arbol() + "\n\n")
+
+
+@contextmanager
+def traza(nombre: str, **atributos):
+    """Abre una traza nueva con ``nombre`` como tramo raíz.
+
+    Al salir se exporta y, si superó el umbral, se vuelca a
+    ``config.TRAZAS_LENTAS_FILE``.
+    """
+    from .config import config
+
+    nueva = Traza(nombre, atributos)
+    marca_traza = _traza.set(nueva)
+    marca_span = _span_actual.set(nueva.raiz)
+    try:
+        yield nueva
+    except BaseException as e:
+        nueva.raiz.terminar(e)
+        raise
+    finally:
+        _span_actual.reset(marca_span)
+        _traza.reset(marca_traza)
+        nueva.raiz.terminar()
+        try:
+            _obtener_exportador().exportar(nueva)
+        except Exception as e:
+            logger.warning("No se pudo exportar la traza %s: %s", nueva.trace_id, e)
+        if config.TRAZAS_UMBRAL_SEG and nueva.raiz.duracion >= config.TRAZAS_UMBRAL_SEG:
+            logger.warning(
+                "Update lento (%.1f s), traza %s volcada en %s",
+                nueva.raiz.duracion,
+                nueva.trace_id,
+                config.TRAZAS_LENTAS_FILE,
+            )
+            try:
+                volcar_traza(nueva, config.TRAZAS_LENTAS_FILE)
+            except OSError as e:
+                logger.error("No se pudo volcar la traza %s: %s", nueva.trace_id, e)
+
+
+def trazar_update(callback: Callable) -> Callable:
+    """Envuelve un callback de telegram para atender cada update en su traza."""
+    if getattr(callback, "_trazado", False):
+        return callback
+    handler = getattr(callback, "__name__", "desconocido")
+
+    @functools.wraps(callback)
+    async def _trazado(update, context):
+        atributos = {"handler": handler}
+        update_id = getattr(update, "update_id", None)
+        if update_id is not None:
+            atributos["update_id"] = update_id
+        usuario = getattr(update, "effective_user", None)
+        if usuario is not None:
+            atributos["user_id"] = usuario.id
+        with traza("update", **atributos):
+            return await callback(update, context)
+
+    _trazado._trazado = True
+    return _trazado
+
+
+class FiltroTraza(logging.Filter):
+    """Agrega ``trace_id`` a cada registro (``-`` fuera de una traza)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = id_traza_actual() or "-"
+        return True
@@ -7,6 +7,9 @@ Funciones de utilidad comunes para el bot
 
 import json
 import logging
+import os
+import tempfile
+import threading
 import unicodedata
 from datetime import datetime
 from typing import Dict, Any, Optional
@@ -164,6 +167,53 @@ def rellenar_tabla_sla(ruta_docx: str, datos: list[dict]) -> 'Document':
     return doc
 
 
+# Serializa los contadores entre hilos; entre procesos se usa ``fcntl``
+_LOCK_CONTADOR = threading.Lock()
+
+
+def guardar_json_atomico(datos: Dict, ruta: Path) -> None:
+    """Escribe ``datos`` en un temporal y lo renombra sobre ``ruta``.
+
+    Quien lea el archivo ve la versión anterior o la nueva, nunca una a medias.
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=ruta.parent, prefix=f".{ruta.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def reservar_numero(clave: str, ruta: Path | None = None) -> int:
+    """Incrementa de forma atómica el contador ``clave`` y devuelve el nuevo valor.
+
+    Dos llamadas simultáneas (hilos o procesos) nunca obtienen el mismo
+    número: la lectura y la escritura se hacen bajo un lock y el archivo se
+    reemplaza con :func:`guardar_json_atomico`.
+    """
+    destino = Path(ruta or config.ARCHIVO_CONTADOR)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with _LOCK_CONTADOR, open(destino.with_name(destino.name + ".lock"), "a") as lock:
+        try:
+            import fcntl
+
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        except ImportError:  # pragma: no cover - Windows: solo el lock de hilos
+            pass
+        data = cargar_json(destino)
+        numero = data.get(clave, 0) + 1
+        data[clave] = numero
+        guardar_json_atomico(data, destino)
+    return numero
+
+
 def incrementar_contador(clave: str, ruta: Path | None = None) -> int:
     """Obtiene el próximo número diario para ``clave``.
 
@@ -171,10 +221,4 @@ def incrementar_contador(clave: str, ruta: Path | None = None) -> int:
     si no se especifica. Incrementa el valor y lo devuelve.
     """
     fecha = datetime.now().strftime("%d%m%Y")
-    destino = ruta or config.ARCHIVO_CONTADOR
-    data = cargar_json(destino)
-    key = f"{clave}_{fecha}"
-    numero = data.get(key, 0) + 1
-    data[key] = numero
-    guardar_json(data, destino)
-    return numero
+    return reservar_numero(f"{clave}_{fecha}", ruta)
@@ -0,0 +1,69 @@
+# Nombre de archivo: comun.py
+# Ubicación de archivo: benchmarks/comun.py
+# User-provided custom instructions
+"""Utilidades compartidas por los scripts de ``benchmarks/``."""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+PKG_PATH = ROOT_DIR / "Sandy bot"
+
+# Variables que ``config`` exige para poder importar ``sandybot``
+VARIABLES_MINIMAS = {
+    "TELEGRAM_TOKEN": "123456:perfil",
+    "OPENAI_API_KEY": "x",
+    "NOTION_TOKEN": "x",
+    "NOTION_DATABASE_ID": "x",
+    "DB_USER": "x",
+    "DB_PASSWORD": "x",
+}
+
+
+def preparar_entorno() -> None:
+    """Agrega ``Sandy bot`` al ``sys.path`` y define las variables mínimas."""
+    for clave, valor in VARIABLES_MINIMAS.items():
+        os.environ.setdefault(clave, valor)
+    if str(PKG_PATH) not in sys.path:
+        sys.path.insert(0, str(PKG_PATH))
+
+
+def cargar_database(url: str = "sqlite://"):
+    """Importa ``sandybot.database`` apuntando a ``url`` en lugar de PostgreSQL.
+
+    Se usa el mismo recurso que las pruebas: reemplazar ``create_engine``
+    durante la importación. Para SQLite en memoria se emplea ``StaticPool``
+    así todas las sesiones comparten la misma base.
+    """
+    preparar_entorno()
+    import sqlalchemy
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    original = sqlalchemy.create_engine
+    extra = {"poolclass": StaticPool} if url in ("sqlite://", "sqlite:///:memory:") else {}
+    sqlalchemy.create_engine = lambda *a, **k: original(url, **extra)
+    try:
+        bd = importlib.import_module("sandybot.database")
+    finally:
+        sqlalchemy.create_engine = original
+    bd.SessionLocal = sessionmaker(bind=bd.engine, expire_on_commit=False)
+    bd.Base.metadata.create_all(bind=bd.engine)
+    return bd
+
+
+@contextmanager
+def cronometro(etiqueta: str, resultados: dict | None = None):
+    """Mide el bloque y lo imprime; opcionalmente lo guarda en ``resultados``."""
+    inicio = time.perf_counter()
+    yield
+    duracion = time.perf_counter() - inicio
+    if resultados is not None:
+        resultados[etiqueta] = duracion
+    print(f"{etiqueta:<40} {duracion * 1000:10.1f} ms")
@@ -0,0 +1,86 @@
+# Nombre de archivo: conftest.py
+# Ubicación de archivo: benchmarks/conftest.py
+# User-provided custom instructions
+"""Fixtures de la suite ``pytest-benchmark`` de las rutas críticas.
+
+La base es SQLite en memoria, cargada con :func:`comun.cargar_database`
+igual que los scripts de esta carpeta. Los datos pesados se generan una vez
+por sesión. Los archivos que el bot escribe en ``data/`` y ``logs/``
+(contador diario, caché de GPT, históricos) se redirigen a un directorio
+temporal para no tocar los reales.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+
+import pytest
+
+from comun import cargar_database, preparar_entorno
+from generadores import generar_servicios
+
+preparar_entorno()
+
+# Servicios cargados para las búsquedas por cámara
+SERVICIOS = 10_000
+
+# Atributos de ``config`` con rutas que el bot escribe mientras corre
+RUTAS_DATA = (
+    "ARCHIVO_CONTADOR",
+    "ARCHIVO_INTERACCIONES",
+    "ARCHIVO_DESTINATARIOS",
+    "GPT_CACHE_FILE",
+    "TRANSCRIPCIONES_FILE",
+    "NOTION_PENDIENTES_FILE",
+    "PERFILES_CORREO_PATH",
+)
+RUTAS_LOG = ("LOG_FILE", "ERRORES_FILE", "TRAZAS_LENTAS_FILE")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def rutas_temporales(tmp_path_factory):
+    """Apunta ``DATA_DIR``, ``LOG_DIR`` y sus archivos a un directorio temporal."""
+    from sandybot.config import config
+
+    base = tmp_path_factory.mktemp("sandy")
+    nuevas = {
+        "DATA_DIR": base / "data",
+        "LOG_DIR": base / "logs",
+        "HISTORICO_DIR": base / "data" / "historico",
+        "SLA_HISTORIAL_DIR": base / "historicos_sla",
+        "CONVERSACIONES_ARCHIVO_DIR": base / "data" / "archivo",
+    }
+    nuevas.update({a: nuevas["DATA_DIR"] / getattr(config, a).name for a in RUTAS_DATA})
+    nuevas.update({a: nuevas["LOG_DIR"] / getattr(config, a).name for a in RUTAS_LOG})
+    for clave in ("DATA_DIR", "LOG_DIR", "HISTORICO_DIR", "SLA_HISTORIAL_DIR"):
+        nuevas[clave].mkdir(parents=True, exist_ok=True)
+
+    originales = {a: getattr(config, a) for a in nuevas}
+    temporal_original = tempfile.tempdir
+    for atributo, ruta in nuevas.items():
+        setattr(config, atributo, ruta)
+    # Los informes y los .msg generados van a ``tempfile.gettempdir()``
+    tempfile.tempdir = str(base)
+    yield base
+    tempfile.tempdir = temporal_original
+    for atributo, ruta in originales.items():
+        setattr(config, atributo, ruta)
+
+
+@pytest.fixture(scope="session")
+def bd(rutas_temporales):
+    return cargar_database("sqlite://")
+
+
+@pytest.fixture(scope="session")
+def camaras(bd):
+    """Universo de cámaras de los :data:`SERVICIOS` servicios cargados."""
+    return generar_servicios(bd, SERVICIOS)
+
+
+@pytest.fixture(scope="session")
+def loop():
+    nuevo = asyncio.new_event_loop()
+    yield nuevo
+    nuevo.close()
@@ -0,0 +1,110 @@
+# Nombre de archivo: depurar_duplicados.py
+# Ubicación de archivo: benchmarks/depurar_duplicados.py
+# User-provided custom instructions
+"""Benchmark de ``depurar_servicios_duplicados`` y ``depurar_reclamos_duplicados``.
+
+Genera servicios y reclamos sintéticos con duplicados y compara la depuración
+actual (una sentencia ``DELETE`` con ``row_number()``) contra el esquema
+anterior, que cargaba cada grupo repetido como objetos ORM y los borraba uno
+por uno. También mide el modo ``simular``.
+
+Uso::
+
+    python benchmarks/depurar_duplicados.py [--filas 100000] [--url sqlite://]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+
+from comun import cargar_database, cronometro
+
+
+def generar_datos(bd, filas: int, semilla: int = 1) -> tuple[int, int]:
+    """Carga ``filas`` servicios y reclamos; devuelve los duplicados esperados."""
+    rnd = random.Random(semilla)
+    grupos = max(filas // 2, 1)
+    servicios = [
+        {"id": i, "nombre": f"S{g}", "cliente": f"C{g % 50}"}
+        for i, g in enumerate((rnd.randrange(grupos) for _ in range(filas)), 1)
+    ]
+    # ``uix_reclamo_unico`` impide repetir número en un mismo servicio
+    reclamos = [
+        {"id": i, "servicio_id": i, "numero": f"R{rnd.randrange(grupos)}"}
+        for i in range(1, filas + 1)
+    ]
+    bd.Base.metadata.drop_all(bind=bd.engine)
+    bd.Base.metadata.create_all(bind=bd.engine)
+    with bd.engine.begin() as conn:
+        conn.execute(bd.Servicio.__table__.insert(), servicios)
+        conn.execute(bd.Reclamo.__table__.insert(), reclamos)
+    dup_srv = filas - len({(s["nombre"], s["cliente"]) for s in servicios})
+    dup_rec = filas - len({r["numero"] for r in reclamos})
+    return dup_srv, dup_rec
+
+
+def depurar_por_grupo(bd, modelo, *columnas) -> int:
+    """Implementación anterior: un ``SELECT`` y ``session.delete`` por fila."""
+    with bd.SessionLocal() as session:
+        repetidos = (
+            session.query(*columnas)
+            .group_by(*columnas)
+            .having(bd.func.count(modelo.id) > 1)
+            .all()
+        )
+        eliminados = 0
+        for valores in repetidos:
+            filas = (
+                session.query(modelo)
+                .filter(*(c == v for c, v in zip(columnas, valores)))
+                .order_by(modelo.id.desc())
+                .all()
+            )
+            for fila in filas[1:]:
+                session.delete(fila)
+                eliminados += 1
+        session.commit()
+        return eliminados
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument(
+        "--sin-referencia",
+        action="store_true",
+        help="omite la implementación anterior (puede tardar minutos)",
+    )
+    args = parser.parse_args(argv)
+
+    bd = cargar_database(args.url)
+    print(f"== {args.filas} servicios y {args.filas} reclamos sobre {bd.engine.url}")
+    dup_srv, dup_rec = generar_datos(bd, args.filas)
+    print(f"Duplicados esperados: servicios={dup_srv} reclamos={dup_rec}")
+
+    with cronometro("simular servicios"):
+        assert bd.depurar_servicios_duplicados(simular=True) == dup_srv
+    with cronometro("simular reclamos"):
+        assert bd.depurar_reclamos_duplicados(simular=True) == dup_rec
+    with cronometro("DELETE servicios (set-based)"):
+        assert bd.depurar_servicios_duplicados() == dup_srv
+    with cronometro("DELETE reclamos (set-based)"):
+        assert bd.depurar_reclamos_duplicados() == dup_rec
+
+    if not args.sin_referencia:
+        generar_datos(bd, args.filas)
+        with cronometro("ORM por grupo servicios (anterior)"):
+            assert (
+                depurar_por_grupo(bd, bd.Servicio, bd.Servicio.nombre, bd.Servicio.cliente)
+                == dup_srv
+            )
+        with cronometro("ORM por grupo reclamos (anterior)"):
+            assert depurar_por_grupo(bd, bd.Reclamo, bd.Reclamo.numero) == dup_rec
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
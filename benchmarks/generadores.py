@@ -0,0 +1,183 @@
+# Nombre de archivo: generadores.py
+# Ubicación de archivo: benchmarks/generadores.py
+# User-provided custom instructions
+"""Datos sintéticos para la suite de ``benchmarks/test_rutas_criticas.py``.
+
+Todos los generadores reciben una semilla, así dos corridas miden sobre los
+mismos datos y las comparaciones contra la línea base son válidas.
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+CALLES = (
+    "Av. San Martín", "Gral. Paz", "Cra. 7", "Bv. Oroño", "Av Corrientes",
+    "Cam. Belgrano", "Rivadavia", "Gral Mosconi", "Av. de Mayo", "Pellegrini",
+    "Córdoba", "Entre Ríos", "Ituzaingó", "Av. Pte. Perón", "Güemes",
+)
+TIPOS_CAMARA = ("Cámara", "CAM", "Cam.", "Camara", "Cámara de empalme", "Pozo")
+
+
+def nombre_camara(rnd: random.Random) -> str:
+    """Nombre de cámara con acentos y abreviaturas mezcladas, como en los tracking."""
+    calle = rnd.choice(CALLES)
+    if rnd.random() < 0.5:
+        ubicacion = f"{calle} {rnd.randint(1, 9999)}"
+    else:
+        ubicacion = f"{calle} y {rnd.choice(CALLES)}"
+    return f"{rnd.choice(TIPOS_CAMARA)} {ubicacion}"
+
+
+def generar_camaras(cantidad: int, semilla: int = 1) -> list[str]:
+    """Lista de ``cantidad`` nombres de cámara."""
+    rnd = random.Random(semilla)
+    return [nombre_camara(rnd) for _ in range(cantidad)]
+
+
+def generar_servicios(
+    bd, cantidad: int, camaras_por_servicio: int = 20, semilla: int = 1
+) -> list[str]:
+    """Carga ``cantidad`` servicios con sus cámaras y devuelve el universo de cámaras.
+
+    Las cámaras salen de un conjunto compartido para que una misma cámara
+    aparezca en varios servicios, como ocurre con los troncales.
+    """
+    rnd = random.Random(semilla)
+    universo = generar_camaras(max(cantidad * camaras_por_servicio // 8, 1), semilla)
+    servicios = [
+        {
+            "id": i,
+            "nombre": f"Servicio {i}",
+            "cliente": f"Cliente {i % 300}",
+            "id_carrier": f"CRT-{100000 + i}",
+            "camaras": rnd.sample(universo, min(camaras_por_servicio, len(universo))),
+            "trackings": [],
+        }
+        for i in range(1, cantidad + 1)
+    ]
+    bd.Base.metadata.drop_all(bind=bd.engine)
+    bd.Base.metadata.create_all(bind=bd.engine)
+    with bd.engine.begin() as conn:
+        conn.execute(bd.Servicio.__table__.insert(), servicios)
+    return universo
+
+
+def generar_tracking(ruta: Path, empalmes: int, semilla: int = 1) -> Path:
+    """Escribe un tracking de texto con ``empalmes`` cámaras y líneas de relleno."""
+    rnd = random.Random(semilla)
+    lineas = [f"Tracking del servicio {rnd.randint(10000, 99999)}", ""]
+    for i in range(1, empalmes + 1):
+        lineas.append(f"* {rnd.randint(5, 800)}.{rnd.randint(0, 9)} mts")
+        lineas.append(f"Empalme {i}: {nombre_camara(rnd)}")
+        if rnd.random() < 0.3:
+            lineas.append(f"Observaciones: fibra {rnd.choice(('48', '96', '144'))} pelos")
+        lineas.append("")
+    ruta.write_text("\n".join(lineas), encoding="utf-8")
+    return ruta
+
+
+def generar_excels_sla(
+    directorio: Path, servicios: int, reclamos_por_servicio: int = 3, semilla: int = 1
+) -> tuple[Path, Path]:
+    """Crea ``reclamos.xlsx`` y ``servicios.xlsx`` para el informe de SLA."""
+    import pandas as pd
+
+    rnd = random.Random(semilla)
+    lineas = [10000 + i for i in range(servicios)]
+    reclamos = pd.DataFrame(
+        [
+            {
+                "Número Línea": linea,
+                "Número Reclamo": f"R{linea}-{n}",
+                "Horas Netas Reclamo": f"{rnd.uniform(0.5, 48):.2f}",
+                "Tipo Solución Reclamo": rnd.choice(("Fibra", "Energía", "Equipo")),
+                "Fecha Inicio Reclamo": f"2024-03-{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:00",
+            }
+            for linea in lineas
+            for n in range(rnd.randint(0, reclamos_por_servicio))
+        ]
+    )
+    servicios_df = pd.DataFrame(
+        {
+            "Tipo Servicio": [rnd.choice(("Internet", "MPLS", "Punto a punto")) for _ in lineas],
+            "Número Línea": lineas,
+            "Nombre Cliente": [f"Cliente {rnd.randint(1, 200)}" for _ in lineas],
+            "Dirección Servicio": [nombre_camara(rnd) for _ in lineas],
+            "Horas Reclamos Todos": [f"{rnd.randint(0, 72)}:{rnd.randint(0, 59):02d}:00" for _ in lineas],
+            "SLA": [round(rnd.uniform(0.95, 1), 4) for _ in lineas],
+        }
+    )
+    ruta_reclamos = directorio / "reclamos.xlsx"
+    ruta_servicios = directorio / "servicios.xlsx"
+    reclamos.to_excel(ruta_reclamos, index=False)
+    servicios_df.to_excel(ruta_servicios, index=False)
+    return ruta_reclamos, ruta_servicios
+
+
+def generar_plantilla_sla(ruta: Path) -> Path:
+    """Plantilla mínima con las tres tablas que espera ``_generar_documento_sla``."""
+    from docx import Document
+
+    doc = Document()
+    principal = ["Tipo Servicio", "Número Línea", "Nombre Cliente", "Horas Reclamos Todos", "SLA"]
+    tabla = doc.add_table(rows=1, cols=len(principal))
+    for celda, texto in zip(tabla.rows[0].cells, principal):
+        celda.text = texto
+    tabla = doc.add_table(rows=5, cols=2)
+    for fila, texto in zip(tabla.rows, ("Servicio", "Cliente", "N° de Ticket", "Domicilio", "SLA")):
+        fila.cells[0].text = texto
+    doc.add_paragraph("Eventos sucedidos de mayor impacto en SLA:")
+    doc.add_paragraph("Conclusión:")
+    doc.add_paragraph("Propuesta de mejora:")
+    reclamos = [
+        "Número Línea", "Número Reclamo", "Horas Netas Reclamo",
+        "Tipo Solución Reclamo", "Fecha Inicio Reclamo",
+    ]
+    tabla = doc.add_table(rows=1, cols=len(reclamos))
+    for celda, texto in zip(tabla.rows[0].cells, reclamos):
+        celda.text = texto
+    doc.save(ruta)
+    return ruta
+
+
+def aviso_telxius(numero: int, ids: list[str]) -> str:
+    """Aviso de mantenimiento de TELXIUS que el perfil resuelve sin GPT.
+
+    ``numero`` cambia el identificador y las fechas, así cada aviso es una
+    tarea nueva y no una repetición ya registrada.
+    """
+    dia = numero % 28 + 1
+    hora = numero % 20
+    return (
+        f"Planned work SWX{numero:07d}\n"
+        f"Start Date and Time: {dia:02d}/03/2024 {hora:02d}:00\n"
+        f"End Date and Time: {dia:02d}/03/2024 {hora + 3:02d}:{numero % 60:02d}\n"
+        f"Type of work: Fiber repair on segment {numero}\n"
+        f"Affected services: {', '.join(ids)}\n"
+        "Please contact our NOC for further information."
+    )
+
+
+FRASES_NATURALES = (
+    "hola sandy, podés comparar trazados de fo de estos dos servicios?",
+    "necesito verificar ingresos del sitio de ayer",
+    "carguemos el tracking del servicio 12345",
+    "bajar cams del servicio 7788 por favor",
+    "me pasás las cámaras por correo?",
+    "quiero el id carrier de este circuito",
+    "armá el informe de sla de marzo",
+    "¿cómo estás? contame algo de redes ópticas",
+    "cuál es el estado del reclamo 55555",
+    "gracias, eso era todo",
+)
+
+
+def generar_mensajes(cantidad: int, semilla: int = 1) -> list[str]:
+    """Mensajes de usuario, con y sin una acción reconocible."""
+    rnd = random.Random(semilla)
+    return [
+        rnd.choice(FRASES_NATURALES).upper() if rnd.random() < 0.2 else rnd.choice(FRASES_NATURALES)
+        for _ in range(cantidad)
+    ]
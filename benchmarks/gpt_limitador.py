@@ -0,0 +1,213 @@
+# Nombre de archivo: gpt_limitador.py
+# Ubicación de archivo: benchmarks/gpt_limitador.py
+# User-provided custom instructions
+"""Rendimiento de GPTHandler contra un servidor OpenAI falso con límites.
+
+Levanta en un hilo un servidor HTTP local que imita
+``POST /v1/chat/completions``: demora cada respuesta, aplica sus propios
+límites de pedidos y tokens por minuto y responde ``429`` con
+``retry-after`` al superarlos. Luego lanza a la vez una ráfaga de
+extracciones de correos (prioridad de lote) y algunas consultas de charla
+(interactivas) con el cliente ``openai`` real apuntando al servidor, y
+compara:
+
+* sin límites locales (solo la pausa global ante un 429);
+* con :class:`~sandybot.limitador.LimitadorGPT` ajustado a los límites del
+  servidor.
+
+Informa la duración total, los 429 recibidos, las consultas fallidas y la
+latencia de la charla. Requiere el paquete ``openai`` instalado.
+
+Uso::
+
+    python benchmarks/gpt_limitador.py [--lote 200] [--chat 20]
+        [--rpm 600] [--tpm 60000] [--latencia 0.2]
+    python benchmarks/gpt_limitador.py --solo-servidor --puerto 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from comun import preparar_entorno
+
+
+class ServidorFalso(ThreadingHTTPServer):
+    """Servidor compatible con ``chat.completions`` con límites por minuto."""
+
+    daemon_threads = True
+
+    def __init__(self, puerto: int, rpm: int, tpm: int, latencia: float):
+        super().__init__(("127.0.0.1", puerto), _Manejador)
+        self.rpm = rpm
+        self.tpm = tpm
+        self.latencia = latencia
+        self._lock = threading.Lock()
+        # (instante, tokens) de los pedidos aceptados en el último minuto
+        self._ventana: deque[tuple[float, int]] = deque()
+        self.aceptados = 0
+        self.rechazados = 0
+
+    def admitir(self, tokens: int) -> float:
+        """Registra el pedido y devuelve 0, o los segundos a esperar si excede."""
+        with self._lock:
+            ahora = time.monotonic()
+            while self._ventana and ahora - self._ventana[0][0] >= 60:
+                self._ventana.popleft()
+            usados = sum(t for _, t in self._ventana)
+            if len(self._ventana) >= self.rpm or usados + tokens > self.tpm:
+                self.rechazados += 1
+                return max(60 - (ahora - self._ventana[0][0]), 0.1) if self._ventana else 1.0
+            self._ventana.append((ahora, tokens))
+            self.aceptados += 1
+            return 0.0
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    server: ServidorFalso
+
+    def log_message(self, *args) -> None:  # silencia el log por pedido
+        pass
+
+    def _responder(self, estado: int, cuerpo: dict, encabezados: dict | None = None) -> None:
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        for clave, valor in (encabezados or {}).items():
+            self.send_header(clave, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_POST(self) -> None:
+        largo = int(self.headers.get("Content-Length", 0))
+        pedido = json.loads(self.rfile.read(largo) or b"{}")
+        texto = " ".join(m.get("content", "") for m in pedido.get("messages", []))
+        prompt = len(texto) // 4 + 1
+        respuesta = 60
+        espera = self.server.admitir(prompt + respuesta)
+        if espera:
+            self._responder(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"retry-after": f"{espera:.2f}"},
+            )
+            return
+        time.sleep(self.server.latencia)
+        self._responder(200, {
+            "id": "chatcmpl-falso",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": pedido.get("model", "gpt-falso"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": '{"respuesta": "ok"}'},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt,
+                "completion_tokens": respuesta,
+                "total_tokens": prompt + respuesta,
+            },
+        })
+
+
+def iniciar_servidor(puerto: int, rpm: int, tpm: int, latencia: float) -> ServidorFalso:
+    servidor = ServidorFalso(puerto, rpm, tpm, latencia)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[max(int(len(ordenados) * p) - 1, 0)]
+
+
+async def _ronda(gpt_handler, limitador, lote: int, chat: int) -> dict:
+    gpt = gpt_handler.GPTHandler()
+    latencias: list[float] = []
+    fallidas = 0
+
+    async def _extraccion(i: int) -> None:
+        nonlocal fallidas
+        with limitador.prioridad_gpt(limitador.PRIORIDAD_LOTE):
+            try:
+                await gpt.consultar_gpt(f"Extraé la tarea del aviso {i}: " + "texto " * 200, cache=False)
+            except Exception:
+                fallidas += 1
+
+    async def _charla(i: int) -> None:
+        nonlocal fallidas
+        # Los mensajes llegan repartidos durante la ráfaga
+        await asyncio.sleep(i * 0.25)
+        inicio = time.perf_counter()
+        try:
+            await gpt._consultar_interactiva(f"hola {i}")
+            latencias.append(time.perf_counter() - inicio)
+        except Exception:
+            fallidas += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(
+        *(_extraccion(i) for i in range(lote)), *(_charla(i) for i in range(chat))
+    )
+    return {"duracion": time.perf_counter() - inicio, "latencias": latencias, "fallidas": fallidas}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lote", type=int, default=200, help="extracciones en la ráfaga")
+    parser.add_argument("--chat", type=int, default=20, help="consultas interactivas")
+    parser.add_argument("--rpm", type=int, default=600, help="pedidos/min del servidor")
+    parser.add_argument("--tpm", type=int, default=60_000, help="tokens/min del servidor")
+    parser.add_argument("--latencia", type=float, default=0.2, help="segundos por respuesta")
+    parser.add_argument("--puerto", type=int, default=0)
+    parser.add_argument("--solo-servidor", action="store_true", help="solo levanta el servidor")
+    args = parser.parse_args(argv)
+
+    servidor = iniciar_servidor(args.puerto, args.rpm, args.tpm, args.latencia)
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/v1"
+    if args.solo_servidor:
+        print(f"Servidor OpenAI falso en {url} (Ctrl+C para salir)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            return 0
+
+    # El cliente ``openai`` toma la URL base de esta variable
+    os.environ["OPENAI_BASE_URL"] = url
+    preparar_entorno()
+    from sandybot import gpt_handler, limitador
+
+    print(f"== {args.lote} extracciones + {args.chat} consultas de charla; "
+          f"servidor {args.rpm} pedidos/min, {args.tpm} tokens/min, {args.latencia}s por respuesta")
+    configuraciones = {
+        "sin límites locales": limitador.LimitadorGPT(0, 0, 0),
+        "limitador con prioridades": limitador.LimitadorGPT(args.rpm, args.tpm, 16),
+    }
+    for nombre, lim in configuraciones.items():
+        gpt_handler.limitador_gpt = lim
+        servidor.aceptados = servidor.rechazados = 0
+        servidor._ventana.clear()
+        resultado = asyncio.run(_ronda(gpt_handler, limitador, args.lote, args.chat))
+        latencias = resultado["latencias"] or [float("nan")]
+        print(
+            f"{nombre:<28} total {resultado['duracion']:7.1f} s  429 {servidor.rechazados:5d}  "
+            f"fallidas {resultado['fallidas']:4d}  charla p50 {statistics.median(latencias):6.2f} s  "
+            f"p95 {_percentil(latencias, 0.95):6.2f} s"
+        )
+    servidor.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
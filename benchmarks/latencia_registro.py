@@ -0,0 +1,92 @@
+# Nombre de archivo: latencia_registro.py
+# Ubicación de archivo: benchmarks/latencia_registro.py
+# User-provided custom instructions
+"""Latencia de ``responder_registrando`` con y sin el buffer de conversaciones.
+
+Simula respuestas del bot (``reply_text`` no hace I/O) y mide cuánto tarda
+cada llamada en volver al handler: con registro directo incluye el ``INSERT``
+y el ``commit``; con el buffer solo el encolado. Por defecto se usa un
+archivo SQLite temporal para que el ``commit`` tenga costo real de disco.
+
+Uso::
+
+    python benchmarks/latencia_registro.py [--respuestas 2000] [--url URL]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from comun import cargar_database
+
+
+class _MensajeFalso:
+    async def reply_text(self, *a, **k):
+        await asyncio.sleep(0)
+
+
+def _resumen(etiqueta: str, tiempos: list[float]) -> None:
+    ordenados = sorted(tiempos)
+    p95 = ordenados[int(len(ordenados) * 0.95) - 1]
+    print(
+        f"{etiqueta:<22} media {statistics.mean(tiempos) * 1000:7.3f} ms  "
+        f"p50 {statistics.median(tiempos) * 1000:7.3f} ms  p95 {p95 * 1000:7.3f} ms"
+    )
+
+
+async def _medir(registrador, respuestas: int) -> list[float]:
+    mensaje = _MensajeFalso()
+    tiempos = []
+    for i in range(respuestas):
+        inicio = time.perf_counter()
+        await registrador.responder_registrando(mensaje, i, f"m{i}", "respuesta", "bench")
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+async def _con_buffer(registrador, respuestas: int) -> tuple[list[float], float]:
+    buffer = registrador.buffer_conversaciones
+    await buffer.iniciar()
+    tiempos = await _medir(registrador, respuestas)
+    inicio = time.perf_counter()
+    await buffer.detener()
+    return tiempos, time.perf_counter() - inicio
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--respuestas", type=int, default=2000)
+    parser.add_argument("--url", help="URL de SQLAlchemy (por defecto SQLite en disco)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        url = args.url or f"sqlite:///{Path(carpeta) / 'bench.db'}"
+        bd = cargar_database(url)
+        import sandybot.registrador as registrador
+        from sqlalchemy import func, select
+
+        def _total() -> int:
+            with bd.SessionLocal() as s:
+                return s.execute(select(func.count(bd.Conversacion.id))).scalar_one()
+
+        print(f"== {args.respuestas} respuestas sobre {bd.engine.url}")
+        directo = asyncio.run(_medir(registrador, args.respuestas))
+        _resumen("registro directo", directo)
+
+        antes = _total()
+        buffer, cierre = asyncio.run(_con_buffer(registrador, args.respuestas))
+        _resumen("buffer en lote", buffer)
+        print(f"vaciado final del buffer: {cierre * 1000:.1f} ms")
+        assert _total() - antes == args.respuestas, "se perdieron conversaciones"
+        bd.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
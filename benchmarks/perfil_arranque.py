@@ -0,0 +1,174 @@
+# Nombre de archivo: perfil_arranque.py
+# Ubicación de archivo: benchmarks/perfil_arranque.py
+# User-provided custom instructions
+"""Perfil de arranque de SandyBot.
+
+Ejecuta dos mediciones en procesos nuevos para que no influya la cache de
+módulos del intérprete actual:
+
+1. ``python -X importtime`` sobre ``import sandybot.bot`` y muestra los
+   módulos con mayor tiempo acumulado, indicando cuáles de las dependencias
+   pesadas (pandas, geopandas, docx, openai, ...) se cargaron.
+2. Tiempo hasta el primer update: desde que se lanza el proceso hasta que
+   el bot construyó la aplicación y respondió un ``/start`` sintético. El
+   envío a Telegram y el registro en la base se reemplazan por funciones
+   vacías para medir solo el costo propio del bot.
+
+Uso::
+
+    python benchmarks/perfil_arranque.py [--top 25] [--repeticiones 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+from comun import PKG_PATH, VARIABLES_MINIMAS
+
+# Dependencias que no deberían cargarse para responder ``/start``
+MODULOS_PESADOS = (
+    "pandas",
+    "geopandas",
+    "contextily",
+    "shapely",
+    "matplotlib",
+    "docx",
+    "notion_client",
+    "openai",
+    "extract_msg",
+)
+
+_PATRON_IMPORTTIME = re.compile(
+    r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)"
+)
+
+_SCRIPT_PRIMER_UPDATE = r"""
+import asyncio, sys, time
+from types import SimpleNamespace
+
+inicio_import = time.perf_counter()
+import sandybot.bot as bot_mod
+import sandybot.registrador as registrador
+fin_import = time.perf_counter()
+
+registrador.registrar_conversacion = lambda *a, **k: None
+
+bot = bot_mod.SandyBot()
+fin_build = time.perf_counter()
+
+callback = None
+for grupo in bot.app.handlers.values():
+    for h in grupo:
+        if "start" in getattr(h, "commands", ()):
+            callback = h.callback
+            break
+
+async def _responder(*a, **k):
+    return None
+
+usuario = SimpleNamespace(id=1)
+mensaje = SimpleNamespace(text="/start", from_user=usuario, reply_text=_responder)
+update = SimpleNamespace(message=mensaje, effective_user=usuario)
+asyncio.run(callback(update, SimpleNamespace(args=[], user_data={})))
+fin_update = time.perf_counter()
+
+pesados = [m for m in sys.argv[1].split(",") if m in sys.modules]
+print(f"{time.time()}|{fin_import - inicio_import}|{fin_build - fin_import}|"
+      f"{fin_update - fin_build}|{','.join(pesados)}")
+"""
+
+
+def _entorno() -> dict[str, str]:
+    """Entorno del proceso hijo con la ruta del paquete y variables mínimas."""
+    env = dict(os.environ)
+    for clave, valor in VARIABLES_MINIMAS.items():
+        env.setdefault(clave, valor)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(PKG_PATH), env.get("PYTHONPATH")])
+    )
+    return env
+
+
+def perfil_importtime(modulo: str = "sandybot.bot") -> list[tuple[str, int, int]]:
+    """Devuelve ``(módulo, self_us, acumulado_us)`` según ``-X importtime``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=PKG_PATH,
+        env=_entorno(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    filas = []
+    for linea in proc.stderr.splitlines():
+        m = _PATRON_IMPORTTIME.match(linea)
+        if m:
+            filas.append((m.group(4), int(m.group(1)), int(m.group(2))))
+    return filas
+
+
+def tiempo_primer_update() -> dict[str, float | list[str]]:
+    """Mide cuánto tarda un proceso nuevo en responder ``/start``."""
+    lanzado = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-c", _SCRIPT_PRIMER_UPDATE, ",".join(MODULOS_PESADOS)],
+        cwd=PKG_PATH,
+        env=_entorno(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    ultima = proc.stdout.strip().splitlines()[-1]
+    fin, t_import, t_build, t_update, pesados = ultima.split("|")
+    return {
+        "total": float(fin) - lanzado,
+        "import": float(t_import),
+        "build": float(t_build),
+        "start": float(t_update),
+        "pesados": [p for p in pesados.split(",") if p],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    filas = perfil_importtime()
+    total_us = max((f[2] for f in filas), default=0)
+    print(f"== python -X importtime: import sandybot.bot ({total_us / 1000:.1f} ms)")
+    print(f"{'acumulado ms':>13} {'propio ms':>10}  módulo")
+    for nombre, propio, acumulado in sorted(filas, key=lambda f: -f[2])[: args.top]:
+        print(f"{acumulado / 1000:13.1f} {propio / 1000:10.1f}  {nombre}")
+    raices = {f[0].split(".")[0] for f in filas}
+    cargados = [m for m in MODULOS_PESADOS if m in raices]
+    print("Dependencias pesadas al importar:", ", ".join(cargados) or "ninguna")
+
+    print("\n== Tiempo hasta el primer update (/start)")
+    muestras = [tiempo_primer_update() for _ in range(args.repeticiones)]
+    for i, m in enumerate(muestras, 1):
+        print(
+            f"#{i}: total {m['total'] * 1000:.0f} ms "
+            f"(import {m['import'] * 1000:.0f} ms, "
+            f"SandyBot() {m['build'] * 1000:.0f} ms, "
+            f"/start {m['start'] * 1000:.0f} ms)"
+        )
+    mejor = min(m["total"] for m in muestras)
+    print(f"Mejor total: {mejor * 1000:.0f} ms")
+    print(
+        "Dependencias pesadas tras /start:",
+        ", ".join(muestras[-1]["pesados"]) or "ninguna",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# Nombre de archivo: perfiles_correo.py
+# Ubicación de archivo: benchmarks/perfiles_correo.py
+# User-provided custom instructions
+"""Benchmark de la extracción local de avisos con perfiles por carrier.
+
+Genera avisos sintéticos de TELXIUS (en inglés), IGNETWORK y de un carrier
+sin perfil, y mide sobre ellos la tasa de aciertos y el tiempo por correo de
+la expresión genérica anterior contra los perfiles de
+:mod:`sandybot.perfiles_correo`. Cada fallo es una consulta a GPT.
+
+Uso::
+
+    python benchmarks/perfiles_correo.py [--correos 3000] [--yaml perfiles.yaml]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+
+from comun import preparar_entorno
+
+
+def _extraer_anterior(texto: str) -> dict | None:
+    """Copia de ``_extraer_por_regex``, el único formato que se leía sin GPT."""
+    inicio_m = re.search(r"inicio[:\s-]+([^\n\r]+)", texto, re.I)
+    fin_m = re.search(r"fin[:\s-]+([^\n\r]+)", texto, re.I)
+    ids_m = re.search(r"servicios?(?:\s+afectados)?[:\s-]+([A-Z0-9,\- ]+)", texto, re.I)
+    if not (inicio_m and fin_m and ids_m):
+        return None
+    return {"ids": [i.strip() for i in ids_m.group(1).split(",") if i.strip()]}
+
+
+def generar_correos(cantidad: int, semilla: int = 1) -> list[tuple[str, str]]:
+    """Lista de ``(carrier, texto)`` con los tres formatos mezclados."""
+    rnd = random.Random(semilla)
+    correos = []
+    for _ in range(cantidad):
+        dia = rnd.randint(1, 28)
+        hora = rnd.randint(0, 20)
+        fechas = (f"{dia:02d}/03/2024 {hora:02d}:00", f"{dia:02d}/03/2024 {hora + 3:02d}:00")
+        formato = rnd.random()
+        if formato < 0.4:
+            ids = ", ".join(f"CRT-{rnd.randint(100000, 999999)}" for _ in range(rnd.randint(1, 4)))
+            correos.append((
+                "TELXIUS",
+                f"Planned work SWX{rnd.randint(0, 9999999):07d}\n"
+                f"Start Date and Time: {fechas[0]}\nEnd Date and Time: {fechas[1]}\n"
+                f"Type of work: Fiber repair\nAffected services: {ids}\n"
+                "Please contact our NOC for further information.",
+            ))
+        elif formato < 0.7:
+            ids = " / ".join(
+                f"MTR.{rnd.randint(1000, 99999)}.A{rnd.randint(1, 999):03d}"
+                for _ in range(rnd.randint(1, 3))
+            )
+            correos.append((
+                "IGNETWORK",
+                f"Aviso de trabajo programado\nInicio: {fechas[0]}\nFin: {fechas[1]}\n"
+                f"Circuitos: {ids}\nMotivo: mantenimiento preventivo",
+            ))
+        else:
+            ids = ", ".join(str(rnd.randint(10000, 99999)) for _ in range(rnd.randint(1, 3)))
+            correos.append((
+                None,
+                f"Estimado cliente\nInicio: {fechas[0]}\nFin: {fechas[1]}\n"
+                f"Servicios afectados: {ids}",
+            ))
+    return correos
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--correos", type=int, default=3_000)
+    parser.add_argument("--yaml", default=None, help="perfiles adicionales")
+    args = parser.parse_args(argv)
+
+    preparar_entorno()
+    from sandybot import perfiles_correo
+
+    correos = generar_correos(args.correos)
+
+    inicio = time.perf_counter()
+    registro = perfiles_correo.cargar_perfiles(args.yaml)
+    print(f"Compilación de {len(registro)} perfiles: {(time.perf_counter() - inicio) * 1e3:.2f} ms")
+
+    inicio = time.perf_counter()
+    aciertos_antes = sum(_extraer_anterior(texto) is not None for _, texto in correos)
+    antes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for carrier, texto in correos:
+        perfil = registro.perfil(carrier)
+        perfiles_correo.registrar_extraccion(perfil.nombre, perfil.extraer(texto) is not None)
+    despues = time.perf_counter() - inicio
+
+    print(f"== {len(correos)} avisos sintéticos")
+    print(f"{'regex genérica (anterior)':<32} {aciertos_antes / len(correos):6.1%} "
+          f"{antes / len(correos) * 1e6:8.1f} µs/correo")
+    tasas = perfiles_correo.tasa_regex()
+    print(f"{'perfiles por carrier':<32} {tasas['total']:6.1%} "
+          f"{despues / len(correos) * 1e6:8.1f} µs/correo")
+    for nombre in sorted(t for t in tasas if t != "total"):
+        print(f"  {nombre:<30} {tasas[nombre]:6.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# Nombre de archivo: test_rutas_criticas.py
+# Ubicación de archivo: benchmarks/test_rutas_criticas.py
+# User-provided custom instructions
+"""Benchmarks de las rutas más usadas del bot, con ``pytest-benchmark``.
+
+Cubre la normalización y búsqueda de cámaras, la lectura de tracking, el
+informe de SLA, la extracción de avisos por regex, la detección de acciones
+en mensajes libres y la actualización de tracking de un servicio. Todo corre
+sobre SQLite en memoria con datos de :mod:`generadores`.
+
+``benchmarks/baselines/`` se versiona vacía porque los tiempos dependen de
+la máquina: la primera corrida en cada equipo debe guardar la referencia.
+Desde la raíz del repositorio::
+
+    # Guardar una línea base en benchmarks/baselines/ (antes de comparar)
+    pytest benchmarks --benchmark-save=referencia
+
+    # Comparar contra la última guardada y fallar si algo empeora un 20 %
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:20%
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+
+import pytest
+
+from generadores import (
+    aviso_telxius,
+    generar_camaras,
+    generar_excels_sla,
+    generar_mensajes,
+    generar_plantilla_sla,
+    generar_tracking,
+)
+
+
+def test_normalizar_camara(benchmark):
+    from sandybot.utils import normalizar_camara
+
+    nombres = generar_camaras(10_000)
+    resultado = benchmark(lambda: [normalizar_camara(n) for n in nombres])
+    assert len(resultado) == len(nombres)
+
+
+@pytest.mark.parametrize("caso", ["coincide", "sin_coincidencia"])
+def test_buscar_servicios_por_camara(benchmark, bd, camaras, caso):
+    # Sin coincidencias en SQL la función recorre los 10.000 servicios en memoria
+    buscada = random.Random(2).choice(camaras) if caso == "coincide" else "Cámara Inexistente 0"
+    resultado = benchmark(bd.buscar_servicios_por_camara, buscada)
+    assert bool(resultado) == (caso == "coincide")
+
+
+def test_tracking_parser_archivo_grande(benchmark, tmp_path):
+    from sandybot.tracking_parser import TrackingParser
+
+    ruta = generar_tracking(tmp_path / "tracking.txt", empalmes=20_000)
+    parser = TrackingParser()
+
+    def _leer():
+        parser.clear_data()
+        parser.parse_file(str(ruta))
+        return parser._data[0][1]
+
+    assert len(benchmark(_leer)) == 20_000
+
+
+def test_generar_documento_sla(benchmark, bd, tmp_path, monkeypatch):
+    from sandybot.handlers import informe_sla
+
+    monkeypatch.setattr(
+        informe_sla, "RUTA_PLANTILLA", str(generar_plantilla_sla(tmp_path / "plantilla.docx"))
+    )
+    reclamos, servicios = generar_excels_sla(tmp_path, servicios=1_000)
+    # Cada ronda tarda segundos; pocas alcanzan para comparar
+    ruta = benchmark.pedantic(
+        informe_sla._generar_documento_sla, args=(str(reclamos), str(servicios)), rounds=3
+    )
+    assert ruta.endswith(".docx")
+
+
+def test_procesar_correo_a_tarea_regex(benchmark, bd, camaras, loop):
+    from sandybot import email_utils
+
+    numeros = itertools.count(1)
+
+    def _aviso():
+        # Un aviso distinto por ronda: uno repetido se resolvería por su huella
+        n = next(numeros)
+        ids = [f"CRT-{100000 + (n * 7 + k) % 10_000 + 1}" for k in range(3)]
+        return (aviso_telxius(n, ids), "Cliente Benchmark", "TELXIUS"), {}
+
+    def _procesar(texto, cliente, carrier):
+        return loop.run_until_complete(
+            email_utils.procesar_correo_a_tarea(texto, cliente, carrier)
+        )
+
+    tarea, creada, pendientes, _ = benchmark.pedantic(
+        _procesar, setup=_aviso, rounds=200, warmup_rounds=5
+    )
+    assert creada and not pendientes
+
+
+def test_detectar_accion_natural(benchmark):
+    from sandybot.handlers.message import _detectar_accion_natural
+
+    mensajes = generar_mensajes(1_000)
+    acciones = benchmark(lambda: [_detectar_accion_natural(m) for m in mensajes])
+    assert any(acciones) and not all(acciones)
+
+
+def test_actualizar_tracking(benchmark, bd, camaras):
+    rnd = random.Random(3)
+    anteriores = rnd.sample(camaras, 200)
+    nuevas = anteriores[20:] + rnd.sample(camaras, 20)
+
+    def _reiniciar():
+        # Cada ronda parte del mismo servicio, sin el historial de las anteriores
+        with bd.SessionLocal() as session:
+            servicio = session.get(bd.Servicio, 1)
+            servicio.camaras = anteriores
+            servicio.trackings = []
+            session.commit()
+        return (1,), {
+            "ruta": "/tmp/tracking_1.txt",
+            "camaras": nuevas,
+            "trackings_txt": ["/tmp/tracking_1.txt"],
+        }
+
+    benchmark.pedantic(bd.actualizar_tracking, setup=_reiniciar, rounds=100)
+    servicio = bd.obtener_servicio(1)
+    assert servicio.trackings[-1]["nuevas"] and servicio.trackings[-1]["quitadas"]
@@ -39,6 +39,8 @@ REQUIRED_VARS = {
     "DB_PASSWORD": "x",
     "SLACK_WEBHOOK_URL": "x",
     "SUPERVISOR_DB_ID": "x",
+    # Los stubs en memoria no llegan a los procesos nuevos del lector de .msg
+    "CORREOS_PROCESOS": "0",
 }
 for key, val in REQUIRED_VARS.items():
     os.environ.setdefault(key, val)
@@ -103,6 +103,7 @@ def _detectar(texto: str) -> str:
     async def _a(*a, **k):
         return None
     stubs["sandybot.handlers.ingresos"].iniciar_verificacion_ingresos = _a
+    stubs["sandybot.registrador"].responder_en_vivo = _a
     stubs["sandybot.handlers.comparador"].iniciar_comparador = _a
     stubs["sandybot.handlers.cargar_tracking"].guardar_tracking_servicio = lambda *a, **k: None
     stubs["sandybot.handlers.cargar_tracking"].iniciar_carga_tracking = _a
@@ -328,6 +328,41 @@ def test_crear_tarea_servicio_repetido():
     assert len(rels) == 1
 
 
+def test_guardar_tarea_programada_diferencias():
+    """Solo se escriben los cambios y se informa qué se modificó."""
+    s1 = bd.crear_servicio(nombre="Dif1", cliente="D")
+    s2 = bd.crear_servicio(nombre="Dif2", cliente="D")
+    s3 = bd.crear_servicio(nombre="Dif3", cliente="D")
+    args = (datetime(2024, 6, 1, 8), datetime(2024, 6, 1, 10), "Mant")
+
+    tarea, cambios = bd.guardar_tarea_programada(
+        *args, [s1.id, s2.id], carrier_id=7, id_interno="DIF-1"
+    )
+    assert cambios.creada and cambios.agregados == [s1.id, s2.id]
+
+    # Mismo correo reenviado: no hay nada que escribir
+    mismo, cambios = bd.guardar_tarea_programada(
+        *args, [s2.id, s1.id], carrier_id=7, id_interno="DIF-1"
+    )
+    assert mismo.id == tarea.id
+    assert cambios.sin_cambios
+
+    _, cambios = bd.guardar_tarea_programada(
+        args[0], args[1], "Upgrade", [s2.id, s3.id], carrier_id=7, id_interno="DIF-1"
+    )
+    assert cambios.campos == ["tipo_tarea"]
+    assert cambios.agregados == [s3.id]
+    assert cambios.quitados == [s1.id]
+    with bd.SessionLocal() as session:
+        ids = {
+            r.servicio_id
+            for r in session.query(bd.TareaServicio).filter(
+                bd.TareaServicio.tarea_id == tarea.id
+            )
+        }
+    assert ids == {s2.id, s3.id}
+
+
 def test_reclamos_por_servicio():
     srv1 = bd.crear_servicio(nombre="SrvRec1", cliente="Cli")
     srv2 = bd.crear_servicio(nombre="SrvRec2", cliente="Cli")
@@ -432,3 +467,212 @@ def test_eliminar_duplicados_tareas():
     assert len(filas) == 1
     assert filas[0].id == 1
     assert pendiente.tarea_id == 1
+
+
+def test_eliminar_duplicados_tareas_sqlite():
+    """La depuración reasigna servicios y pendientes sin romper la unicidad."""
+
+    from sqlalchemy.pool import StaticPool
+
+    eng = create_engine("sqlite://", poolclass=StaticPool)
+    with eng.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE tareas_programadas ("
+                "id INTEGER PRIMARY KEY, carrier_id INTEGER, id_interno STRING)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE tareas_servicio (id INTEGER PRIMARY KEY, "
+                "tarea_id INTEGER, servicio_id INTEGER, "
+                "UNIQUE (tarea_id, servicio_id))"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE servicios_pendientes ("
+                "id INTEGER PRIMARY KEY, tarea_id INTEGER, id_carrier STRING)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO tareas_programadas VALUES "
+                "(1, 1, 'X1'), (2, 1, 'X1'), (3, 1, 'X1'), (4, 2, 'X1'), (5, NULL, 'X1')"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO tareas_servicio (tarea_id, servicio_id) VALUES "
+                "(1, 10), (2, 10), (2, 11), (3, 11), (3, 12)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO servicios_pendientes VALUES (1, 3, 'A'), (2, 4, 'B')")
+        )
+
+    with eng.begin() as conn:
+        borradas = bd.eliminar_duplicados_tareas(conn)
+
+    with eng.connect() as conn:
+        tareas = [r[0] for r in conn.execute(text("SELECT id FROM tareas_programadas ORDER BY id"))]
+        vinculos = set(conn.execute(text("SELECT tarea_id, servicio_id FROM tareas_servicio")).all())
+        pendientes = dict(conn.execute(text("SELECT id, tarea_id FROM servicios_pendientes")).all())
+
+    assert borradas == 2
+    assert tareas == [1, 4, 5]
+    assert vinculos == {(1, 10), (1, 11), (1, 12)}
+    assert pendientes == {1: 1, 2: 4}
+
+
+def test_init_db_versionado(monkeypatch):
+    """``init_db`` registra las migraciones y luego solo verifica la versión."""
+
+    from sqlalchemy.pool import StaticPool
+
+    eng = create_engine("sqlite://", poolclass=StaticPool)
+    monkeypatch.setattr(bd, "engine", eng)
+
+    assert bd.obtener_version_esquema() is None
+    bd.init_db()
+    assert bd.obtener_version_esquema() == bd.VERSION_ESQUEMA
+
+    insp = sqlalchemy.inspect(eng)
+    assert "schema_version" in insp.get_table_names()
+    assert any(
+        i["name"] == "ix_servicios_id_carrier" for i in insp.get_indexes("servicios")
+    )
+
+    def _no_migrar(*a, **k):
+        raise AssertionError("no debería migrar con el esquema al día")
+
+    monkeypatch.setattr(bd, "aplicar_migraciones", _no_migrar)
+    bd.init_db()
+
+
+
+def test_init_db_desde_version_4(monkeypatch):
+    """Una base ya versionada recibe las tablas agregadas después."""
+
+    from sqlalchemy.pool import StaticPool
+
+    eng = create_engine("sqlite://", poolclass=StaticPool)
+    monkeypatch.setattr(bd, "engine", eng)
+    nuevas = {"huellas_correos", "extracciones_correo"}
+    bd.Base.metadata.create_all(
+        bind=eng,
+        tables=[t for n, t in bd.Base.metadata.tables.items() if n not in nuevas],
+    )
+    with eng.begin() as conn:
+        for version in range(1, 5):
+            conn.execute(
+                bd.VersionEsquema.__table__.insert().values(
+                    version=version, descripcion="x", aplicada=datetime.utcnow()
+                )
+            )
+    # ``create_all`` no debe ser lo que las crea: solo corre al migrar
+    monkeypatch.setattr(bd.Base.metadata, "create_all", lambda *a, **k: None)
+
+    bd.init_db()
+
+    insp = sqlalchemy.inspect(eng)
+    assert nuevas <= set(insp.get_table_names())
+    assert any(i["name"] == "ix_huellas_correos_tarea_id" for i in insp.get_indexes("huellas_correos"))
+    assert bd.obtener_version_esquema() == bd.VERSION_ESQUEMA
+
+def test_obtener_pagina_keyset(tmp_path):
+    """La paginación por clave recorre todas las filas en ambos sentidos."""
+
+    with bd.SessionLocal() as s:
+        for i in range(45):
+            # Fechas repetidas para verificar el desempate por ``id``
+            s.add(bd.Ingreso(id_servicio=1, camara=f"P{i}", fecha=datetime(2024, 5, 1 + i // 3)))
+        s.commit()
+        esperado = [
+            fila.id
+            for fila in s.query(bd.Ingreso.id).order_by(
+                bd.Ingreso.fecha.desc(), bd.Ingreso.id.desc()
+            )
+        ]
+
+    columnas = (bd.Ingreso.id, bd.Ingreso.camara)
+    orden = (bd.Ingreso.fecha, bd.Ingreso.id)
+    paginas = [bd.obtener_pagina(columnas, orden, limite=20)]
+    assert paginas[0].anterior is None
+    while paginas[-1].siguiente is not None:
+        paginas.append(
+            bd.obtener_pagina(columnas, orden, cursor=paginas[-1].siguiente, limite=20)
+        )
+    assert [f.id for p in paginas for f in p.filas] == esperado
+
+    # Volver una página reproduce exactamente la anterior
+    previa = bd.obtener_pagina(
+        columnas, orden, cursor=paginas[-1].anterior, anterior=True, limite=20
+    )
+    assert [f.id for f in previa.filas] == [f.id for f in paginas[-2].filas]
+    assert previa.siguiente == paginas[-2].siguiente
+
+    ruta = tmp_path / "ingresos.csv"
+    assert bd.exportar_csv(columnas, orden, ruta, lote=7) == len(esperado)
+    lineas = ruta.read_text(encoding="utf-8").splitlines()
+    assert lineas[0] == "id,camara"
+    assert [int(l.split(",")[0]) for l in lineas[1:]] == esperado
+
+
+def test_tareas_en_rango_y_servicios_afectados():
+    s1 = bd.crear_servicio(nombre="Rango1", cliente="R")
+    s2 = bd.crear_servicio(nombre="Rango2", cliente="R")
+    larga, _ = bd.crear_tarea_programada(
+        datetime(2031, 1, 1), datetime(2031, 1, 31), "Larga", [s1.id]
+    )
+    corta, _ = bd.crear_tarea_programada(
+        datetime(2031, 1, 10, 8), datetime(2031, 1, 10, 12), "Corta", [s2.id]
+    )
+    bd.crear_tarea_programada(
+        datetime(2031, 3, 1), datetime(2031, 3, 2), "Lejana", [s2.id]
+    )
+
+    ids = [t.id for t in bd.tareas_en_rango(datetime(2031, 1, 10), datetime(2031, 1, 11))]
+    assert ids == [larga.id, corta.id]
+    # Los extremos cuentan: la ventana toca el final de la tarea corta
+    assert [t.id for t in bd.tareas_en_curso(datetime(2031, 1, 10, 12))] == [larga.id, corta.id]
+    assert bd.servicios_afectados(datetime(2031, 1, 20), datetime(2031, 2, 1)) == {s1.id}
+    assert bd.servicios_afectados(datetime(2031, 2, 10), datetime(2031, 2, 20)) == set()
+
+    # Al crear una tarea nueva la cache del árbol se invalida sola
+    nueva, _ = bd.crear_tarea_programada(
+        datetime(2031, 2, 15), datetime(2031, 2, 16), "Nueva", [s1.id]
+    )
+    assert [t.id for t in bd.tareas_en_rango(datetime(2031, 2, 10), datetime(2031, 2, 20))] == [nueva.id]
+
+
+def test_cache_mantenimientos_servicio():
+    from datetime import timedelta
+
+    ahora = datetime.utcnow()
+    s1 = bd.crear_servicio(nombre="Mant1", cliente="M")
+    s2 = bd.crear_servicio(nombre="Mant2", cliente="M")
+    bd.crear_tarea_programada(
+        ahora - timedelta(days=3), ahora - timedelta(days=2), "Pasada", [s1.id]
+    )
+    actual, _ = bd.crear_tarea_programada(
+        ahora - timedelta(hours=1), ahora + timedelta(hours=1), "Actual", [s1.id],
+        carrier_id=None,
+    )
+    proxima, _ = bd.crear_tarea_programada(
+        ahora + timedelta(days=2), ahora + timedelta(days=3), "Proxima",
+        [s1.id, s2.id], carrier_id=1, id_interno="MANT-1",
+    )
+
+    assert [m.tarea_id for m in bd.mantenimientos_servicio(s1.id)] == [actual.id, proxima.id]
+    assert bd.servicio_afectado(s2.id, ahora, ahora + timedelta(days=7))
+    assert not bd.servicio_afectado(s2.id, ahora, ahora + timedelta(days=1))
+    assert bd.servicios_de_tarea(proxima.id) == [s1.id, s2.id]
+
+    # Reenviar el aviso con otros servicios actualiza la cache
+    bd.crear_tarea_programada(
+        ahora + timedelta(days=2), ahora + timedelta(days=3), "Proxima",
+        [s2.id], carrier_id=1, id_interno="MANT-1",
+    )
+    assert bd.servicios_de_tarea(proxima.id) == [s2.id]
+    assert [m.tarea_id for m in bd.mantenimientos_servicio(s1.id)] == [actual.id]
@@ -566,7 +566,47 @@ def test_ids_ignetwork(tmp_path):
     email_utils.gpt = GPTStub()
 
     tarea, _, ids_pend, carrier = asyncio.run(
-        email_utils.procesar_correo_a_tarea("texto", "Cli", "IGNETWORK")
+        email_utils.procesar_correo_a_tarea("aviso ignetwork", "Cli", "IGNETWORK")
     )
     assert ids_pend == ["MTR.1234.A001", "MTR.12345.012"]
     assert carrier == "IGNETWORK"
+
+
+def test_procesar_correo_reutiliza_extraccion(monkeypatch):
+    """La extracción validada se guarda por texto limpio y versión del prompt."""
+    consultas = []
+
+    class GPTStub(email_utils.gpt.__class__):
+        async def consultar_gpt(self, mensaje: str, cache: bool = True) -> str:
+            consultas.append(cache)
+            return (
+                '{"inicio": "2024-04-02 08:00", "fin": "2024-04-02 10:00", '
+                '"tipo": "Mant", "afectacion": null, "descripcion": null, "ids": []}'
+            )
+
+        async def procesar_json_response(self, resp, esquema):
+            import json
+
+            return json.loads(resp)
+
+    monkeypatch.setattr(email_utils, "gpt", GPTStub())
+    texto = "Aviso de cambio de placas en nodo Oeste"
+
+    tarea, *_ = asyncio.run(email_utils.procesar_correo_a_tarea(texto, "Cli"))
+    assert consultas == [False]
+
+    # Sin la tarea la huella no sirve, pero la extracción sigue guardada
+    with bd.SessionLocal() as s:
+        s.delete(s.get(bd.TareaProgramada, tarea.id))
+        s.commit()
+    otra, *_ = asyncio.run(email_utils.procesar_correo_a_tarea(texto, "Cli"))
+    assert consultas == [False]
+    assert otra.fecha_inicio == datetime(2024, 4, 2, 8)
+
+    # Un prompt o esquema distinto invalida lo guardado
+    with bd.SessionLocal() as s:
+        s.delete(s.get(bd.TareaProgramada, otra.id))
+        s.commit()
+    monkeypatch.setattr(email_utils, "VERSION_EXTRACCION", "otra")
+    asyncio.run(email_utils.procesar_correo_a_tarea(texto, "Cli"))
+    assert consultas == [False, False]
@@ -16,7 +16,7 @@ captura = {}
 registros = {}
 
 
-def _importar(tmp_path):
+def _importar(tmp_path, monkeypatch):
     pkg = "sandybot.handlers"
     if pkg not in sys.modules:
         handlers_pkg = ModuleType(pkg)
@@ -30,7 +30,8 @@ def _importar(tmp_path):
 
     registrador_stub.responder_registrando = responder_registrando
     registrador_stub.registrar_conversacion = lambda *a, **k: None
-    sys.modules["sandybot.registrador"] = registrador_stub
+    # ``monkeypatch`` restaura el módulo real al terminar la prueba
+    monkeypatch.setitem(sys.modules, "sandybot.registrador", registrador_stub)
 
     db_stub = ModuleType("sandybot.database")
 
@@ -39,7 +40,7 @@ def _importar(tmp_path):
         return True
 
     db_stub.exportar_camaras_servicio = exportar_camaras_servicio
-    sys.modules["sandybot.database"] = db_stub
+    monkeypatch.setitem(sys.modules, "sandybot.database", db_stub)
 
     email_stub = ModuleType("sandybot.email_utils")
 
@@ -51,13 +52,13 @@ def _importar(tmp_path):
         return True
 
     email_stub.enviar_excel_por_correo = enviar_excel_por_correo
-    sys.modules["sandybot.email_utils"] = email_stub
+    monkeypatch.setitem(sys.modules, "sandybot.email_utils", email_stub)
 
     mod_name = f"{pkg}.enviar_camaras_mail"
     spec = importlib.util.spec_from_file_location(mod_name, ROOT_DIR / "Sandy bot" / "sandybot" / "handlers" / "enviar_camaras_mail.py")
 
     mod = importlib.util.module_from_spec(spec)
-    sys.modules[mod_name] = mod
+    monkeypatch.setitem(sys.modules, mod_name, mod)
     spec.loader.exec_module(mod)
     return mod
 
@@ -71,7 +72,7 @@ async def _run(mod):
 
 def test_handler_envia_excel(monkeypatch, tmp_path):
     monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
-    mod = _importar(tmp_path)
+    mod = _importar(tmp_path, monkeypatch)
     captura.clear()
     registros.clear()
     asyncio.run(_run(mod))
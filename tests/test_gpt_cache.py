@@ -30,10 +30,17 @@ llamadas = {"n": 0}
 class CompletionStub:
     async def create(self, *args, **kwargs):
         llamadas["n"] += 1
+        llamadas["kwargs"] = kwargs
+        if kwargs.get("stream"):
+            return _stream(["Hola", "", " mundo", None, "!"])
         class Resp:
             def __init__(self):
                 self.choices = [type("msg", (), {"message": type("m", (), {"content": "respuesta"})()})]
         return Resp()
+async def _stream(fragmentos):
+    for fragmento in fragmentos:
+        delta = type("d", (), {"content": fragmento})()
+        yield type("chunk", (), {"choices": [type("c", (), {"delta": delta})()]})()
 class AsyncOpenAI:
     def __init__(self, api_key=None):
         self.chat = type("c", (), {"completions": CompletionStub()})()
@@ -89,3 +96,77 @@ def test_persistencia_cache(tmp_path):
     else:
         sys.modules.pop("openai", None)
 
+
+
+def test_stream_cachea_texto_final(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "openai", openai_stub)
+    monkeypatch.setattr(config_mod.config, "GPT_CACHE_FILE", tmp_path / "gpt_cache.json")
+    gpt_module = importlib.reload(importlib.import_module("sandybot.gpt_handler"))
+    handler = gpt_module.GPTHandler()
+    llamadas["n"] = 0
+
+    async def _consumir(texto):
+        return [f async for f in handler.consultar_gpt_stream(texto)]
+
+    assert asyncio.run(_consumir("saludo")) == ["Hola", " mundo", "!"]
+    assert llamadas["n"] == 1
+    # La segunda vez sale de la cache en un solo fragmento, igual que consultar_gpt
+    assert asyncio.run(_consumir("saludo")) == ["Hola mundo!"]
+    assert asyncio.run(handler.consultar_gpt("saludo")) == "Hola mundo!"
+    assert llamadas["n"] == 1
+
+
+def test_perfiles_por_tarea(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "openai", openai_stub)
+    cfg = config_mod.config
+    monkeypatch.setattr(cfg, "GPT_CACHE_FILE", tmp_path / "gpt_cache.json")
+    monkeypatch.setattr(cfg, "GPT_MODEL_CLASIFICACION", "gpt-4o-mini")
+    monkeypatch.setattr(cfg, "GPT_MODEL_EXTRACCION", "gpt-4o")
+    gpt_module = importlib.reload(importlib.import_module("sandybot.gpt_handler"))
+    handler = gpt_module.GPTHandler()
+
+    asyncio.run(handler.detectar_intencion("hola"))
+    assert llamadas["kwargs"]["model"] == "gpt-4o-mini"
+    assert llamadas["kwargs"]["max_tokens"] == 20
+    assert llamadas["kwargs"]["temperature"] == 0
+
+    async def _extraer():
+        with gpt_module.perfil_gpt("extraccion"):
+            await handler.consultar_gpt("aviso en JSON", cache=False)
+
+    asyncio.run(_extraer())
+    assert llamadas["kwargs"]["model"] == "gpt-4o"
+    assert llamadas["kwargs"]["response_format"] == {"type": "json_object"}
+
+    # Sin perfil se usa el de charla; gpt-4 no admite el modo JSON
+    asyncio.run(handler.consultar_gpt("pregunta libre", cache=False))
+    assert llamadas["kwargs"]["model"] == cfg.GPT_MODEL
+    assert "response_format" not in llamadas["kwargs"]
+    assert not gpt_module.admite_json("gpt-4")
+
+    metricas = handler.metricas_perfiles()
+    assert metricas["clasificacion"]["consultas"] == 1
+    assert metricas["extraccion"]["consultas"] == 1
+    assert metricas["chat"]["consultas"] == 1
+    assert metricas["chat"]["p95_ms"] >= 0
+    assert metricas["cronologia"]["consultas"] == 0
+
+
+def test_parametros_modelos_razonamiento(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "openai", openai_stub)
+    cfg = config_mod.config
+    monkeypatch.setattr(cfg, "GPT_CACHE_FILE", tmp_path / "gpt_cache.json")
+    monkeypatch.setattr(cfg, "GPT_MODEL_EXTRACCION", "o3-mini")
+    gpt_module = importlib.reload(importlib.import_module("sandybot.gpt_handler"))
+    handler = gpt_module.GPTHandler()
+
+    async def _extraer():
+        with gpt_module.perfil_gpt("extraccion"):
+            await handler.consultar_gpt("aviso en JSON", cache=False)
+
+    asyncio.run(_extraer())
+    kwargs = llamadas["kwargs"]
+    assert kwargs["model"] == "o3-mini"
+    assert kwargs["max_completion_tokens"] == 4000
+    assert "max_tokens" not in kwargs and "temperature" not in kwargs
+    assert kwargs["response_format"] == {"type": "json_object"}
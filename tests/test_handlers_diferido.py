@@ -0,0 +1,40 @@
+# Nombre de archivo: test_handlers_diferido.py
+# Ubicación de archivo: tests/test_handlers_diferido.py
+# User-provided custom instructions
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+INIT = ROOT_DIR / "Sandy bot" / "sandybot" / "handlers" / "__init__.py"
+
+
+def _paquete(tmp_path, nombre="handlers_prueba"):
+    """Carga ``handlers/__init__.py`` con submódulos falsos en ``tmp_path``."""
+    (tmp_path / "supermenu.py").write_text(
+        "async def supermenu(update, context):\n"
+        "    return 'supermenu'\n"
+        "async def listar_servicios(update, context):\n"
+        "    return 'servicios'\n"
+    )
+    spec = importlib.util.spec_from_file_location(
+        nombre, INIT, submodule_search_locations=[str(tmp_path)]
+    )
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_diferido_con_submodulo_homonimo(tmp_path):
+    """Importar el submódulo antes no reemplaza al handler del mismo nombre."""
+    pkg = _paquete(tmp_path)
+    try:
+        importlib.import_module("handlers_prueba.supermenu")
+        assert asyncio.run(pkg.diferido("listar_servicios")(None, None)) == "servicios"
+        assert asyncio.run(pkg.diferido("supermenu")(None, None)) == "supermenu"
+        assert asyncio.run(pkg.diferido("supermenu")(None, None)) == "supermenu"
+    finally:
+        for nombre in ("handlers_prueba", "handlers_prueba.supermenu"):
+            sys.modules.pop(nombre, None)
@@ -0,0 +1,94 @@
+# Nombre de archivo: test_huellas.py
+# Ubicación de archivo: tests/test_huellas.py
+# User-provided custom instructions
+import importlib
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy.orm import sessionmaker
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+HUELLAS = ROOT_DIR / "Sandy bot" / "sandybot" / "huellas.py"
+
+orig_engine = sqlalchemy.create_engine
+sqlalchemy.create_engine = lambda *a, **k: orig_engine("sqlite:///:memory:")
+import sandybot.database as bd
+
+sqlalchemy.create_engine = orig_engine
+
+AVISO = (
+    "Mantenimiento programado\n"
+    "Estimado cliente, le informamos que realizaremos una ventana de "
+    "mantenimiento sobre la red troncal para reemplazar equipos de "
+    "transmisión en el nodo central de la ciudad.\n"
+    "De: 05/03/2024 01:00\nHasta: 05/03/2024 05:00"
+)
+
+
+def _importar(monkeypatch):
+    eng = orig_engine("sqlite://")
+    bd.Base.metadata.create_all(bind=eng)
+    monkeypatch.setattr(bd, "SessionLocal", sessionmaker(bind=eng, expire_on_commit=False))
+    monkeypatch.setitem(sys.modules, "sandybot.database", bd)
+    spec = importlib.util.spec_from_file_location("sandybot.huellas", HUELLAS)
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "sandybot.huellas", mod)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_normalizar_quita_encabezados_de_reenvio(monkeypatch):
+    hu = _importar(monkeypatch)
+    reenvio = (
+        "From: noc@carrier.com\nEnviado el: lunes 4 de marzo 9:12\n"
+        "-----Original Message-----\nRE: FW: " + AVISO
+    )
+    assert hu.normalizar(reenvio) == hu.normalizar(AVISO)
+    # "De:" con horario y sin correo es parte del aviso
+    assert "de: 05/03/2024 01:00" in hu.normalizar(AVISO)
+
+
+def test_indice_simhash_exige_misma_firma(monkeypatch):
+    hu = _importar(monkeypatch)
+    base = hu.normalizar(AVISO)
+    parecido = base.replace("reemplazar", "cambiar")
+    assert hu.distancia(hu.simhash(base), hu.simhash(parecido)) <= hu.DISTANCIA_MAXIMA
+
+    indice = hu.IndiceSimHash()
+    indice.agregar(hu.simhash(base), hu.firma_numerica(base), 7)
+    assert indice.buscar(hu.simhash(parecido), hu.firma_numerica(parecido)) == [7]
+    otra_fecha = parecido.replace("05/03", "06/03")
+    assert indice.buscar(hu.simhash(otra_fecha), hu.firma_numerica(otra_fecha)) == []
+
+
+def test_registrar_y_buscar(tmp_path, monkeypatch):
+    hu = _importar(monkeypatch)
+    with bd.SessionLocal() as s:
+        tarea = bd.TareaProgramada(
+            fecha_inicio=datetime(2024, 3, 5, 1), fecha_fin=datetime(2024, 3, 5, 5)
+        )
+        s.add(tarea)
+        s.commit()
+
+    archivo = tmp_path / "aviso.msg"
+    archivo.write_bytes(b"contenido")
+    sha = hu.huella_archivo(archivo)
+    assert hu.tarea_por_archivo(sha) is None
+
+    hu.registrar_archivo(sha, tarea.id)
+    hu.registrar_texto(AVISO, tarea.id)
+    # Registrar dos veces la misma huella no falla
+    hu.registrar_texto("FW: " + AVISO, tarea.id)
+
+    assert hu.tarea_por_archivo(sha) == tarea.id
+    assert hu.tarea_por_texto("RE: " + AVISO) == tarea.id
+    assert hu.tarea_por_texto(AVISO.replace("nodo central", "nodo principal")) == tarea.id
+    assert hu.tarea_por_texto(AVISO.replace("01:00", "02:00")) is None
+
+    # Las huellas de tareas borradas se ignoran
+    with bd.SessionLocal() as s:
+        s.delete(s.get(bd.TareaProgramada, tarea.id))
+        s.commit()
+    assert hu.tarea_por_texto(AVISO) is None
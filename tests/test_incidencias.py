@@ -4,6 +4,7 @@
 import sys
 import importlib
 import asyncio
+import json
 from types import ModuleType
 from pathlib import Path
 # Importar Document para crear el archivo de prueba
@@ -73,3 +74,57 @@ def test_procesar_incidencias_docx(tmp_path):
     assert respuesta == "ok"
     assert incidencias.gpt.last_msg == texto
 
+
+
+def test_dividir_por_tokens_respeta_parrafos():
+    tokens = importlib.import_module("sandybot.tokens")
+    parrafos = [f"{i:02d}/03/2024 10:00 evento número {i} " + "x" * 40 for i in range(1, 21)]
+    fragmentos = tokens.dividir_por_tokens("\n\n".join(parrafos), 60)
+
+    assert len(fragmentos) > 1
+    assert all(tokens.contar_tokens(f) <= 60 for f in fragmentos)
+    # Ningún párrafo queda partido entre dos fragmentos
+    assert [p for f in fragmentos for p in f.split("\n")] == parrafos
+
+
+def test_analizar_incidencias_por_fragmentos():
+    activas = {"n": 0, "max": 0}
+
+    class GPTFragmentos(gpt_module.GPTHandler):
+        async def consultar_gpt(self, mensaje: str, cache: bool = True) -> str:
+            activas["n"] += 1
+            activas["max"] = max(activas["max"], activas["n"])
+            await asyncio.sleep(0.01)
+            activas["n"] -= 1
+            texto = mensaje.split("Texto:\n", 1)[1]
+            eventos = [
+                {"fecha": linea.split(" - ")[0], "evento": linea.split(" - ")[1]}
+                for linea in texto.splitlines()
+            ]
+            # Repite el último evento como si se mencionara en otro fragmento
+            eventos.append(dict(eventos[-1]))
+            return json.dumps(eventos)
+
+    handler = GPTFragmentos()
+    lineas = [f"{d:02d}/03/2024 08:00 - corte {d}" for d in range(30, 0, -1)]
+    datos = asyncio.run(
+        handler.analizar_incidencias("\n".join(lineas), max_tokens=30, concurrencia=2)
+    )
+
+    assert activas["max"] == 2
+    assert [d["evento"] for d in datos] == [f"corte {d}" for d in range(1, 31)]
+
+
+def test_analizar_incidencias_contexto_en_blanco():
+    class GPTContexto(gpt_module.GPTHandler):
+        async def consultar_gpt(self, mensaje: str, cache: bool = True) -> str:
+            self.last_msg = mensaje
+            return json.dumps([{"fecha": "01/03/2024 08:00", "evento": "corte"}])
+
+    handler = GPTContexto()
+    datos = asyncio.run(
+        handler.analizar_incidencias("01/03/2024 08:00 - corte", contexto="  \n\t ")
+    )
+
+    assert [d["evento"] for d in datos] == ["corte"]
+    assert "Contexto" not in handler.last_msg
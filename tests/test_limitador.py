@@ -0,0 +1,87 @@
+# Nombre de archivo: test_limitador.py
+# Ubicación de archivo: tests/test_limitador.py
+# User-provided custom instructions
+import asyncio
+import importlib
+import time
+
+limitador = importlib.import_module("sandybot.limitador")
+
+
+def test_prioridad_interactiva_pasa_antes_que_lotes():
+    lim = limitador.LimitadorGPT(0, 0, max_simultaneas=1)
+    orden = []
+
+    async def _consulta(nombre, nivel):
+        with limitador.prioridad_gpt(nivel):
+            async with lim.reservar(10):
+                orden.append(nombre)
+                await asyncio.sleep(0.01)
+
+    async def _flujo():
+        async with lim.reservar(10, limitador.PRIORIDAD_LOTE):
+            tareas = [
+                asyncio.create_task(_consulta(f"lote{i}", limitador.PRIORIDAD_LOTE))
+                for i in range(3)
+            ]
+            await asyncio.sleep(0)
+            tareas.append(
+                asyncio.create_task(_consulta("chat", limitador.PRIORIDAD_INTERACTIVA))
+            )
+            await asyncio.sleep(0)
+            assert lim.en_espera == 4
+        await asyncio.gather(*tareas)
+
+    asyncio.run(_flujo())
+    assert orden == ["chat", "lote0", "lote1", "lote2"]
+    assert lim.en_curso == 0
+
+
+def test_baldes_limitan_pedidos_y_tokens():
+    # 600 pedidos/min = uno cada 0.1 s una vez agotado el balde inicial
+    lim = limitador.LimitadorGPT(600, 0)
+    lim.pedidos._fichas = 1
+
+    async def _flujo():
+        inicio = time.monotonic()
+        for _ in range(4):
+            async with lim.reservar(1):
+                pass
+        return time.monotonic() - inicio
+
+    assert 0.25 <= asyncio.run(_flujo()) < 1
+
+    # Sin fichas de tokens la consulta espera lo necesario para juntarlas
+    lim = limitador.LimitadorGPT(0, 6000)
+    lim.tokens._fichas = 0
+
+    async def _tokens():
+        inicio = time.monotonic()
+        async with lim.reservar(20) as reserva:
+            reserva.ajustar(10)
+        return time.monotonic() - inicio
+
+    assert 0.15 <= asyncio.run(_tokens()) < 1
+    # El ajuste devolvió al balde los tokens no usados
+    assert lim.tokens._fichas > 5
+
+
+def test_penalizar_y_cancelar_en_espera():
+    lim = limitador.LimitadorGPT(0, 0, max_simultaneas=1)
+
+    async def _flujo():
+        async with lim.reservar(1):
+            espera = asyncio.create_task(lim.reservar(1).__aenter__())
+            await asyncio.sleep(0)
+            espera.cancel()
+            await asyncio.gather(espera, return_exceptions=True)
+        assert lim.en_curso == 0
+
+        lim.penalizar(0.2)
+        inicio = time.monotonic()
+        async with lim.reservar(1):
+            pass
+        return time.monotonic() - inicio
+
+    assert asyncio.run(_flujo()) >= 0.15
+    assert lim.en_espera == 0
@@ -86,6 +86,9 @@ def reiniciar_bd():
 
 
 def _importar():
+    # Otros módulos de prueba reemplazan ``sandybot.database`` por stubs
+    sys.modules["sandybot.database"] = bd
+    sys.modules["sandybot.registrador"] = registrador_stub
     pkg = "sandybot.handlers"
     if pkg not in sys.modules:
         handlers_pkg = ModuleType(pkg)
@@ -178,3 +181,61 @@ def test_listar_tareas_filtro_carrier():
     texto = asyncio.run(_ejecutar([f"carrier={car1.nombre}"]))
     assert "A" in texto
     assert "B" not in texto
+
+
+def test_listar_tareas_paginado(monkeypatch):
+    mod = _importar()
+    monkeypatch.setattr(mod, "TAREAS_POR_PAGINA", 2)
+    monkeypatch.setitem(sys.modules, "sandybot.handlers.listar_tareas", mod)
+    s1 = bd.crear_servicio(nombre="P1", cliente="F")
+    s2 = bd.crear_servicio(nombre="P2", cliente="F")
+    for dia in range(1, 6):
+        bd.crear_tarea_programada(
+            datetime(2024, 5, dia, 8), datetime(2024, 5, dia, 10), f"T{dia}", [s1.id, s2.id]
+        )
+
+    async def _pagina(args):
+        msg = Message("/listar_tareas")
+        captura.clear()
+        sys.modules["sandybot.registrador"] = registrador_stub
+        await mod.listar_tareas(Update(message=msg), SimpleNamespace(args=args))
+        return captura["texto"]
+
+    texto = asyncio.run(_pagina(["F"]))
+    assert "T1" in texto and "T2" in texto and "T3" not in texto
+    assert f"(servicios: {s1.id}, {s2.id})" in texto
+    assert "/listar_tareas F pagina=2" in texto
+
+    texto = asyncio.run(_pagina(["F", "pagina=3"]))
+    assert "T5" in texto and "T4" not in texto
+    assert "pagina=4" not in texto
+
+
+def test_listar_tareas_pagina_larga_en_partes(monkeypatch):
+    mod = _importar()
+    # Se usa el ``responder_registrando`` real, sin registrar en la base
+    monkeypatch.delitem(sys.modules, "sandybot.registrador")
+    registrador = importlib.import_module("sandybot.registrador")
+    monkeypatch.setitem(sys.modules, "sandybot.registrador", registrador_stub)
+    monkeypatch.setattr(registrador, "registrar_conversacion", lambda *a, **k: None)
+    monkeypatch.setattr(mod, "responder_registrando", registrador.responder_registrando)
+
+    servicios = [bd.crear_servicio(nombre=f"L{i}", cliente="G").id for i in range(300)]
+    for dia in range(1, 11):
+        bd.crear_tarea_programada(
+            datetime(2024, 6, dia, 8), datetime(2024, 6, dia, 10), f"T{dia}", servicios
+        )
+
+    respuestas = []
+
+    class MensajeRegistrado(Message):
+        async def reply_text(self, texto, **k):
+            respuestas.append(texto)
+
+    msg = MensajeRegistrado("/listar_tareas")
+    asyncio.run(mod.listar_tareas(Update(message=msg), SimpleNamespace(args=["G"])))
+
+    assert len(respuestas) > 1
+    assert all(len(r) <= registrador.LIMITE_MENSAJE for r in respuestas)
+    completo = "\n".join(respuestas)
+    assert all(f"T{dia} " in completo for dia in range(1, 11))
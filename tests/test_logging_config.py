@@ -0,0 +1,92 @@
+# Nombre de archivo: test_logging_config.py
+# Ubicación de archivo: tests/test_logging_config.py
+# User-provided custom instructions
+import importlib
+import json
+import logging
+
+import pytest
+
+logging_config = importlib.import_module("sandybot.logging_config")
+trazas = importlib.import_module("sandybot.trazas")
+
+
+@pytest.fixture
+def raiz(monkeypatch, tmp_path):
+    """Restaura los handlers del logger raíz que usa pytest."""
+    monkeypatch.setattr(logging_config.config, "LOG_FILE", tmp_path / "sandy.log", raising=False)
+    monkeypatch.setattr(
+        logging_config.config, "ERRORES_FILE", tmp_path / "errores.log", raising=False
+    )
+    root = logging.getLogger()
+    handlers, nivel = root.handlers[:], root.level
+    yield tmp_path
+    logging_config.detener_logging()
+    for handler in root.handlers:
+        handler.close()
+    root.handlers[:] = handlers
+    root.setLevel(nivel)
+
+
+def test_registros_pasan_por_la_cola(raiz):
+    logging_config.setup_logging(json_logs=False, muestreo_debug=1)
+    root = logging.getLogger()
+    assert [type(h) for h in root.handlers] == [logging_config.EncoladorLogs]
+
+    log = logging.getLogger("prueba_cola")
+    with trazas.traza("update") as traza:
+        log.info("dentro de la traza")
+    log.error("falló algo")
+    logging_config.detener_logging()
+
+    texto = (raiz / "sandy.log").read_text(encoding="utf-8")
+    assert f"[{traza.trace_id}] dentro de la traza" in texto
+    assert "[-] falló algo" in texto
+    errores = (raiz / "errores.log").read_text(encoding="utf-8")
+    assert "falló algo" in errores and "dentro de la traza" not in errores
+
+
+def test_json_y_muestreo_debug(raiz):
+    logging_config.setup_logging(logging.DEBUG, json_logs=True, muestreo_debug=10)
+    log = logging.getLogger("prueba_json")
+    for i in range(25):
+        log.debug("fila %s procesada", i)
+    log.debug("otra línea")
+    log.warning("aviso %s", "único")
+    logging_config.detener_logging()
+
+    registros = [
+        json.loads(linea)
+        for linea in (raiz / "sandy.log").read_text(encoding="utf-8").splitlines()
+    ]
+    mensajes = [r["mensaje"] for r in registros if r["logger"] == "prueba_json"]
+    assert mensajes == [
+        "fila 0 procesada",
+        "fila 10 procesada",
+        "fila 20 procesada",
+        "otra línea",
+        "aviso único",
+    ]
+    assert registros[-1]["nivel"] == "WARNING" and registros[-1]["trace_id"] == "-"
+
+
+@pytest.mark.parametrize("json_logs", [True, False])
+def test_excepcion_separada_del_mensaje(raiz, json_logs):
+    logging_config.setup_logging(json_logs=json_logs, muestreo_debug=1)
+    log = logging.getLogger("prueba_excepcion")
+    try:
+        raise ValueError("dato inválido")
+    except ValueError:
+        log.exception("no se pudo procesar %s", "aviso.msg")
+    logging_config.detener_logging()
+
+    texto = (raiz / "errores.log").read_text(encoding="utf-8")
+    if json_logs:
+        registro = json.loads(texto.splitlines()[-1])
+        assert registro["mensaje"] == "no se pudo procesar aviso.msg"
+        assert "Traceback" in registro["excepcion"]
+        assert "ValueError: dato inválido" in registro["excepcion"]
+    else:
+        # El traceback sigue apareciendo una sola vez, debajo del mensaje
+        assert "no se pudo procesar aviso.msg\nTraceback" in texto
+        assert texto.count("Traceback") == 1
@@ -0,0 +1,116 @@
+# Nombre de archivo: test_metricas.py
+# Ubicación de archivo: tests/test_metricas.py
+# User-provided custom instructions
+import asyncio
+import importlib
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+metricas = importlib.import_module("sandybot.metricas")
+
+
+def test_exposicion_formato_prometheus():
+    reg = metricas.Registro()
+    consultas = reg.contador("x_consultas_total", "Consultas", ("perfil",))
+    demora = reg.histograma("x_segundos", "Demora", ("flujo",), limites=(0.1, 1))
+    reg.medidor("x_cola", "Cola", lambda: 3)
+    reg.medidor("x_ratio", "Ratio", lambda: {"a": 0.5}, etiqueta="perfil")
+
+    consultas.incrementar(perfil="chat")
+    consultas.incrementar(2, perfil="chat")
+    for valor in (0.05, 0.5, 5):
+        demora.observar(valor, flujo='in"forme')
+    # Declarar de nuevo devuelve la misma métrica
+    assert reg.contador("x_consultas_total", "Consultas", ("perfil",)) is consultas
+    with pytest.raises(ValueError):
+        consultas.incrementar(modelo="x")
+
+    texto = reg.exponer()
+    assert "# TYPE x_consultas_total counter" in texto
+    assert 'x_consultas_total{perfil="chat"} 3' in texto
+    assert 'x_segundos_bucket{flujo="in\\"forme",le="0.1"} 1' in texto
+    assert 'x_segundos_bucket{flujo="in\\"forme",le="1"} 2' in texto
+    assert 'x_segundos_bucket{flujo="in\\"forme",le="+Inf"} 3' in texto
+    assert 'x_segundos_count{flujo="in\\"forme"} 3' in texto
+    assert "x_cola 3" in texto
+    assert 'x_ratio{perfil="a"} 0.5' in texto
+
+
+def test_instrumentar_handler_y_smtp():
+    async def iniciar_comparador(update, context):
+        if update == "falla":
+            raise RuntimeError("x")
+        return "ok"
+
+    iniciar_comparador.flujo = "comparador"
+    medido = metricas.instrumentar(iniciar_comparador)
+    assert metricas.instrumentar(medido) is medido
+    antes = metricas.HANDLER_SEGUNDOS.cuenta(handler="iniciar_comparador", flujo="comparador")
+
+    assert asyncio.run(medido(None, None)) == "ok"
+    with pytest.raises(RuntimeError):
+        asyncio.run(medido("falla", None))
+    assert (
+        metricas.HANDLER_SEGUNDOS.cuenta(handler="iniciar_comparador", flujo="comparador")
+        == antes + 2
+    )
+    assert metricas.HANDLER_ERRORES.valor(handler="iniciar_comparador", flujo="comparador") >= 1
+
+    @metricas.medir_smtp
+    def enviar_prueba(ok):
+        return ok
+
+    enviar_prueba(True)
+    enviar_prueba(False)
+    assert metricas.SMTP_ENVIOS.valor(funcion="enviar_prueba", resultado="ok") == 1
+    assert metricas.SMTP_ENVIOS.valor(funcion="enviar_prueba", resultado="error") == 1
+
+
+def test_instrumentar_flujo_por_modo_del_usuario(monkeypatch):
+    from types import SimpleNamespace
+
+    # Otras pruebas dejan stubs del paquete de handlers; se usa el real
+    for nombre in ("sandybot.handlers", "sandybot.handlers.estado"):
+        monkeypatch.delitem(sys.modules, nombre, raising=False)
+    diferido = importlib.import_module("sandybot.handlers").diferido
+    UserState = importlib.import_module("sandybot.handlers.estado").UserState
+
+    async def callback_handler(update, context):
+        # El botón del menú inicia el flujo
+        if update.effective_user:
+            UserState.set_mode(update.effective_user.id, "informe_sla")
+
+    callback_handler.flujo = "callback"
+    callback_handler.flujo_dinamico = diferido("callback_handler").flujo_dinamico
+    medido = metricas.instrumentar(callback_handler)
+    update = SimpleNamespace(effective_user=SimpleNamespace(id=4701))
+
+    UserState.set_mode(4701, "")
+    asyncio.run(medido(update, None))
+    assert metricas.HANDLER_SEGUNDOS.cuenta(handler="callback_handler", flujo="informe_sla") == 1
+    # Ya dentro del flujo se usa el modo con el que llegó el update
+    UserState.set_mode(4701, "comparador")
+    asyncio.run(medido(update, None))
+    assert metricas.HANDLER_SEGUNDOS.cuenta(handler="callback_handler", flujo="comparador") == 1
+    asyncio.run(medido(SimpleNamespace(effective_user=None), None))
+    assert metricas.HANDLER_SEGUNDOS.cuenta(handler="callback_handler", flujo="callback") == 1
+    UserState.clear_user(4701)
+
+
+def test_servidor_metrics():
+    reg = metricas.Registro()
+    reg.medidor("x_cola", "Cola", lambda: 7)
+    servidor = metricas.iniciar_servidor(0, registro_metricas=reg)
+    url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as respuesta:
+            assert respuesta.headers["Content-Type"].startswith("text/plain")
+            assert "x_cola 7" in respuesta.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/otra", timeout=5)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,111 @@
+# Nombre de archivo: test_notion.py
+# Ubicación de archivo: tests/test_notion.py
+# User-provided custom instructions
+import asyncio
+import importlib
+import sys
+import threading
+import time
+
+utils = importlib.import_module("sandybot.utils")
+sys.modules.pop("sandybot.handlers.notion", None)
+notion = importlib.import_module("sandybot.handlers.notion")
+
+
+class ErrorNotion(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class ClienteFalso:
+    """Imita ``notion_client.AsyncClient``: falla con los estados indicados."""
+
+    def __init__(self, fallos=()):
+        self.fallos = list(fallos)
+        self.creadas = []
+        self.pages = self
+
+    async def create(self, **entrada):
+        await asyncio.sleep(0)
+        if self.fallos:
+            raise ErrorNotion(self.fallos.pop(0))
+        self.creadas.append(entrada["properties"]["Nombre"]["title"][0]["text"]["content"])
+
+
+def _preparar(monkeypatch, tmp_path, cliente, intervalo=60):
+    bandeja = notion.BandejaNotion(tmp_path / "pendientes.json", intervalo=intervalo)
+    monkeypatch.setattr(notion, "bandeja_notion", bandeja)
+    monkeypatch.setattr(notion, "_notion", cliente)
+    monkeypatch.setattr(
+        notion,
+        "reservar_numero",
+        lambda clave: utils.reservar_numero(clave, tmp_path / "contador.json"),
+    )
+    return bandeja
+
+
+def test_reservar_numero_concurrente(tmp_path):
+    ruta = tmp_path / "contador.json"
+    numeros = []
+
+    def _reservar():
+        for _ in range(20):
+            numeros.append(utils.reservar_numero("dia", ruta))
+
+    hilos = [threading.Thread(target=_reservar) for _ in range(5)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert sorted(numeros) == list(range(1, 101))
+    assert utils.cargar_json(ruta) == {"dia": 100}
+
+
+def test_bandeja_reintenta_y_persiste(monkeypatch, tmp_path):
+    cliente = ClienteFalso(fallos=[503])
+    bandeja = _preparar(monkeypatch, tmp_path, cliente)
+
+    async def _flujo():
+        nombres = await asyncio.gather(
+            *(notion.registrar_accion_pendiente([f"msg {i}"], 1) for i in range(3))
+        )
+        return nombres
+
+    nombres = asyncio.run(_flujo())
+    # Números distintos aunque las solicitudes llegaron a la vez
+    assert len(set(nombres)) == 3
+    # La que falló quedó en disco con su reintento programado
+    pendientes = notion.BandejaNotion(bandeja.ruta).pendientes()
+    assert len(pendientes) == 1
+    (item,) = pendientes.values()
+    assert item["intentos"] == 1 and "503" in item["error"]
+    assert item["proximo"] > time.time() + 50
+
+    # Vence la espera y el próximo envío la crea
+    item["proximo"] = 0
+    utils.guardar_json_atomico(pendientes, bandeja.ruta)
+    assert asyncio.run(bandeja.enviar_pendientes()) == 1
+    assert sorted(cliente.creadas) == sorted(nombres)
+    assert bandeja.pendientes() == {}
+
+
+def test_bandeja_en_segundo_plano_descarta_rechazos(monkeypatch, tmp_path):
+    cliente = ClienteFalso(fallos=[400])
+    bandeja = _preparar(monkeypatch, tmp_path, cliente, intervalo=30)
+
+    async def _flujo():
+        await bandeja.iniciar()
+        await asyncio.sleep(0.05)
+        rechazada = await notion.registrar_accion_pendiente(["malo"], 1)
+        # El handler no espera a Notion: vuelve con la solicitud en la bandeja
+        assert rechazada in bandeja.pendientes()
+        await asyncio.sleep(0.05)
+        aceptada = await notion.registrar_accion_pendiente(["bueno"], 1)
+        await bandeja.detener()
+        return rechazada, aceptada
+
+    rechazada, aceptada = asyncio.run(_flujo())
+    assert cliente.creadas == [aceptada]
+    assert bandeja.pendientes() == {}
+    assert not bandeja.activo
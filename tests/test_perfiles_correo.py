@@ -0,0 +1,133 @@
+# Nombre de archivo: test_perfiles_correo.py
+# Ubicación de archivo: tests/test_perfiles_correo.py
+# User-provided custom instructions
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+PERFILES = ROOT_DIR / "Sandy bot" / "sandybot" / "perfiles_correo.py"
+
+AVISO_TELXIUS = (
+    "From: noc@telxius.com\n"
+    "Planned work SWX0012345\n"
+    "Start Date and Time: 02/01/2024 08:00\n"
+    "End Date and Time: 02/01/2024 10:00\n"
+    "Type of work: Fiber repair\n"
+    "Affected services: CRT-123456, CRT-654321 and 1234"
+)
+
+
+def _importar(monkeypatch):
+    spec = importlib.util.spec_from_file_location("sandybot.perfiles_correo", PERFILES)
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "sandybot.perfiles_correo", mod)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_perfiles_base(monkeypatch):
+    mod = _importar(monkeypatch)
+    reg = mod.cargar_perfiles()
+
+    assert reg.por_remitente("noc@telxius.com").nombre == "TELXIUS"
+    assert reg.por_remitente("otro@ejemplo.com") is None
+
+    telxius = reg.perfil("telxius")
+    assert telxius.buscar_id_interno(AVISO_TELXIUS) == "SWX0012345"
+    datos = telxius.extraer(AVISO_TELXIUS)
+    assert datos["inicio"] == "02/01/2024 08:00"
+    assert datos["fin"] == "02/01/2024 10:00"
+    assert datos["tipo"] == "Fiber repair"
+    assert datos["ids"] == ["CRT-123456", "CRT-654321"]
+    assert telxius.filtrar_ids(["CRT-123456", "1234"]) == (["CRT-123456"], ["1234"])
+
+    # Carrier desconocido: perfil genérico con etiquetas en castellano
+    generico = reg.perfil("OTRO")
+    assert generico is reg.generico
+    assert generico.extraer(
+        "Inicio: 02/01/2024 08:00\nFin: 02/01/2024 10:00\nServicios: 76208, 78333."
+    ) == {
+        "inicio": "02/01/2024 08:00",
+        "fin": "02/01/2024 10:00",
+        "tipo": "Mantenimiento",
+        "afectacion": None,
+        "descripcion": None,
+        "ids": ["76208", "78333"],
+    }
+    assert generico.extraer("Inicio: 02/01/2024 08:00\nFin: 02/01/2024 10:00") is None
+    assert generico.filtrar_ids(["2024", "12345", "123456", "CRT-1"]) == (
+        ["123456", "CRT-1"],
+        ["2024", "12345"],
+    )
+
+
+def test_etiquetas_no_toman_prosa(monkeypatch):
+    """Frases o etiquetas sin ``:`` y fechas ilegibles se derivan a GPT."""
+    mod = _importar(monkeypatch)
+    telxius = mod.cargar_perfiles().perfil("TELXIUS")
+
+    prosa = (
+        "Dear customer,\n"
+        "We will start the works during the night and they will end before 6am.\n"
+        "Affected services: CRT-123456"
+    )
+    assert telxius.extraer(prosa) is None
+
+    sin_dos_puntos = AVISO_TELXIUS.replace(
+        "Start Date and Time: 02/01/2024 08:00", "Start time 02/01/2024 08:00 UTC"
+    )
+    assert telxius.extraer(sin_dos_puntos) is None
+
+    fecha_ilegible = AVISO_TELXIUS.replace("02/01/2024 08:00", "tomorrow night")
+    assert telxius.extraer(fecha_ilegible) is None
+    assert telxius.leer_fecha("02/01/2024 08:00").hour == 8
+
+
+def test_perfiles_desde_yaml(tmp_path, monkeypatch):
+    pytest.importorskip("yaml")
+    mod = _importar(monkeypatch)
+    ruta = tmp_path / "perfiles.yaml"
+    ruta.write_text(
+        "NUEVO:\n"
+        "  remitentes: ['nuevo-carrier']\n"
+        "  servicio: 'NC\\d{5}'\n"
+        "  servicios_en_texto: true\n"
+        "  etiquetas:\n"
+        "    inicio: ['desde']\n"
+        "    fin: ['hasta']\n"
+        "  formatos_fecha: ['%d.%m.%Y %H:%M']\n"
+        "TELXIUS:\n"
+        "  etiquetas:\n"
+        "    inicio: ['comienzo']\n"
+        "ROTO:\n"
+        "  servicio: '('\n",
+        encoding="utf-8",
+    )
+    reg = mod.cargar_perfiles(ruta)
+
+    nuevo = reg.por_remitente("avisos@nuevo-carrier.net")
+    assert nuevo.formatos_fecha == ("%d.%m.%Y %H:%M",)
+    assert nuevo.extraer("Desde: 01.02.2024 08:00\nHasta: 01.02.2024 09:00\nNC12345")["ids"] == [
+        "NC12345"
+    ]
+    # Se reemplaza solo la etiqueta indicada y el perfil inválido se omite
+    telxius = reg.perfil("TELXIUS")
+    assert telxius.extraer(AVISO_TELXIUS.replace("Start Date and Time", "Comienzo"))
+    assert telxius.extraer(AVISO_TELXIUS) is None
+    assert reg.perfil("ROTO") is reg.generico
+
+
+def test_tasa_regex(monkeypatch):
+    mod = _importar(monkeypatch)
+    assert mod.tasa_regex() == {}
+    mod.registrar_extraccion("TELXIUS", True)
+    mod.registrar_extraccion("TELXIUS", True)
+    mod.registrar_extraccion("GENERICO", False)
+    mod.registrar_extraccion("TELXIUS", False)
+    tasas = mod.tasa_regex()
+    assert tasas["TELXIUS"] == pytest.approx(2 / 3)
+    assert tasas["GENERICO"] == 0
+    assert tasas["total"] == 0.5
@@ -164,7 +164,7 @@ def test_procesar_correos(tmp_path):
 
     email_utils.gpt = GPTStub()
 
-    doc = Document(content="dummy")
+    doc = Document(content="aviso simple")
     msg = Message(document=doc)
     update = Update(message=msg)
     ctx = SimpleNamespace(args=["Cliente"])
@@ -240,8 +240,8 @@ def test_procesar_correos_varios(tmp_path):
 
     email_utils.gpt = GPTStub()
 
-    doc1 = Document(file_name="uno.msg", content="dummy")
-    doc2 = Document(file_name="dos.msg", content="dummy")
+    doc1 = Document(file_name="uno.msg", content="aviso uno")
+    doc2 = Document(file_name="dos.msg", content="aviso dos")
     msg = Message(documents=[doc1, doc2])
     update = Update(message=msg)
     ctx = SimpleNamespace(args=["Cliente"])
@@ -316,7 +316,7 @@ def test_procesar_correos_zip(tmp_path):
 
     email_utils.gpt = GPTStub()
 
-    docs = [Document(file_name=f"a{i}.msg", content="dummy") for i in range(5)]
+    docs = [Document(file_name=f"a{i}.msg", content=f"aviso {i}") for i in range(5)]
     msg = Message(documents=docs)
     update = Update(message=msg)
     ctx = SimpleNamespace(args=["Cliente"])
@@ -464,3 +464,351 @@ def test_leer_msg_bytes(tmp_path, monkeypatch):
     arch.write_text("x")
     texto = mod._leer_msg(str(arch))
     assert "cuerpo bytes" in texto
+
+
+def test_leer_correos_pool_timeout(tmp_path, monkeypatch):
+    """Lee varios MSG en procesos aparte y corta los que demoran."""
+    mod_name = "sandybot.handlers.procesar_correos"
+    spec = importlib.util.spec_from_file_location(
+        mod_name,
+        ROOT_DIR / "Sandy bot" / "sandybot" / "handlers" / "procesar_correos.py",
+    )
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, mod_name, mod)
+    spec.loader.exec_module(mod)
+
+    # Los procesos se crean con ``spawn``: el stub tiene que ser un archivo
+    # importable desde el ``sys.path`` que heredan
+    stubs = tmp_path / "stubs"
+    stubs.mkdir()
+    (stubs / "extract_msg.py").write_text(
+        "import time\n"
+        "from pathlib import Path\n"
+        "class Message:\n"
+        "    def __init__(self, path, **kwargs):\n"
+        "        self.body = Path(path).read_text()\n"
+        "        self.subject = 'asunto'\n"
+        "        self.sender = 'noc@carrier.com'\n"
+        "        if self.body == 'lento':\n"
+        "            time.sleep(10)\n"
+    )
+    monkeypatch.syspath_prepend(str(stubs))
+    monkeypatch.delitem(sys.modules, "extract_msg", raising=False)
+
+    rutas = []
+    for i, contenido in enumerate(["uno", "lento", "tres"]):
+        ruta = tmp_path / f"{i}.msg"
+        ruta.write_text(contenido)
+        rutas.append(str(ruta))
+
+    correos = asyncio.run(mod.leer_correos(rutas, timeout=1, procesos=2))
+    assert [c.error for c in correos] == [None, "timeout", None]
+    assert isinstance(correos[0], mod.CorreoParseado)
+    assert correos[0].texto == "From: noc@carrier.com\nasunto\nuno"
+    assert correos[2].cuerpo == "tres"
+
+    # Con ``procesos=0`` se lee en el mismo proceso
+    assert asyncio.run(mod.leer_correos(rutas[:1], procesos=0))[0].cuerpo == "uno"
+
+
+def test_procesar_correos_comprimidos(tmp_path, monkeypatch):
+    """Lee los avisos de un ZIP y un TAR.GZ de a lotes y responde con un ZIP."""
+    import io
+    import tarfile
+    import zipfile
+
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+
+    mod_name = "sandybot.handlers.procesar_correos"
+    spec = importlib.util.spec_from_file_location(
+        mod_name,
+        ROOT_DIR / "Sandy bot" / "sandybot" / "handlers" / "procesar_correos.py",
+    )
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, mod_name, mod)
+    spec.loader.exec_module(mod)
+    monkeypatch.setattr(mod, "_TAM_LOTE", 2)
+    monkeypatch.setattr(mod, "enviar_correo", lambda *a, **k: True)
+
+    servicio = bd.crear_servicio(nombre="Srv", cliente="Cli")
+
+    import sandybot.email_utils as email_utils
+
+    class GPTStub(email_utils.gpt.__class__):
+        async def consultar_gpt(self, mensaje: str, cache: bool = True) -> str:
+            return (
+                '{"inicio": "2024-01-02T08:00:00", "fin": "2024-01-02T10:00:00", '
+                '"tipo": "Mant", "afectacion": "1h", "ids": [' + str(servicio.id) + "]}"
+            )
+
+    monkeypatch.setattr(email_utils, "gpt", GPTStub())
+
+    buf_zip = io.BytesIO()
+    with zipfile.ZipFile(buf_zip, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"mes/aviso{i}.msg", f"aviso zip {i}")
+        zf.writestr("leeme.pdf", "no es un aviso")
+    buf_tar = io.BytesIO()
+    with tarfile.open(fileobj=buf_tar, mode="w:gz") as tf:
+        for i in range(2):
+            datos = f"aviso tar {i}".encode()
+            info = tarfile.TarInfo(f"aviso{i}.msg")
+            info.size = len(datos)
+            tf.addfile(info, io.BytesIO(datos))
+
+    class DocBinario(Document):
+        async def get_file(self):
+            contenido = self._content
+
+            class F:
+                async def download_to_drive(_, path):
+                    Path(path).write_bytes(contenido)
+
+            return F()
+
+    class MensajeProgreso(Message):
+        def __init__(self, **k):
+            super().__init__(**k)
+            self.progreso = []
+
+        async def reply_text(self, texto, *a, **k):
+            mensaje = self
+
+            class Aviso:
+                async def edit_text(_, nuevo):
+                    mensaje.progreso.append(nuevo)
+
+            self.progreso.append(texto)
+            return Aviso()
+
+    msg = MensajeProgreso(
+        documents=[
+            DocBinario("mayo.zip", buf_zip.getvalue()),
+            DocBinario("junio.tar.gz", buf_tar.getvalue()),
+        ]
+    )
+
+    with bd.SessionLocal() as s:
+        prev_tareas = s.query(bd.TareaProgramada).count()
+
+    asyncio.run(mod.procesar_correos(Update(message=msg), SimpleNamespace(args=["Cliente"])))
+
+    with bd.SessionLocal() as s:
+        assert s.query(bd.TareaProgramada).count() == prev_tareas + 5
+
+    assert msg.sent == "tareas.zip"
+    # Un aviso de progreso por lote (2 + 2 + 1) y el resumen final
+    assert [p for p in msg.progreso if p.startswith("Procesando")][-1].startswith(
+        "Procesando correos: 5 leídos"
+    )
+    # No quedan temporales de descarga, miembros ni del ZIP de respuesta
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_procesar_correos_repetidos(tmp_path, monkeypatch):
+    """Un reenvío del mismo aviso no consulta a GPT ni crea otra tarea."""
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+
+    mod_name = "sandybot.handlers.procesar_correos"
+    spec = importlib.util.spec_from_file_location(
+        mod_name,
+        ROOT_DIR / "Sandy bot" / "sandybot" / "handlers" / "procesar_correos.py",
+    )
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, mod_name, mod)
+    spec.loader.exec_module(mod)
+    avisos = []
+    monkeypatch.setattr(mod, "enviar_correo", lambda *a, **k: avisos.append(a) or True)
+
+    servicio = bd.crear_servicio(nombre="Srv", cliente="Cli")
+
+    import sandybot.email_utils as email_utils
+
+    consultas = []
+
+    class GPTStub(email_utils.gpt.__class__):
+        async def consultar_gpt(self, mensaje: str, cache: bool = True) -> str:
+            consultas.append(mensaje)
+            return (
+                '{"inicio": "2024-03-05T01:00:00", "fin": "2024-03-05T05:00:00", '
+                '"tipo": "Mant", "afectacion": "4h", "ids": [' + str(servicio.id) + "]}"
+            )
+
+    monkeypatch.setattr(email_utils, "gpt", GPTStub())
+
+    cuerpo = (
+        "Estimado cliente, le informamos que realizaremos una ventana de "
+        "mantenimiento programado sobre la red troncal para reemplazar equipos "
+        "de transmisión en el nodo central.\nInicio: 05/03/2024 01:00\n"
+        "Fin: 05/03/2024 05:00\nImpacto: corte de 4 horas en el enlace 99123"
+    )
+    reenvio = (
+        "From: operador@metrotel.com.ar\nEnviado el: lunes, 4 de marzo de 2024 9:12\n"
+        "FW: Mantenimiento programado\n" + cuerpo.replace("reemplazar", "cambiar")
+    )
+    ctx = SimpleNamespace(args=["Cliente"])
+
+    with bd.SessionLocal() as s:
+        prev_tareas = s.query(bd.TareaProgramada).count()
+
+    primero = Message(document=Document("orig.msg", "Mantenimiento programado\n" + cuerpo))
+    asyncio.run(mod.procesar_correos(Update(message=primero), ctx))
+    assert len(consultas) == 1 and len(avisos) == 1
+
+    # El mismo archivo, un reenvío con otro encabezado y una palabra distinta
+    respuestas = []
+
+    async def fake_responder(_msg, _uid, _nombre, texto, _modo):
+        respuestas.append(texto)
+
+    monkeypatch.setattr(mod, "responder_registrando", fake_responder)
+
+    segundo = Message(
+        documents=[
+            Document("orig.msg", "Mantenimiento programado\n" + cuerpo),
+            Document("fw.msg", reenvio),
+        ]
+    )
+    asyncio.run(mod.procesar_correos(Update(message=segundo), ctx))
+
+    with bd.SessionLocal() as s:
+        tareas = s.query(bd.TareaProgramada).all()
+    assert len(tareas) == prev_tareas + 1
+    assert len(consultas) == 1 and len(avisos) == 1
+    assert segundo.sent is None
+    assert respuestas == [
+        f"Avisos ya registrados, sin procesar de nuevo: {tareas[-1].id}, {tareas[-1].id}"
+    ]
+
+    # Una reprogramación cambia los números y se procesa como aviso nuevo
+    reprogramado = "Mantenimiento programado\n" + cuerpo.replace("05/03", "12/03")
+    tercero = Message(document=Document("nuevo.msg", reprogramado))
+    asyncio.run(mod.procesar_correos(Update(message=tercero), ctx))
+    assert len(consultas) == 2
+
+
+def test_procesar_correos_informa_fallidos(tmp_path, monkeypatch):
+    """Los avisos que no se leen o no se registran aparecen en el resumen."""
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+
+    mod_name = "sandybot.handlers.procesar_correos"
+    spec = importlib.util.spec_from_file_location(
+        mod_name,
+        ROOT_DIR / "Sandy bot" / "sandybot" / "handlers" / "procesar_correos.py",
+    )
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, mod_name, mod)
+    spec.loader.exec_module(mod)
+    monkeypatch.setattr(mod, "enviar_correo", lambda *a, **k: True)
+
+    import sandybot.lector_msg as lector_msg
+
+    parsear_original = lector_msg.parsear_msg
+
+    def parsear(ruta):
+        if Path(ruta).read_text() == "colgado":
+            return lector_msg.CorreoParseado(ruta, error="timeout")
+        return parsear_original(ruta)
+
+    monkeypatch.setattr(lector_msg, "parsear_msg", parsear)
+
+    servicio = bd.crear_servicio(nombre="Srv", cliente="Cli")
+
+    import sandybot.email_utils as email_utils
+
+    class GPTStub(email_utils.gpt.__class__):
+        async def consultar_gpt(self, mensaje: str, cache: bool = True) -> str:
+            if "ilegible" in mensaje:
+                return "sin datos"
+            return (
+                '{"inicio": "2024-04-02T08:00:00", "fin": "2024-04-02T10:00:00", '
+                '"tipo": "Mant", "afectacion": "1h", "ids": [' + str(servicio.id) + "]}"
+            )
+
+    monkeypatch.setattr(email_utils, "gpt", GPTStub())
+    respuestas = []
+
+    async def fake_responder(_msg, _uid, _nombre, texto, _modo):
+        respuestas.append(texto)
+
+    monkeypatch.setattr(mod, "responder_registrando", fake_responder)
+
+    msg = Message(
+        documents=[
+            Document("bueno.msg", "aviso de abril con datos válidos"),
+            Document("colgado.msg", "colgado"),
+            Document("roto.msg", "aviso ilegible"),
+        ]
+    )
+    asyncio.run(mod.procesar_correos(Update(message=msg), SimpleNamespace(args=["Cliente"])))
+
+    assert respuestas[0] == "No se pudo extraer la tarea del correo"
+    assert respuestas[1].startswith("Tareas registradas: ")
+    assert respuestas[-1] == "No se pudieron procesar 2 avisos: colgado.msg, roto.msg"
+
+
+def test_procesar_correos_miembro_txt(tmp_path, monkeypatch):
+    """Un ``.txt`` dentro del comprimido se lee como texto, sin ``extract_msg``."""
+    import io
+    import zipfile
+
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+
+    mod_name = "sandybot.handlers.procesar_correos"
+    spec = importlib.util.spec_from_file_location(
+        mod_name,
+        ROOT_DIR / "Sandy bot" / "sandybot" / "handlers" / "procesar_correos.py",
+    )
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, mod_name, mod)
+    spec.loader.exec_module(mod)
+    monkeypatch.setattr(mod, "enviar_correo", lambda *a, **k: True)
+
+    # Como el extract_msg real, falla con un archivo que no es MSG
+    class MsgEstricto:
+        def __init__(self, path, **kwargs):
+            raise ValueError("no es un archivo OLE")
+
+    estricto = ModuleType("extract_msg")
+    estricto.Message = MsgEstricto
+    monkeypatch.setitem(sys.modules, "extract_msg", estricto)
+
+    servicio = bd.crear_servicio(nombre="Srv", cliente="Cli")
+
+    import sandybot.email_utils as email_utils
+
+    mensajes_gpt = []
+
+    class GPTStub(email_utils.gpt.__class__):
+        async def consultar_gpt(self, mensaje: str, cache: bool = True) -> str:
+            mensajes_gpt.append(mensaje)
+            return (
+                '{"inicio": "2024-05-02T08:00:00", "fin": "2024-05-02T10:00:00", '
+                '"tipo": "Mant", "afectacion": "1h", "ids": [' + str(servicio.id) + "]}"
+            )
+
+    monkeypatch.setattr(email_utils, "gpt", GPTStub())
+
+    buf_zip = io.BytesIO()
+    with zipfile.ZipFile(buf_zip, "w") as zf:
+        zf.writestr("mayo/aviso.txt", "aviso en texto plano de mayo")
+
+    class DocBinario(Document):
+        async def get_file(self):
+            contenido = self._content
+
+            class F:
+                async def download_to_drive(_, path):
+                    Path(path).write_bytes(contenido)
+
+            return F()
+
+    with bd.SessionLocal() as s:
+        prev_tareas = s.query(bd.TareaProgramada).count()
+
+    msg = Message(documents=[DocBinario("mayo.zip", buf_zip.getvalue())])
+    asyncio.run(mod.procesar_correos(Update(message=msg), SimpleNamespace(args=["Cliente"])))
+
+    with bd.SessionLocal() as s:
+        assert s.query(bd.TareaProgramada).count() == prev_tareas + 1
+    assert "aviso en texto plano de mayo" in mensajes_gpt[0]
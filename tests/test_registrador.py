@@ -0,0 +1,185 @@
+# Nombre de archivo: test_registrador.py
+# Ubicación de archivo: tests/test_registrador.py
+# User-provided custom instructions
+import asyncio
+import importlib
+import sys
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import tests.telegram_stub  # Registra las clases fake de telegram
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+REGISTRADOR = ROOT_DIR / "Sandy bot" / "sandybot" / "registrador.py"
+
+orig_engine = sqlalchemy.create_engine
+sqlalchemy.create_engine = lambda *a, **k: orig_engine("sqlite:///:memory:")
+import sandybot.database as bd
+
+sqlalchemy.create_engine = orig_engine
+
+
+def _importar(monkeypatch):
+    """Carga el registrador real con una base SQLite compartida entre hilos."""
+    eng = orig_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    bd.Base.metadata.create_all(bind=eng)
+    monkeypatch.setattr(bd, "SessionLocal", sessionmaker(bind=eng, expire_on_commit=False))
+    monkeypatch.setitem(sys.modules, "sandybot.database", bd)
+    spec = importlib.util.spec_from_file_location("sandybot.registrador", REGISTRADOR)
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "sandybot.registrador", mod)
+    spec.loader.exec_module(mod)
+    return mod, eng
+
+
+def _contar(eng) -> int:
+    with eng.connect() as conn:
+        return conn.execute(sqlalchemy.text("SELECT COUNT(*) FROM conversaciones")).scalar()
+
+
+def test_registro_directo_sin_buffer(monkeypatch):
+    reg, eng = _importar(monkeypatch)
+    reg.registrar_conversacion(1, "hola", "hi", "prueba")
+    assert _contar(eng) == 1
+
+
+def test_buffer_vuelca_en_lotes(monkeypatch):
+    reg, eng = _importar(monkeypatch)
+    lotes = []
+    original = reg._insertar_lote
+
+    def _espiar(filas):
+        lotes.append(len(filas))
+        return original(filas)
+
+    monkeypatch.setattr(reg, "_insertar_lote", _espiar)
+    buffer = reg.BufferConversaciones(max_filas=50, intervalo_ms=10_000)
+    monkeypatch.setattr(reg, "buffer_conversaciones", buffer)
+
+    async def _flujo():
+        await buffer.iniciar()
+        for i in range(120):
+            reg.registrar_conversacion(i, f"m{i}", "r", "prueba")
+        # Nada se escribe hasta que la tarea de fondo toma el lote
+        assert _contar(eng) == 0
+        await asyncio.sleep(0.2)
+        parcial = _contar(eng)
+        await buffer.detener()
+        return parcial
+
+    parcial = asyncio.run(_flujo())
+    assert parcial >= 50
+    assert _contar(eng) == 120
+    assert sum(lotes) == 120 and len(lotes) <= 3
+    assert not buffer.activo
+
+
+def test_buffer_vuelca_por_tiempo(monkeypatch):
+    reg, eng = _importar(monkeypatch)
+    buffer = reg.BufferConversaciones(max_filas=1000, intervalo_ms=20)
+    monkeypatch.setattr(reg, "buffer_conversaciones", buffer)
+
+    async def _flujo():
+        await buffer.iniciar()
+        reg.registrar_conversacion(1, "hola", "hi", "prueba")
+        await asyncio.sleep(0.2)
+        guardadas = _contar(eng)
+        await buffer.detener()
+        return guardadas
+
+    assert asyncio.run(_flujo()) == 1
+
+
+def test_buffer_reencola_lote_fallido(monkeypatch):
+    reg, eng = _importar(monkeypatch)
+    original = reg._insertar_lote
+    caida = {"activa": True}
+
+    def _insertar(filas):
+        return False if caida["activa"] else original(filas)
+
+    monkeypatch.setattr(reg, "_insertar_lote", _insertar)
+    buffer = reg.BufferConversaciones(max_filas=10, intervalo_ms=10_000, max_pendientes=25)
+
+    async def _flujo():
+        for i in range(20):
+            buffer.agregar({"user_id": str(i), "mensaje": "m", "respuesta": "r", "modo": "p"})
+            if i % 10 == 9:
+                await buffer.volcar()
+        # Los dos lotes rechazados siguen en el buffer
+        assert buffer.pendientes == 20
+        for i in range(20, 30):
+            buffer.agregar({"user_id": str(i), "mensaje": "m", "respuesta": "r", "modo": "p"})
+        # El tercer fallo supera el tope: se descartan las 5 filas más viejas
+        await buffer.volcar()
+        assert buffer.pendientes == 25
+        caida["activa"] = False
+        await buffer.volcar()
+
+    asyncio.run(_flujo())
+    assert buffer.pendientes == 0
+    with eng.connect() as conn:
+        usuarios = conn.execute(sqlalchemy.text("SELECT user_id FROM conversaciones")).scalars()
+        assert sorted(map(int, usuarios)) == list(range(5, 30))
+
+
+class _Enviado:
+    def __init__(self, texto):
+        self.textos = [texto]
+
+    async def edit_text(self, texto):
+        self.textos.append(texto)
+
+
+class _Mensaje:
+    def __init__(self):
+        self.respuestas = []
+
+    async def reply_text(self, texto, **kwargs):
+        enviado = _Enviado(texto)
+        self.respuestas.append(enviado)
+        return enviado
+
+
+def test_responder_en_vivo_edita_con_intervalo(monkeypatch):
+    reg, eng = _importar(monkeypatch)
+    reloj = {"t": 0.0}
+    monkeypatch.setattr(reg.time, "monotonic", lambda: reloj["t"])
+
+    async def _fragmentos():
+        # Un fragmento cada 0.4 s: con intervalo de 1 s se edita cada ~3
+        for palabra in ["Hola", " que", " tal", " como", " va", " todo", "?"]:
+            yield palabra
+            reloj["t"] += 0.4
+
+    msg = _Mensaje()
+    final = asyncio.run(reg.responder_en_vivo(msg, 1, "hola", _fragmentos(), "GPT", intervalo=1.0))
+
+    assert final == "Hola que tal como va todo?"
+    assert len(msg.respuestas) == 1
+    textos = msg.respuestas[0].textos
+    assert textos[0] == "Hola"
+    assert textos[-1] == final
+    assert len(textos) < 7
+    assert _contar(eng) == 1
+
+
+def test_responder_en_vivo_parte_textos_largos(monkeypatch):
+    reg, _ = _importar(monkeypatch)
+
+    async def _fragmentos():
+        for _ in range(60):
+            yield "x" * 99 + "\n"
+
+    msg = _Mensaje()
+    final = asyncio.run(reg.responder_en_vivo(msg, 1, "hola", _fragmentos(), "GPT", intervalo=0))
+
+    partes = [msg.respuestas[0].textos[-1]] + [r.textos[-1] for r in msg.respuestas[1:]]
+    assert len(msg.respuestas) == 2
+    assert all(len(p) <= reg.LIMITE_MENSAJE for p in partes)
+    assert "\n".join(partes) == final
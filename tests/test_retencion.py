@@ -0,0 +1,85 @@
+# Nombre de archivo: test_retencion.py
+# Ubicación de archivo: tests/test_retencion.py
+# User-provided custom instructions
+import csv
+import gzip
+import importlib
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy.orm import sessionmaker
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+RETENCION = ROOT_DIR / "Sandy bot" / "sandybot" / "retencion.py"
+
+orig_engine = sqlalchemy.create_engine
+sqlalchemy.create_engine = lambda *a, **k: orig_engine("sqlite:///:memory:")
+import sandybot.database as bd
+
+sqlalchemy.create_engine = orig_engine
+
+
+def _importar(monkeypatch):
+    eng = orig_engine("sqlite://")
+    bd.Base.metadata.create_all(bind=eng)
+    monkeypatch.setattr(bd, "SessionLocal", sessionmaker(bind=eng, expire_on_commit=False))
+    monkeypatch.setitem(sys.modules, "sandybot.database", bd)
+    # Sin pyarrow se usa el respaldo CSV comprimido
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    spec = importlib.util.spec_from_file_location("sandybot.retencion", RETENCION)
+    mod = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "sandybot.retencion", mod)
+    spec.loader.exec_module(mod)
+    return mod, eng
+
+
+def test_archivar_conversaciones_por_mes(tmp_path, monkeypatch):
+    ret, eng = _importar(monkeypatch)
+    fechas = [
+        datetime(2024, 1, 5),
+        datetime(2024, 1, 20),
+        datetime(2024, 3, 2),
+        datetime(2024, 6, 10),
+        datetime(2024, 7, 1),
+    ]
+    with bd.SessionLocal() as s:
+        for i, f in enumerate(fechas):
+            s.add(bd.Conversacion(user_id=str(i), mensaje=f"m{i}", respuesta="r", modo="x", fecha=f))
+        s.commit()
+
+    archivos = ret.archivar_conversaciones(
+        dias=30, destino=tmp_path, ahora=datetime(2024, 7, 15)
+    )
+
+    # Corte: 1 de junio. Se archivan enero y marzo; febrero no genera archivo
+    assert sorted(archivos.values()) == [1, 2]
+    nombres = sorted(archivos)
+    assert nombres[0].startswith("conversaciones_2024_01_")
+    assert nombres[1].startswith("conversaciones_2024_03_")
+    with gzip.open(tmp_path / nombres[0], "rt", encoding="utf-8") as f:
+        filas = list(csv.DictReader(f))
+    assert [r["mensaje"] for r in filas] == ["m0", "m1"]
+
+    with bd.SessionLocal() as s:
+        restantes = s.query(bd.Conversacion.mensaje).order_by(bd.Conversacion.id).all()
+    assert [r[0] for r in restantes] == ["m3", "m4"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == nombres
+
+    # Una segunda pasada no encuentra nada para archivar
+    assert ret.archivar_conversaciones(dias=30, destino=tmp_path, ahora=datetime(2024, 7, 15)) == {}
+
+
+def test_retencion_desactivada_por_defecto(tmp_path, monkeypatch):
+    """Sin configurar la retención no se archiva ni se borra nada."""
+    ret, eng = _importar(monkeypatch)
+    assert ret.config.CONVERSACIONES_RETENCION_DIAS == 0
+    with bd.SessionLocal() as s:
+        s.add(bd.Conversacion(user_id="1", mensaje="vieja", respuesta="r", modo="x", fecha=datetime(2020, 1, 1)))
+        s.commit()
+
+    assert ret.archivar_conversaciones(destino=tmp_path) == {}
+    assert list(tmp_path.iterdir()) == []
+    with bd.SessionLocal() as s:
+        assert s.query(bd.Conversacion).filter_by(mensaje="vieja").count() == 1
@@ -9,6 +9,7 @@ from pathlib import Path
 from types import ModuleType, SimpleNamespace
 
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 
@@ -48,6 +49,8 @@ def _importar():
         sys.modules[pkg] = handlers_pkg
     mod_name = f"{pkg}.supermenu"
     sys.modules["sandybot.registrador"] = registrador_stub
+    # Otras pruebas reemplazan ``sandybot.database`` por un stub
+    sys.modules["sandybot.database"] = bd
     spec = importlib.util.spec_from_file_location(
         mod_name, ROOT_DIR / "Sandy bot" / "sandybot" / "handlers" / "supermenu.py"
     )
@@ -177,6 +180,95 @@ def test_depurar_duplicados():
     bd.crear_servicio(nombre="Dup", cliente="X")
     bd.crear_reclamo(s1.id, "R10")
     bd.crear_reclamo(bd.crear_servicio(nombre="Otro", cliente="X").id, "R10")
+    texto = asyncio.run(_run("depurar_duplicados", ["simular"]))["texto"]
+    assert "Servicios a eliminar: 1" in texto
+    assert "Reclamos a eliminar: 1" in texto
     texto = asyncio.run(_run("depurar_duplicados", []))["texto"]
     assert "Servicios eliminados: 1" in texto
     assert "Reclamos eliminados: 1" in texto
+    with bd.SessionLocal() as s:
+        assert s.query(bd.Servicio).filter_by(nombre="Dup").one().id != s1.id
+        assert s.query(bd.Reclamo).count() == 1
+
+
+def test_listado_paginado_y_csv(monkeypatch):
+    # La exportación corre en otro hilo: ``StaticPool`` comparte la base en memoria
+    eng = orig_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    monkeypatch.setattr(bd, "engine", eng)
+    monkeypatch.setattr(bd, "SessionLocal", sessionmaker(bind=eng, expire_on_commit=False))
+    bd.Base.metadata.create_all(bind=eng)
+    with bd.SessionLocal() as s:
+        s.add_all(
+            [
+                bd.Conversacion(user_id="1", mensaje=f"m{i}", respuesta="r", modo="t")
+                for i in range(25)
+            ]
+        )
+        s.commit()
+    mod = _importar()
+
+    texto = asyncio.run(_run("listar_conversaciones", []))["texto"]
+    lineas = texto.splitlines()
+    assert len(lineas) == 1 + mod.FILAS_POR_PAGINA
+    assert lineas[1] == "1. m24" and lineas[-1] == "20. m5"
+
+    editado = {}
+
+    class Query:
+        from_user = SimpleNamespace(id=1)
+        message = Message("/CDB_Conversaciones")
+
+        def __init__(self, data):
+            self.data = data
+
+        async def edit_message_text(self, texto, **k):
+            editado["texto"] = texto
+
+    # La fila 20 tiene id 6: la página siguiente arranca en m4
+    update = Update(callback_query=Query("cdb:conv:s:1:6"))
+    asyncio.run(mod.navegar_listado(update, SimpleNamespace()))
+    assert editado["texto"].splitlines()[1:] == [f"{21 + i}. m{4 - i}" for i in range(5)]
+
+    update = Update(callback_query=Query("cdb:conv:a:0:5"))
+    asyncio.run(mod.navegar_listado(update, SimpleNamespace()))
+    assert editado["texto"] == texto
+
+    update = Update(callback_query=Query("cdb:conv:csv"))
+    asyncio.run(mod.navegar_listado(update, SimpleNamespace()))
+    assert Query.message.documento == "CDB_Conversaciones.csv"
+
+
+def test_listado_paginado_fechas_nulas():
+    """Las filas sin fecha también aparecen al recorrer todas las páginas."""
+    bd.Base.metadata.drop_all(bind=bd.engine)
+    bd.Base.metadata.create_all(bind=bd.engine)
+    with bd.SessionLocal() as s:
+        s.add_all(
+            [
+                bd.Ingreso(id_servicio=1, camara=f"C{i}", fecha=datetime(2024, 1, 1 + i))
+                for i in range(25)
+            ]
+        )
+        s.commit()
+        # ``default`` no aplica cuando se inserta ``NULL`` explícito
+        s.execute(
+            bd.Ingreso.__table__.insert(),
+            [{"id_servicio": 1, "camara": f"N{i}", "fecha": None} for i in range(5)],
+        )
+        s.commit()
+    mod = _importar()
+    _, _, _, columnas, orden, _ = mod._LISTADOS["ing"]
+
+    vistas = []
+    cursor = None
+    while True:
+        pagina = bd.obtener_pagina(columnas, orden, cursor=cursor, limite=mod.FILAS_POR_PAGINA)
+        vistas += [f.camara for f in pagina.filas]
+        if pagina.siguiente is None:
+            break
+        # El cursor pasa por ``callback_data`` y debe sobrevivir la ida y vuelta
+        cursor = mod._decodificar_cursor(mod._codificar_cursor(pagina.siguiente), orden)
+    assert len(vistas) == 30
+    assert vistas[-5:] == [f"N{i}" for i in range(4, -1, -1)]
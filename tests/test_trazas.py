@@ -0,0 +1,89 @@
+# Nombre de archivo: test_trazas.py
+# Ubicación de archivo: tests/test_trazas.py
+# User-provided custom instructions
+import asyncio
+import importlib
+import logging
+import time
+from types import SimpleNamespace
+
+trazas = importlib.import_module("sandybot.trazas")
+
+
+def test_span_fuera_de_traza_no_registra():
+    with trazas.span("db") as tramo:
+        assert tramo is None
+    assert trazas.empezar_span("db") is None
+    assert trazas.id_traza_actual() is None
+
+
+def test_arbol_de_tramos_y_volcado_lento(monkeypatch, tmp_path):
+    config = importlib.import_module("sandybot.config").config
+    monkeypatch.setattr(config, "TRAZAS_UMBRAL_SEG", 0.05, raising=False)
+    monkeypatch.setattr(config, "TRAZAS_LENTAS_FILE", tmp_path / "lentas.log", raising=False)
+    exportadas = []
+    monkeypatch.setattr(
+        trazas, "_exportador", SimpleNamespace(exportar=exportadas.append)
+    )
+
+    @trazas.trazar("docx.prueba")
+    def _generar():
+        time.sleep(0.06)
+
+    async def handler(update, context):
+        with trazas.span("gpt", perfil="chat"):
+            assert trazas.traceparent().startswith(f"00-{trazas.id_traza_actual()}-")
+        # Los tramos abiertos en hilos se cuelgan del tramo en curso
+        await asyncio.to_thread(_generar)
+        db = trazas.empezar_span("db", operacion="SELECT")
+        db.terminar()
+        return trazas.id_traza_actual()
+
+    envuelto = trazas.trazar_update(handler)
+    update = SimpleNamespace(update_id=7, effective_user=SimpleNamespace(id=42))
+    trace_id = asyncio.run(envuelto(update, None))
+
+    (traza,) = exportadas
+    assert traza.trace_id == trace_id and len(trace_id) == 32
+    raiz = traza.raiz
+    assert raiz.atributos == {"handler": "handler", "update_id": 7, "user_id": 42}
+    assert [h.nombre for h in raiz.hijos] == ["gpt", "docx.prueba", "db"]
+    assert all(h.padre_id == raiz.span_id for h in raiz.hijos)
+    assert raiz.hijos[1].duracion >= 0.05
+
+    volcado = (tmp_path / "lentas.log").read_text(encoding="utf-8")
+    assert trace_id in volcado
+    assert "  - update" in volcado and "    - docx.prueba" in volcado
+    assert "perfil=chat" in volcado
+
+
+def test_error_y_filtro_de_logs(monkeypatch):
+    config = importlib.import_module("sandybot.config").config
+    monkeypatch.setattr(config, "TRAZAS_UMBRAL_SEG", 0, raising=False)
+    monkeypatch.setattr(trazas, "_exportador", trazas.ExportadorNulo())
+    registros = []
+
+    class _Captura(logging.Handler):
+        def emit(self, record):
+            registros.append(record.trace_id)
+
+    captura = _Captura()
+    captura.addFilter(trazas.FiltroTraza())
+    log = logging.getLogger("prueba_trazas")
+    log.addHandler(captura)
+    log.setLevel(logging.INFO)
+    try:
+        try:
+            with trazas.traza("update") as traza:
+                log.info("dentro")
+                with trazas.span("smtp"):
+                    raise ValueError("sin servidor")
+        except ValueError:
+            pass
+        log.info("fuera")
+    finally:
+        log.removeHandler(captura)
+
+    assert registros == [traza.trace_id, "-"]
+    assert traza.raiz.hijos[0].error == "ValueError: sin servidor"
+    assert traza.raiz.error == "ValueError: sin servidor"
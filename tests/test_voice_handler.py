@@ -152,3 +152,58 @@ def test_voice_no_modifica_update():
     assert upd.message.text is None
     assert ctx.user_data == {}
     assert voice_module.voice_client is cliente
+
+
+class _VozRepetida(Voice):
+    file_unique_id = "audio-1"
+
+
+class _Aplicacion:
+    def __init__(self):
+        self.tareas = []
+
+    def create_task(self, coro, update=None):
+        tarea = asyncio.ensure_future(coro)
+        self.tareas.append(tarea)
+        return tarea
+
+
+def test_voice_cache_y_segundo_plano(tmp_path, monkeypatch):
+    llamadas = {"n": 0}
+
+    class Transcripciones:
+        async def create(self, *a, **k):
+            llamadas["n"] += 1
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(text=" hola audio ")
+
+    cliente = SimpleNamespace(audio=SimpleNamespace(transcriptions=Transcripciones()))
+    transcripcion = importlib.import_module("sandybot.transcripcion")
+    monkeypatch.setattr(
+        voice_module,
+        "_transcriptor",
+        voice_module.Transcriptor(
+            transcripcion.BackendOpenAI(cliente), ruta_cache=tmp_path / "transcripciones.json"
+        ),
+    )
+
+    async def _flujo():
+        app = _Aplicacion()
+        ctx = SimpleNamespace(user_data={}, application=app)
+        # Dos copias del mismo audio llegan juntas: se transcriben una vez y
+        # el handler no espera la transcripción
+        for _ in range(2):
+            await voice_module.voice_handler(Update(message=Message(voice=_VozRepetida())), ctx)
+        assert len(app.tareas) == 2 and "texto" not in captura
+        await asyncio.gather(*app.tareas)
+        assert captura.pop("texto") == "hola audio"
+
+        # Un reenvío posterior sale de la cache y se responde en el momento
+        await voice_module.voice_handler(Update(message=Message(voice=_VozRepetida())), ctx)
+        assert len(app.tareas) == 2
+        assert captura["texto"] == "hola audio"
+
+    captura.clear()
+    asyncio.run(_flujo())
+    assert llamadas["n"] == 1
+    assert "audio-1" in (tmp_path / "transcripciones.json").read_text(encoding="utf-8")